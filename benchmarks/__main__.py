@@ -0,0 +1,148 @@
+"""
+Run the benchmark suite: ``python -m benchmarks``
+
+By default everything runs offline against stub executables. ``--real``
+runs the same scenarios against the installed ffmpeg, Whisper.cpp and model.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import click
+from rich.console import Console
+from rich.table import Table
+
+from .scenarios import run_scenario
+
+console = Console()
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Short column headings so tables fit a terminal
+LABELS = {
+    'median_file_ms': "file ms", 'median_subprocess_ms': "subproc ms",
+    'median_overhead_ms': "overhead ms", 'p90_overhead_ms': "p90 overhead ms",
+    'elapsed_s': "time s", 'files_per_s': "files/s", 'audio_x_realtime': "x realtime",
+    'peak_temp_mb': "temp MB", 'peak_temp_files': "temp files",
+    'peak_rss_mb': "RSS MB", 'peak_child_rss_mb': "child RSS MB",
+    'python_ms': "python ms", 'import_ms': "import ms", 'import_only_ms': "import-only ms",
+    'help_ms': "--help ms", 'transcribe_help_ms': "transcribe --help ms",
+    'models_ms': "models ms", 'plain_models_ms': "--plain models ms",
+}
+
+
+def _isolated(name: str, options: dict) -> dict:
+    """Run a scenario in a fresh interpreter and return its measurements."""
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks", "--worker", name, json.dumps(options)],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr
+                           else f"{name} exited with code {result.returncode}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _table(title: str, rows: list) -> Table:
+    table = Table(title=title)
+    columns = list(rows[0])
+    for column in columns:
+        table.add_column(LABELS.get(column, column),
+                         justify="left" if column == "mode" else "right")
+    for row in rows:
+        table.add_row(*[f"{row[c]:.2f}" if isinstance(row[c], float) else str(row[c])
+                        for c in columns])
+    return table
+
+
+@click.command()
+@click.option('--scenario', type=click.Choice(['all', 'overhead', 'throughput', 'startup']),
+              default='all', show_default=True, help='Scenario to run')
+@click.option('--workers', 'workers', default='1,2,4,8', show_default=True,
+              help='Concurrency levels for the throughput scenario')
+@click.option('--pipeline', is_flag=True,
+              help='Also measure the pipelined batch mode')
+@click.option('--files', type=click.IntRange(min=1), default=16, show_default=True,
+              help='Files per scenario')
+@click.option('--seconds', type=click.FloatRange(min=0.1), default=30.0, show_default=True,
+              help='Duration of each synthetic recording')
+@click.option('--ffmpeg-latency', type=float, default=0.0, show_default=True,
+              help='Stub ffmpeg start-up cost in seconds')
+@click.option('--ffmpeg-rtf', type=float, default=0.002, show_default=True,
+              help='Stub ffmpeg seconds per second of audio')
+@click.option('--whisper-latency', type=float, default=0.05, show_default=True,
+              help='Stub Whisper.cpp start-up (model load) cost in seconds')
+@click.option('--whisper-rtf', type=float, default=0.01, show_default=True,
+              help='Stub Whisper.cpp seconds per second of audio')
+@click.option('--segment-seconds', type=float, default=5.0, show_default=True,
+              help='Stub transcript segment length (controls output size)')
+@click.option('--segment-words', type=int, default=12, show_default=True,
+              help='Words per stub transcript segment')
+@click.option('--runs', type=click.IntRange(min=1), default=10, show_default=True,
+              help='Interpreter starts per command for the startup scenario')
+@click.option('--real', is_flag=True,
+              help='Use the installed ffmpeg, Whisper.cpp and model instead of stubs')
+@click.option('--model', default='base', show_default=True,
+              help='Model name or path for --real (never downloaded)')
+@click.option('--whisper-path', help='Whisper.cpp executable for --real')
+@click.option('--json', 'json_path', help='Also write the results to this JSON file')
+@click.option('--worker', nargs=2, hidden=True)
+def main(scenario, workers, pipeline, files, seconds, ffmpeg_latency, ffmpeg_rtf,
+         whisper_latency, whisper_rtf, segment_seconds, segment_words, runs, real, model,
+         whisper_path, json_path, worker):
+    """Measure orchestration overhead, batch scaling and CLI start-up."""
+    if worker:
+        name, options = worker
+        print(json.dumps(run_scenario(name, json.loads(options))))
+        return
+
+    base = {
+        'files': files, 'seconds': seconds, 'real': real, 'model': model,
+        'whisper_path': whisper_path,
+        'ffmpeg_latency': ffmpeg_latency, 'ffmpeg_rtf': ffmpeg_rtf,
+        'whisper_latency': whisper_latency, 'whisper_rtf': whisper_rtf,
+        'segment_seconds': segment_seconds, 'segment_words': segment_words,
+    }
+    console.print(f"[blue]Benchmarking with {'real binaries' if real else 'stub executables'}"
+                  f" ({files} x {seconds:g}s files)[/blue]")
+    results = {}
+
+    try:
+        if scenario in ('all', 'overhead'):
+            row = _isolated('overhead', base)
+            results['overhead'] = row
+            console.print(_table("Per-file overhead", [row]))
+
+        if scenario in ('all', 'throughput'):
+            levels = [int(level) for level in workers.split(',') if level.strip()]
+            modes = [False, True] if pipeline else [False]
+            rows = []
+            for mode in modes:
+                for level in levels:
+                    rows.append(_isolated('throughput',
+                                          dict(base, workers=level, pipeline=mode)))
+            baseline = {row['mode']: row['files_per_s']
+                        for row in rows if row['workers'] == levels[0]}
+            for row in rows:
+                row['speedup'] = row['files_per_s'] / baseline[row['mode']]
+            results['throughput'] = rows
+            console.print(_table("Batch throughput", rows))
+
+        if scenario in ('all', 'startup'):
+            row = _isolated('startup', dict(base, runs=runs))
+            results['startup'] = row
+            console.print(_table("CLI start-up", [row]))
+    except RuntimeError as e:
+        console.print(f"[red]Benchmark failed: {e}[/red]")
+        sys.exit(1)
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        console.print(f"[green]Results written to {json_path}[/green]")
+
+
+if __name__ == "__main__":
+    main()
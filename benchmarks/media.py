@@ -0,0 +1,78 @@
+"""
+Synthetic media for benchmarks
+
+Generates deterministic 16 kHz mono WAV files of speech-like tone bursts
+separated by pauses, so silence detection and chunking have realistic cut
+points. Real FFmpeg probes the content rather than the extension, so the
+same files work as ``.mp4`` inputs for both the stubs and the real binaries.
+"""
+
+import math
+import os
+import random
+import struct
+import wave
+from typing import List
+
+SAMPLE_RATE = 16000
+
+
+def write_wav(path: str, seconds: float, seed: int = 0) -> str:
+    """
+    Write a synthetic recording.
+
+    Args:
+        path: Output file
+        seconds: Duration in seconds
+        seed: Seed for burst lengths and pitches (same seed, same bytes)
+
+    Returns:
+        The path written
+    """
+    rng = random.Random(seed)
+    total = int(seconds * SAMPLE_RATE)
+    samples = bytearray()
+    while len(samples) // 2 < total:
+        # 1-4 s of tone, then 0.3-1.2 s of near silence
+        burst = int(rng.uniform(1.0, 4.0) * SAMPLE_RATE)
+        pitch = rng.uniform(110.0, 320.0)
+        samples += b''.join(
+            struct.pack('<h', int(8000 * math.sin(2 * math.pi * pitch * i / SAMPLE_RATE)))
+            for i in range(burst)
+        )
+        samples += b'\0\0' * int(rng.uniform(0.3, 1.2) * SAMPLE_RATE)
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(bytes(samples[:total * 2]))
+    return path
+
+
+def make_corpus(directory: str, count: int, seconds: float,
+                extension: str = ".mp4") -> List[str]:
+    """
+    Create ``count`` synthetic inputs in a directory.
+
+    Args:
+        directory: Target directory
+        count: Number of files
+        seconds: Duration of each file
+        extension: File extension (must be a supported video format)
+
+    Returns:
+        Sorted list of file paths
+    """
+    os.makedirs(directory, exist_ok=True)
+    # Generate once and copy: synthesis is slow compared with the stubs
+    first = os.path.join(directory, f"clip_000{extension}")
+    write_wav(first, seconds, seed=0)
+    with open(first, 'rb') as f:
+        data = f.read()
+    paths = [first]
+    for index in range(1, count):
+        path = os.path.join(directory, f"clip_{index:03d}{extension}")
+        with open(path, 'wb') as f:
+            f.write(data)
+        paths.append(path)
+    return paths
@@ -0,0 +1,296 @@
+"""
+Benchmark scenarios
+
+Each scenario returns a flat dictionary of measurements. Scenarios run in a
+fresh interpreter (see ``__main__``) so peak RSS figures belong to one
+scenario only.
+"""
+
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from src.batch import run_batch
+from src.pipeline import run_pipeline
+from src.scratch import ScratchManager
+from src.transcriber import VideoTranscriber
+
+from .media import make_corpus
+from .stubs import StubProfile, install_stubs
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class BenchEnv:
+    """Where the executables, model and scratch space for a run live."""
+
+    work_dir: str
+    whisper_path: str
+    model_path: str
+    real: bool = False
+
+    @property
+    def temp_dir(self) -> str:
+        path = os.path.join(self.work_dir, "temp")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def transcriber(self) -> VideoTranscriber:
+        # Scratch stays on disk so DiskSampler sees it
+        return VideoTranscriber(whisper_path=self.whisper_path, temp_dir=self.temp_dir,
+                                quiet=True, scratch=ScratchManager(self.temp_dir, ram_dir=""))
+
+
+def stub_env(work_dir: str, profile: StubProfile) -> BenchEnv:
+    """Install the stand-in executables and a dummy model."""
+    paths = install_stubs(os.path.join(work_dir, "bin"))
+    profile.apply()
+    model_path = os.path.join(work_dir, "ggml-stub.bin")
+    with open(model_path, 'wb') as f:
+        f.write(b"stub model")
+    return BenchEnv(work_dir=work_dir, whisper_path=paths['whisper'], model_path=model_path)
+
+
+def find_model(name_or_path: str) -> Optional[str]:
+    """Locate an installed ggml model without downloading anything."""
+    if os.path.isfile(name_or_path):
+        return name_or_path
+    filename = f"ggml-{name_or_path}.bin"
+    whisper_dir = os.environ.get('WHISPER_CPP_DIR', '/opt/whisper.cpp')
+    for directory in [os.path.join(whisper_dir, "models"), "./whisper.cpp/models",
+                      os.path.expanduser("~/whisper.cpp/models")]:
+        path = os.path.join(directory, filename)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def real_env(work_dir: str, model: str, whisper_path: str = None) -> BenchEnv:
+    """
+    Use the installed ffmpeg, Whisper.cpp and model.
+
+    Raises:
+        RuntimeError: if any of them is missing
+    """
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not found on PATH")
+    try:
+        whisper_path = whisper_path or VideoTranscriber(
+            temp_dir=work_dir, quiet=True).whisper_path
+    except Exception as e:
+        raise RuntimeError(f"Whisper.cpp not found: {e}")
+    model_path = find_model(model)
+    if model_path is None:
+        raise RuntimeError(f"Model '{model}' not found (benchmarks never download models)")
+    return BenchEnv(work_dir=work_dir, whisper_path=whisper_path,
+                    model_path=model_path, real=True)
+
+
+class DiskSampler:
+    """Track the peak total size of a directory from a background thread."""
+
+    def __init__(self, directory: str, interval: float = 0.005):
+        self.directory = directory
+        self.interval = interval
+        self.peak_bytes = 0
+        self.peak_files = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self) -> None:
+        total = 0
+        count = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                    count += 1
+                except OSError:
+                    pass
+        self.peak_bytes = max(self.peak_bytes, total)
+        self.peak_files = max(self.peak_files, count)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "DiskSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def peak_rss() -> Dict[str, float]:
+    """Peak resident memory of this process and of its largest child, in MiB."""
+    # ru_maxrss is in KiB on Linux
+    return {
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        'peak_child_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024.0,
+    }
+
+
+def _time_command(cmd: List[str], stdin=None) -> float:
+    start = time.perf_counter()
+    subprocess.run(cmd, stdin=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                   check=True)
+    return time.perf_counter() - start
+
+
+def overhead(env: BenchEnv, files: int = 20, seconds: float = 30.0) -> Dict[str, Any]:
+    """
+    Per-file cost of the Python orchestration.
+
+    Times transcribe_video end to end, then the same ffmpeg and Whisper.cpp
+    commands run directly; the difference is what the transcriber adds.
+    """
+    inputs = make_corpus(os.path.join(env.work_dir, "overhead"), files, seconds)
+    out_dir = os.path.join(env.work_dir, "overhead-out")
+    transcriber = env.transcriber()
+    transcriber._check_dependencies()
+
+    full = []
+    for index, path in enumerate(inputs):
+        start = time.perf_counter()
+        transcriber.transcribe_video(path, env.model_path,
+                                     output_path=os.path.join(out_dir, f"{index}.txt"),
+                                     show_progress=False)
+        full.append(time.perf_counter() - start)
+
+    raw = []
+    audio_path = os.path.join(env.temp_dir, "raw_audio.wav")
+    for path in inputs:
+        elapsed = _time_command(transcriber._build_extract_command(path, audio_path))
+        elapsed += _time_command(transcriber._build_whisper_command(
+            audio_path, env.model_path, None, "json", os.path.join(env.temp_dir, "raw")))
+        raw.append(elapsed)
+
+    overheads = [f - r for f, r in zip(full, raw)]
+    return {
+        'files': files,
+        'median_file_ms': statistics.median(full) * 1000,
+        'median_subprocess_ms': statistics.median(raw) * 1000,
+        'median_overhead_ms': statistics.median(overheads) * 1000,
+        'p90_overhead_ms': sorted(overheads)[int(0.9 * (len(overheads) - 1))] * 1000,
+        **peak_rss(),
+    }
+
+
+def throughput(env: BenchEnv, workers: int, files: int = 16, seconds: float = 30.0,
+               pipeline: bool = False) -> Dict[str, Any]:
+    """
+    Batch throughput, temp disk usage and memory for one concurrency level.
+    """
+    inputs = make_corpus(os.path.join(env.work_dir, "batch"), files, seconds)
+    out_dir = os.path.join(env.work_dir, f"batch-out-{workers}")
+    transcriber = env.transcriber()
+
+    with DiskSampler(env.temp_dir) as disk:
+        start = time.perf_counter()
+        if pipeline:
+            results = run_pipeline(transcriber, inputs, env.model_path, out_dir,
+                                   transcribe_workers=workers)
+        else:
+            results = run_batch(transcriber, inputs, env.model_path, out_dir,
+                                workers=workers)
+        elapsed = time.perf_counter() - start
+
+    failed = [r.error for r in results if not r.success]
+    if failed:
+        raise RuntimeError(f"{len(failed)} file(s) failed, e.g. {failed[0]}")
+    return {
+        'mode': "pipeline" if pipeline else "pool",
+        'workers': workers,
+        'files': files,
+        'elapsed_s': elapsed,
+        'files_per_s': files / elapsed,
+        'audio_x_realtime': files * seconds / elapsed,
+        'peak_temp_mb': disk.peak_bytes / (1024.0 * 1024.0),
+        'peak_temp_files': disk.peak_files,
+        **peak_rss(),
+    }
+
+
+def _median_ms(cmd: List[str], runs: int, env: Dict[str, str]) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def startup(work_dir: str, runs: int = 10) -> Dict[str, Any]:
+    """
+    Cold-start cost of ``python -m src.transcriber``.
+
+    Each command runs ``runs`` times in a fresh interpreter; the bare
+    interpreter start is reported too so the CLI's own share is visible.
+    The discovery cache lives in the scratch directory, so after the first
+    run the ``models`` commands measure the warm-cache path.
+    """
+    env = dict(os.environ, TRANSCRIBER_DISCOVERY_FILE=os.path.join(work_dir, "discovery.json"))
+    python = [sys.executable]
+    cli = [sys.executable, "-m", "src.transcriber"]
+    row = {
+        'runs': runs,
+        'python_ms': _median_ms(python + ["-c", "pass"], runs, env),
+        'import_ms': _median_ms(python + ["-c", "import src.transcriber"], runs, env),
+        'help_ms': _median_ms(cli + ["--help"], runs, env),
+        'transcribe_help_ms': _median_ms(cli + ["transcribe", "--help"], runs, env),
+        'models_ms': _median_ms(cli + ["models"], runs, env),
+        'plain_models_ms': _median_ms(cli + ["--plain", "models"], runs, env),
+    }
+    row['import_only_ms'] = row['import_ms'] - row['python_ms']
+    return row
+
+
+def run_scenario(name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one scenario in this process.
+
+    Args:
+        name: "overhead", "throughput" or "startup"
+        options: Scenario options plus "real", "model", "whisper_path" and
+            the stub profile fields
+
+    Returns:
+        Scenario measurements
+    """
+    work_dir = tempfile.mkdtemp(prefix="transcriber-bench-")
+    try:
+        if name == "startup":
+            return startup(work_dir, runs=options.get('runs', 10))
+
+        if options.get('real'):
+            env = real_env(work_dir, options.get('model', 'base'), options.get('whisper_path'))
+        else:
+            profile = StubProfile(**{key: options[key] for key in StubProfile.__annotations__
+                                     if key in options})
+            env = stub_env(work_dir, profile)
+
+        if name == "overhead":
+            return overhead(env, files=options.get('files', 20),
+                            seconds=options.get('seconds', 30.0))
+        if name == "throughput":
+            return throughput(env, workers=options['workers'],
+                              files=options.get('files', 16),
+                              seconds=options.get('seconds', 30.0),
+                              pipeline=options.get('pipeline', False))
+        raise ValueError(f"Unknown scenario: {name}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
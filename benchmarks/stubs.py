@@ -0,0 +1,171 @@
+"""
+Deterministic stand-ins for the ffmpeg, ffprobe and whisper-cli executables
+
+The stubs understand the command lines the transcriber builds, take a
+configurable amount of time (a fixed start-up cost plus a multiple of the
+audio duration) and produce output of a configurable size, so benchmarks
+measure the Python orchestration rather than the speech model.
+"""
+
+import os
+import stat
+import sys
+from dataclasses import dataclass
+from typing import Dict
+
+# ffmpeg stand-in. Handles -version, silencedetect (-f null -), extraction to
+# a file and extraction to stdout (-f wav -). Input files that are WAVs are
+# copied through; anything else becomes BENCH_AUDIO_SECONDS of silence.
+FFMPEG_STUB = r'''
+import io, os, sys, time, wave
+
+args = sys.argv[1:]
+if args and args[0] == "-version":
+    print("ffmpeg version bench-stub")
+    sys.exit(0)
+
+src = args[args.index("-i") + 1]
+try:
+    with wave.open(src, "rb") as wav:
+        frames = wav.readframes(wav.getnframes())
+except (wave.Error, EOFError, OSError):
+    frames = b"\0\0" * int(16000 * float(os.environ.get("BENCH_AUDIO_SECONDS", "10")))
+seconds = len(frames) / 32000.0
+
+time.sleep(float(os.environ.get("BENCH_FFMPEG_LATENCY", "0"))
+           + seconds * float(os.environ.get("BENCH_FFMPEG_RTF", "0")))
+
+if "null" in args:
+    sys.exit(0)
+
+out = args[-1]
+buffer = io.BytesIO()
+with wave.open(buffer, "wb") as wav:
+    wav.setnchannels(1)
+    wav.setsampwidth(2)
+    wav.setframerate(16000)
+    wav.writeframes(frames)
+if out == "-":
+    sys.stdout.buffer.write(buffer.getvalue())
+else:
+    with open(out, "wb") as f:
+        f.write(buffer.getvalue())
+'''
+
+# ffprobe stand-in. Describes ``.wav`` inputs as the PCM WAVs they are and
+# anything else as a video with a 44.1 kHz stereo AAC track, which is what
+# the synthetic corpus stands in for (so extraction is still exercised).
+FFPROBE_STUB = r'''
+import json, sys, wave
+
+src = sys.argv[-1]
+try:
+    with wave.open(src, "rb") as wav:
+        seconds = wav.getnframes() / float(wav.getframerate())
+        rate, channels = wav.getframerate(), wav.getnchannels()
+except (wave.Error, EOFError, OSError):
+    sys.exit(1)
+
+if src.endswith(".wav"):
+    fmt = "wav"
+    streams = [{"index": 0, "codec_type": "audio", "codec_name": "pcm_s16le",
+                "sample_rate": str(rate), "channels": channels, "disposition": {"default": 0}}]
+else:
+    fmt = "mov,mp4,m4a,3gp,3g2,mj2"
+    streams = [{"index": 0, "codec_type": "video", "codec_name": "h264"},
+               {"index": 1, "codec_type": "audio", "codec_name": "aac",
+                "sample_rate": "44100", "channels": 2, "disposition": {"default": 1}}]
+print(json.dumps({"format": {"format_name": fmt, "duration": "%.6f" % seconds},
+                  "streams": streams}))
+'''
+
+# whisper-cli stand-in. Reads the WAV (file or stdin), then emits one segment
+# every BENCH_SEGMENT_SECONDS with BENCH_SEGMENT_WORDS words each, as
+# Whisper.cpp's JSON file and console lines.
+WHISPER_STUB = r'''
+import io, json, os, sys, time, wave
+
+args = sys.argv[1:]
+src = args[args.index("-f") + 1]
+data = sys.stdin.buffer.read() if src == "-" else open(src, "rb").read()
+with wave.open(io.BytesIO(data), "rb") as wav:
+    seconds = wav.getnframes() / float(wav.getframerate())
+
+time.sleep(float(os.environ.get("BENCH_WHISPER_LATENCY", "0"))
+           + seconds * float(os.environ.get("BENCH_WHISPER_RTF", "0")))
+
+step = float(os.environ.get("BENCH_SEGMENT_SECONDS", "5"))
+words = int(os.environ.get("BENCH_SEGMENT_WORDS", "12"))
+segments = []
+start = 0.0
+while start < seconds:
+    end = min(seconds, start + step)
+    text = " ".join("word%d" % ((len(segments) + i) % 97) for i in range(words))
+    segments.append({"offsets": {"from": int(start * 1000), "to": int(end * 1000)},
+                     "text": " " + text})
+    start = end
+
+def stamp(ms):
+    return "%02d:%02d:%02d.%03d" % (ms // 3600000, ms // 60000 % 60, ms // 1000 % 60, ms % 1000)
+
+for segment in segments:
+    print("[%s --> %s] %s" % (stamp(segment["offsets"]["from"]),
+                              stamp(segment["offsets"]["to"]), segment["text"]))
+if "-of" in args:
+    with open(args[args.index("-of") + 1] + ".json", "w") as f:
+        json.dump({"transcription": segments}, f)
+'''
+
+
+@dataclass
+class StubProfile:
+    """Latency and output size of the stand-in executables."""
+
+    ffmpeg_latency: float = 0.0
+    ffmpeg_rtf: float = 0.0
+    whisper_latency: float = 0.0
+    whisper_rtf: float = 0.0
+    segment_seconds: float = 5.0
+    segment_words: int = 12
+
+    def env(self) -> Dict[str, str]:
+        """Environment variables the stubs read."""
+        return {
+            'BENCH_FFMPEG_LATENCY': str(self.ffmpeg_latency),
+            'BENCH_FFMPEG_RTF': str(self.ffmpeg_rtf),
+            'BENCH_WHISPER_LATENCY': str(self.whisper_latency),
+            'BENCH_WHISPER_RTF': str(self.whisper_rtf),
+            'BENCH_SEGMENT_SECONDS': str(self.segment_seconds),
+            'BENCH_SEGMENT_WORDS': str(self.segment_words),
+        }
+
+    def apply(self) -> None:
+        """Export the profile to this process (inherited by the stubs)."""
+        os.environ.update(self.env())
+
+
+def _write_script(path: str, body: str) -> str:
+    with open(path, 'w') as f:
+        f.write(f"#!{sys.executable}\n{body}")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def install_stubs(bin_dir: str) -> Dict[str, str]:
+    """
+    Write the stub executables and put them first on PATH.
+
+    Args:
+        bin_dir: Directory for the scripts
+
+    Returns:
+        Dictionary with the ``ffmpeg``, ``ffprobe`` and ``whisper`` paths
+    """
+    os.makedirs(bin_dir, exist_ok=True)
+    paths = {
+        'ffmpeg': _write_script(os.path.join(bin_dir, "ffmpeg"), FFMPEG_STUB),
+        'ffprobe': _write_script(os.path.join(bin_dir, "ffprobe"), FFPROBE_STUB),
+        'whisper': _write_script(os.path.join(bin_dir, "whisper-cli"), WHISPER_STUB),
+    }
+    os.environ['PATH'] = bin_dir + os.pathsep + os.environ.get('PATH', '')
+    return paths
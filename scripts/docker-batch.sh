@@ -11,6 +11,8 @@ OUTPUT_DIR="./output"
 MODEL_PATH="/opt/whisper.cpp/models/ggml-base.bin"
 FORMAT="txt"
 LANGUAGE=""
+WORKERS=""
+RESUME=""
 
 # Colors for output
 RED='\033[0;31m'
@@ -46,6 +48,8 @@ show_usage() {
     echo "  -l, --language LANG   Language code (e.g., en, es, fr)"
     echo "  -i, --input DIR       Input directory (default: ./input)"
     echo "  -o, --output DIR      Output directory (default: ./output)"
+    echo "  -j, --workers N       Files to transcribe concurrently (default: CPU cores / 4)"
+    echo "  -r, --resume          Continue an interrupted batch, skipping finished files"
     echo "  -h, --help            Show this help message"
     echo ""
     echo "Examples:"
@@ -78,6 +82,14 @@ while [[ $# -gt 0 ]]; do
             OUTPUT_DIR="$2"
             shift 2
             ;;
+        -j|--workers)
+            WORKERS="$2"
+            shift 2
+            ;;
+        -r|--resume)
+            RESUME="1"
+            shift
+            ;;
         -h|--help)
             show_usage
             exit 0
@@ -128,45 +140,35 @@ if [[ -n "$LANGUAGE" ]]; then
 fi
 echo ""
 
-# Process each video file
-SUCCESS_COUNT=0
-FAILED_COUNT=0
-
-for video_file in "${VIDEO_FILES[@]}"; do
-    filename=$(basename "$video_file")
-    name_without_ext="${filename%.*}"
-    
-    print_status "Processing: $filename"
-    
-    # Build command
-    cmd="docker-compose run --rm transcriber python3 -m src.transcriber transcribe"
-    cmd="$cmd -i /app/input/$filename"
-    cmd="$cmd -m $MODEL_PATH"
-    cmd="$cmd -f $FORMAT"
-    cmd="$cmd -o /app/output/${name_without_ext}_transcript.$FORMAT"
-    
-    if [[ -n "$LANGUAGE" ]]; then
-        cmd="$cmd -l $LANGUAGE"
-    fi
-    
-    # Execute command
-    if eval "$cmd"; then
-        print_success "Completed: $filename"
-        ((SUCCESS_COUNT++))
-    else
-        print_error "Failed: $filename"
-        ((FAILED_COUNT++))
-    fi
-    
-    echo ""
-done
+# Process all files in a single container with a worker pool
+cmd="docker-compose run --rm transcriber python3 -m src.transcriber batch"
+cmd="$cmd -i /app/input"
+cmd="$cmd -o /app/output"
+cmd="$cmd -m $MODEL_PATH"
+cmd="$cmd -f $FORMAT"
+
+if [[ -n "$LANGUAGE" ]]; then
+    cmd="$cmd -l $LANGUAGE"
+fi
+
+if [[ -n "$WORKERS" ]]; then
+    cmd="$cmd -j $WORKERS"
+fi
+
+if [[ -n "$RESUME" ]]; then
+    cmd="$cmd --resume"
+fi
+
+BATCH_STATUS=0
+eval "$cmd" || BATCH_STATUS=$?
 
 # Summary
 echo "=========================================="
-print_status "Batch processing completed!"
-print_success "Successful: $SUCCESS_COUNT"
-if [[ $FAILED_COUNT -gt 0 ]]; then
-    print_error "Failed: $FAILED_COUNT"
+if [[ $BATCH_STATUS -eq 0 ]]; then
+    print_success "Batch processing completed!"
+else
+    print_error "Batch processing finished with failures"
 fi
 print_status "Output files are in: $OUTPUT_DIR"
-echo "==========================================" 
\ No newline at end of file
+echo "=========================================="
+exit $BATCH_STATUS 
\ No newline at end of file
@@ -60,6 +60,15 @@ setup(
             "mypy>=1.0.0",
             "pre-commit>=2.20.0",
         ],
+        "dedup": [
+            "numpy>=1.21",
+        ],
+        "vad": [
+            "numpy>=1.21",
+        ],
+        "zstd": [
+            "zstandard>=0.19",
+        ],
         "docs": [
             "sphinx>=5.0.0",
             "sphinx-rtd-theme>=1.0.0",
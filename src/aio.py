@@ -0,0 +1,601 @@
+"""
+asyncio API for Local Video Transcriber
+
+AsyncVideoTranscriber runs the same ffprobe, FFmpeg and Whisper.cpp command
+lines as VideoTranscriber - it builds them through the VideoTranscriber it
+wraps - but starts them with asyncio.create_subprocess_exec, so a service
+can await transcriptions on its own event loop instead of parking a thread
+per call. A semaphore bounds how many jobs run at once, cancelling a job
+kills its FFmpeg or Whisper.cpp process before the cancellation propagates,
+and events() yields progress and transcribed segments as they arrive.
+
+Voice activity detection and duplicate detection configured on the wrapped
+VideoTranscriber apply as they do there: the NumPy work runs in a worker
+thread and hands each Whisper.cpp run back to the loop, so cancelling still
+kills the process. (Chunking is a transcribe_video argument of the
+synchronous API and isn't offered here.) With a backend other than the CLI
+one the Whisper step runs in a worker thread; cancelling it asks the
+backend to abort, which for the server backend stops the whisper-server
+doing the work (the next job restarts it).
+"""
+
+import asyncio
+import codecs
+import concurrent.futures
+import functools
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from . import config
+from . import formats
+from .extraction import (PASSTHROUGH, build_probe_command, link_or_copy,
+                         parse_probe_output, plan_extraction)
+from .discovery import ToolInfo
+from .metrics import FileMetrics, file_size, wav_duration
+from .progress import ProgressTracker, StreamedOutput
+from .transcriber import FFMPEG_MISSING, VideoTranscriber
+
+# FFmpeg redraws its stats line with carriage returns
+_LINE_BREAK = re.compile(r'\r\n|\r|\n')
+_READ_SIZE = 64 * 1024
+
+
+@dataclass
+class SegmentEvent:
+    """A segment Whisper.cpp has just transcribed.
+
+    Attributes:
+        input_path: File being transcribed
+        start: Segment start in seconds
+        end: Segment end in seconds
+        text: Transcribed text
+    """
+
+    input_path: str
+    start: float
+    end: float
+    text: str
+
+
+@dataclass
+class CompletedEvent:
+    """The last event of a job.
+
+    Attributes:
+        input_path: File that was transcribed
+        output_path: Path of the first output file
+        written: Every output file
+    """
+
+    input_path: str
+    output_path: str
+    written: List[str]
+
+
+async def _in_thread(func, *args):
+    """Run a blocking call in the loop's default executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args))
+
+
+async def _pump(stream, on_line: Callable[[str], None]) -> None:
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pending = ""
+    while True:
+        chunk = await stream.read(_READ_SIZE)
+        pending += decoder.decode(chunk, final=not chunk)
+        *lines, pending = _LINE_BREAK.split(pending)
+        for line in lines:
+            on_line(line + "\n")
+        if not chunk:
+            break
+    if pending:
+        on_line(pending)
+
+
+async def run_async(cmd: List[str], on_stdout: Callable[[str], None] = None,
+                    on_stderr: Callable[[str], None] = None,
+                    on_start: Callable[[int], None] = None,
+                    check: bool = True, keep_stdout: bool = True) -> StreamedOutput:
+    """
+    Run a command to completion on the event loop, handing its output to
+    callbacks line by line.
+
+    The asyncio counterpart of progress.run_streaming: stderr keeps only a
+    bounded tail and stdout spills to disk past
+    config.SUBPROCESS_STDOUT_SPOOL_SIZE. If the awaiting task is cancelled
+    the process is killed and reaped before CancelledError propagates.
+
+    Args:
+        cmd: Command line
+        on_stdout: Called with each stdout line
+        on_stderr: Called with each stderr line
+        on_start: Called with the child's pid once it has started (e.g.
+            CpuAllocation.pin_process)
+        check: Raise CalledProcessError on a non-zero exit
+        keep_stdout: Keep stdout for StreamedOutput.stdout
+
+    Returns:
+        StreamedOutput; close it (or use it as a context manager) to drop
+        the stdout spool
+    """
+    stderr_tail: deque = deque(maxlen=config.SUBPROCESS_STDERR_TAIL_LINES)
+    spool = (tempfile.SpooledTemporaryFile(max_size=config.SUBPROCESS_STDOUT_SPOOL_SIZE,
+                                           mode='w+', encoding='utf-8')
+             if keep_stdout else None)
+
+    def stdout_line(line: str) -> None:
+        if spool is not None:
+            spool.write(line)
+        if on_stdout is not None:
+            on_stdout(line)
+
+    def stderr_line(line: str) -> None:
+        stderr_tail.append(line)
+        if on_stderr is not None:
+            on_stderr(line)
+
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+        raise
+
+    try:
+        if on_start is not None:
+            on_start(process.pid)
+        await asyncio.gather(_pump(process.stdout, stdout_line),
+                             _pump(process.stderr, stderr_line))
+        await process.wait()
+    except BaseException:
+        # Cancelled, or a callback failed: don't leave the child running
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+        if spool is not None:
+            spool.close()
+        raise
+
+    output = StreamedOutput(list(cmd), process.returncode, spool, "".join(stderr_tail))
+    if check and process.returncode != 0:
+        output.close()
+        raise subprocess.CalledProcessError(process.returncode, list(cmd),
+                                            stderr=output.stderr)
+    return output
+
+
+class AsyncVideoTranscriber:
+    """Transcribe on an asyncio event loop with cancellable subprocesses."""
+
+    def __init__(self, transcriber: VideoTranscriber = None, max_concurrent: int = 1,
+                 **options):
+        """
+        Initialize the transcriber.
+
+        Args:
+            transcriber: VideoTranscriber whose settings, command building,
+                cache, metrics and output writing are used (default: one
+                created from options)
+            max_concurrent: Jobs (extractions, transcriptions or whole
+                files) that may run at once; the rest wait their turn
+            **options: VideoTranscriber arguments, when transcriber is None
+
+        Raises:
+            ValueError: if the transcriber's CpuScheduler has fewer slots
+                than max_concurrent (waiting for a slot would block the loop)
+        """
+        self.transcriber = transcriber or VideoTranscriber(**options)
+        self.max_concurrent = max(1, max_concurrent)
+        scheduler = self.transcriber.scheduler
+        if scheduler is not None and scheduler.slots < self.max_concurrent:
+            raise ValueError(f"CPU scheduler has {scheduler.slots} slot(s) for "
+                             f"{self.max_concurrent} concurrent job(s)")
+        # Created on first use, inside the loop that runs the jobs
+        self._semaphore = None
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold one of the max_concurrent job slots."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        async with self._semaphore:
+            yield
+
+    async def _check_dependencies(self) -> None:
+        """VideoTranscriber._check_dependencies, probing FFmpeg on the loop."""
+        transcriber = self.transcriber
+        if transcriber._dependencies_checked:
+            return
+        if await self._tool("ffmpeg") is None:
+            raise RuntimeError(FFMPEG_MISSING)
+        transcriber._check_whisper_executable()
+        transcriber._dependencies_checked = True
+
+    async def _tool(self, name: str) -> Optional[ToolInfo]:
+        """DiscoveryRegistry.tool with the ``-version`` probe run by run_async."""
+        registry = self.transcriber.registry
+        path = shutil.which(name)
+        if path is None:
+            return None
+        cached = registry.cached_tool(path)
+        if cached is not None:
+            return cached
+        try:
+            output = await run_async([path, "-version"])
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        with output:
+            return registry.record_tool(path, output.stdout)
+
+    async def probe(self, path: str):
+        """
+        Describe a media file with ffprobe.
+
+        Returns:
+            MediaInfo, or None if ffprobe is missing or cannot read the file
+        """
+        try:
+            output = await run_async(build_probe_command(path))
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        with output:
+            return parse_probe_output(path, output.stdout)
+
+    async def extract_audio(self, video_path: str, output_path: str = None,
+                            on_progress=None, plan=None) -> str:
+        """
+        Extract audio from a video or audio file.
+
+        Args:
+            video_path: Path to input video or audio file
+            output_path: Path for output audio file (optional)
+            on_progress: Called with a ProgressEvent for each FFmpeg stats
+                update
+            plan: ExtractionPlan if the caller already probed the input
+
+        Returns:
+            Path to extracted audio file
+
+        Raises:
+            NoAudioStreamError: if the input has no audio stream
+        """
+        async with self._slot():
+            return await self._extract(video_path, output_path, on_progress, plan)
+
+    async def _extract(self, video_path: str, output_path: str = None,
+                       on_progress=None, plan=None) -> str:
+        if output_path is None:
+            output_path = os.path.join(self.transcriber.temp_dir,
+                                       f"{Path(video_path).stem}_audio.wav")
+        if plan is None:
+            plan = plan_extraction(await self.probe(video_path))
+        tracker = ProgressTracker("extract", on_progress, plan.duration, video_path)
+
+        if plan.action == PASSTHROUGH:
+            await _in_thread(link_or_copy, video_path, output_path)
+        else:
+            cmd = self.transcriber._build_extract_command(video_path, output_path, plan)
+            (await run_async(cmd, on_stderr=tracker.ffmpeg_line, keep_stdout=False)).close()
+        tracker.finish()
+        return output_path
+
+    async def transcribe_audio(self, audio_path: str, model_path: str,
+                               language: str = None, output_format: str = "txt",
+                               on_progress=None, on_segment=None) -> Dict[str, Any]:
+        """
+        Transcribe audio using Whisper.cpp.
+
+        Args:
+            audio_path: Path to audio file
+            model_path: Path to Whisper model
+            language: Language code (optional)
+            output_format: Output format (one of config.OUTPUT_FORMATS)
+            on_progress: Called with a ProgressEvent for each segment
+                Whisper.cpp prints
+            on_segment: Called with each segment (``start``/``end`` in
+                seconds and ``text``) as Whisper.cpp prints it
+
+        Returns:
+            The Whisper.cpp JSON result for "json", otherwise a dictionary
+            with the rendered text under "transcription"
+        """
+        async with self._slot():
+            return await self._transcribe(audio_path, model_path, language,
+                                          output_format, on_progress, on_segment)
+
+    async def _transcribe(self, audio_path: str, model_path: str, language: str = None,
+                          output_format: str = "txt", on_progress=None,
+                          on_segment=None) -> Dict[str, Any]:
+        transcriber = self.transcriber
+        tracker = None
+        if on_progress is not None:
+            tracker = ProgressTracker("transcribe", on_progress,
+                                      wav_duration(audio_path), audio_path)
+
+        cache_key = None
+        if transcriber.cache is not None:
+            cache_key = await _in_thread(transcriber.cache.make_key, audio_path,
+                                         model_path, language, "json",
+                                         transcriber.cache_options())
+            cached = await _in_thread(transcriber.cache.get, cache_key)
+            if cached is not None:
+                if tracker is not None:
+                    tracker.finish()
+                return transcriber._format_result(cached, output_format)
+
+        started = time.monotonic()
+        if transcriber.backend.name == "cli":
+            result = await self._run_whisper(audio_path, model_path, language,
+                                             tracker, on_segment)
+        else:
+            result = await self._run_backend(audio_path, model_path, language, tracker)
+        transcriber._record_throughput(model_path, audio_path, time.monotonic() - started)
+        if tracker is not None:
+            tracker.finish()
+        if cache_key is not None:
+            await _in_thread(transcriber.cache.put, cache_key, result)
+        return transcriber._format_result(result, output_format)
+
+    async def _run_whisper(self, audio_path: str, model_path: str, language: str,
+                           tracker: Optional[ProgressTracker], on_segment) -> Dict[str, Any]:
+        """Run the Whisper.cpp CLI, writing its JSON next to the audio file."""
+        transcriber = self.transcriber
+        output_prefix = os.path.splitext(audio_path)[0]
+
+        def line(text: str) -> None:
+            segment = formats.parse_console_line(text)
+            if segment is None:
+                return
+            if tracker is not None:
+                tracker.update(segment['end'], segment['text'])
+            if on_segment is not None:
+                on_segment(segment)
+
+        # The semaphore keeps jobs within the scheduler's slots, so this never waits
+        with transcriber._lease_cpus() as allocation:
+            cmd = transcriber._build_whisper_command(audio_path, model_path, language,
+                                                     "json", output_prefix, allocation)
+            with await run_async(
+                cmd, on_stdout=line,
+                on_start=allocation.pin_process if allocation else None
+            ) as output:
+                # Console output is only read back if the JSON file is missing
+                stdout = "" if os.path.exists(f"{output_prefix}.json") else output.stdout
+        return transcriber._read_whisper_output(output_prefix, "json", stdout)
+
+    async def _run_backend(self, audio_path: str, model_path: str, language: str,
+                           tracker: Optional[ProgressTracker]) -> Dict[str, Any]:
+        """
+        Run a non-CLI backend in a worker thread.
+
+        On cancellation the backend is asked to abort (the server backend
+        stops the whisper-server doing the work) and the thread is awaited,
+        so the CPU lease and the server are free before CancelledError
+        propagates. A backend that can't abort is left to finish on its own.
+        """
+        backend = self.transcriber.backend
+
+        def run() -> Dict[str, Any]:
+            with self.transcriber._lease_cpus() as allocation:
+                return backend.transcribe(audio_path, model_path, language,
+                                          allocation, progress=tracker)
+
+        work = asyncio.get_running_loop().run_in_executor(None, run)
+        try:
+            return await asyncio.shield(work)
+        except asyncio.CancelledError:
+            if await _in_thread(backend.abort, audio_path):
+                with suppress(Exception):
+                    await work
+            raise
+
+    async def _acquire_scratch(self, input_path: str, plan):
+        """Reserve a scratch directory, awaiting released space while the quota is in use."""
+        scratch = self.transcriber.scratch
+        expected = self.transcriber.scratch_bytes(input_path, plan)
+        loop = asyncio.get_running_loop()
+        while True:
+            released = loop.create_future()
+
+            def wake() -> None:
+                if not released.done():
+                    released.set_result(None)
+
+            with scratch.on_release(lambda: loop.call_soon_threadsafe(wake)):
+                # Tried after subscribing, so a release in between isn't missed
+                try:
+                    return scratch.acquire(expected, timeout=0)
+                except TimeoutError:
+                    pass
+                await released
+
+    async def transcribe_video(self, video_path: str, model_name_or_path: str,
+                               output_path: str = None, language: str = None,
+                               output_format="txt", on_event=None) -> str:
+        """
+        Complete video transcription pipeline.
+
+        Args:
+            video_path: Path to input video or audio file
+            model_name_or_path: Model name or path to Whisper model
+            output_path: Path for output file (for several formats, the
+                path of the first; the others swap the extension)
+            language: Language code
+            output_format: Output format, or several as a list or a comma
+                separated string (e.g. "srt,vtt,txt")
+            on_event: Called with each ProgressEvent and SegmentEvent, and
+                a CompletedEvent once the outputs are saved
+
+        Returns:
+            Path to the (first) output file
+        """
+        async with self._slot():
+            return await self._transcribe_video(video_path, model_name_or_path, output_path,
+                                                language, output_format, on_event)
+
+    async def _transcribe_video(self, video_path: str, model_name_or_path: str,
+                                output_path: str, language: str, output_format,
+                                on_event) -> str:
+        transcriber = self.transcriber
+        file_metrics = FileMetrics(video_path)
+        scratch_job = None
+        try:
+            output_formats = formats.parse_formats(output_format)
+            await self._check_dependencies()
+            if not os.path.exists(video_path):
+                raise FileNotFoundError(f"Video file not found: {video_path}")
+            model_path = await _in_thread(transcriber._resolve_model_path,
+                                          model_name_or_path)
+            if output_path is None:
+                output_path = f"{Path(video_path).stem}_transcript.{output_formats[0]}"
+
+            plan = plan_extraction(await self.probe(video_path))
+            scratch_job = await self._acquire_scratch(video_path, plan)
+            with file_metrics.stage("extract") as stage:
+                stage.bytes_read = file_size(video_path)
+                audio_path = await self._extract(
+                    video_path, scratch_job.file(f"{Path(video_path).stem}_audio.wav"),
+                    on_progress=on_event, plan=plan)
+                stage.bytes_written = file_size(audio_path)
+            file_metrics.audio_seconds = wav_duration(audio_path)
+
+            def segment(found: Dict[str, Any]) -> None:
+                on_event(SegmentEvent(video_path, found['start'], found['end'], found['text']))
+
+            with file_metrics.stage("transcribe") as stage:
+                stage.bytes_read = file_size(audio_path)
+                result = await self._transcribe_source(
+                    video_path, audio_path, model_path, language, file_metrics,
+                    on_progress=on_event, on_segment=segment if on_event else None)
+
+            with file_metrics.stage("write") as stage:
+                written = await _in_thread(transcriber.save_outputs, result,
+                                           output_path, output_formats)
+                stage.bytes_written = sum(file_size(path) for path in written)
+
+            file_metrics.stop()
+            if transcriber.metrics is not None:
+                transcriber.metrics.finish(file_metrics, success=True)
+            if on_event is not None:
+                on_event(CompletedEvent(video_path, output_path, written))
+            return output_path
+
+        except asyncio.CancelledError:
+            if transcriber.metrics is not None:
+                transcriber.metrics.finish(file_metrics, success=False, error="cancelled")
+            raise
+        except Exception as e:
+            if transcriber.metrics is not None:
+                transcriber.metrics.finish(file_metrics, success=False, error=str(e))
+            raise
+        finally:
+            if scratch_job is not None:
+                scratch_job.close()
+
+    async def _transcribe_source(self, video_path: str, audio_path: str, model_path: str,
+                                 language: str, file_metrics: FileMetrics, on_progress=None,
+                                 on_segment=None) -> Dict[str, Any]:
+        """
+        The transcribe step of transcribe_video, with VAD and dedup if enabled.
+
+        VideoTranscriber.transcribe_deduplicated and transcribe_speech run in
+        a worker thread; each Whisper.cpp run they ask for is scheduled back
+        on the loop and cancelled with the job.
+        """
+        transcriber = self.transcriber
+        if transcriber.dedup is None and not transcriber.vad:
+            return await self._transcribe(audio_path, model_path, language, "json",
+                                          on_progress, on_segment)
+
+        loop = asyncio.get_running_loop()
+        lock = threading.Lock()
+        runs: List[concurrent.futures.Future] = []
+        stopping = False
+        # Segments of speech-only audio aren't on the input's timeline
+        segment_events = None if transcriber.vad else on_segment
+
+        def run(path: str) -> Dict[str, Any]:
+            with lock:
+                if stopping:
+                    raise concurrent.futures.CancelledError()
+                future = asyncio.run_coroutine_threadsafe(
+                    self._transcribe(path, model_path, language, "json",
+                                     on_progress, segment_events), loop)
+                runs.append(future)
+            return future.result()
+
+        work = loop.run_in_executor(None, functools.partial(
+            transcriber.transcribe_deduplicated, video_path, audio_path, model_path,
+            language, lambda: transcriber.transcribe_speech(audio_path, run, file_metrics),
+            on_progress))
+        try:
+            return await asyncio.shield(work)
+        except asyncio.CancelledError:
+            with lock:
+                stopping = True
+            for future in runs:
+                future.cancel()
+            with suppress(BaseException):
+                await work
+            raise
+
+    async def events(self, video_path: str, model_name_or_path: str,
+                     **options) -> AsyncIterator[Any]:
+        """
+        Transcribe a file, yielding what happens as it happens.
+
+        Leaving the loop early (break, or closing the iterator) cancels the
+        job and kills its processes. Errors are raised from the iterator.
+
+        Args:
+            video_path: Path to input video or audio file
+            model_name_or_path: Model name or path to Whisper model
+            **options: transcribe_video arguments (output_path, language,
+                output_format)
+
+        Yields:
+            ProgressEvent and SegmentEvent objects, then one CompletedEvent
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        job = asyncio.ensure_future(self.transcribe_video(
+            video_path, model_name_or_path, on_event=queue.put_nowait, **options))
+        job.add_done_callback(lambda _: queue.put_nowait(finished))
+        try:
+            while True:
+                event = await queue.get()
+                if event is finished:
+                    break
+                yield event
+            job.result()
+        finally:
+            if not job.done():
+                job.cancel()
+                with suppress(asyncio.CancelledError):
+                    await job
+            elif not job.cancelled():
+                # Consumed here when the caller stopped listening early
+                job.exception()
+
+    async def close(self) -> None:
+        """Shut down the wrapped transcriber (backend, metrics export and indexes)."""
+        await _in_thread(self.transcriber.close)
+
+    async def __aenter__(self) -> "AsyncVideoTranscriber":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -0,0 +1,521 @@
+"""
+Transcription backends for Local Video Transcriber
+
+A backend turns an audio file into a Whisper.cpp JSON result. The CLI backend
+starts Whisper.cpp once per file; the server backend keeps whisper-server
+processes running with their models loaded and sends audio to them over
+local HTTP, which saves the model load on every file. A whisper-server runs
+one inference at a time, so each model gets a server per concurrent job.
+"""
+
+import json
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Tuple
+
+from . import config
+from . import formats
+from .progress import run_streaming
+
+
+class TranscriptionBackend:
+    """Interface for anything that can run Whisper on an audio file."""
+
+    name = "base"
+
+    def transcribe(self, audio_path: str, model_path: str, language: str = None,
+                   allocation=None, progress=None) -> Dict[str, Any]:
+        """
+        Transcribe an audio file.
+
+        Args:
+            audio_path: Path to 16 kHz WAV audio
+            model_path: Path to Whisper model
+            language: Language code (optional)
+            allocation: CpuAllocation for this job (optional)
+            progress: ProgressTracker fed with the audio position reached
+                (optional; backends that can't report progress ignore it)
+
+        Returns:
+            Whisper.cpp JSON result
+        """
+        raise NotImplementedError
+
+    def preload(self, model_path: str, allocation=None) -> bool:
+        """
+        Load a model before the first file needs it.
+
+        Args:
+            model_path: Path to Whisper model
+            allocation: CpuAllocation the model would run with (optional)
+
+        Returns:
+            True if the backend keeps models loaded and now holds this one
+        """
+        return False
+
+    def abort(self, audio_path: str) -> bool:
+        """
+        Stop a transcription of audio_path running in another thread.
+
+        The interrupted transcribe() call raises instead of returning.
+
+        Args:
+            audio_path: Audio file passed to that transcribe() call
+
+        Returns:
+            True if it was stopped; False if the backend can't interrupt
+            (the call then runs to completion)
+        """
+        return False
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class CliBackend(TranscriptionBackend):
+    """Run the Whisper.cpp command line tool once per file."""
+
+    name = "cli"
+
+    def __init__(self, transcriber):
+        """
+        Initialize the backend.
+
+        Args:
+            transcriber: VideoTranscriber whose command building is used
+        """
+        self.transcriber = transcriber
+
+    def transcribe(self, audio_path: str, model_path: str, language: str = None,
+                   allocation=None, progress=None) -> Dict[str, Any]:
+        # Write results next to the audio file, e.g. video_audio.json
+        output_prefix = os.path.splitext(audio_path)[0]
+        cmd = self.transcriber._build_whisper_command(audio_path, model_path, language,
+                                                      "json", output_prefix, allocation)
+        with run_streaming(
+            cmd, on_stdout=progress.whisper_line if progress else None,
+            on_start=allocation.pin_process if allocation else None
+        ) as result:
+            # Console output is only read back if the JSON file is missing
+            stdout = "" if os.path.exists(f"{output_prefix}.json") else result.stdout
+        return self.transcriber._read_whisper_output(output_prefix, "json", stdout)
+
+
+def find_server_executable(whisper_path: str = None) -> str:
+    """
+    Find the whisper.cpp server binary.
+
+    Looks next to the Whisper.cpp CLI first, then in the usual install
+    locations.
+
+    Args:
+        whisper_path: Path to the Whisper.cpp CLI executable (optional)
+
+    Returns:
+        Path to the server executable
+    """
+    directories = []
+    if whisper_path:
+        directories.append(os.path.dirname(os.path.abspath(whisper_path)))
+    whisper_dir = os.environ.get('WHISPER_CPP_DIR', '/opt/whisper.cpp')
+    directories.extend([whisper_dir, os.path.join(whisper_dir, 'build', 'bin')])
+
+    for directory in directories:
+        for name in ['whisper-server', 'server']:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path) and os.access(path, os.X_OK):
+                return path
+
+    raise FileNotFoundError(
+        "whisper.cpp server executable not found. Build it with "
+        "'cmake --build build --target whisper-server' or pass --server-path"
+    )
+
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class _ServerProcess:
+    """One whisper-server process with a model loaded."""
+
+    def __init__(self, server_path: str, model_path: str, host: str,
+                 threads: int = None):
+        self.server_path = server_path
+        self.model_path = model_path
+        self.host = host
+        self.threads = threads
+        self.port = None
+        self.process = None
+        self.log = None
+        self.last_used = time.monotonic()
+        # Held while checked out by ServerBackend
+        self.lock = threading.Lock()
+        # Set once ServerBackend dropped it (evicted, reaped or closed)
+        self.retired = False
+        # Audio file being transcribed, and whether abort() stopped it
+        self.job = None
+        self.aborted = False
+        # Serializes starting and stopping the process (and reading its
+        # log): abort() stops a server from another thread than its user's
+        self._state_lock = threading.Lock()
+
+    def start(self, timeout: float) -> None:
+        port = _free_port(self.host)
+        cmd = [self.server_path, "-m", self.model_path,
+               "--host", self.host, "--port", str(port)]
+        if self.threads:
+            cmd.extend(["-t", str(self.threads)])
+
+        with self._state_lock:
+            if self.aborted:
+                raise RuntimeError("whisper-server start was aborted")
+            self.port = port
+            self.log = tempfile.TemporaryFile()
+            self.process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL,
+                                            stdout=subprocess.DEVNULL, stderr=self.log)
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                if self.aborted:
+                    raise RuntimeError("whisper-server start was aborted")
+                raise RuntimeError(
+                    f"whisper-server exited with code {self.process.returncode}: "
+                    f"{self.log_tail()}"
+                )
+            if self.healthy():
+                return
+            time.sleep(0.1)
+        self.stop()
+        raise RuntimeError(f"whisper-server did not become ready within {timeout:g}s")
+
+    def log_tail(self, size: int = 2000) -> str:
+        with self._state_lock:
+            if self.log is None:
+                return ""
+            self.log.seek(0, os.SEEK_END)
+            self.log.seek(max(0, self.log.tell() - size))
+            return self.log.read().decode(errors="replace").strip()
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def healthy(self) -> bool:
+        """Return True if the server answers its health endpoint."""
+        if not self.alive():
+            return False
+        import http.client
+        try:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=2)
+            connection.request("GET", "/health")
+            response = connection.getresponse()
+            response.read()
+            connection.close()
+        except OSError:
+            return False
+        # Builds without /health answer 404 once they are listening
+        return response.status in (200, 404)
+
+    def stop(self) -> None:
+        with self._state_lock:
+            if self.process is not None and self.process.poll() is None:
+                self.process.terminate()
+                try:
+                    self.process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+                    self.process.wait()
+            if self.log is not None:
+                self.log.close()
+                self.log = None
+
+
+def _multipart_envelope(boundary: str, fields: Dict[str, str], file_field: str,
+                        filename: str) -> Tuple[bytes, bytes]:
+    """Return the multipart/form-data bytes before and after the file."""
+    head = b''.join(
+        (f"--{boundary}\r\n"
+         f"Content-Disposition: form-data; name=\"{name}\"\r\n\r\n"
+         f"{value}\r\n").encode()
+        for name, value in fields.items()
+    )
+    head += (f"--{boundary}\r\n"
+             f"Content-Disposition: form-data; name=\"{file_field}\"; "
+             f"filename=\"{filename}\"\r\n"
+             f"Content-Type: audio/wav\r\n\r\n").encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    return head, tail
+
+
+def _stream_file(head: bytes, file_path: str, tail: bytes) -> Iterator[bytes]:
+    """Yield a request body, reading the file from disk in chunks."""
+    yield head
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            yield chunk
+    yield tail
+
+
+def result_from_server(response: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a whisper-server ``verbose_json`` response to Whisper.cpp JSON.
+
+    Args:
+        response: Parsed server response
+
+    Returns:
+        Result dictionary in Whisper.cpp's JSON layout
+    """
+    segments = [
+        {'start': float(segment.get('start', 0)), 'end': float(segment.get('end', 0)),
+         'text': segment.get('text', '').strip()}
+        for segment in response.get('segments', [])
+    ]
+    base = {'result': {'language': response.get('language')}} if response.get('language') else None
+    return formats.build_result(segments, base=base)
+
+
+class ServerBackend(TranscriptionBackend):
+    """Keep whisper-server processes warm and send audio to them over HTTP."""
+
+    name = "server"
+
+    def __init__(self, server_path: str = None, whisper_path: str = None,
+                 host: str = "127.0.0.1", idle_timeout: float = None,
+                 startup_timeout: float = None, max_models: int = 1,
+                 servers_per_model: int = 1):
+        """
+        Initialize the backend. Servers start lazily on first use.
+
+        Args:
+            server_path: Path to the whisper-server executable
+            whisper_path: Path to the Whisper.cpp CLI, used to find the server
+            host: Interface the servers listen on
+            idle_timeout: Stop a server after this many idle seconds (0 keeps
+                it running until close)
+            startup_timeout: Seconds to wait for a server to become healthy
+            max_models: Number of models kept loaded at once
+            servers_per_model: Servers started per model; each handles one
+                request at a time, so match the number of concurrent jobs
+                (the CpuScheduler's slots)
+        """
+        self.server_path = server_path or find_server_executable(whisper_path)
+        self.host = host
+        self.idle_timeout = (config.SERVER_IDLE_TIMEOUT
+                             if idle_timeout is None else idle_timeout)
+        self.startup_timeout = startup_timeout or config.SERVER_STARTUP_TIMEOUT
+        self.max_models = max(1, max_models)
+        self.servers_per_model = max(1, servers_per_model)
+        # Model path -> its servers; a server is checked out while its lock is held
+        self._servers: Dict[str, List[_ServerProcess]] = {}
+        self._lock = threading.Lock()
+        self._returned = threading.Condition(self._lock)
+        self._closed = threading.Event()
+        self._reaper = None
+        if self.idle_timeout:
+            self._reaper = threading.Thread(target=self._reap_idle, daemon=True)
+            self._reaper.start()
+
+    def _reap_idle(self) -> None:
+        """Stop servers that have been idle longer than idle_timeout."""
+        interval = min(self.idle_timeout, 5.0)
+        while not self._closed.wait(interval):
+            now = time.monotonic()
+            idle = []
+            with self._lock:
+                for model_path, pool in list(self._servers.items()):
+                    for server in list(pool):
+                        if now - server.last_used > self.idle_timeout \
+                                and server.lock.acquire(blocking=False):
+                            server.retired = True
+                            pool.remove(server)
+                            idle.append(server)
+                    if not pool:
+                        del self._servers[model_path]
+            for server in idle:
+                server.stop()
+                server.lock.release()
+
+    def _evict(self, keep: str) -> List[_ServerProcess]:
+        """
+        Drop least recently used models until there is room for another
+        (caller holds self._lock).
+
+        Returns:
+            Evicted servers that were idle; the caller stops them after
+            releasing self._lock. Busy ones are stopped when checked in.
+        """
+        idle = []
+        while len(self._servers) >= self.max_models:
+            oldest = min((path for path in self._servers if path != keep),
+                         key=lambda path: max((s.last_used for s in self._servers[path]),
+                                             default=0))
+            for server in self._servers.pop(oldest):
+                server.retired = True
+                if server.lock.acquire(blocking=False):
+                    idle.append(server)
+        return idle
+
+    def _checkout(self, model_path: str, allocation=None,
+                  job: str = None) -> _ServerProcess:
+        """
+        Take a server for the model for exclusive use, waiting while all of
+        its servers are busy. Pair with _checkin.
+
+        Args:
+            model_path: Path to Whisper model
+            allocation: CpuAllocation a new server is sized for (optional)
+            job: Audio file the server is taken for, so abort() finds it
+        """
+        while True:
+            evicted = []
+            with self._lock:
+                if self._closed.is_set():
+                    raise RuntimeError("Server backend is closed")
+                pool = self._servers.get(model_path)
+                if pool is None:
+                    evicted = self._evict(model_path)
+                    pool = self._servers[model_path] = []
+                server = next((s for s in pool if s.lock.acquire(blocking=False)), None)
+                if server is None and len(pool) < self.servers_per_model:
+                    server = _ServerProcess(self.server_path, model_path, self.host,
+                                            allocation.threads if allocation else None)
+                    server.lock.acquire()
+                    pool.append(server)
+                if server is not None:
+                    server.job = job
+                    server.aborted = False
+                if server is None and not evicted:
+                    self._returned.wait()
+                    continue
+            # Evicted models are stopped outside the lock so lookups don't wait
+            for victim in evicted:
+                victim.stop()
+                victim.lock.release()
+            if server is not None:
+                server.last_used = time.monotonic()
+                return server
+
+    def _checkin(self, server: _ServerProcess) -> None:
+        """Hand a checked out server back (stopping it if it was evicted meanwhile)."""
+        server.last_used = time.monotonic()
+        if server.retired:
+            server.stop()
+        with self._lock:
+            server.job = None
+            server.lock.release()
+            self._returned.notify_all()
+
+    def _ensure_running(self, server: _ServerProcess) -> None:
+        if server.retired:
+            raise RuntimeError("Server backend is closed")
+        if not server.healthy():
+            server.stop()
+            server.start(self.startup_timeout)
+
+    def _post_inference(self, server: _ServerProcess, audio_path: str,
+                        language: str = None) -> Dict[str, Any]:
+        import http.client
+        boundary = uuid.uuid4().hex
+        fields = {'response_format': 'verbose_json', 'temperature': '0.0'}
+        if language:
+            fields['language'] = language
+
+        head, tail = _multipart_envelope(boundary, fields, 'file',
+                                         os.path.basename(audio_path))
+        length = len(head) + os.path.getsize(audio_path) + len(tail)
+
+        connection = http.client.HTTPConnection(server.host, server.port, timeout=None)
+        try:
+            connection.request(
+                "POST", "/inference",
+                body=_stream_file(head, audio_path, tail),
+                headers={
+                    'Content-Type': f"multipart/form-data; boundary={boundary}",
+                    'Content-Length': str(length),
+                }
+            )
+            response = connection.getresponse()
+            body = response.read().decode('utf-8', errors='replace')
+        finally:
+            connection.close()
+
+        if response.status != 200:
+            raise RuntimeError(f"whisper-server returned {response.status}: {body}")
+        data = json.loads(body)
+        if 'error' in data:
+            raise RuntimeError(f"whisper-server error: {data['error']}")
+        return data
+
+    def transcribe(self, audio_path: str, model_path: str, language: str = None,
+                   allocation=None, progress=None) -> Dict[str, Any]:
+        # Imported here so the CLI backend doesn't pay for the HTTP stack
+        import http.client
+
+        server = self._checkout(model_path, allocation, job=audio_path)
+        try:
+            try:
+                self._ensure_running(server)
+                if server.aborted:
+                    raise RuntimeError(f"Transcription of {audio_path} was aborted")
+                data = self._post_inference(server, audio_path, language)
+            except (OSError, http.client.HTTPException):
+                if server.aborted:
+                    raise RuntimeError(f"Transcription of {audio_path} was aborted")
+                if server.retired:
+                    raise RuntimeError("Server backend is closed")
+                # The server died mid-request; restart it and retry once
+                server.stop()
+                server.start(self.startup_timeout)
+                data = self._post_inference(server, audio_path, language)
+        finally:
+            self._checkin(server)
+        return result_from_server(data)
+
+    def abort(self, audio_path: str) -> bool:
+        # Stopping the server is the only way to end an inference; it is
+        # restarted (reloading the model) by the next request
+        with self._lock:
+            servers = [server for pool in self._servers.values() for server in pool
+                       if server.job == audio_path]
+            for server in servers:
+                server.aborted = True
+        for server in servers:
+            server.stop()
+        return bool(servers)
+
+    def preload(self, model_path: str, allocation=None) -> bool:
+        server = self._checkout(model_path, allocation)
+        try:
+            self._ensure_running(server)
+        finally:
+            self._checkin(server)
+        return True
+
+    def loaded_models(self) -> List[str]:
+        """Return the model paths that currently have a running server."""
+        with self._lock:
+            return [path for path, pool in self._servers.items()
+                    if any(server.alive() for server in pool)]
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed.set()
+            servers = [server for pool in self._servers.values() for server in pool]
+            self._servers.clear()
+            for server in servers:
+                server.retired = True
+            # Wake checkouts waiting for a server so they see the backend is closed
+            self._returned.notify_all()
+        # Requests still running fail once their server is gone
+        for server in servers:
+            server.stop()
@@ -0,0 +1,209 @@
+"""
+Batch processing for Local Video Transcriber
+
+Runs many VideoTranscriber jobs inside one Python process using a bounded
+worker pool, so dependency checks and model resolution happen once per batch
+instead of once per file.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import config
+from . import formats
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of transcribing a single file in a batch."""
+
+    input_path: str
+    output_path: Optional[str] = None
+    success: bool = False
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    skipped: bool = False
+
+
+def find_media_files(input_dir: str, recursive: bool = False) -> List[str]:
+    """
+    Find supported media files in a directory.
+
+    Args:
+        input_dir: Directory to scan
+        recursive: Also scan subdirectories
+
+    Returns:
+        Sorted list of file paths with a supported extension
+    """
+    if not os.path.isdir(input_dir):
+        raise FileNotFoundError(f"Input directory not found: {input_dir}")
+
+    pattern = "**/*" if recursive else "*"
+    files = [
+        str(path) for path in Path(input_dir).glob(pattern)
+        if path.is_file() and config.validate_media_format(str(path))
+    ]
+    return sorted(files)
+
+
+def build_output_paths(files: List[str], output_dir: str, output_format: str,
+                       input_dir: str = None) -> Dict[str, str]:
+    """
+    Map each input file to its transcript path in the output directory.
+
+    Subdirectories of the input directory (``--recursive``) are mirrored
+    under the output directory, so ``a/intro.mp4`` and ``b/intro.mp4`` get
+    separate transcripts. Files in one directory that share a stem (e.g.
+    ``intro.mp4`` and ``intro.mov``) keep their extension in the output name
+    so they don't overwrite each other.
+
+    Args:
+        files: Input file paths
+        output_dir: Directory for transcripts
+        output_format: Output format extension
+        input_dir: Directory the files were found in (default: their
+            deepest common directory)
+
+    Returns:
+        Dictionary mapping input path to output path
+    """
+    if not files:
+        return {}
+    if input_dir is None:
+        input_dir = os.path.commonpath([os.path.dirname(os.path.abspath(file_path))
+                                        for file_path in files])
+    root = os.path.abspath(input_dir)
+
+    subdirs = {}
+    stem_counts: Dict[Tuple[str, str], int] = {}
+    for file_path in files:
+        subdir = os.path.relpath(os.path.dirname(os.path.abspath(file_path)), root)
+        subdirs[file_path] = "" if subdir == os.curdir else subdir
+        key = (subdirs[file_path], Path(file_path).stem)
+        stem_counts[key] = stem_counts.get(key, 0) + 1
+
+    output_paths = {}
+    for file_path in files:
+        path = Path(file_path)
+        name = path.stem
+        if stem_counts[(subdirs[file_path], name)] > 1:
+            name = f"{name}_{path.suffix.lstrip('.').lower()}"
+        output_paths[file_path] = os.path.join(
+            output_dir, subdirs[file_path], f"{name}_transcript.{output_format}"
+        )
+    return output_paths
+
+
+def resolve_models(transcriber, files: List[str], model_name_or_path: str,
+                   model_for: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Resolve the model of every file, each distinct model once.
+
+    Args:
+        transcriber: VideoTranscriber
+        files: Input file paths
+        model_name_or_path: Whisper model name or path for all files
+        model_for: Model name or path per file, overriding the default
+
+    Returns:
+        Resolved model path per input file
+    """
+    model_for = model_for or {}
+    resolved: Dict[str, str] = {}
+    model_paths = {}
+    for file_path in files:
+        model = model_for.get(file_path, model_name_or_path)
+        if model not in resolved:
+            resolved[model] = transcriber._resolve_model_path(model)
+        model_paths[file_path] = resolved[model]
+    return model_paths
+
+
+def run_batch(transcriber, files: List[str], model_name_or_path: str,
+              output_dir: str, language: str = None,
+              output_format="txt", workers: int = None,
+              stream: bool = False, journal=None,
+              model_for: Optional[Dict[str, str]] = None,
+              on_result: Optional[Callable[[BatchItemResult], None]] = None,
+              input_dir: str = None) -> List[BatchItemResult]:
+    """
+    Transcribe files concurrently with a bounded worker pool.
+
+    Each worker only orchestrates FFmpeg and Whisper.cpp subprocesses, so a
+    thread pool is enough to keep every core busy without the cost of
+    forking Python interpreters.
+
+    Args:
+        transcriber: VideoTranscriber shared by all workers
+        files: Input file paths
+        model_name_or_path: Whisper model name or path
+        output_dir: Directory for transcripts
+        language: Language code (optional)
+        output_format: Output format, or several as a list or comma
+            separated string
+        workers: Number of concurrent jobs (default: config default)
+        stream: Pipe audio from FFmpeg into Whisper.cpp without temp files
+        journal: BatchJournal recording progress; files it lists as done
+            are skipped
+        model_for: Model name or path per input file, overriding
+            model_name_or_path (e.g. ModelPlan.model_paths())
+        on_result: Callback invoked as each file finishes
+        input_dir: Directory the files were found in; its subdirectories
+            are mirrored under output_dir (see build_output_paths)
+
+    Returns:
+        List of per-file results, in input order
+    """
+    workers = max(1, workers or config.get_default_batch_workers())
+
+    # Resolve shared state once rather than in every job
+    transcriber._check_dependencies()
+    model_paths = resolve_models(transcriber, files, model_name_or_path, model_for)
+    os.makedirs(output_dir, exist_ok=True)
+    output_formats = formats.parse_formats(output_format)
+    output_paths = build_output_paths(files, output_dir, output_formats[0], input_dir)
+
+    def process(file_path: str) -> BatchItemResult:
+        result = BatchItemResult(input_path=file_path)
+        if journal is not None:
+            done_path = journal.is_done(file_path)
+            if done_path:
+                result.output_path = done_path
+                result.success = result.skipped = True
+                return result
+            journal.start(file_path)
+
+        start = time.monotonic()
+        try:
+            result.output_path = transcriber.transcribe_video(
+                video_path=file_path,
+                model_name_or_path=model_paths[file_path],
+                output_path=output_paths[file_path],
+                language=language,
+                output_format=output_formats,
+                show_progress=False,
+                stream=stream
+            )
+            result.success = True
+        except Exception as e:
+            result.error = str(e)
+        result.elapsed = time.monotonic() - start
+        if journal is not None:
+            journal.finish(result)
+        return result
+
+    results: Dict[str, BatchItemResult] = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process, file_path) for file_path in files]
+        for future in as_completed(futures):
+            item = future.result()
+            results[item.input_path] = item
+            if on_result:
+                on_result(item)
+
+    return [results[file_path] for file_path in files]
@@ -0,0 +1,270 @@
+"""
+Transcription result cache for Local Video Transcriber
+
+Results are stored on disk under a content-addressed key derived from the
+extracted audio, the model file and the decode options, so re-running the
+same media skips Whisper.cpp entirely. The cache is bounded by total size and
+evicts the least recently used entries first.
+
+Streamed transcriptions never see the extracted audio, so they are keyed on
+the input file itself instead (see VideoTranscriber.transcribe_stream).
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config
+
+# Bump when the stored result layout changes so stale entries stop matching
+CACHE_FORMAT_VERSION = 2
+
+_SIZE_UNITS = {'': 1, 'B': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse a human readable size such as ``500M`` or ``2G`` into bytes.
+
+    Args:
+        value: Size string (bytes if no unit is given)
+
+    Returns:
+        Size in bytes
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*', str(value).upper())
+    if not match:
+        raise ValueError(f"Invalid size: {value}")
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit])
+
+
+def format_size(num_bytes: int) -> str:
+    """Format a byte count for display."""
+    if num_bytes < 1024:
+        return f"{num_bytes} B"
+    size = num_bytes / 1024
+    for unit in ['KB', 'MB']:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_identity(model_path: str) -> Dict[str, Any]:
+    """
+    Identify a model file without hashing gigabytes of weights.
+
+    The resolved path, size and modification time change whenever the model
+    is replaced or re-downloaded.
+    """
+    stat = os.stat(model_path)
+    return {
+        'path': os.path.realpath(model_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+
+
+class TranscriptionCache:
+    """Size-bounded, LRU-evicting on-disk cache of transcription results."""
+
+    def __init__(self, cache_dir: str = None, max_size: int = None):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding cache entries
+            max_size: Maximum total size of entries in bytes
+        """
+        self.cache_dir = cache_dir or config.get_default_cache_dir()
+        self.max_size = max_size if max_size is not None else config.CACHE_MAX_SIZE
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Running estimate of the total entry size, so put() only walks the
+        # cache directory when it may be over the cap. Counted on first put;
+        # entries other processes add are only seen by the next walk.
+        self._size_lock = threading.Lock()
+        self._total_size: Optional[int] = None
+
+    def make_key(self, audio_path: str, model_path: str, language: str = None,
+                 output_format: str = "txt", options: Dict[str, Any] = None) -> str:
+        """
+        Build the cache key for a transcription request.
+
+        Args:
+            audio_path: Path to the extracted audio (or, for a streamed
+                transcription, the input file)
+            model_path: Path to the resolved Whisper model
+            language: Language code (optional)
+            output_format: Output format
+            options: Any other options that change Whisper.cpp's output
+                (see VideoTranscriber.cache_options)
+
+        Returns:
+            Hex digest identifying the request
+        """
+        material = {
+            'version': CACHE_FORMAT_VERSION,
+            'audio': hash_file(audio_path),
+            'model': model_identity(model_path),
+            'language': language or 'auto',
+            'format': output_format,
+            'options': options or {},
+        }
+        encoded = json.dumps(material, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            The stored result, or None on a miss
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        # Touch the entry so eviction sees it as recently used
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """
+        Store a result and evict old entries if the cache is over its cap.
+
+        Args:
+            key: Cache key from make_key
+            result: Transcription result to store
+        """
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write atomically so concurrent readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            size = os.path.getsize(tmp_path)
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._size_lock:
+            if self._total_size is None:
+                self._total_size = sum(entry[1] for entry in self._entries())
+            else:
+                self._total_size += size - replaced
+            over = self._total_size > self.max_size
+        if over:
+            self.prune()
+
+    def _entries(self) -> List[Tuple[str, int, float]]:
+        """Return (path, size, last_used) for every entry."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarize cache usage.
+
+        Returns:
+            Dictionary with entry count, total size, cap and access times
+        """
+        entries = self._entries()
+        last_used = [entry[2] for entry in entries]
+        return {
+            'cache_dir': self.cache_dir,
+            'entries': len(entries),
+            'total_size': sum(entry[1] for entry in entries),
+            'max_size': self.max_size,
+            'oldest': min(last_used) if last_used else None,
+            'newest': max(last_used) if last_used else None,
+        }
+
+    def prune(self, max_size: int = None) -> Tuple[int, int]:
+        """
+        Evict least recently used entries until the cache fits its cap.
+
+        Args:
+            max_size: Size to shrink to (default: the configured cap)
+
+        Returns:
+            Tuple of (entries removed, bytes freed)
+        """
+        limit = self.max_size if max_size is None else max_size
+        with self._size_lock:
+            entries = self._entries()
+            total = sum(entry[1] for entry in entries)
+
+            removed = 0
+            freed = 0
+            for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+                if total <= limit:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                freed += size
+                removed += 1
+            self._total_size = total
+        return removed, freed
+
+    def clear(self) -> Tuple[int, int]:
+        """Remove every entry. Returns (entries removed, bytes freed)."""
+        return self.prune(max_size=0)
+
+
+def describe_age(timestamp: Optional[float]) -> str:
+    """Format how long ago a timestamp was, for display."""
+    if timestamp is None:
+        return "-"
+    seconds = max(0, time.time() - timestamp)
+    for unit, span in [('d', 86400), ('h', 3600), ('m', 60)]:
+        if seconds >= span:
+            return f"{int(seconds // span)}{unit} ago"
+    return f"{int(seconds)}s ago"
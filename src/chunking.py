@@ -0,0 +1,278 @@
+"""
+Chunked transcription for long recordings
+
+Long audio is split at silence boundaries, the chunks are transcribed by
+concurrent Whisper.cpp processes, and the segments are stitched back onto
+the original timeline. Chunks overlap slightly so words at a hard cut aren't
+lost; text repeated in the overlap is removed when stitching.
+"""
+
+import os
+import re
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from . import config
+from . import formats
+from .progress import ProgressTracker, run_streaming
+
+_SILENCE_START = re.compile(r'silence_start:\s*(-?\d+(?:\.\d+)?)')
+_SILENCE_END = re.compile(r'silence_end:\s*(-?\d+(?:\.\d+)?)')
+
+# Longest run of words compared when removing text repeated across a boundary
+MAX_BOUNDARY_WORDS = 8
+
+
+@dataclass
+class Chunk:
+    """A slice of the source audio.
+
+    ``start``/``end`` are the audio actually transcribed; ``core_start`` is
+    where this chunk's own content begins (start plus the overlap it shares
+    with the previous chunk).
+    """
+
+    index: int
+    start: float
+    end: float
+    core_start: float
+
+
+def get_wav_duration(audio_path: str) -> float:
+    """Return the duration of a WAV file in seconds."""
+    with wave.open(audio_path, 'rb') as wav:
+        return wav.getnframes() / float(wav.getframerate())
+
+
+def detect_silences(audio_path: str, noise_db: float = None,
+                    min_duration: float = None, ffmpeg: str = "ffmpeg",
+                    tracker: ProgressTracker = None) -> List[Tuple[float, float]]:
+    """
+    Find silent stretches using FFmpeg's silencedetect filter.
+
+    FFmpeg's stderr is parsed line by line as it arrives rather than
+    buffered, so hours of input don't pile up in memory.
+
+    Args:
+        audio_path: Path to audio file
+        noise_db: Level (dBFS) below which audio counts as silence
+        min_duration: Shortest silence to report, in seconds
+        ffmpeg: FFmpeg executable (e.g. from DiscoveryRegistry.tool)
+        tracker: Receives FFmpeg's progress as it scans the audio
+
+    Returns:
+        List of (start, end) silence intervals in seconds
+    """
+    noise_db = config.SILENCE_NOISE_DB if noise_db is None else noise_db
+    min_duration = config.SILENCE_MIN_DURATION if min_duration is None else min_duration
+    cmd = [
+        ffmpeg, "-nostdin", "-i", audio_path,
+        "-af", f"silencedetect=noise={noise_db}dB:d={min_duration}",
+        "-f", "null", "-"
+    ]
+
+    silences = []
+    start = None
+
+    def line(text: str) -> None:
+        nonlocal start
+        if tracker is not None:
+            tracker.ffmpeg_line(text)
+        match = _SILENCE_START.search(text)
+        if match:
+            start = max(0.0, float(match.group(1)))
+            return
+        match = _SILENCE_END.search(text)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+
+    run_streaming(cmd, on_stderr=line, keep_stdout=False).close()
+    if tracker is not None:
+        tracker.finish()
+    return silences
+
+
+def plan_chunks(duration: float, silences: List[Tuple[float, float]],
+                chunk_length: float, overlap: float = 0.0) -> List[Chunk]:
+    """
+    Choose chunk boundaries, preferring the middle of a silence.
+
+    Each cut is placed at the silence closest to ``chunk_length`` seconds
+    after the previous cut, searching back up to a quarter of the chunk
+    length. Without a suitable silence the audio is cut hard at the target.
+
+    Args:
+        duration: Total audio duration in seconds
+        silences: Silent intervals from detect_silences
+        chunk_length: Target chunk length in seconds
+        overlap: Seconds each chunk re-reads from the end of the previous one
+
+    Returns:
+        List of chunks covering the whole audio
+    """
+    if chunk_length <= 0:
+        raise ValueError("Chunk length must be positive")
+
+    midpoints = sorted((start + end) / 2.0 for start, end in silences)
+    window = chunk_length / 4.0
+
+    cuts = [0.0]
+    while duration - cuts[-1] > chunk_length:
+        target = cuts[-1] + chunk_length
+        candidates = [point for point in midpoints
+                      if target - window <= point <= target]
+        cuts.append(max(candidates) if candidates else target)
+    cuts.append(duration)
+
+    chunks = []
+    for index in range(len(cuts) - 1):
+        core_start = cuts[index]
+        start = max(0.0, core_start - overlap) if index else 0.0
+        chunks.append(Chunk(index=index, start=start, end=cuts[index + 1],
+                            core_start=core_start))
+    return chunks
+
+
+def split_wav(audio_path: str, chunks: List[Chunk], output_dir: str) -> List[str]:
+    """
+    Write each chunk of a WAV file to its own file.
+
+    Args:
+        audio_path: Source WAV file
+        chunks: Chunks from plan_chunks
+        output_dir: Directory for chunk files
+
+    Returns:
+        Paths of the chunk files, in chunk order
+    """
+    stem = os.path.splitext(os.path.basename(audio_path))[0]
+    paths = []
+    with wave.open(audio_path, 'rb') as source:
+        rate = source.getframerate()
+        for chunk in chunks:
+            path = os.path.join(output_dir, f"{stem}_chunk{chunk.index:04d}.wav")
+            first = int(chunk.start * rate)
+            count = int(chunk.end * rate) - first
+            source.setpos(first)
+            with wave.open(path, 'wb') as target:
+                target.setparams(source.getparams())
+                target.writeframes(source.readframes(count))
+            paths.append(path)
+    return paths
+
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r'[^\w]', '', word.lower())
+
+
+def _strip_repeated_words(previous_text: str, text: str) -> str:
+    """Drop leading words of text that repeat the end of previous_text."""
+    previous = [_normalize_word(w) for w in previous_text.split()][-MAX_BOUNDARY_WORDS:]
+    words = text.split()
+    current = [_normalize_word(w) for w in words[:MAX_BOUNDARY_WORDS]]
+
+    for size in range(min(len(previous), len(current)), 0, -1):
+        if previous[-size:] == current[:size] and any(previous[-size:]):
+            return ' '.join(words[size:])
+    return text
+
+
+def merge_chunk_segments(chunks: List[Chunk],
+                         chunk_segments: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Stitch per-chunk segments onto the original timeline.
+
+    Segments are shifted by their chunk's start. Segments centred in the
+    overlap already covered by the previous chunk are dropped, and words
+    repeated across the boundary are removed from the later segment.
+
+    Args:
+        chunks: Chunks from plan_chunks
+        chunk_segments: Segments for each chunk, relative to the chunk start
+
+    Returns:
+        Segments with global timestamps
+    """
+    merged: List[Dict[str, Any]] = []
+    for chunk, segments in zip(chunks, chunk_segments):
+        first_in_chunk = True
+        for segment in segments:
+            start = segment['start'] + chunk.start
+            end = min(segment['end'] + chunk.start, chunk.end)
+            if chunk.index and (start + end) / 2.0 < chunk.core_start:
+                continue
+
+            text = segment['text']
+            if first_in_chunk and merged:
+                text = _strip_repeated_words(merged[-1]['text'], text)
+                start = max(start, merged[-1]['end'])
+            first_in_chunk = False
+            if not text.strip():
+                continue
+
+            merged.append({'start': start, 'end': max(start, end), 'text': text})
+    return merged
+
+
+def transcribe_chunked(transcriber, audio_path: str, model_path: str,
+                       language: str = None, chunk_length: float = None,
+                       overlap: float = None, workers: int = None,
+                       on_progress=None) -> Dict[str, Any]:
+    """
+    Transcribe a long recording as parallel chunks.
+
+    Args:
+        transcriber: VideoTranscriber used for each chunk
+        audio_path: Path to the extracted 16 kHz WAV
+        model_path: Path to Whisper model
+        language: Language code (optional)
+        chunk_length: Target chunk length in seconds
+        overlap: Seconds of overlap between neighbouring chunks
+        workers: Number of chunks transcribed concurrently
+        on_progress: Called with a ProgressEvent as silence detection
+            scans the audio ("silence" stage) and as each chunk completes
+
+    Returns:
+        Whisper.cpp shaped JSON result on the original timeline
+    """
+    chunk_length = chunk_length or config.CHUNK_LENGTH_DEFAULT
+    overlap = config.CHUNK_OVERLAP_DEFAULT if overlap is None else overlap
+    workers = max(1, workers or config.get_default_batch_workers())
+
+    duration = get_wav_duration(audio_path)
+    tool = transcriber.registry.tool("ffmpeg")
+    silences = detect_silences(audio_path, ffmpeg=tool.path if tool else "ffmpeg",
+                               tracker=ProgressTracker("silence", on_progress, duration,
+                                                       audio_path))
+    chunks = plan_chunks(duration, silences, chunk_length, overlap)
+    transcriber.console.print(
+        f"[blue]Transcribing {len(chunks)} chunk(s) with {workers} worker(s)...[/blue]"
+    )
+
+    # Chunks finish out of order, so progress counts each chunk's own content
+    tracker = ProgressTracker("transcribe", on_progress, duration, audio_path)
+    core_ends = [chunk.core_start for chunk in chunks[1:]] + [duration]
+    core_lengths = [end - chunk.core_start for chunk, end in zip(chunks, core_ends)]
+
+    def transcribe_chunk(index: int) -> Dict[str, Any]:
+        result = transcriber.transcribe_audio(chunk_paths[index], model_path, language, "json")
+        tracker.advance(core_lengths[index])
+        return result
+
+    chunk_paths = split_wav(audio_path, chunks, os.path.dirname(audio_path))
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(transcribe_chunk, range(len(chunk_paths))))
+        tracker.finish()
+    finally:
+        for path in chunk_paths:
+            prefix = os.path.splitext(path)[0]
+            for leftover in [path, f"{prefix}.json"]:
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+    segments = merge_chunk_segments(chunks, [formats.get_segments(r) for r in results])
+    return formats.build_result(segments, base=results[0] if results else None)
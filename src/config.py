@@ -36,11 +36,11 @@ SUPPORTED_VIDEO_FORMATS = [
 
 # Supported audio formats for output
 SUPPORTED_AUDIO_FORMATS = [
-    '.wav', '.mp3', '.aac', '.ogg', '.flac'
+    '.wav', '.mp3', '.aac', '.ogg', '.flac', '.m4a', '.opus'
 ]
 
-# Output formats
-OUTPUT_FORMATS = ['txt', 'srt', 'vtt', 'json']
+# Output formats (jsonl.gz and jsonl.zst are compressed JSONL, see segments.py)
+OUTPUT_FORMATS = ['txt', 'srt', 'vtt', 'json', 'jsonl', 'jsonl.gz', 'jsonl.zst']
 
 # Language codes (common ones)
 LANGUAGE_CODES = {
@@ -174,6 +174,127 @@ FFMPEG_AUDIO_SETTINGS = {
     'format': 'wav'         # WAV format
 }
 
+# FFmpeg decoder/filter threads per extraction; 0 lets FFmpeg decide, which
+# oversubscribes the CPU when many extractions run at once
+FFMPEG_THREADS = int(os.environ.get('TRANSCRIBER_FFMPEG_THREADS', 0))
+
+# Threads Whisper.cpp uses per process when -t is not given
+WHISPER_DEFAULT_THREADS = 4
+
+# Transcription result cache size cap in bytes (override with TRANSCRIBER_CACHE_MAX_SIZE)
+CACHE_MAX_SIZE = int(os.environ.get('TRANSCRIBER_CACHE_MAX_SIZE', 1024 ** 3))
+
+# Duplicate detection (dedup): minimum share of matching fingerprint bits
+# (unrelated audio scores about 0.5), how far a copy's start may be shifted,
+# how much durations may differ and how much of the longer recording the
+# compared part must cover
+DEDUP_SIMILARITY_THRESHOLD = float(os.environ.get('TRANSCRIBER_DEDUP_THRESHOLD', 0.75))
+DEDUP_MAX_OFFSET_SECONDS = 1.0
+DEDUP_DURATION_TOLERANCE = 0.02
+DEDUP_MIN_OVERLAP = 0.9
+
+# --model auto: processing seconds per audio second assumed for models not
+# yet measured on this host (Whisper.cpp on about four CPU threads); the
+# ratio of measured to assumed speed of other models scales them
+MODEL_REALTIME_FACTOR_PRIORS = {
+    'tiny': 0.04,
+    'base': 0.08,
+    'small': 0.25,
+    'medium': 0.7,
+    'large': 1.4,
+    'large-v2': 1.4,
+}
+# Target when neither --deadline nor --max-rtf is given (1.0 = realtime)
+AUTO_MODEL_MAX_RTF = 1.0
+# Share of a deadline planned for transcription; the rest covers extraction,
+# model loading and estimation error
+AUTO_MODEL_DEADLINE_MARGIN = 0.85
+# Weight kept by older measurements each time a model's speed is recorded
+THROUGHPUT_DECAY = 0.8
+
+# Model warm-up before batch and watch runs: page cache prefetched models
+# may fill (TRANSCRIBER_PREFETCH_BUDGET in bytes; 0 = this share of available
+# memory) and the read size used to hash and prefetch them
+MODEL_PREFETCH_BUDGET = int(os.environ.get('TRANSCRIBER_PREFETCH_BUDGET', 0))
+MODEL_PREFETCH_MEMORY_SHARE = 0.5
+MODEL_READ_CHUNK = 8 * 1024 ** 2
+
+# Voice activity detection (--vad): a 30 ms frame is speech when it is
+# VAD_ENERGY_MARGIN_DB above the recording's noise floor (and above
+# VAD_MIN_ENERGY_DB dBFS), mostly in the speech band, not noise-flat and its
+# level moves like syllables do over VAD_MODULATION_SECONDS
+VAD_ENERGY_MARGIN_DB = 12.0
+VAD_MIN_ENERGY_DB = -55.0
+VAD_MIN_SPEECH_BAND_RATIO = 0.5
+VAD_MAX_FLATNESS = 0.5
+VAD_MIN_MODULATION_DB = 3.0
+VAD_MODULATION_SECONDS = 0.5
+# Speech spans: shortest kept, padding on each side, shortest pause that
+# splits two spans (seconds)
+VAD_MIN_SPEECH_SECONDS = 0.3
+VAD_PADDING_SECONDS = 0.3
+VAD_MIN_SILENCE_SECONDS = 1.0
+# Below this many seconds of non-speech the original audio is used as is
+VAD_MIN_SKIPPED_SECONDS = 2.0
+
+# Per-job scratch directories (see scratch.py): RAM-backed location tried
+# first (TRANSCRIBER_SCRATCH_RAM_DIR="" disables it), the share of its free
+# space jobs may take, the bytes all open jobs may reserve together
+# (TRANSCRIBER_SCRATCH_QUOTA, 0 = unlimited), the directory name prefix and
+# how old a directory without its lock file must be before it is swept
+SCRATCH_RAM_DIR = os.environ.get('TRANSCRIBER_SCRATCH_RAM_DIR', '/dev/shm')
+SCRATCH_RAM_MAX_SHARE = 0.5
+SCRATCH_QUOTA = int(os.environ.get('TRANSCRIBER_SCRATCH_QUOTA', 4 * 1024 ** 3))
+SCRATCH_PREFIX = 'local-transcriber-job-'
+SCRATCH_ORPHAN_GRACE_SECONDS = 60
+
+# Local HTTP job service (serve, see service.py): default port, jobs that may
+# wait for a worker before submissions are refused with 429, largest upload
+# accepted, finished jobs kept for status queries and the Retry-After hint
+# sent with a 429 (seconds)
+SERVICE_PORT = 8765
+SERVICE_QUEUE_SIZE = 32
+SERVICE_MAX_UPLOAD_BYTES = 8 * 1024 ** 3
+SERVICE_JOB_HISTORY = 1000
+SERVICE_RETRY_AFTER_SECONDS = 5
+
+# JSONL transcripts (see segments.py) are written in independently compressed
+# blocks of about this much audio, or this many uncompressed bytes, each one
+# an entry in the seek index
+JSONL_BLOCK_SECONDS = 60.0
+JSONL_BLOCK_BYTES = 256 * 1024
+
+# Transcript search (see search.py): words of context in each hit's snippet
+SEARCH_SNIPPET_TOKENS = 12
+
+# Long-recording chunking (seconds)
+CHUNK_LENGTH_DEFAULT = 600.0
+CHUNK_OVERLAP_DEFAULT = 2.0
+
+# Silence detection used to place chunk boundaries
+SILENCE_NOISE_DB = -35
+SILENCE_MIN_DURATION = 0.5
+
+# Extracted files allowed to wait for inference in pipelined batches
+PIPELINE_QUEUE_DEPTH = 2
+
+# Batch journal written to the output directory (used by batch --resume)
+JOURNAL_FILENAME = ".transcriber-journal.sqlite3"
+
+# Watch mode: a file must stop changing for this long before it is
+# transcribed; the polling fallback rescans this often (seconds)
+WATCH_SETTLE_SECONDS = 2.0
+WATCH_POLL_INTERVAL = 1.0
+
+# Subprocess output handling: stderr lines kept for error messages, and
+# stdout bytes held in memory before spilling to a temp file
+SUBPROCESS_STDERR_TAIL_LINES = 200
+SUBPROCESS_STDOUT_SPOOL_SIZE = 1024 * 1024
+
+# Resident whisper-server backend (seconds)
+SERVER_IDLE_TIMEOUT = 300.0
+SERVER_STARTUP_TIMEOUT = 120.0
+
 # Whisper.cpp model sizes and their characteristics
 WHISPER_MODELS = {
     'tiny': {
@@ -236,6 +357,46 @@ def get_default_temp_dir():
     """Get the default temporary directory."""
     return os.path.join(tempfile.gettempdir(), 'local-transcriber')
 
+def get_default_batch_workers():
+    """Get the default number of concurrent batch jobs.
+
+    Whisper.cpp uses 4 threads per process by default, so run roughly one
+    job per 4 available cores.
+    """
+    return max(1, (os.cpu_count() or 1) // WHISPER_DEFAULT_THREADS)
+
+def _cache_path(env_var, name):
+    """Path from env_var, else ``name`` in the local-transcriber XDG cache directory."""
+    path = os.environ.get(env_var)
+    if path:
+        return path
+    cache_home = os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))
+    return os.path.join(cache_home, 'local-transcriber', name)
+
+def get_default_cache_dir():
+    """Get the default directory for cached transcription results."""
+    return _cache_path('TRANSCRIBER_CACHE_DIR', 'transcripts')
+
+def get_default_discovery_file():
+    """Get the default file caching discovered executables and models."""
+    return _cache_path('TRANSCRIBER_DISCOVERY_FILE', 'discovery.json')
+
+def get_default_dedup_index():
+    """Get the default fingerprint index used for duplicate detection."""
+    return _cache_path('TRANSCRIBER_DEDUP_INDEX', 'fingerprints.sqlite3')
+
+def get_default_throughput_file():
+    """Get the default file recording measured per-model transcription speed."""
+    return _cache_path('TRANSCRIBER_THROUGHPUT_FILE', 'throughput.json')
+
+def get_default_model_records_dir():
+    """Get the directory for model verification records of read-only models."""
+    return _cache_path('TRANSCRIBER_MODEL_RECORDS_DIR', 'models')
+
+def get_default_search_index():
+    """Get the default full-text index of saved transcripts."""
+    return _cache_path('TRANSCRIBER_SEARCH_INDEX', 'search.sqlite3')
+
 def get_default_output_dir():
     """Get the default output directory."""
     return os.path.join(os.getcwd(), 'transcriptions')
@@ -254,4 +415,9 @@ def validate_output_format(format_name):
 
 def validate_video_format(file_path):
     """Validate if a file has a supported video format."""
-    return Path(file_path).suffix.lower() in SUPPORTED_VIDEO_FORMATS 
\ No newline at end of file
+    return Path(file_path).suffix.lower() in SUPPORTED_VIDEO_FORMATS
+
+def validate_media_format(file_path):
+    """Validate if a file has a supported video or audio format."""
+    suffix = Path(file_path).suffix.lower()
+    return suffix in SUPPORTED_VIDEO_FORMATS or suffix in SUPPORTED_AUDIO_FORMATS 
\ No newline at end of file
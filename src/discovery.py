@@ -0,0 +1,326 @@
+"""
+Tool and model discovery for Local Video Transcriber
+
+Finding Whisper.cpp, FFmpeg and the installed models means statting a few
+dozen candidate paths and spawning ``ffmpeg -version``. DiscoveryRegistry
+does that once per process and keeps the answers in a small JSON file. A
+cached answer is only reused while the paths it came from keep the same
+modification time and size, so a rebuilt binary or a newly downloaded model
+is noticed without help; ``--rescan`` throws everything away (e.g. after
+installing a Whisper.cpp build somewhere that is searched earlier).
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from . import config
+
+# Bump when the cache file layout changes so old files are ignored
+DISCOVERY_FORMAT_VERSION = 1
+
+# Searched in order after $WHISPER_CPP_DIR; whisper-cli builds win over the
+# deprecated main executable
+WHISPER_CANDIDATES = [
+    # Container paths (preferred) - whisper-cli first
+    "/opt/whisper.cpp/whisper-cli",
+    "/opt/whisper.cpp/build/bin/whisper-cli",
+    # Local development paths
+    "./whisper.cpp/whisper-cli",
+    "./whisper.cpp/build/bin/whisper-cli",
+    "../whisper.cpp/whisper-cli",
+    "../whisper.cpp/build/bin/whisper-cli",
+    "~/whisper.cpp/whisper-cli",
+    "~/whisper.cpp/build/bin/whisper-cli",
+    # Fallback to main executable (deprecated but still works)
+    "/opt/whisper.cpp/main",
+    "/opt/whisper.cpp/build/bin/main",
+    "./whisper.cpp/main",
+    "./whisper.cpp/build/bin/main",
+    "../whisper.cpp/main",
+    "../whisper.cpp/build/bin/main",
+    "~/whisper.cpp/main",
+    "~/whisper.cpp/build/bin/main",
+    "/usr/local/bin/whisper-main",
+    "/opt/whisper.cpp/whisper-main",
+]
+
+
+@dataclass
+class ToolInfo:
+    """An external executable and the version it reports."""
+
+    path: str
+    version: str
+
+
+def _stamp(path: str) -> Optional[List[int]]:
+    """Modification time and size of a path, or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _is_executable(path: str) -> bool:
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def whisper_candidates() -> List[str]:
+    """Paths searched for the Whisper.cpp executable, in priority order."""
+    candidates = []
+    whisper_dir = os.environ.get('WHISPER_CPP_DIR')
+    if whisper_dir:
+        candidates += [os.path.join(whisper_dir, "whisper-cli"),
+                       os.path.join(whisper_dir, "main")]
+    return candidates + [os.path.abspath(os.path.expanduser(path))
+                         for path in WHISPER_CANDIDATES]
+
+
+# The container's media input directory, also searched for models
+INPUT_MODEL_DIRECTORY = "/app/input"
+
+
+def model_directories() -> List[str]:
+    """Directories searched for ggml models, in priority order."""
+    whisper_dir = os.environ.get('WHISPER_CPP_DIR', '/opt/whisper.cpp')
+    directories = [
+        "./whisper.cpp/models",
+        "~/whisper.cpp/models",
+        "/opt/whisper.cpp/models",
+        "/usr/local/whisper.cpp/models",
+        INPUT_MODEL_DIRECTORY,  # Allow models in input directory
+        # Where _download_model puts them
+        os.path.join(whisper_dir, "models"),
+    ]
+    resolved = []
+    for directory in directories:
+        directory = os.path.abspath(os.path.expanduser(directory))
+        if directory not in resolved:
+            resolved.append(directory)
+    return resolved
+
+
+class DiscoveryRegistry:
+    """Memoized, persisted lookups of executables, versions and models."""
+
+    def __init__(self, cache_path: str = None):
+        """
+        Args:
+            cache_path: JSON file holding discovery results (default:
+                config.get_default_discovery_file())
+        """
+        self.cache_path = cache_path or config.get_default_discovery_file()
+        self._lock = threading.RLock()
+        self._data = None
+        # Answers already validated in this process
+        self._whisper = {}
+        self._models = None
+
+    def _load(self) -> Dict:
+        if self._data is None:
+            try:
+                with open(self.cache_path, encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') != DISCOVERY_FORMAT_VERSION:
+                    raise ValueError("stale discovery cache")
+            except (OSError, ValueError):
+                data = {'version': DISCOVERY_FORMAT_VERSION}
+            data.setdefault('whisper', {})
+            data.setdefault('tools', {})
+            self._data = data
+        return self._data
+
+    def _save(self) -> None:
+        # Best effort: a read-only cache directory only costs a re-probe
+        directory = os.path.dirname(self.cache_path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, indent=1)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def rescan(self) -> None:
+        """Forget everything, in memory and on disk."""
+        with self._lock:
+            self._data = None
+            self._whisper = {}
+            self._models = None
+            try:
+                os.remove(self.cache_path)
+            except FileNotFoundError:
+                pass
+
+    def whisper_executable(self) -> Optional[str]:
+        """
+        Find the Whisper.cpp CLI executable.
+
+        Returns:
+            Path to the executable, or None if none of the candidates (or
+            ``whisper-main`` on PATH) exists
+        """
+        # Relative candidates and $WHISPER_CPP_DIR make the answer depend on
+        # where and how we were started
+        key = "|".join([os.environ.get('WHISPER_CPP_DIR', ''), os.getcwd(),
+                        os.path.expanduser("~")])
+        with self._lock:
+            if key in self._whisper:
+                return self._whisper[key]
+
+            entry = self._load()['whisper'].get(key)
+            if entry and entry['stamp'] == _stamp(entry['path']) and _is_executable(entry['path']):
+                self._whisper[key] = entry['path']
+                return entry['path']
+
+            path = next((c for c in whisper_candidates() if _is_executable(c)), None)
+            path = path or shutil.which("whisper-main")
+            if path is not None:
+                self._data['whisper'][key] = {'path': path, 'stamp': _stamp(path)}
+                self._save()
+                self._whisper[key] = path
+            return path
+
+    def tool(self, name: str) -> Optional[ToolInfo]:
+        """
+        Locate an executable on PATH and read its ``-version`` banner.
+
+        The PATH lookup is repeated on every call (it is only a few stats and
+        PATH may change); the version probe is not, while the binary's
+        modification time and size stay the same.
+
+        Args:
+            name: Executable name, e.g. "ffmpeg"
+
+        Returns:
+            ToolInfo, or None if it is missing or does not run
+        """
+        path = shutil.which(name)
+        if path is None:
+            return None
+        cached = self.cached_tool(path)
+        if cached is not None:
+            return cached
+
+        try:
+            result = subprocess.run([path, "-version"], capture_output=True, text=True,
+                                    errors='replace', check=True)
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return self.record_tool(path, result.stdout)
+
+    def cached_tool(self, path: str) -> Optional[ToolInfo]:
+        """
+        The version recorded for an executable, while it is unchanged.
+
+        Args:
+            path: Path to the executable
+
+        Returns:
+            ToolInfo, or None if it has to be probed (again)
+        """
+        stamp = _stamp(path)
+        with self._lock:
+            entry = self._load()['tools'].get(path)
+            if entry and entry['stamp'] == stamp:
+                return ToolInfo(path=path, version=entry['version'])
+        return None
+
+    def record_tool(self, path: str, banner: str) -> ToolInfo:
+        """
+        Remember what an executable's ``-version`` printed.
+
+        Args:
+            path: Path to the executable
+            banner: Its ``-version`` output (the first line is kept)
+
+        Returns:
+            ToolInfo
+        """
+        version = (banner.strip().splitlines() or [""])[0]
+        with self._lock:
+            self._load()['tools'][path] = {'stamp': _stamp(path), 'version': version}
+            self._save()
+        return ToolInfo(path=path, version=version)
+
+    def models(self) -> Dict[str, str]:
+        """
+        Installed ggml models.
+
+        Returns:
+            Dictionary of model name (see config.WHISPER_MODELS) to path,
+            taking the first directory from model_directories() that has it
+        """
+        with self._lock:
+            if self._models is not None:
+                return dict(self._models)
+
+            # A directory's mtime changes whenever a file is added or removed
+            directories = model_directories()
+            stamps = {d: _stamp(d) for d in directories}
+            entry = self._load().get('models')
+            if entry and entry['directories'] == stamps:
+                self._models = entry['paths']
+                return dict(self._models)
+
+            paths = {}
+            for directory in directories:
+                if stamps[directory] is None:
+                    continue
+                for model_name in config.WHISPER_MODELS:
+                    path = os.path.join(directory, f"ggml-{model_name}.bin")
+                    if model_name not in paths and os.path.isfile(path):
+                        paths[model_name] = path
+
+            self._data['models'] = {'directories': stamps, 'paths': paths}
+            self._save()
+            self._models = paths
+            return dict(paths)
+
+    def find_model(self, model_name: str) -> Optional[str]:
+        """
+        Path of an installed model.
+
+        Args:
+            model_name: Name from config.WHISPER_MODELS
+
+        Returns:
+            Path to the ggml file, or None if it is not installed
+        """
+        path = self.models().get(model_name)
+        if path is not None and not os.path.isfile(path):
+            # Removed behind our back; look again
+            self.forget_models()
+            path = self.models().get(model_name)
+        return path
+
+    def forget_models(self) -> None:
+        """Drop the model list (e.g. after downloading a model)."""
+        with self._lock:
+            self._models = None
+            self._load().pop('models', None)
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_registry() -> DiscoveryRegistry:
+    """The process-wide DiscoveryRegistry."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = DiscoveryRegistry()
+        return _default_registry
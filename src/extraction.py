@@ -0,0 +1,243 @@
+"""
+Audio extraction planning for Local Video Transcriber
+
+Whisper.cpp wants 16 kHz mono 16-bit PCM WAV. Rather than always running a
+full FFmpeg transcode, the input is probed with ffprobe first and the
+cheapest route is chosen:
+
+- passthrough: the input already is such a WAV, so it is linked (or copied)
+  into place and FFmpeg is not run at all
+- copy: the audio stream is already 16 kHz mono PCM in another container,
+  so it is remuxed without decoding
+- transcode: the audio stream is decoded and resampled
+
+In every FFmpeg case only the chosen audio stream is mapped and video,
+subtitle and data streams are dropped, so multi-stream containers don't
+decode anything they don't need. Files without an audio stream are rejected
+before anything is launched. Without ffprobe the planner falls back to the
+first audio stream and a transcode.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from . import config
+
+PASSTHROUGH = "passthrough"
+COPY = "copy"
+TRANSCODE = "transcode"
+
+
+class NoAudioStreamError(RuntimeError):
+    """The input has no audio stream to transcribe."""
+
+
+@dataclass
+class AudioStream:
+    """An audio stream reported by ffprobe."""
+
+    index: int
+    codec: str
+    sample_rate: int
+    channels: int
+    default: bool = False
+
+    @property
+    def whisper_ready(self) -> bool:
+        """True if the samples are already what Whisper.cpp expects."""
+        return (self.codec == config.FFMPEG_AUDIO_SETTINGS['codec']
+                and self.sample_rate == int(config.FFMPEG_AUDIO_SETTINGS['sample_rate'])
+                and self.channels == int(config.FFMPEG_AUDIO_SETTINGS['channels']))
+
+
+@dataclass
+class MediaInfo:
+    """What ffprobe knows about an input file."""
+
+    path: str
+    format_name: str
+    duration: Optional[float]
+    audio_streams: List[AudioStream] = field(default_factory=list)
+    other_streams: int = 0
+
+
+@dataclass
+class ExtractionPlan:
+    """How to turn one input into Whisper-ready audio.
+
+    Attributes:
+        action: PASSTHROUGH, COPY or TRANSCODE
+        stream: Audio stream to use, or None if the input was not probed
+        duration: Input duration in seconds, if known
+    """
+
+    action: str
+    stream: Optional[AudioStream] = None
+    duration: Optional[float] = None
+
+
+def _to_int(value, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def build_probe_command(path: str) -> List[str]:
+    """Build the ffprobe command that describes a media file as JSON."""
+    return ["ffprobe", "-v", "error", "-of", "json",
+            "-show_entries",
+            "format=format_name,duration:"
+            "stream=index,codec_type,codec_name,sample_rate,channels:"
+            "stream_disposition=default",
+            path]
+
+
+def parse_probe_output(path: str, stdout: str) -> Optional[MediaInfo]:
+    """
+    Turn ffprobe's JSON output into a MediaInfo.
+
+    Args:
+        path: Media file that was probed
+        stdout: Output of the build_probe_command command
+
+    Returns:
+        MediaInfo, or None if the output is not ffprobe JSON
+    """
+    try:
+        data = json.loads(stdout)
+    except ValueError:
+        return None
+
+    fmt = data.get('format', {})
+    try:
+        duration = float(fmt['duration'])
+    except (KeyError, TypeError, ValueError):
+        duration = None
+
+    info = MediaInfo(path=path, format_name=fmt.get('format_name', ''), duration=duration)
+    for stream in data.get('streams', []):
+        if stream.get('codec_type') != 'audio':
+            info.other_streams += 1
+            continue
+        info.audio_streams.append(AudioStream(
+            index=_to_int(stream.get('index')),
+            codec=stream.get('codec_name', ''),
+            sample_rate=_to_int(stream.get('sample_rate')),
+            channels=_to_int(stream.get('channels')),
+            default=bool(stream.get('disposition', {}).get('default')),
+        ))
+    return info
+
+
+def probe_media(path: str) -> Optional[MediaInfo]:
+    """
+    Describe a media file with ffprobe.
+
+    Args:
+        path: Media file
+
+    Returns:
+        MediaInfo, or None if ffprobe is missing or cannot read the file
+        (FFmpeg gets to report the problem then)
+    """
+    try:
+        result = subprocess.run(build_probe_command(path), capture_output=True,
+                                text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return parse_probe_output(path, result.stdout)
+
+
+def plan_extraction(info: Optional[MediaInfo]) -> ExtractionPlan:
+    """
+    Choose how to extract audio from a probed input.
+
+    Args:
+        info: Result of probe_media (None if probing failed)
+
+    Returns:
+        ExtractionPlan
+
+    Raises:
+        NoAudioStreamError: if the input has no audio stream
+    """
+    if info is None:
+        return ExtractionPlan(action=TRANSCODE)
+    if not info.audio_streams:
+        raise NoAudioStreamError(f"No audio stream in {info.path}")
+
+    # The stream players pick by default, else the first one
+    stream = next((s for s in info.audio_streams if s.default), info.audio_streams[0])
+    if stream.whisper_ready:
+        single_wav = ('wav' in info.format_name.split(',')
+                      and len(info.audio_streams) == 1 and not info.other_streams)
+        action = PASSTHROUGH if single_wav else COPY
+    else:
+        action = TRANSCODE
+    return ExtractionPlan(action=action, stream=stream, duration=info.duration)
+
+
+def build_extract_command(input_path: str, output_path: str,
+                          plan: ExtractionPlan = None, threads: int = None) -> List[str]:
+    """
+    Build the FFmpeg command for a plan.
+
+    Passing "-" as output_path writes a WAV stream to stdout. A PASSTHROUGH
+    plan is built as a COPY here, for callers that need a command (pipes).
+
+    Args:
+        input_path: Media file
+        output_path: WAV file, or "-" for stdout
+        plan: ExtractionPlan (default: transcode the first audio stream)
+        threads: FFmpeg decoder and filter threads (FFmpeg's choice when
+            None or 0)
+
+    Returns:
+        Command line
+    """
+    plan = plan or ExtractionPlan(action=TRANSCODE)
+    cmd = ["ffmpeg"]
+    if threads:
+        cmd.extend(["-threads", str(threads), "-filter_threads", str(threads)])
+    cmd.extend([
+        "-i", input_path,
+        "-map", f"0:{plan.stream.index}" if plan.stream else "0:a:0",
+        "-vn", "-sn", "-dn",  # Never decode video, subtitles or data
+    ])
+    if plan.action in (PASSTHROUGH, COPY):
+        cmd.extend(["-c:a", "copy"])
+    else:
+        cmd.extend([
+            "-ar", config.FFMPEG_AUDIO_SETTINGS['sample_rate'],  # 16kHz sample rate
+            "-ac", config.FFMPEG_AUDIO_SETTINGS['channels'],     # Mono audio
+            "-c:a", config.FFMPEG_AUDIO_SETTINGS['codec'],       # 16-bit PCM
+        ])
+    if output_path == "-":
+        # Piped output: no container seeking, keep stderr small
+        cmd.extend(["-f", "wav", "-loglevel", "error", "-nostdin"])
+    else:
+        cmd.append("-y")  # Overwrite output file
+    cmd.append(output_path)
+    return cmd
+
+
+def link_or_copy(source: str, destination: str) -> None:
+    """
+    Put an already compliant WAV at ``destination`` without re-encoding.
+
+    A hard link costs nothing; across file systems the file is copied.
+    Either way removing ``destination`` later leaves the source alone.
+    """
+    if os.path.abspath(source) == os.path.abspath(destination):
+        raise ValueError(f"Input and extracted audio are the same file: {source}")
+    if os.path.lexists(destination):
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
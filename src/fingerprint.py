@@ -0,0 +1,393 @@
+"""
+Audio fingerprints and duplicate detection for Local Video Transcriber
+
+A re-muxed or re-encoded copy of a recording has different bytes (so the
+transcription cache misses it) but nearly the same sound. After extraction
+the 16 kHz PCM is reduced to a compact fingerprint: one 32-bit word per
+32 ms frame, each bit saying whether the energy difference between two
+neighbouring frequency bands (300-2000 Hz) grew or shrank since the previous
+frame. Such bits survive lossy codecs, resampling and volume changes, and
+two fingerprints are compared by the share of matching bits at the best
+small time offset.
+
+Fingerprints and the Whisper.cpp result they led to are kept in a SQLite
+index in the cache directory. A new file whose fingerprint is similar
+enough to an indexed one, transcribed with the same model and language,
+reuses that result instead of running Whisper.cpp again; every such reuse
+is logged for ``dedup report``.
+
+NumPy is only needed when de-duplication is enabled
+(``pip install local-transcriber[dedup]``).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import wave
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import config
+from .cache import model_identity
+
+# Bump when the fingerprint parameters or table layout change; older
+# indexes are recreated
+FINGERPRINT_FORMAT_VERSION = 1
+
+# Analysis frame and hop in samples (256 ms frames every 32 ms)
+SAMPLE_RATE = 16000
+FRAME_SIZE = 4096
+HOP_SIZE = 512
+# 33 log-spaced bands give 32 energy differences, i.e. one 32-bit word
+BAND_COUNT = 33
+BAND_LOW_HZ = 300.0
+BAND_HIGH_HZ = 2000.0
+# Frames read and transformed at once; bounds memory for long recordings
+BLOCK_FRAMES = 512
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS fingerprints (
+        id          INTEGER PRIMARY KEY,
+        source_path TEXT NOT NULL,
+        duration    REAL NOT NULL,
+        model       TEXT NOT NULL,
+        language    TEXT NOT NULL,
+        fingerprint BLOB NOT NULL,
+        result      TEXT NOT NULL,
+        created_at  REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS fingerprints_lookup "
+    "ON fingerprints (model, language, duration)",
+    """
+    CREATE TABLE IF NOT EXISTS matches (
+        id            INTEGER PRIMARY KEY,
+        source_path   TEXT NOT NULL,
+        original_path TEXT NOT NULL,
+        similarity    REAL NOT NULL,
+        created_at    REAL NOT NULL
+    )
+    """,
+]
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("Duplicate detection needs NumPy: "
+                           "pip install local-transcriber[dedup]") from None
+    return numpy
+
+
+@dataclass
+class Fingerprint:
+    """Fingerprint of one audio file.
+
+    Attributes:
+        words: One uint32 per frame (NumPy array)
+        duration: Audio duration in seconds
+    """
+
+    words: Any
+    duration: float
+
+    def to_bytes(self) -> bytes:
+        return self.words.astype('<u4').tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, duration: float) -> "Fingerprint":
+        np = _numpy()
+        return cls(words=np.frombuffer(data, dtype='<u4').astype(np.uint32),
+                   duration=duration)
+
+
+@dataclass
+class DuplicateMatch:
+    """An indexed recording that a new file duplicates."""
+
+    original_path: str
+    similarity: float
+    result: Dict[str, Any]
+
+
+def _band_edges(np):
+    """FFT bin indices bounding the fingerprint bands."""
+    hz = np.geomspace(BAND_LOW_HZ, BAND_HIGH_HZ, BAND_COUNT + 1)
+    return np.round(hz * FRAME_SIZE / SAMPLE_RATE).astype(np.intp)
+
+
+def read_pcm_blocks(audio_path: str, block_samples: int,
+                    scale: float = 1.0) -> Iterator[Any]:
+    """
+    Read a 16 kHz 16-bit PCM WAV file a block at a time.
+
+    Only one block is held in memory, however long the recording.
+
+    Args:
+        audio_path: 16 kHz WAV file (channels are averaged)
+        block_samples: Samples per block (the last one may be shorter)
+        scale: Factor applied to the int16 sample values
+
+    Yields:
+        Mono float32 NumPy arrays
+    """
+    np = _numpy()
+    with wave.open(audio_path, 'rb') as wav:
+        if wav.getsampwidth() != 2 or wav.getframerate() != SAMPLE_RATE:
+            raise ValueError(f"Expected 16 kHz 16-bit PCM audio: {audio_path}")
+        channels = wav.getnchannels()
+        while True:
+            data = wav.readframes(block_samples)
+            if not data:
+                break
+            samples = np.frombuffer(data, dtype='<i2').astype(np.float32)
+            if channels > 1:
+                samples = samples[:len(samples) - len(samples) % channels]
+                samples = samples.reshape(-1, channels).mean(axis=1)
+            if scale != 1.0:
+                samples *= np.float32(scale)
+            yield samples
+
+
+def compute_fingerprint(audio_path: str) -> Fingerprint:
+    """
+    Fingerprint an extracted 16-bit PCM WAV file.
+
+    The audio is read and transformed BLOCK_FRAMES frames at a time, so
+    memory stays flat for long recordings.
+
+    Args:
+        audio_path: 16 kHz WAV file (channels are averaged)
+
+    Returns:
+        Fingerprint (no words if the audio is shorter than two frames)
+    """
+    np = _numpy()
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+    edges = _band_edges(np)
+    weights = np.left_shift(np.uint32(1), np.arange(BAND_COUNT - 1, dtype=np.uint32))
+    words = []
+    total = 0
+    # Samples not yet consumed by a frame (frames overlap by FRAME_SIZE - HOP_SIZE)
+    pending = np.zeros(0, dtype=np.float32)
+    # Band differences of the last frame of the previous block
+    previous = None
+
+    for samples in read_pcm_blocks(audio_path, BLOCK_FRAMES * HOP_SIZE):
+        total += len(samples)
+        pending = np.concatenate([pending, samples])
+        if len(pending) < FRAME_SIZE:
+            continue
+        # Strided view: every frame shares the sample buffer, nothing is copied
+        frames = np.lib.stride_tricks.sliding_window_view(pending, FRAME_SIZE)[::HOP_SIZE]
+        power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2
+        # Sum each band's bins: cumulative sums sampled at the band edges
+        totals = np.cumsum(power[:, edges[0]:edges[-1]], axis=1)
+        totals = np.concatenate([np.zeros((len(frames), 1)), totals], axis=1)
+        energies = np.diff(totals[:, edges - edges[0]], axis=1)
+        band_diff = energies[:, :-1] - energies[:, 1:]
+        if previous is not None:
+            band_diff = np.concatenate([previous, band_diff])
+        bits = (band_diff[1:] - band_diff[:-1]) > 0
+        words.append((bits.astype(np.uint32) * weights).sum(axis=1, dtype=np.uint32))
+        previous = band_diff[-1:]
+        pending = pending[len(frames) * HOP_SIZE:]
+
+    words = np.concatenate(words) if words else np.zeros(0, dtype=np.uint32)
+    return Fingerprint(words=words, duration=total / SAMPLE_RATE)
+
+
+def _popcount(np, words):
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(words).sum())
+    return int(np.unpackbits(words.view(np.uint8)).sum())
+
+
+def similarity(first: Fingerprint, second: Fingerprint,
+               max_offset: float = None) -> float:
+    """
+    Compare two fingerprints.
+
+    The shorter one is slid over the longer one by up to ``max_offset``
+    seconds (remuxing can shift the start a little) and the best share of
+    equal bits is kept. Only overlaps covering most of the longer recording
+    count, so an excerpt does not match the whole.
+
+    Args:
+        first: Fingerprint
+        second: Fingerprint
+        max_offset: Largest shift in seconds (default:
+            config.DEDUP_MAX_OFFSET_SECONDS)
+
+    Returns:
+        1.0 for identical fingerprints, about 0.5 for unrelated audio
+    """
+    np = _numpy()
+    a, b = first.words, second.words
+    longest = max(len(a), len(b))
+    if not len(a) or not len(b):
+        return 0.0
+    if max_offset is None:
+        max_offset = config.DEDUP_MAX_OFFSET_SECONDS
+    shift_limit = int(round(max_offset * SAMPLE_RATE / HOP_SIZE))
+
+    best = 0.0
+    for shift in range(-shift_limit, shift_limit + 1):
+        x = a[shift:] if shift >= 0 else a
+        y = b if shift >= 0 else b[-shift:]
+        overlap = min(len(x), len(y))
+        if overlap < config.DEDUP_MIN_OVERLAP * longest:
+            continue
+        errors = _popcount(np, np.bitwise_xor(x[:overlap], y[:overlap]))
+        best = max(best, 1.0 - errors / (32.0 * overlap))
+    return best
+
+
+class FingerprintIndex:
+    """SQLite index of fingerprints and the transcripts they produced."""
+
+    def __init__(self, path: str = None, threshold: float = None):
+        """
+        Open (or create) an index.
+
+        Args:
+            path: SQLite database file (default:
+                config.get_default_dedup_index())
+            threshold: Minimum similarity for a duplicate (default:
+                config.DEDUP_SIMILARITY_THRESHOLD)
+        """
+        _numpy()  # Fail on construction, not halfway through a batch
+        self.path = path or config.get_default_dedup_index()
+        self.threshold = (config.DEDUP_SIMILARITY_THRESHOLD if threshold is None
+                          else threshold)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Several batches may share the index; wait for each other's writes
+        self._db = sqlite3.connect(self.path, check_same_thread=False,
+                                   isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version != FINGERPRINT_FORMAT_VERSION:
+            self._db.execute("DROP TABLE IF EXISTS fingerprints")
+            self._db.execute("DROP TABLE IF EXISTS matches")
+            self._db.execute(f"PRAGMA user_version={FINGERPRINT_FORMAT_VERSION}")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+
+    @staticmethod
+    def _model_key(model_path: str) -> str:
+        return json.dumps(model_identity(model_path), sort_keys=True)
+
+    def find(self, fingerprint: Fingerprint, model_path: str,
+             language: str = None) -> Optional[DuplicateMatch]:
+        """
+        Look for an indexed recording that sounds the same.
+
+        Args:
+            fingerprint: Fingerprint of the new audio
+            model_path: Resolved Whisper model
+            language: Language code (optional)
+
+        Returns:
+            The most similar entry at or above the threshold, or None
+        """
+        if not len(fingerprint.words):
+            return None
+        tolerance = max(config.DEDUP_DURATION_TOLERANCE * fingerprint.duration,
+                        config.DEDUP_MAX_OFFSET_SECONDS)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT source_path, duration, fingerprint, result FROM fingerprints "
+                "WHERE model = ? AND language = ? AND duration BETWEEN ? AND ?",
+                (self._model_key(model_path), language or 'auto',
+                 fingerprint.duration - tolerance, fingerprint.duration + tolerance)
+            ).fetchall()
+
+        best = None
+        for source_path, duration, data, result in rows:
+            score = similarity(fingerprint, Fingerprint.from_bytes(data, duration))
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (source_path, score, result)
+        if best is None:
+            return None
+        return DuplicateMatch(original_path=best[0], similarity=best[1],
+                              result=json.loads(best[2]))
+
+    def add(self, fingerprint: Fingerprint, source_path: str, model_path: str,
+            language: str, result: Dict[str, Any]) -> None:
+        """
+        Index a transcribed recording.
+
+        Args:
+            fingerprint: Fingerprint of its audio
+            source_path: Input file it was extracted from
+            model_path: Resolved Whisper model
+            language: Language code (optional)
+            result: Whisper.cpp JSON result
+        """
+        if not len(fingerprint.words):
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO fingerprints (source_path, duration, model, language, "
+                "fingerprint, result, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(source_path), fingerprint.duration,
+                 self._model_key(model_path), language or 'auto',
+                 fingerprint.to_bytes(), json.dumps(result), time.time())
+            )
+
+    def record_match(self, source_path: str, match: DuplicateMatch) -> None:
+        """Log that ``source_path`` reused the transcript of a duplicate."""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO matches (source_path, original_path, similarity, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (os.path.abspath(source_path), match.original_path, match.similarity,
+                 time.time())
+            )
+
+    def report(self, since: float = None, limit: int = None) -> List[Dict[str, Any]]:
+        """
+        De-duplicated files, newest first.
+
+        Args:
+            since: Only matches logged at or after this Unix time
+            limit: Maximum number of rows
+
+        Returns:
+            List of dictionaries with source_path, original_path, similarity
+            and created_at
+        """
+        query = ("SELECT source_path, original_path, similarity, created_at FROM matches "
+                 "WHERE created_at >= ? ORDER BY created_at DESC")
+        params = [since or 0.0]
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [dict(zip(('source_path', 'original_path', 'similarity', 'created_at'), row))
+                for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Number of indexed recordings and of logged matches."""
+        with self._lock:
+            return {
+                'fingerprints': self._db.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0],
+                'matches': self._db.execute("SELECT COUNT(*) FROM matches").fetchone()[0],
+            }
+
+    def clear(self) -> None:
+        """Remove every fingerprint and logged match."""
+        with self._lock:
+            self._db.execute("DELETE FROM fingerprints")
+            self._db.execute("DELETE FROM matches")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
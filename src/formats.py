@@ -0,0 +1,356 @@
+"""
+Output format rendering for Local Video Transcriber
+
+Whisper.cpp is run once with JSON output and every requested format is
+rendered from its segments here, so asking for SRT and TXT together doesn't
+mean transcribing twice.
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from . import config
+
+# Matches Whisper.cpp console lines: [00:00:01.000 --> 00:00:04.500]  text
+_CONSOLE_LINE = re.compile(
+    r'^\[(\d+):(\d{2}):(\d{2})[.,](\d{3}) --> (\d+):(\d{2}):(\d{2})[.,](\d{3})\]\s*(.*)$'
+)
+
+# Matches SRT/WebVTT cue timings: 00:00:01,000 --> 00:00:04,500 (hours optional)
+_CUE_TIMING = re.compile(
+    r'^(?:(\d+):)?(\d{2}):(\d{2})[.,](\d{3})\s+-->\s+(?:(\d+):)?(\d{2}):(\d{2})[.,](\d{3})'
+)
+
+
+def parse_formats(value) -> List[str]:
+    """
+    Parse a comma separated list of output formats.
+
+    Args:
+        value: String such as ``"srt,vtt"`` or an iterable of format names
+
+    Returns:
+        De-duplicated list of formats in the order given
+    """
+    if isinstance(value, str):
+        items = value.split(',')
+    else:
+        items = list(value)
+
+    formats = []
+    for item in items:
+        name = item.strip().lower()
+        if not name:
+            continue
+        if not config.validate_output_format(name):
+            raise ValueError(
+                f"Unsupported output format: {name} "
+                f"(choose from {', '.join(config.OUTPUT_FORMATS)})"
+            )
+        if name not in formats:
+            formats.append(name)
+
+    if not formats:
+        raise ValueError("At least one output format is required")
+    return formats
+
+
+def strip_format_extension(path: str) -> str:
+    """
+    Remove an output format extension, including ``.jsonl.gz`` style ones.
+
+    Args:
+        path: Transcript path
+
+    Returns:
+        path without the extension, or unchanged if it has none
+    """
+    lower = path.lower()
+    for fmt in sorted(config.OUTPUT_FORMATS, key=len, reverse=True):
+        if lower.endswith(f".{fmt}"):
+            return path[:-len(fmt) - 1]
+    return path
+
+
+def output_paths(output_path: str, formats: List[str]) -> Dict[str, str]:
+    """
+    Derive one output path per format from a single output path.
+
+    The first format is written to output_path exactly as given; the others
+    replace its extension (``talk.srt`` -> ``talk.vtt``).
+
+    Args:
+        output_path: Path requested for the first format
+        formats: Output formats
+
+    Returns:
+        Dictionary mapping format to path
+    """
+    base = strip_format_extension(output_path)
+    paths = {}
+    for index, fmt in enumerate(formats):
+        paths[fmt] = output_path if index == 0 else f"{base}.{fmt}"
+    return paths
+
+
+def _format_timestamp(seconds: float, separator: str) -> str:
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def iter_segments(result: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield segments from a Whisper.cpp JSON result one at a time.
+
+    Args:
+        result: Parsed Whisper.cpp JSON output
+
+    Returns:
+        Iterator of segments with ``start``/``end`` in seconds and ``text``
+    """
+    for item in result.get('transcription', []):
+        offsets = item.get('offsets', {})
+        yield {
+            'start': offsets.get('from', 0) / 1000.0,
+            'end': offsets.get('to', 0) / 1000.0,
+            'text': item.get('text', '').strip(),
+        }
+
+
+def get_segments(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Extract segments from a Whisper.cpp JSON result.
+
+    Args:
+        result: Parsed Whisper.cpp JSON output
+
+    Returns:
+        List of segments with ``start``/``end`` in seconds and ``text``
+    """
+    return list(iter_segments(result))
+
+
+def build_result(segments: Iterable[Dict[str, Any]],
+                 base: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Build a Whisper.cpp shaped JSON result from segments.
+
+    Args:
+        segments: Segments with ``start``/``end`` in seconds and ``text``
+        base: Existing result whose metadata (model, params, ...) is kept
+
+    Returns:
+        Result dictionary in Whisper.cpp's JSON layout
+    """
+    result = {key: value for key, value in (base or {}).items() if key != 'transcription'}
+    result['transcription'] = [
+        {
+            'timestamps': {
+                'from': _format_timestamp(segment['start'], ','),
+                'to': _format_timestamp(segment['end'], ','),
+            },
+            'offsets': {
+                'from': int(round(segment['start'] * 1000)),
+                'to': int(round(segment['end'] * 1000)),
+            },
+            'text': segment['text'],
+        }
+        for segment in segments
+    ]
+    return result
+
+
+def parse_console_line(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse one ``[00:00:01.000 --> 00:00:02.500]  text`` line.
+
+    Args:
+        line: A line of Whisper.cpp standard output
+
+    Returns:
+        Segment with ``start``/``end`` in seconds and ``text``, or None if
+        the line isn't a segment
+    """
+    match = _CONSOLE_LINE.match(line.strip())
+    if not match:
+        return None
+    h1, m1, s1, ms1, h2, m2, s2, ms2, text = match.groups()
+    return {
+        'start': int(h1) * 3600 + int(m1) * 60 + int(s1) + int(ms1) / 1000.0,
+        'end': int(h2) * 3600 + int(m2) * 60 + int(s2) + int(ms2) / 1000.0,
+        'text': text.strip(),
+    }
+
+
+def parse_console_output(stdout: str) -> Dict[str, Any]:
+    """
+    Build a JSON result from Whisper.cpp's console output.
+
+    Used when a Whisper.cpp build didn't write its JSON file.
+
+    Args:
+        stdout: Whisper.cpp standard output
+
+    Returns:
+        Result dictionary in Whisper.cpp's JSON layout
+    """
+    segments = [segment for segment in map(parse_console_line, stdout.splitlines())
+                if segment is not None]
+    return build_result(segments)
+
+
+def parse_subtitles(text: str) -> List[Dict[str, Any]]:
+    """
+    Read the cues of SubRip or WebVTT subtitles back into segments.
+
+    Args:
+        text: SRT or VTT file contents
+
+    Returns:
+        List of segments with ``start``/``end`` in seconds and ``text``
+    """
+    segments = []
+    current = None
+    for line in text.splitlines():
+        match = _CUE_TIMING.match(line.strip())
+        if match:
+            h1, m1, s1, ms1, h2, m2, s2, ms2 = match.groups()
+            current = {
+                'start': int(h1 or 0) * 3600 + int(m1) * 60 + int(s1) + int(ms1) / 1000.0,
+                'end': int(h2 or 0) * 3600 + int(m2) * 60 + int(s2) + int(ms2) / 1000.0,
+                'text': '',
+            }
+            segments.append(current)
+        elif not line.strip():
+            current = None
+        elif current is not None:
+            current['text'] = f"{current['text']} {line.strip()}".strip()
+    return segments
+
+
+def render_txt(result: Dict[str, Any]) -> str:
+    """Render plain text, one segment per line."""
+    return ''.join(f"{segment['text']}\n" for segment in get_segments(result))
+
+
+def render_srt(result: Dict[str, Any]) -> str:
+    """Render SubRip subtitles."""
+    blocks = []
+    for index, segment in enumerate(get_segments(result), start=1):
+        blocks.append(
+            f"{index}\n"
+            f"{_format_timestamp(segment['start'], ',')} --> "
+            f"{_format_timestamp(segment['end'], ',')}\n"
+            f"{segment['text']}\n"
+        )
+    return '\n'.join(blocks)
+
+
+def render_vtt(result: Dict[str, Any]) -> str:
+    """Render WebVTT subtitles."""
+    blocks = ["WEBVTT\n"]
+    for segment in get_segments(result):
+        blocks.append(
+            f"{_format_timestamp(segment['start'], '.')} --> "
+            f"{_format_timestamp(segment['end'], '.')}\n"
+            f"{segment['text']}\n"
+        )
+    return '\n'.join(blocks)
+
+
+def render_json(result: Dict[str, Any]) -> str:
+    """Render the Whisper.cpp JSON result."""
+    return json.dumps(result, indent=2, ensure_ascii=False)
+
+
+def render_jsonl(result: Dict[str, Any]) -> str:
+    """Render one compact JSON object per segment (uncompressed)."""
+    from .segments import encode_segment
+    return ''.join(encode_segment(segment) for segment in iter_segments(result))
+
+
+RENDERERS = {
+    'txt': render_txt,
+    'srt': render_srt,
+    'vtt': render_vtt,
+    'json': render_json,
+    'jsonl': render_jsonl,
+    'jsonl.gz': render_jsonl,
+    'jsonl.zst': render_jsonl,
+}
+
+
+def render(result: Dict[str, Any], output_format: str) -> str:
+    """
+    Render a Whisper.cpp JSON result in the given format.
+
+    Args:
+        result: Parsed Whisper.cpp JSON output
+        output_format: One of config.OUTPUT_FORMATS
+
+    Returns:
+        Rendered transcript
+    """
+    try:
+        renderer = RENDERERS[output_format]
+    except KeyError:
+        raise ValueError(f"Unsupported output format: {output_format}")
+    return renderer(result)
+
+
+def write_outputs(result: Dict[str, Any], paths: Dict[str, str]) -> List[str]:
+    """
+    Render and write every requested format.
+
+    JSON and JSONL are written straight to the file rather than rendered
+    into one string first, so long transcripts don't hold a second copy of
+    themselves in memory.
+
+    Args:
+        result: Parsed Whisper.cpp JSON output
+        paths: Dictionary mapping format to output path
+
+    Returns:
+        List of written paths
+    """
+    written = []
+    for fmt, path in paths.items():
+        if fmt.startswith('jsonl'):
+            from .segments import write_jsonl
+            write_jsonl(result, path, fmt)
+        elif fmt == 'json':
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2, ensure_ascii=False)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(render(result, fmt))
+        written.append(path)
+    return written
+
+
+def load_result(path: str) -> Dict[str, Any]:
+    """
+    Load a JSON transcript written by this tool or by Whisper.cpp.
+
+    JSONL transcripts (``.jsonl``, ``.jsonl.gz``, ``.jsonl.zst``) are read
+    back into the same layout.
+
+    Args:
+        path: Path to the JSON or JSONL transcript
+
+    Returns:
+        Parsed result
+    """
+    if path.lower().endswith(('.jsonl', '.jsonl.gz', '.jsonl.zst')):
+        from .segments import load_jsonl_result
+        return load_jsonl_result(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        result = json.load(f)
+    if not isinstance(result, dict) or 'transcription' not in result \
+            or not isinstance(result['transcription'], list):
+        raise ValueError(f"Not a Whisper.cpp JSON transcript: {path}")
+    return result
@@ -0,0 +1,242 @@
+"""
+Batch job journal for Local Video Transcriber
+
+A SQLite database in the output directory records every file of a batch:
+its fingerprint, the parameters it was transcribed with, its state, attempts,
+timing and output path. ``batch --resume`` reads it back to skip finished
+work, retry failures and re-run files that were in flight when the previous
+run died.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from . import config
+
+# Bump when the table layout changes; older journals are recreated
+JOURNAL_SCHEMA_VERSION = 1
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    input_path  TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    params      TEXT NOT NULL,
+    state       TEXT NOT NULL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    started_at  REAL,
+    finished_at REAL,
+    elapsed     REAL,
+    output_path TEXT,
+    error       TEXT
+)
+"""
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    Identify an input file cheaply.
+
+    Size and modification time change whenever a file is replaced, without
+    reading gigabytes of video on every resume.
+    """
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def params_digest(params: Dict[str, Any]) -> str:
+    """Return a stable digest of the options a batch was run with."""
+    encoded = json.dumps(params, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class BatchJournal:
+    """Crash-safe record of per-file batch progress."""
+
+    def __init__(self, path: str):
+        """
+        Open (or create) a journal.
+
+        Only one batch may use a journal at a time; a second process fails
+        fast instead of transcribing the same files twice.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock_file = open(f"{path}.lock", 'w')
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise RuntimeError(f"Journal is in use by another batch: {path}")
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL keeps every committed state change durable across a crash
+        # without fsyncing the whole database on each update
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version != JOURNAL_SCHEMA_VERSION:
+            self._db.execute("DROP TABLE IF EXISTS items")
+            self._db.execute(f"PRAGMA user_version={JOURNAL_SCHEMA_VERSION}")
+        self._db.execute(_SCHEMA)
+        self.params = ""
+
+    def begin(self, params: Dict[str, Any], resume: bool = False,
+              inputs: Iterable[str] = None) -> None:
+        """
+        Start a run.
+
+        ``watch`` shares the journal of its output directory, so a fresh
+        batch only forgets the files it is about to process; other rows keep
+        the transcript names they own (see owner_of).
+
+        Args:
+            params: Options that affect the output (model, language, formats)
+            resume: Keep earlier progress; otherwise the rows of ``inputs``
+                are cleared
+            inputs: Input files of this run (default: every row is cleared
+                when not resuming)
+        """
+        self.params = params_digest(params)
+        with self._lock:
+            if not resume and inputs is None:
+                self._db.execute("DELETE FROM items")
+            elif not resume:
+                self._db.executemany("DELETE FROM items WHERE input_path = ?",
+                                     [(path,) for path in inputs])
+            else:
+                # Whatever was running when the last run died gets one more go
+                self._db.execute("UPDATE items SET state = ? WHERE state = ?",
+                                 (PENDING, RUNNING))
+
+    def is_done(self, input_path: str) -> Optional[str]:
+        """
+        Check whether a file already finished with the current parameters.
+
+        Args:
+            input_path: Input file path
+
+        Returns:
+            The recorded output path if the file can be skipped, else None
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fingerprint, params, state, output_path FROM items "
+                "WHERE input_path = ?", (input_path,)
+            ).fetchone()
+        if row is None:
+            return None
+        fingerprint, params, state, output_path = row
+        if state != DONE or params != self.params or not output_path:
+            return None
+        if not os.path.exists(output_path):
+            return None
+        try:
+            if fingerprint != file_fingerprint(input_path):
+                return None
+        except OSError:
+            return None
+        return output_path
+
+    def start(self, input_path: str, output_path: str = None) -> None:
+        """
+        Mark a file as in flight and count the attempt.
+
+        Args:
+            input_path: Input file path
+            output_path: Transcript path the file will be written to, if
+                known; recorded now so the name stays claimed even if the
+                run dies (see owner_of)
+        """
+        try:
+            fingerprint = file_fingerprint(input_path)
+        except OSError:
+            fingerprint = ""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO items (input_path, fingerprint, params, state, attempts, "
+                "started_at, output_path) VALUES (?, ?, ?, ?, 1, ?, ?) "
+                "ON CONFLICT(input_path) DO UPDATE SET fingerprint = excluded.fingerprint, "
+                "params = excluded.params, state = excluded.state, "
+                "attempts = attempts + 1, started_at = excluded.started_at, "
+                "output_path = COALESCE(excluded.output_path, output_path), "
+                "finished_at = NULL, elapsed = NULL, error = NULL",
+                (input_path, fingerprint, self.params, RUNNING, time.time(), output_path)
+            )
+
+    def finish(self, item) -> None:
+        """
+        Record the outcome of a file.
+
+        Args:
+            item: BatchItemResult for the file
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE items SET state = ?, finished_at = ?, elapsed = ?, "
+                "output_path = COALESCE(?, output_path), error = ? WHERE input_path = ?",
+                (DONE if item.success else FAILED, time.time(), item.elapsed,
+                 item.output_path, item.error, item.input_path)
+            )
+
+    def get(self, input_path: str) -> Optional[Dict[str, Any]]:
+        """Return the journal row for a file, or None."""
+        with self._lock:
+            cursor = self._db.execute("SELECT * FROM items WHERE input_path = ?",
+                                      (input_path,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip([column[0] for column in cursor.description], row))
+
+    def owner_of(self, output_path: str) -> Optional[str]:
+        """
+        Find the input a transcript path was recorded for.
+
+        Args:
+            output_path: Transcript path
+
+        Returns:
+            Input file path, or None if no file in the journal uses it
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT input_path FROM items WHERE output_path = ? LIMIT 1", (output_path,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of files in each state."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT state, COUNT(*) FROM items GROUP BY state"
+            ).fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        """Close the database and release the journal lock."""
+        with self._lock:
+            self._db.close()
+        fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._lock_file.close()
+
+
+def default_journal_path(output_dir: str) -> str:
+    """Return the journal location for an output directory."""
+    return os.path.join(output_dir, config.JOURNAL_FILENAME)
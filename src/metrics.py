@@ -0,0 +1,336 @@
+"""
+Per-stage metrics for Local Video Transcriber
+
+Each transcribed file gets a record of its stages (extract, transcribe,
+write): wall time, CPU time, bytes read and written, plus the audio duration
+and realtime factor for the whole file. Records are appended to a JSON-lines
+file and aggregated into Prometheus text-format counters that can be written
+to a file (for node_exporter's textfile collector) or served over HTTP.
+"""
+
+import json
+import os
+import resource
+import tempfile
+import threading
+import time
+import wave
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+# Stages in pipeline order; unknown stage names are still accepted
+STAGES = ("extract", "transcribe", "write")
+
+
+def _children_cpu() -> float:
+    """CPU seconds used by reaped child processes (FFmpeg, Whisper.cpp)."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class _ActiveStages:
+    """Count stages running at once, to flag CPU figures that overlap."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+        self._generation = 0
+
+    def enter(self) -> int:
+        with self._lock:
+            self._active += 1
+            self._generation += 1
+            return self._generation
+
+    def exit(self) -> None:
+        with self._lock:
+            self._active -= 1
+
+    def overlapped(self, generation: int) -> bool:
+        """True if another stage started, or was already running, since enter."""
+        with self._lock:
+            return self._active > 1 or self._generation != generation
+
+
+_active_stages = _ActiveStages()
+
+
+class StageMetrics:
+    """Measurements for one stage of one file."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        # Child CPU time is process-wide, so it can't be split exactly
+        # between stages that ran at the same time
+        self.cpu_shared = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'wall_seconds': round(self.wall_seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            'cpu_shared': self.cpu_shared,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+        }
+
+
+class FileMetrics:
+    """Measurements for one transcribed file."""
+
+    def __init__(self, input_path: str):
+        self.input_path = input_path
+        self.stages: Dict[str, StageMetrics] = {}
+        self.audio_seconds: Optional[float] = None
+        # Non-speech that voice activity detection kept from Whisper.cpp
+        self.skipped_seconds: Optional[float] = None
+        self.started = time.time()
+        self._start = time.monotonic()
+        self.wall_seconds = 0.0
+
+    def stop(self) -> None:
+        """Fix the file's total wall time."""
+        self.wall_seconds = time.monotonic() - self._start
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        """
+        Time a stage. The yielded StageMetrics can be given byte counts.
+
+        Repeating a stage (e.g. several chunks) adds to its totals.
+        """
+        stage = self.stages.setdefault(name, StageMetrics(name))
+        generation = _active_stages.enter()
+        wall = time.monotonic()
+        cpu = time.thread_time() + _children_cpu()
+        try:
+            yield stage
+        finally:
+            stage.wall_seconds += time.monotonic() - wall
+            stage.cpu_seconds += time.thread_time() + _children_cpu() - cpu
+            stage.cpu_shared = stage.cpu_shared or _active_stages.overlapped(generation)
+            _active_stages.exit()
+
+    @property
+    def realtime_factor(self) -> Optional[float]:
+        """Processing time divided by audio duration (below 1 is faster than realtime)."""
+        if not self.audio_seconds:
+            return None
+        return self.wall_seconds / self.audio_seconds
+
+    def summary(self) -> str:
+        """One-line description of stage timings, for console output."""
+        parts = [f"{name} {stage.wall_seconds:.1f}s" for name, stage in self.stages.items()]
+        if self.realtime_factor is not None:
+            parts.append(f"RTF {self.realtime_factor:.2f}")
+        if self.skipped_seconds:
+            parts.append(f"skipped {self.skipped_seconds:.1f}s non-speech")
+        return ", ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        rtf = self.realtime_factor
+        return {
+            'input': self.input_path,
+            'started': round(self.started, 3),
+            'wall_seconds': round(self.wall_seconds, 4),
+            'cpu_seconds': round(sum(s.cpu_seconds for s in self.stages.values()), 4),
+            'bytes_read': sum(s.bytes_read for s in self.stages.values()),
+            'bytes_written': sum(s.bytes_written for s in self.stages.values()),
+            'audio_seconds': None if self.audio_seconds is None else round(self.audio_seconds, 3),
+            'realtime_factor': None if rtf is None else round(rtf, 4),
+            'skipped_seconds': (None if self.skipped_seconds is None
+                                else round(self.skipped_seconds, 3)),
+            'stages': {name: stage.to_dict() for name, stage in self.stages.items()},
+        }
+
+
+def file_size(path: Optional[str]) -> int:
+    """Return a file's size, or 0 if it doesn't exist."""
+    try:
+        return os.path.getsize(path) if path else 0
+    except OSError:
+        return 0
+
+
+def wav_duration(path: Optional[str]) -> Optional[float]:
+    """Return a WAV file's duration in seconds, or None if it can't be read."""
+    try:
+        with wave.open(path, 'rb') as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except (wave.Error, EOFError, OSError, TypeError):
+        return None
+
+
+class MetricsRecorder:
+    """Collect FileMetrics and export them as JSON lines and Prometheus text."""
+
+    def __init__(self, jsonl_path: str = None, prometheus_path: str = None):
+        """
+        Initialize the recorder.
+
+        Args:
+            jsonl_path: Append one JSON record per file here (optional)
+            prometheus_path: Rewrite Prometheus text-format metrics here after
+                every file (optional)
+        """
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self._lock = threading.Lock()
+        self._server = None
+        self._files = {'success': 0, 'failure': 0}
+        self._stage_runs: Dict[str, int] = {}
+        self._stage_wall: Dict[str, float] = {}
+        self._stage_cpu: Dict[str, float] = {}
+        self._bytes_read = 0
+        self._bytes_written = 0
+        self._audio_seconds = 0.0
+        self._skipped_seconds = 0.0
+        self._file_seconds = 0.0
+        self._last_rtf: Optional[float] = None
+        for path in (jsonl_path, prometheus_path):
+            directory = os.path.dirname(os.path.abspath(path)) if path else None
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def finish(self, metrics: FileMetrics, success: bool, error: str = None) -> None:
+        """
+        Record a finished file.
+
+        Args:
+            metrics: The file's measurements
+            success: Whether the file was transcribed
+            error: Error message for failures
+        """
+        if not metrics.wall_seconds:
+            metrics.stop()
+        record = metrics.to_dict()
+        record['success'] = success
+        if error:
+            record['error'] = error
+
+        with self._lock:
+            self._files['success' if success else 'failure'] += 1
+            for name, stage in metrics.stages.items():
+                self._stage_runs[name] = self._stage_runs.get(name, 0) + 1
+                self._stage_wall[name] = self._stage_wall.get(name, 0.0) + stage.wall_seconds
+                self._stage_cpu[name] = self._stage_cpu.get(name, 0.0) + stage.cpu_seconds
+            self._bytes_read += record['bytes_read']
+            self._bytes_written += record['bytes_written']
+            self._file_seconds += metrics.wall_seconds
+            if success and metrics.audio_seconds:
+                self._audio_seconds += metrics.audio_seconds
+                self._last_rtf = metrics.realtime_factor
+            if success and metrics.skipped_seconds:
+                self._skipped_seconds += metrics.skipped_seconds
+
+            if self.jsonl_path:
+                with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + "\n")
+        if self.prometheus_path:
+            self.write_prometheus()
+
+    def render_prometheus(self) -> str:
+        """Return all counters in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text
+                             else f"{name} {value}")
+
+        with self._lock:
+            stages = [s for s in STAGES if s in self._stage_runs] + \
+                     sorted(s for s in self._stage_runs if s not in STAGES)
+            metric("transcriber_files_total", "counter", "Files processed, by outcome",
+                   [({'status': status}, count) for status, count in self._files.items()])
+            metric("transcriber_stage_runs_total", "counter", "Stage executions",
+                   [({'stage': s}, self._stage_runs[s]) for s in stages])
+            metric("transcriber_stage_seconds_total", "counter", "Wall time spent per stage",
+                   [({'stage': s}, round(self._stage_wall[s], 4)) for s in stages])
+            metric("transcriber_stage_cpu_seconds_total", "counter",
+                   "CPU time per stage, including FFmpeg/Whisper.cpp children",
+                   [({'stage': s}, round(self._stage_cpu[s], 4)) for s in stages])
+            metric("transcriber_file_seconds_total", "counter", "Wall time spent per file",
+                   [({}, round(self._file_seconds, 4))])
+            metric("transcriber_audio_seconds_total", "counter",
+                   "Duration of successfully transcribed audio",
+                   [({}, round(self._audio_seconds, 3))])
+            metric("transcriber_skipped_audio_seconds_total", "counter",
+                   "Non-speech audio that voice activity detection did not transcribe",
+                   [({}, round(self._skipped_seconds, 3))])
+            metric("transcriber_bytes_read_total", "counter", "Input and audio bytes read",
+                   [({}, self._bytes_read)])
+            metric("transcriber_bytes_written_total", "counter",
+                   "Audio and transcript bytes written", [({}, self._bytes_written)])
+            if self._last_rtf is not None:
+                metric("transcriber_last_realtime_factor", "gauge",
+                       "Processing time over audio duration for the latest file",
+                       [({}, round(self._last_rtf, 4))])
+        metric("transcriber_children_cpu_seconds_total", "counter",
+               "CPU time of all finished FFmpeg/Whisper.cpp processes",
+               [({}, round(_children_cpu(), 4))])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self) -> None:
+        """Atomically rewrite the Prometheus metrics file."""
+        text = self.render_prometheus()
+        directory = os.path.dirname(os.path.abspath(self.prometheus_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, self.prometheus_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> int:
+        """
+        Serve ``/metrics`` over HTTP from a background thread.
+
+        Args:
+            port: Port to listen on (0 picks a free port)
+            host: Interface to bind
+
+        Returns:
+            The bound port
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        recorder = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = recorder.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address[1]
+
+    def close(self) -> None:
+        """Stop the HTTP endpoint and write the final Prometheus file."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self.prometheus_path:
+            self.write_prometheus()
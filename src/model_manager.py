@@ -0,0 +1,269 @@
+"""
+Model verification and warm-up for Local Video Transcriber
+
+The first jobs after a container start are slow when the ggml model is cold
+on disk, and concurrent jobs all fault the same gigabytes in at once. Before
+a batch or watch run takes work, ModelManager reads each needed model once:
+
+- the file must start with the ggml (or GGUF) magic, and if a
+  ``<model>.sha256`` file sits next to it the SHA-256 digest must match
+- the digest, size and modification time are kept in a record next to the
+  model (``<model>.verified.json``, or in the cache directory when the model
+  directory is read-only), so later runs skip the hash while the file is
+  unchanged
+- the read itself pulls the model into the page cache; models are only
+  prefetched while they fit the memory budget, and the time each one took is
+  reported
+
+With the server backend the model is also loaded into whisper-server, so the
+first file does not wait for it either.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from . import config
+
+# Bump when the record layout changes so old records are ignored
+RECORD_FORMAT_VERSION = 1
+RECORD_SUFFIX = ".verified.json"
+
+# First four bytes of Whisper.cpp model files (0x67676d6c little-endian) and
+# of GGUF files
+_MODEL_MAGICS = (b"lmgg", b"GGUF")
+
+
+class ModelVerificationError(RuntimeError):
+    """A model file is not a usable Whisper model or fails its checksum."""
+
+
+def available_memory() -> Optional[int]:
+    """Memory the kernel reports as available (MemAvailable), in bytes."""
+    try:
+        with open('/proc/meminfo', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _advise(fd: int, advice: str) -> None:
+    """posix_fadvise where the platform has it."""
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, 0, 0, getattr(os, advice))
+        except OSError:
+            pass
+
+
+def _read_model(path: str, digest=None, keep_cached: bool = True) -> float:
+    """
+    Read a whole file, optionally hashing it, and return the seconds taken.
+
+    Args:
+        path: Model file
+        digest: hashlib object fed with the contents (optional)
+        keep_cached: Leave the pages in the page cache; False drops them
+            afterwards so a model over the budget doesn't evict others
+    """
+    start = time.monotonic()
+    buffer = bytearray(config.MODEL_READ_CHUNK)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        _advise(f.fileno(), 'POSIX_FADV_SEQUENTIAL')
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            if digest is not None:
+                digest.update(view[:count])
+        if not keep_cached:
+            _advise(f.fileno(), 'POSIX_FADV_DONTNEED')
+    return time.monotonic() - start
+
+
+def _expected_digest(model_path: str) -> Optional[str]:
+    """Digest from a ``sha256sum``-style file next to the model, if any."""
+    try:
+        with open(f"{model_path}.sha256", encoding='utf-8') as f:
+            fields = f.read().split()
+    except OSError:
+        return None
+    return fields[0].lower() if fields else None
+
+
+@dataclass
+class ModelWarmup:
+    """What preparing one model did.
+
+    Attributes:
+        model_path: Path to the ggml file
+        size: File size in bytes
+        sha256: Verified digest
+        hashed: The digest was computed this run (first use or file changed)
+        prefetched: The model is now in the page cache
+        read_seconds: Time spent reading (hashing and/or prefetching)
+        server_seconds: Time whisper-server took to load it (server backend)
+    """
+
+    model_path: str
+    size: int
+    sha256: str
+    hashed: bool = False
+    prefetched: bool = False
+    read_seconds: float = 0.0
+    server_seconds: Optional[float] = None
+
+    @property
+    def load_seconds(self) -> float:
+        return self.read_seconds + (self.server_seconds or 0.0)
+
+    @property
+    def read_rate(self) -> Optional[float]:
+        """Bytes read per second, if anything was read."""
+        if self.read_seconds <= 0 or not (self.hashed or self.prefetched):
+            return None
+        return self.size / self.read_seconds
+
+
+class ModelManager:
+    """Verifies models once and warms them up before work starts."""
+
+    def __init__(self, budget: int = None, record_dir: str = None):
+        """
+        Args:
+            budget: Bytes of page cache prefetched models may fill (default:
+                config.MODEL_PREFETCH_BUDGET, or a share of available memory
+                when that is 0)
+            record_dir: Where records go when the model directory is not
+                writable (default: config.get_default_model_records_dir())
+        """
+        if budget is None:
+            budget = config.MODEL_PREFETCH_BUDGET
+        if not budget:
+            budget = int((available_memory() or 0) * config.MODEL_PREFETCH_MEMORY_SHARE)
+        self.budget = budget
+        self.record_dir = record_dir or config.get_default_model_records_dir()
+
+    def _record_paths(self, model_path: str) -> List[str]:
+        """Record next to the model first, then the fallback in record_dir."""
+        absolute = os.path.abspath(model_path)
+        key = hashlib.sha256(absolute.encode('utf-8')).hexdigest()[:16]
+        return [f"{absolute}{RECORD_SUFFIX}",
+                os.path.join(self.record_dir, f"{os.path.basename(absolute)}-{key}.json")]
+
+    def _load_record(self, model_path: str, stat: os.stat_result) -> Optional[str]:
+        """Digest from a record that still matches the file, if any."""
+        for path in self._record_paths(model_path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if (record.get('version') == RECORD_FORMAT_VERSION
+                    and record.get('size') == stat.st_size
+                    and record.get('mtime_ns') == stat.st_mtime_ns):
+                return record.get('sha256')
+        return None
+
+    def _save_record(self, model_path: str, stat: os.stat_result, sha256: str) -> None:
+        record = {'version': RECORD_FORMAT_VERSION, 'size': stat.st_size,
+                  'mtime_ns': stat.st_mtime_ns, 'sha256': sha256,
+                  'verified_at': time.time()}
+        # Best effort, like the discovery cache: without a record the model is
+        # simply hashed again next time
+        for path in self._record_paths(model_path):
+            directory = os.path.dirname(path)
+            try:
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            except OSError:
+                continue
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(record, f, indent=1)
+                os.replace(tmp_path, path)
+                return
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def prepare(self, model_path: str, prefetch: bool = True) -> ModelWarmup:
+        """
+        Verify a model and pull it into the page cache.
+
+        Args:
+            model_path: Path to the ggml file
+            prefetch: Read the model into the page cache if it fits the
+                budget (verification may read it regardless)
+
+        Returns:
+            ModelWarmup
+
+        Raises:
+            ModelVerificationError: if the file is not a Whisper model or
+                its digest does not match ``<model>.sha256``
+        """
+        stat = os.stat(model_path)
+        with open(model_path, 'rb') as f:
+            if f.read(4) not in _MODEL_MAGICS:
+                raise ModelVerificationError(
+                    f"Not a Whisper.cpp model (bad header), re-download it: {model_path}")
+
+        fits = prefetch and stat.st_size <= self.budget
+        warmup = ModelWarmup(model_path=model_path, size=stat.st_size, sha256="")
+        digest = self._load_record(model_path, stat)
+        if digest is None:
+            hasher = hashlib.sha256()
+            warmup.read_seconds = _read_model(model_path, hasher, keep_cached=fits)
+            digest = hasher.hexdigest()
+            warmup.hashed = True
+            expected = _expected_digest(model_path)
+            if expected is not None and expected != digest:
+                raise ModelVerificationError(
+                    f"Checksum mismatch for {model_path}: expected {expected}, got {digest}")
+            self._save_record(model_path, stat, digest)
+        elif fits:
+            warmup.read_seconds = _read_model(model_path)
+        warmup.sha256 = digest
+        warmup.prefetched = fits
+        if fits:
+            self.budget -= stat.st_size
+        return warmup
+
+    def warm(self, model_paths: Iterable[str], transcriber=None,
+             prefetch: bool = True) -> List[ModelWarmup]:
+        """
+        Prepare every model a run needs, smallest first.
+
+        Args:
+            model_paths: Model files the run will use (duplicates are fine)
+            transcriber: VideoTranscriber whose backend loads each model
+                ahead of the first file (optional)
+            prefetch: Pull models into the page cache
+
+        Returns:
+            One ModelWarmup per distinct model
+        """
+        paths = sorted(set(model_paths), key=lambda path: os.path.getsize(path))
+        warmups = []
+        for path in paths:
+            warmup = self.prepare(path, prefetch=prefetch)
+            if transcriber is not None:
+                start = time.monotonic()
+                with transcriber._lease_cpus() as allocation:
+                    loaded = transcriber.backend.preload(path, allocation)
+                if loaded:
+                    warmup.server_seconds = time.monotonic() - start
+            warmups.append(warmup)
+        return warmups
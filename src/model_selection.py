@@ -0,0 +1,372 @@
+"""
+Deadline-aware model selection for Local Video Transcriber
+
+``--model auto`` picks the most accurate installed model that is expected to
+meet a target: a deadline for the whole job (``--deadline 20m``), a maximum
+realtime factor (``--max-rtf 0.5``: at most half a second of processing per
+second of audio), or both. Expected processing time is the input duration
+(from ffprobe) times the model's realtime factor on this host.
+
+Realtime factors are measured: every Whisper.cpp run records its wall time
+and audio duration in a small JSON file, smoothed so that recent runs count
+most. Models never run here are estimated from built-in priors
+(config.MODEL_REALTIME_FACTOR_PRIORS), scaled by how much faster or slower
+the measured models turned out to be than their priors.
+
+For a batch the deadline is shared by the whole queue: every file starts on
+the fastest model, all files are moved up the accuracy ladder together while
+the total still fits, and leftover time upgrades individual files, cheapest
+first.
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from . import config
+
+# Bump when the throughput file layout changes so old files are ignored
+THROUGHPUT_FORMAT_VERSION = 1
+
+_DURATION_UNITS = {'h': 3600, 'm': 60, 's': 1}
+
+
+def parse_duration(value: str) -> float:
+    """
+    Parse a duration such as ``90``, ``45s``, ``20m`` or ``1h30m`` into seconds.
+
+    Args:
+        value: Duration string (seconds if no unit is given)
+
+    Returns:
+        Duration in seconds
+    """
+    text = str(value).strip().lower()
+    if re.fullmatch(r'\d+(?:\.\d+)?', text):
+        seconds = float(text)
+    else:
+        parts = re.findall(r'(\d+(?:\.\d+)?)\s*([hms])', text)
+        if not parts or re.sub(r'(\d+(?:\.\d+)?)\s*([hms])', '', text).strip():
+            raise ValueError(f"Invalid duration: {value}")
+        seconds = sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+    if seconds <= 0:
+        raise ValueError(f"Duration must be positive: {value}")
+    return seconds
+
+
+def format_duration(seconds: float) -> str:
+    """Format seconds for display, e.g. ``1h 05m`` or ``42s``."""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
+
+
+def base_model(model_name: str) -> str:
+    """Multilingual model an English-only one is derived from (``base.en`` -> ``base``)."""
+    return model_name[:-3] if model_name.endswith('.en') else model_name
+
+
+def model_rank(model_name: str) -> int:
+    """Position of a model on the accuracy ladder (higher is more accurate)."""
+    ladder = []
+    for name in config.WHISPER_MODELS:
+        if base_model(name) not in ladder:
+            ladder.append(base_model(name))
+    return ladder.index(base_model(model_name))
+
+
+def model_name_for_path(model_path: str) -> Optional[str]:
+    """
+    Name of a standard ggml model file.
+
+    Args:
+        model_path: Path such as ``models/ggml-base.en.bin``
+
+    Returns:
+        Name from config.WHISPER_MODELS, or None for other files
+    """
+    match = re.fullmatch(r'ggml-(.+)\.bin', os.path.basename(model_path))
+    if match and match.group(1) in config.WHISPER_MODELS:
+        return match.group(1)
+    return None
+
+
+class ThroughputStore:
+    """Measured realtime factors per model, persisted across runs."""
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: JSON file holding the measurements (default:
+                config.get_default_throughput_file())
+        """
+        self.path = path or config.get_default_throughput_file()
+        self._lock = threading.Lock()
+        self._models = None
+
+    def _load(self) -> Dict[str, Dict[str, float]]:
+        if self._models is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') != THROUGHPUT_FORMAT_VERSION:
+                    raise ValueError("stale throughput file")
+                self._models = data['models']
+            except (OSError, ValueError, KeyError):
+                self._models = {}
+        return self._models
+
+    def _save(self) -> None:
+        # Best effort, like the discovery cache: losing a sample is harmless
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': THROUGHPUT_FORMAT_VERSION, 'models': self._models},
+                          f, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def record(self, model_name: str, audio_seconds: float, wall_seconds: float) -> None:
+        """
+        Add one Whisper.cpp run to a model's measurements.
+
+        Audio and wall time are kept as decaying sums rather than averaging
+        per-run ratios, so long files (where model loading matters least)
+        weigh the most.
+
+        Args:
+            model_name: Name from config.WHISPER_MODELS
+            audio_seconds: Duration of the transcribed audio
+            wall_seconds: Time Whisper.cpp took
+        """
+        if audio_seconds <= 0 or wall_seconds <= 0:
+            return
+        with self._lock:
+            self._models = None  # Pick up what other processes recorded
+            entry = self._load().setdefault(model_name, {'audio': 0.0, 'wall': 0.0, 'runs': 0})
+            entry['audio'] = entry['audio'] * config.THROUGHPUT_DECAY + audio_seconds
+            entry['wall'] = entry['wall'] * config.THROUGHPUT_DECAY + wall_seconds
+            entry['runs'] += 1
+            self._save()
+
+    def measured(self) -> Dict[str, float]:
+        """Measured realtime factor of each model that has run on this host."""
+        with self._lock:
+            return {name: entry['wall'] / entry['audio']
+                    for name, entry in self._load().items() if entry['audio'] > 0}
+
+    def realtime_factor(self, model_name: str) -> float:
+        """
+        Expected processing seconds per audio second.
+
+        Args:
+            model_name: Name from config.WHISPER_MODELS
+
+        Returns:
+            The measured factor, or the prior scaled by this host's speed
+        """
+        measured = self.measured()
+        if model_name in measured:
+            return measured[model_name]
+        priors = config.MODEL_REALTIME_FACTOR_PRIORS
+        # Geometric mean of measured/prior over the models we have data for
+        ratios = [math.log(rtf / priors[base_model(name)])
+                  for name, rtf in measured.items() if base_model(name) in priors]
+        host_factor = math.exp(sum(ratios) / len(ratios)) if ratios else 1.0
+        return priors[base_model(model_name)] * host_factor
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_throughput_store() -> ThroughputStore:
+    """The process-wide ThroughputStore."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ThroughputStore()
+        return _default_store
+
+
+@dataclass
+class ModelTarget:
+    """What ``--model auto`` has to achieve.
+
+    Attributes:
+        deadline: Seconds the whole job may take (None for no deadline)
+        max_rtf: Highest acceptable realtime factor (None for no limit)
+    """
+
+    deadline: Optional[float] = None
+    max_rtf: Optional[float] = None
+
+    def describe(self) -> str:
+        parts = []
+        if self.deadline is not None:
+            parts.append(f"finish within {format_duration(self.deadline)}")
+        if self.max_rtf is not None:
+            parts.append(f"realtime factor <= {self.max_rtf:g}")
+        return " and ".join(parts) or "no target"
+
+
+@dataclass
+class ModelPlan:
+    """Models chosen for a set of files.
+
+    Attributes:
+        models: Model name per input file
+        paths: Model name to installed path
+        realtime_factors: Expected realtime factor per chosen model
+        estimated_seconds: Expected wall time with the given workers
+        meets_target: False if even the fastest models miss the target
+    """
+
+    models: Dict[str, str] = field(default_factory=dict)
+    paths: Dict[str, str] = field(default_factory=dict)
+    realtime_factors: Dict[str, float] = field(default_factory=dict)
+    estimated_seconds: float = 0.0
+    meets_target: bool = True
+
+    def model_paths(self) -> Dict[str, str]:
+        """Installed model path per input file."""
+        return {file_path: self.paths[name] for file_path, name in self.models.items()}
+
+
+def candidate_models(installed: Dict[str, str], language: str = None) -> List[str]:
+    """
+    Installed models usable for a language, least accurate first.
+
+    English-only models are used only for ``en`` and then replace their
+    multilingual counterpart, which is no more accurate for English.
+
+    Args:
+        installed: Model name to path (DiscoveryRegistry.models())
+        language: Language code (optional)
+
+    Returns:
+        Model names ordered by model_rank
+    """
+    english = language == 'en'
+    chosen = {}
+    for name in installed:
+        if name.endswith('.en') and not english:
+            continue
+        rank = model_rank(name)
+        if rank not in chosen or name.endswith('.en'):
+            chosen[rank] = name
+    return [chosen[rank] for rank in sorted(chosen)]
+
+
+def plan_models(durations: Dict[str, Optional[float]], target: ModelTarget,
+                installed: Dict[str, str], store: ThroughputStore,
+                language: str = None, workers: int = 1) -> ModelPlan:
+    """
+    Choose a model per file so the target is met with the best accuracy.
+
+    Args:
+        durations: Audio duration in seconds per input file (None if unknown;
+            those count as the average of the known ones, and if none is
+            known the deadline is dropped in favour of the speed limit)
+        target: ModelTarget
+        installed: Model name to path (DiscoveryRegistry.models())
+        store: ThroughputStore with this host's measurements
+        language: Language code (optional)
+        workers: Files transcribed concurrently, which share the deadline
+
+    Returns:
+        ModelPlan
+
+    Raises:
+        RuntimeError: if no usable model is installed
+    """
+    models = candidate_models(installed, language)
+    if not models:
+        raise RuntimeError("No Whisper models installed for --model auto; "
+                           "download one first (e.g. transcribe once with -m base)")
+    rtf = {name: store.realtime_factor(name) for name in models}
+    known = [d for d in durations.values() if d]
+    if not known and durations:
+        # Nothing to hold against a deadline; fall back to a speed limit
+        target = ModelTarget(max_rtf=target.max_rtf)
+
+    max_rtf = target.max_rtf
+    if max_rtf is None and target.deadline is None:
+        max_rtf = config.AUTO_MODEL_MAX_RTF
+    meets_target = True
+    if max_rtf is not None:
+        allowed = [name for name in models if rtf[name] <= max_rtf]
+        if not allowed:
+            allowed = [min(models, key=rtf.get)]
+            meets_target = False
+        models = allowed
+    # A more accurate model that is also faster makes the slower one pointless
+    ladder = []
+    for name in models:
+        while ladder and rtf[ladder[-1]] >= rtf[name]:
+            ladder.pop()
+        ladder.append(name)
+
+    fallback = sum(known) / len(known) if known else 0.0
+    seconds = {path: (d or fallback) for path, d in durations.items()}
+    workers = max(1, workers)
+
+    def cost(path: str, level: int) -> float:
+        return seconds[path] * rtf[ladder[level]]
+
+    level = {path: 0 for path in seconds}
+    total = sum(cost(path, 0) for path in seconds)
+    if target.deadline is None:
+        level = {path: len(ladder) - 1 for path in seconds}
+        total = sum(cost(path, level[path]) for path in seconds)
+    else:
+        budget = target.deadline * config.AUTO_MODEL_DEADLINE_MARGIN * workers
+        meets_target = meets_target and total <= budget
+        # Raise everyone together while the whole queue still fits...
+        for step in range(1, len(ladder)):
+            raised = sum(cost(path, step) for path in seconds)
+            if raised > budget:
+                break
+            level = {path: step for path in seconds}
+            total = raised
+        # ...then spend what is left on single files, cheapest upgrade first
+        upgrades = [(cost(path, lvl + 1) - cost(path, lvl), path)
+                    for path, lvl in level.items() if lvl + 1 < len(ladder)]
+        heapq.heapify(upgrades)
+        while upgrades:
+            extra, path = heapq.heappop(upgrades)
+            if total + extra > budget:
+                break
+            total += extra
+            level[path] += 1
+            if level[path] + 1 < len(ladder):
+                next_extra = cost(path, level[path] + 1) - cost(path, level[path])
+                heapq.heappush(upgrades, (next_extra, path))
+
+    chosen = {path: ladder[lvl] for path, lvl in level.items()}
+    used = set(chosen.values())
+    return ModelPlan(
+        models=chosen,
+        paths={name: installed[name] for name in used},
+        realtime_factors={name: rtf[name] for name in used},
+        estimated_seconds=total / workers,
+        meets_target=meets_target,
+    )
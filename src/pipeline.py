@@ -0,0 +1,230 @@
+"""
+Pipelined batch processing for Local Video Transcriber
+
+Audio extraction, Whisper inference and output writing run as separate
+stages connected by bounded queues, each with its own workers. FFmpeg can
+prepare the next files while Whisper.cpp works on the current one, and a
+cap on extracted-but-untranscribed files keeps temp disk usage bounded.
+"""
+
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from . import config
+from . import formats
+from .batch import BatchItemResult, build_output_paths, resolve_models
+from .metrics import FileMetrics, file_size, wav_duration
+
+# Queue marker telling a stage worker to exit
+_STOP = object()
+
+
+@dataclass
+class _Job:
+    """A file moving through the pipeline."""
+
+    index: int
+    input_path: str
+    output_path: str
+    audio_path: Optional[str] = None
+    scratch: Optional[Any] = None
+    result: Optional[Dict[str, Any]] = None
+    started: float = field(default_factory=time.monotonic)
+    metrics: Optional[FileMetrics] = None
+
+
+class _Stage:
+    """A pool of worker threads reading from one queue."""
+
+    def __init__(self, name: str, workers: int, handler: Callable[[_Job], None],
+                 inbox: "queue.Queue"):
+        self.name = name
+        self.inbox = inbox
+        self.threads = [
+            threading.Thread(target=self._run, args=(handler,),
+                             name=f"pipeline-{name}-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+
+    def _run(self, handler: Callable[[_Job], None]) -> None:
+        while True:
+            job = self.inbox.get()
+            if job is _STOP:
+                return
+            handler(job)
+
+    def start(self) -> None:
+        for thread in self.threads:
+            thread.start()
+
+    def stop_and_join(self) -> None:
+        """Signal every worker to exit once the queue drains, then wait."""
+        for _ in self.threads:
+            self.inbox.put(_STOP)
+        for thread in self.threads:
+            thread.join()
+
+
+def run_pipeline(transcriber, files: List[str], model_name_or_path: str,
+                 output_dir: str, language: str = None, output_format="txt",
+                 extract_workers: int = 1, transcribe_workers: int = None,
+                 write_workers: int = 1, queue_depth: int = None,
+                 journal=None, model_for: Optional[Dict[str, str]] = None,
+                 on_result: Optional[Callable[[BatchItemResult], None]] = None,
+                 input_dir: str = None) -> List[BatchItemResult]:
+    """
+    Transcribe files with separate extraction, inference and writing stages.
+
+    Args:
+        transcriber: VideoTranscriber shared by all workers
+        files: Input file paths
+        model_name_or_path: Whisper model name or path
+        output_dir: Directory for transcripts
+        language: Language code (optional)
+        output_format: Output format(s)
+        extract_workers: Concurrent FFmpeg extractions
+        transcribe_workers: Concurrent Whisper.cpp jobs
+        write_workers: Concurrent output writers
+        queue_depth: Extracted files allowed to wait for inference; together
+            with the workers this bounds how many WAV files sit in temp
+        journal: BatchJournal recording progress; files it lists as done
+            are skipped
+        model_for: Model name or path per input file, overriding
+            model_name_or_path (e.g. ModelPlan.model_paths())
+        on_result: Callback invoked as each file finishes
+        input_dir: Directory the files were found in; its subdirectories
+            are mirrored under output_dir (see build_output_paths)
+
+    Returns:
+        List of per-file results, in input order
+    """
+    transcribe_workers = max(1, transcribe_workers or config.get_default_batch_workers())
+    queue_depth = config.PIPELINE_QUEUE_DEPTH if queue_depth is None else max(0, queue_depth)
+
+    transcriber._check_dependencies()
+    model_paths = resolve_models(transcriber, files, model_name_or_path, model_for)
+    os.makedirs(output_dir, exist_ok=True)
+    output_formats = formats.parse_formats(output_format)
+    output_paths = build_output_paths(files, output_dir, output_formats[0], input_dir)
+
+    # Audio files on disk at once: one per extractor or transcriber plus
+    # whatever waits in the queue between them
+    audio_slots = threading.Semaphore(queue_depth + transcribe_workers)
+
+    extract_queue: "queue.Queue" = queue.Queue()
+    transcribe_queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_depth))
+    write_queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_depth))
+
+    results: Dict[int, BatchItemResult] = {}
+    results_lock = threading.Lock()
+
+    def finish(job: _Job, error: str = None) -> None:
+        item = BatchItemResult(
+            input_path=job.input_path,
+            output_path=None if error else job.output_path,
+            success=error is None,
+            error=error,
+            elapsed=time.monotonic() - job.started,
+        )
+        if journal is not None:
+            journal.finish(item)
+        if transcriber.metrics is not None and job.metrics is not None:
+            transcriber.metrics.finish(job.metrics, success=error is None, error=error)
+        with results_lock:
+            results[job.index] = item
+        if on_result:
+            on_result(item)
+
+    def release_audio(job: _Job) -> None:
+        if job.scratch is not None:
+            job.scratch.close()
+            job.scratch = None
+            job.audio_path = None
+            audio_slots.release()
+
+    def extract(job: _Job) -> None:
+        audio_slots.acquire()
+        job.started = time.monotonic()
+        job.metrics = FileMetrics(job.input_path)
+        if journal is not None:
+            journal.start(job.input_path)
+        try:
+            # Each job has its own directory, so same-stem inputs never collide
+            job.scratch, plan = transcriber.acquire_scratch(job.input_path)
+            with job.metrics.stage("extract") as stage:
+                stage.bytes_read = file_size(job.input_path)
+                job.audio_path = transcriber.extract_audio(
+                    job.input_path, job.scratch.file(f"{Path(job.input_path).stem}_audio.wav"),
+                    plan=plan)
+                stage.bytes_written = file_size(job.audio_path)
+            job.metrics.audio_seconds = wav_duration(job.audio_path)
+        except Exception as e:
+            if job.scratch is not None:
+                job.scratch.close()
+                job.scratch = None
+            audio_slots.release()
+            finish(job, f"extract: {e}")
+            return
+        transcribe_queue.put(job)
+
+    def transcribe(job: _Job) -> None:
+        model_path = model_paths[job.input_path]
+        try:
+            with job.metrics.stage("transcribe") as stage:
+                stage.bytes_read = file_size(job.audio_path)
+                job.result = transcriber.transcribe_deduplicated(
+                    job.input_path, job.audio_path, model_path, language,
+                    lambda: transcriber.transcribe_speech(
+                        job.audio_path,
+                        lambda path: transcriber.transcribe_audio(path, model_path,
+                                                                  language, "json"),
+                        job.metrics))
+        except Exception as e:
+            release_audio(job)
+            finish(job, f"transcribe: {e}")
+            return
+        release_audio(job)
+        write_queue.put(job)
+
+    def write(job: _Job) -> None:
+        try:
+            with job.metrics.stage("write") as stage:
+                written = transcriber.save_outputs(job.result, job.output_path,
+                                                   output_formats)
+                stage.bytes_written = sum(file_size(path) for path in written)
+        except Exception as e:
+            finish(job, f"write: {e}")
+            return
+        finish(job)
+
+    stages = [
+        _Stage("extract", extract_workers, extract, extract_queue),
+        _Stage("transcribe", transcribe_workers, transcribe, transcribe_queue),
+        _Stage("write", write_workers, write, write_queue),
+    ]
+    for stage in stages:
+        stage.start()
+
+    for index, file_path in enumerate(files):
+        done_path = journal.is_done(file_path) if journal is not None else None
+        if done_path:
+            item = BatchItemResult(input_path=file_path, output_path=done_path,
+                                   success=True, skipped=True)
+            with results_lock:
+                results[index] = item
+            if on_result:
+                on_result(item)
+            continue
+        extract_queue.put(_Job(index=index, input_path=file_path,
+                               output_path=output_paths[file_path]))
+
+    # Shut stages down in order so each drains before the next is told to stop
+    for stage in stages:
+        stage.stop_and_join()
+
+    return [results[index] for index in range(len(files))]
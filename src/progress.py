@@ -0,0 +1,282 @@
+"""
+Progress reporting and incremental subprocess output for Local Video Transcriber
+
+FFmpeg and Whisper.cpp output is read line by line while they run instead of
+being collected at exit. FFmpeg's ``time=`` stats and Whisper.cpp's segment
+timestamps are compared with the media duration to produce progress events
+with a percentage and ETA. Only a bounded tail of stderr is kept, and stdout
+spills to a temporary file past a small limit, so memory stays flat however
+long the recording is.
+"""
+
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from . import config
+from . import formats
+
+_FFMPEG_TIME = re.compile(r'time=\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)')
+
+
+@dataclass
+class ProgressEvent:
+    """A progress update for one stage of one file.
+
+    Attributes:
+        stage: "extract", "silence" (chunk planning) or "transcribe"
+        input_path: File being processed
+        position: Seconds of media processed so far
+        duration: Total media seconds, or None if unknown
+        elapsed: Seconds since the stage started
+        text: Latest transcribed text, for transcribe events
+        done: True for the final event of the stage
+    """
+
+    stage: str
+    input_path: Optional[str]
+    position: float
+    duration: Optional[float]
+    elapsed: float
+    text: Optional[str] = None
+    done: bool = False
+
+    @property
+    def percent(self) -> Optional[float]:
+        """Percentage complete, or None if the duration is unknown."""
+        if self.done:
+            return 100.0
+        if not self.duration:
+            return None
+        return min(100.0, 100.0 * self.position / self.duration)
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds remaining, extrapolated from the rate so far."""
+        if self.done:
+            return 0.0
+        if not self.duration or self.position <= 0:
+            return None
+        remaining = max(0.0, self.duration - self.position)
+        return self.elapsed * remaining / self.position
+
+
+ProgressCallback = Callable[[ProgressEvent], None]
+
+
+class ProgressTracker:
+    """Turn media positions into ProgressEvents for a callback."""
+
+    def __init__(self, stage: str, callback: Optional[ProgressCallback],
+                 duration: float = None, input_path: str = None):
+        """
+        Args:
+            stage: Stage name reported in events
+            callback: Receives each event (may be called from a reader thread)
+            duration: Total media seconds, if known
+            input_path: File being processed
+        """
+        self.stage = stage
+        self.callback = callback
+        self.duration = duration
+        self.input_path = input_path
+        self.position = 0.0
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _emit(self, text: str = None, done: bool = False) -> None:
+        if self.callback is None:
+            return
+        self.callback(ProgressEvent(
+            stage=self.stage, input_path=self.input_path, position=self.position,
+            duration=self.duration, elapsed=time.monotonic() - self._start,
+            text=text, done=done
+        ))
+
+    def update(self, position: float, text: str = None) -> None:
+        """Report that media up to ``position`` seconds has been processed."""
+        with self._lock:
+            self.position = max(self.position, position)
+            self._emit(text)
+
+    def advance(self, seconds: float) -> None:
+        """Add ``seconds`` to the position (for work finishing out of order)."""
+        with self._lock:
+            self.position += seconds
+            self._emit()
+
+    def finish(self) -> None:
+        """Report the stage as complete."""
+        with self._lock:
+            if self.duration:
+                self.position = self.duration
+            self._emit(done=True)
+
+    def ffmpeg_line(self, line: str) -> None:
+        """Feed a line of FFmpeg stderr; ``time=`` stats advance the position."""
+        match = _FFMPEG_TIME.search(line)
+        if match:
+            hours, minutes, seconds = match.groups()
+            self.update(int(hours) * 3600 + int(minutes) * 60 + float(seconds))
+
+    def whisper_line(self, line: str) -> None:
+        """Feed a line of Whisper.cpp stdout; segments advance the position."""
+        segment = formats.parse_console_line(line)
+        if segment is not None:
+            self.update(segment['end'], segment['text'])
+
+
+class StreamedOutput:
+    """Result of run_streaming: exit status, stdout spool and stderr tail."""
+
+    def __init__(self, args: List[str], returncode: int, stdout_spool, stderr: str):
+        self.args = args
+        self.returncode = returncode
+        self.stderr = stderr
+        self._spool = stdout_spool
+
+    @property
+    def stdout(self) -> str:
+        """The full standard output, read back from the spool."""
+        if self._spool is None:
+            return ""
+        self._spool.seek(0)
+        return self._spool.read()
+
+    def close(self) -> None:
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+    def __enter__(self) -> "StreamedOutput":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _pump(stream, tail: Optional[deque], spool, on_line) -> None:
+    for line in stream:
+        if tail is not None:
+            tail.append(line)
+        if spool is not None:
+            spool.write(line)
+        if on_line is not None:
+            on_line(line)
+
+
+class StreamingProcess:
+    """A running command whose output is handed to callbacks line by line.
+
+    FFmpeg redraws its stats line with carriage returns; text mode turns
+    those into line breaks, so each update arrives as its own line.
+    """
+
+    def __init__(self, cmd: List[str], on_stdout: Callable[[str], None] = None,
+                 on_stderr: Callable[[str], None] = None, stdin=None,
+                 on_start: Callable[[int], None] = None, keep_stdout: bool = True,
+                 pipe_stdout: bool = False):
+        """
+        Start the command. Stderr is read from a background thread straight
+        away; stdout is read by wait().
+
+        Args:
+            cmd: Command line
+            on_stdout: Called with each stdout line
+            on_stderr: Called with each stderr line (from a reader thread)
+            stdin: Standard input for the process
+            on_start: Called with the child's pid once it has started (e.g.
+                CpuAllocation.pin_process)
+            keep_stdout: Keep stdout for StreamedOutput.stdout (spooled to
+                disk past config.SUBPROCESS_STDOUT_SPOOL_SIZE)
+            pipe_stdout: Leave ``process.stdout`` unread so it can feed another
+                process; the caller closes it once that process has started
+        """
+        self.cmd = cmd
+        self.pipe_stdout = pipe_stdout
+        self.on_stdout = on_stdout
+        self._stderr_tail: deque = deque(maxlen=config.SUBPROCESS_STDERR_TAIL_LINES)
+        self._spool = (tempfile.SpooledTemporaryFile(
+                           max_size=config.SUBPROCESS_STDOUT_SPOOL_SIZE,
+                           mode='w+', encoding='utf-8')
+                       if keep_stdout else None)
+        try:
+            self.process = subprocess.Popen(cmd, stdin=stdin, stdout=subprocess.PIPE,
+                                            stderr=subprocess.PIPE, text=True,
+                                            errors='replace')
+        except BaseException:
+            if self._spool is not None:
+                self._spool.close()
+            raise
+        if on_start is not None:
+            try:
+                on_start(self.process.pid)
+            except BaseException:
+                self.process.kill()
+                self.process.wait()
+                self.process.stdout.close()
+                self.process.stderr.close()
+                if self._spool is not None:
+                    self._spool.close()
+                raise
+        self._reader = threading.Thread(
+            target=_pump, args=(self.process.stderr, self._stderr_tail, None, on_stderr),
+            daemon=True
+        )
+        self._reader.start()
+
+    def wait(self, check: bool = True) -> StreamedOutput:
+        """
+        Read stdout until the command exits.
+
+        Args:
+            check: Raise CalledProcessError on a non-zero exit
+
+        Returns:
+            StreamedOutput; close it (or use it as a context manager) to
+            drop the stdout spool
+        """
+        try:
+            if not self.pipe_stdout:
+                _pump(self.process.stdout, None, self._spool, self.on_stdout)
+            self.process.wait()
+        except BaseException:
+            self.process.kill()
+            self.process.wait()
+            if self._spool is not None:
+                self._spool.close()
+            raise
+        finally:
+            self._reader.join()
+            self.process.stdout.close()
+            self.process.stderr.close()
+
+        output = StreamedOutput(self.cmd, self.process.returncode, self._spool,
+                                "".join(self._stderr_tail))
+        if check and self.process.returncode != 0:
+            output.close()
+            raise subprocess.CalledProcessError(self.process.returncode, self.cmd,
+                                                stderr=output.stderr)
+        return output
+
+
+def run_streaming(cmd: List[str], on_stdout: Callable[[str], None] = None,
+                  on_stderr: Callable[[str], None] = None, stdin=None,
+                  on_start: Callable[[int], None] = None, check: bool = True,
+                  keep_stdout: bool = True) -> StreamedOutput:
+    """
+    Run a command to completion, handing its output to callbacks line by line.
+
+    Arguments are those of StreamingProcess and StreamingProcess.wait.
+
+    Returns:
+        StreamedOutput; close it (or use it as a context manager) to drop
+        the stdout spool
+    """
+    return StreamingProcess(cmd, on_stdout=on_stdout, on_stderr=on_stderr, stdin=stdin,
+                            on_start=on_start, keep_stdout=keep_stdout).wait(check)
@@ -0,0 +1,155 @@
+"""
+CPU scheduling for Whisper.cpp jobs
+
+Works out how many CPUs this process may really use (affinity mask and
+cgroup quota inside containers), splits them between concurrently running
+jobs and hands each job an explicit thread count and, optionally, its own
+core set to pin to.
+"""
+
+import math
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+
+@dataclass
+class CpuAllocation:
+    """CPUs granted to one running job."""
+
+    threads: int
+    cpus: List[int]
+    pin: bool = False
+    processors: int = 1
+
+    def pin_process(self, pid: int) -> None:
+        """
+        Pin a started child to this job's cores (a no-op unless pinning).
+
+        Done from the parent after the child starts, as a preexec_fn isn't
+        safe while other threads run. Whisper.cpp starts its compute
+        threads after loading the model, so they inherit the mask.
+        """
+        if not self.pin or not self.cpus or not hasattr(os, 'sched_setaffinity'):
+            return
+        try:
+            os.sched_setaffinity(pid, set(self.cpus))
+        except ProcessLookupError:
+            # Already exited
+            pass
+
+
+def _read_file(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(root: str = '/sys/fs/cgroup') -> Optional[float]:
+    """
+    Return the CPU quota imposed by cgroups, in CPUs.
+
+    Supports cgroup v2 (``cpu.max``) and v1 (``cpu.cfs_quota_us``).
+
+    Args:
+        root: cgroup filesystem mount point
+
+    Returns:
+        Number of CPUs allowed, or None when unlimited or unknown
+    """
+    cpu_max = _read_file(os.path.join(root, 'cpu.max'))
+    if cpu_max:
+        quota, _, period = cpu_max.partition(' ')
+        if quota != 'max' and period:
+            try:
+                return int(quota) / int(period)
+            except ValueError:
+                return None
+        return None
+
+    quota = _read_file(os.path.join(root, 'cpu', 'cpu.cfs_quota_us'))
+    period = _read_file(os.path.join(root, 'cpu', 'cpu.cfs_period_us'))
+    try:
+        if quota and period and int(quota) > 0:
+            return int(quota) / int(period)
+    except ValueError:
+        pass
+    return None
+
+
+def available_cpus() -> List[int]:
+    """Return the CPU ids this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def effective_cpu_count() -> int:
+    """Return how many CPUs' worth of work this process can actually get."""
+    count = len(available_cpus())
+    limit = cgroup_cpu_limit()
+    if limit:
+        count = min(count, max(1, math.ceil(limit)))
+    return max(1, count)
+
+
+class CpuScheduler:
+    """Split the usable CPUs into equal slots, one per concurrent job."""
+
+    def __init__(self, slots: int = 1, pin: bool = False,
+                 threads: int = None, processors: int = 1,
+                 cpus: List[int] = None, cpu_count: int = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            slots: Number of jobs expected to run at the same time
+            pin: Pin each job to its own set of cores
+            threads: Override the computed thread count per job
+            processors: Whisper.cpp processors (-p) per job; the job's
+                threads are divided between them
+            cpus: CPU ids to schedule on (default: affinity mask)
+            cpu_count: CPUs' worth of quota (default: effective_cpu_count)
+        """
+        self.cpus = cpus if cpus is not None else available_cpus()
+        self.cpu_count = cpu_count or min(len(self.cpus), effective_cpu_count())
+        self.slots = max(1, slots)
+        self.pin = pin
+        self.processors = max(1, processors)
+        total_threads = threads or max(1, self.cpu_count // self.slots)
+        self.threads = max(1, total_threads // self.processors)
+
+        # Contiguous core sets per slot; slots share cores when there are
+        # more slots than CPUs
+        self._core_sets = []
+        per_slot = max(1, len(self.cpus) // self.slots)
+        for slot in range(self.slots):
+            start = (slot * per_slot) % len(self.cpus)
+            self._core_sets.append(self.cpus[start:start + per_slot])
+
+        self._free = list(range(self.slots))
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def lease(self) -> Iterator[CpuAllocation]:
+        """
+        Reserve a slot for the duration of a job.
+
+        Blocks while every slot is in use, so more concurrent jobs than slots
+        queue instead of oversubscribing the CPUs.
+        """
+        with self._condition:
+            while not self._free:
+                self._condition.wait()
+            slot = self._free.pop(0)
+        try:
+            yield CpuAllocation(threads=self.threads, cpus=self._core_sets[slot],
+                                pin=self.pin, processors=self.processors)
+        finally:
+            with self._condition:
+                self._free.append(slot)
+                self._condition.notify()
@@ -0,0 +1,268 @@
+"""
+Per-job scratch space for Local Video Transcriber
+
+Every transcription gets a private work directory for its extracted WAV and
+the files derived from it (speech-only audio, chunks, Whisper.cpp output), so
+inputs that share a stem (``intro.mp4`` and ``intro.mov``) never share a path.
+The directory goes on a RAM-backed filesystem (``/dev/shm``) when the job's
+expected size fits there, and into the temp directory otherwise.
+
+The expected sizes of all open jobs count against a quota: a job that would
+exceed it waits until earlier jobs release their space (a job larger than the
+whole quota runs once nothing else holds scratch). Each directory holds a lock
+file its process keeps locked, so directories left behind by a crashed or
+killed process are recognised and swept at start-up.
+"""
+
+import fcntl
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from . import config
+
+LOCK_NAME = ".lock"
+
+# Bytes per second of Whisper-ready audio (16 kHz mono 16-bit) and WAV header
+_WAV_BYTES_PER_SECOND = 16000 * 2
+_WAV_HEADER_BYTES = 44
+
+
+def estimate_audio_bytes(duration: Optional[float], fallback: int = 0) -> int:
+    """
+    Expected size of the Whisper-ready WAV for an input.
+
+    Args:
+        duration: Input duration in seconds (None if unknown)
+        fallback: Size to assume when the duration is unknown
+
+    Returns:
+        Size in bytes
+    """
+    if duration is None:
+        return fallback
+    return int(duration * _WAV_BYTES_PER_SECOND) + _WAV_HEADER_BYTES
+
+
+def _tree_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _is_orphaned(path: str) -> bool:
+    """True if no live process holds the job directory's lock."""
+    try:
+        fd = os.open(os.path.join(path, LOCK_NAME), os.O_RDWR)
+    except FileNotFoundError:
+        # Either being created right now or left by a crash before its
+        # lock existed; only the latter gets old
+        try:
+            return time.time() - os.path.getmtime(path) > config.SCRATCH_ORPHAN_GRACE_SECONDS
+        except OSError:
+            return False
+    except OSError:
+        return False  # Another user's directory
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    finally:
+        os.close(fd)
+    return True
+
+
+class ScratchJob:
+    """One job's private scratch directory, removed by close()."""
+
+    def __init__(self, manager: 'ScratchManager', path: str, reserved_bytes: int,
+                 in_ram: bool, lock_file):
+        self.path = path
+        self.reserved_bytes = reserved_bytes
+        self.in_ram = in_ram
+        self._manager = manager
+        self._lock_file = lock_file
+        self._closed = False
+
+    def file(self, name: str) -> str:
+        """Path of a file inside the job directory."""
+        return os.path.join(self.path, name)
+
+    def close(self) -> None:
+        """Remove the directory with everything in it and return the space."""
+        if not self._closed:
+            self._closed = True
+            self._manager._release(self)
+
+    def __enter__(self) -> 'ScratchJob':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ScratchManager:
+    """Hands out job directories within a shared space quota."""
+
+    def __init__(self, disk_dir: str, ram_dir: str = None, quota: int = None):
+        """
+        Args:
+            disk_dir: Directory for job directories that don't go to RAM
+            ram_dir: RAM-backed directory tried first (default:
+                config.SCRATCH_RAM_DIR; "" disables it)
+            quota: Bytes all open jobs may reserve together (default:
+                config.SCRATCH_QUOTA; 0 = unlimited)
+        """
+        self.disk_dir = disk_dir
+        self.ram_dir = config.SCRATCH_RAM_DIR if ram_dir is None else ram_dir
+        self.quota = config.SCRATCH_QUOTA if quota is None else quota
+        self._condition = threading.Condition()
+        self._reserved = 0
+        self._ram_reserved = 0
+        self._jobs = 0
+        self._release_listeners: List[Callable[[], None]] = []
+
+    @property
+    def reserved_bytes(self) -> int:
+        """Space reserved by the jobs open right now."""
+        with self._condition:
+            return self._reserved
+
+    def _fits_quota(self, size: int) -> bool:
+        return not self.quota or self._jobs == 0 or self._reserved + size <= self.quota
+
+    def _fits_ram(self, size: int) -> bool:
+        if not self.ram_dir or not os.path.isdir(self.ram_dir):
+            return False
+        try:
+            free = shutil.disk_usage(self.ram_dir).free
+        except OSError:
+            return False
+        # Reservations of jobs still extracting are not on the filesystem yet
+        return self._ram_reserved + size <= free * config.SCRATCH_RAM_MAX_SHARE
+
+    def acquire(self, expected_bytes: int = 0, timeout: float = None) -> ScratchJob:
+        """
+        Reserve space and create a job directory, waiting for the quota.
+
+        Args:
+            expected_bytes: Most the job is expected to write
+            timeout: Seconds to wait for the quota (None waits forever)
+
+        Returns:
+            ScratchJob (use as a context manager or call close())
+
+        Raises:
+            TimeoutError: if the space did not free up in time
+        """
+        expected_bytes = max(0, int(expected_bytes))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not self._fits_quota(expected_bytes):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"Scratch quota of {self.quota} bytes is in use")
+                self._condition.wait(remaining)
+            in_ram = self._fits_ram(expected_bytes)
+            self._reserve(expected_bytes, in_ram, 1)
+
+        try:
+            path, lock_file = self._create(self.ram_dir if in_ram else self.disk_dir)
+        except OSError:
+            if not in_ram:
+                self._unreserve(expected_bytes, False)
+                raise
+            # RAM directory not usable after all (read-only, full, ...)
+            with self._condition:
+                self._ram_reserved -= expected_bytes
+            in_ram = False
+            try:
+                path, lock_file = self._create(self.disk_dir)
+            except OSError:
+                self._unreserve(expected_bytes, False)
+                raise
+        return ScratchJob(self, path, expected_bytes, in_ram, lock_file)
+
+    @contextmanager
+    def on_release(self, callback: Callable[[], None]) -> Iterator[None]:
+        """
+        Call ``callback`` whenever a job gives its space back, while in the block.
+
+        For waiters that can't block a thread in acquire() (the asyncio
+        API); the callback runs in the releasing thread, under the
+        manager's lock, so it should only hand off (e.g. via
+        loop.call_soon_threadsafe).
+        """
+        with self._condition:
+            self._release_listeners.append(callback)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._release_listeners.remove(callback)
+
+    def _reserve(self, size: int, in_ram: bool, jobs: int) -> None:
+        self._reserved += size
+        self._jobs += jobs
+        if in_ram:
+            self._ram_reserved += size
+
+    def _unreserve(self, size: int, in_ram: bool) -> None:
+        with self._condition:
+            self._reserve(-size, in_ram, -1)
+            self._condition.notify_all()
+            for callback in self._release_listeners:
+                callback()
+
+    def _create(self, base: str) -> Tuple[str, object]:
+        os.makedirs(base, exist_ok=True)
+        path = tempfile.mkdtemp(prefix=f"{config.SCRATCH_PREFIX}{os.getpid()}-", dir=base)
+        # Lock under another name and rename into place: a sweep() in another
+        # process must never find LOCK_NAME unlocked in a live directory (a
+        # directory without it is left alone until it is old)
+        pending = os.path.join(path, f"{LOCK_NAME}.new")
+        lock_file = open(pending, 'w')
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        os.rename(pending, os.path.join(path, LOCK_NAME))
+        return path, lock_file
+
+    def _release(self, job: ScratchJob) -> None:
+        shutil.rmtree(job.path, ignore_errors=True)
+        job._lock_file.close()
+        self._unreserve(job.reserved_bytes, job.in_ram)
+
+    def sweep(self) -> Tuple[int, int]:
+        """
+        Remove job directories whose process is gone.
+
+        Returns:
+            (directories removed, bytes freed)
+        """
+        removed, freed = 0, 0
+        for base in {self.disk_dir, self.ram_dir}:
+            if not base or not os.path.isdir(base):
+                continue
+            try:
+                entries = list(os.scandir(base))
+            except OSError:
+                continue
+            for entry in entries:
+                if not (entry.name.startswith(config.SCRATCH_PREFIX)
+                        and entry.is_dir(follow_symlinks=False)):
+                    continue
+                if _is_orphaned(entry.path):
+                    size = _tree_size(entry.path)
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    if not os.path.exists(entry.path):
+                        removed += 1
+                        freed += size
+        return removed, freed
@@ -0,0 +1,343 @@
+"""
+Full-text search over transcripts for Local Video Transcriber
+
+Every saved transcript is added to a SQLite FTS5 index, one row per segment
+with its timestamps, so ``search`` finds which recording mentions a term, and
+where, without reading the archive. ``reindex`` brings the index up to date
+with transcripts written or edited outside the tool; files whose size and
+modification time haven't changed since they were indexed are skipped.
+
+A recording saved in several formats (``talk.srt`` and ``talk.txt``) is
+indexed once, from the format that carries the most: JSON, then JSONL, then
+subtitles (timestamps), then plain text (no timestamps).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import config, formats
+
+# Bump when the table layout changes; older indexes are rebuilt by reindex
+SEARCH_FORMAT_VERSION = 1
+
+# Formats a recording is indexed from, best first
+TRANSCRIPT_PREFERENCE = ['json', 'jsonl', 'jsonl.gz', 'jsonl.zst', 'srt', 'vtt', 'txt']
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS transcripts (
+        id         INTEGER PRIMARY KEY,
+        path       TEXT NOT NULL UNIQUE,
+        base       TEXT NOT NULL,
+        size       INTEGER NOT NULL,
+        mtime_ns   INTEGER NOT NULL,
+        indexed_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS transcripts_base ON transcripts (base)",
+    """
+    CREATE TABLE IF NOT EXISTS segments (
+        id            INTEGER PRIMARY KEY,
+        transcript_id INTEGER NOT NULL,
+        start         REAL,
+        end           REAL,
+        text          TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS segments_transcript ON segments (transcript_id)",
+    # External content: the text is stored once, in segments
+    "CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5("
+    "text, content='segments', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+]
+
+
+@dataclass
+class SearchHit:
+    """One matching segment.
+
+    Attributes:
+        path: Transcript file
+        start: Segment start in seconds (None for plain text transcripts)
+        end: Segment end in seconds (None for plain text transcripts)
+        snippet: Matching text with the terms between the given markers
+        score: BM25 rank, lower is better
+    """
+
+    path: str
+    start: Optional[float]
+    end: Optional[float]
+    snippet: str
+    score: float
+
+
+@dataclass
+class ReindexStats:
+    """What a reindex run did."""
+
+    indexed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    failed: int = 0
+
+
+def preferred_transcript(paths: Iterable[str]) -> Optional[str]:
+    """
+    Pick the file a recording is indexed from.
+
+    Args:
+        paths: Transcripts of one recording in different formats
+
+    Returns:
+        The path in the most informative format, or None if none is a transcript
+    """
+    ranked = []
+    for path in paths:
+        fmt = transcript_format(path)
+        if fmt is not None:
+            ranked.append((TRANSCRIPT_PREFERENCE.index(fmt), path))
+    return min(ranked)[1] if ranked else None
+
+
+def transcript_format(path: str) -> Optional[str]:
+    """Output format of a transcript path, or None for other files."""
+    lower = path.lower()
+    for fmt in sorted(TRANSCRIPT_PREFERENCE, key=len, reverse=True):
+        if lower.endswith(f".{fmt}"):
+            return fmt
+    return None
+
+
+def load_segments(path: str) -> List[Dict[str, Any]]:
+    """
+    Read the segments of a transcript in any output format.
+
+    Args:
+        path: Transcript file
+
+    Returns:
+        Segments with ``start``/``end`` in seconds (None for plain text) and
+        ``text``
+
+    Raises:
+        ValueError: if the file is not a transcript
+    """
+    fmt = transcript_format(path)
+    if fmt is None:
+        raise ValueError(f"Not a transcript: {path}")
+    if fmt.startswith('json'):
+        return formats.get_segments(formats.load_result(path))
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if fmt == 'txt':
+        return [{'start': None, 'end': None, 'text': line.strip()}
+                for line in text.splitlines() if line.strip()]
+    return formats.parse_subtitles(text)
+
+
+def _match_query(query: str) -> str:
+    """Quote every term so punctuation can't turn into FTS5 syntax."""
+    terms = query.split()
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+class TranscriptIndex:
+    """SQLite FTS5 index of transcript segments."""
+
+    def __init__(self, path: str = None):
+        """
+        Open (or create) an index.
+
+        Args:
+            path: SQLite database file (default:
+                config.get_default_search_index())
+        """
+        self.path = path or config.get_default_search_index()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Batches and watch runs share the index; wait for each other's writes
+        self._db = sqlite3.connect(self.path, check_same_thread=False,
+                                   isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version != SEARCH_FORMAT_VERSION:
+            for table in ('segments_fts', 'segments', 'transcripts'):
+                self._db.execute(f"DROP TABLE IF EXISTS {table}")
+            self._db.execute(f"PRAGMA user_version={SEARCH_FORMAT_VERSION}")
+        try:
+            for statement in _SCHEMA:
+                self._db.execute(statement)
+        except sqlite3.OperationalError as e:
+            self._db.close()
+            raise RuntimeError(f"Transcript search needs SQLite with FTS5: {e}") from None
+
+    def _remove(self, transcript_id: int) -> None:
+        """Drop a transcript and its segments (caller holds the transaction)."""
+        self._db.execute(
+            "INSERT INTO segments_fts (segments_fts, rowid, text) "
+            "SELECT 'delete', id, text FROM segments WHERE transcript_id = ?",
+            (transcript_id,))
+        self._db.execute("DELETE FROM segments WHERE transcript_id = ?", (transcript_id,))
+        self._db.execute("DELETE FROM transcripts WHERE id = ?", (transcript_id,))
+
+    def add(self, path: str, segments: Iterable[Dict[str, Any]]) -> None:
+        """
+        Index a transcript, replacing what was indexed for its recording.
+
+        Args:
+            path: Transcript file (already written)
+            segments: Its segments with ``start``/``end`` in seconds and ``text``
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        base = formats.strip_format_extension(path)
+        rows = [(segment['start'], segment['end'], segment['text'])
+                for segment in segments if segment['text']]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for (transcript_id,) in self._db.execute(
+                        "SELECT id FROM transcripts WHERE path = ? OR base = ?",
+                        (path, base)).fetchall():
+                    self._remove(transcript_id)
+                transcript_id = self._db.execute(
+                    "INSERT INTO transcripts (path, base, size, mtime_ns, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (path, base, stat.st_size, stat.st_mtime_ns, time.time())
+                ).lastrowid
+                for start, end, text in rows:
+                    segment_id = self._db.execute(
+                        "INSERT INTO segments (transcript_id, start, end, text) "
+                        "VALUES (?, ?, ?, ?)", (transcript_id, start, end, text)
+                    ).lastrowid
+                    self._db.execute("INSERT INTO segments_fts (rowid, text) VALUES (?, ?)",
+                                     (segment_id, text))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def add_result(self, paths: Iterable[str], result: Dict[str, Any]) -> Optional[str]:
+        """
+        Index a freshly saved Whisper.cpp result.
+
+        Args:
+            paths: Files the result was saved to
+            result: Whisper.cpp JSON result
+
+        Returns:
+            The path it was indexed under, or None if none is a transcript
+        """
+        path = preferred_transcript(paths)
+        if path is not None:
+            segments = formats.get_segments(result)
+            if transcript_format(path) == 'txt':
+                for segment in segments:
+                    segment['start'] = segment['end'] = None
+            self.add(path, segments)
+        return path
+
+    def _indexed(self) -> Dict[str, Tuple[int, int, int]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT path, id, size, mtime_ns FROM transcripts").fetchall()
+        return {path: (transcript_id, size, mtime_ns)
+                for path, transcript_id, size, mtime_ns in rows}
+
+    def reindex(self, directories: Iterable[str], on_error=None) -> ReindexStats:
+        """
+        Index new and changed transcripts under directories and drop vanished ones.
+
+        Args:
+            directories: Directories searched recursively
+            on_error: Called with (path, exception) for unreadable transcripts
+
+        Returns:
+            ReindexStats
+        """
+        stats = ReindexStats()
+        indexed = self._indexed()
+        for directory in directories:
+            root = os.path.abspath(directory)
+            recordings: Dict[str, List[str]] = {}
+            for dirpath, _, filenames in os.walk(root):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    if transcript_format(path) is not None:
+                        recordings.setdefault(formats.strip_format_extension(path),
+                                              []).append(path)
+
+            current = set()
+            for paths in recordings.values():
+                path = preferred_transcript(paths)
+                current.add(path)
+                try:
+                    stat = os.stat(path)
+                    known = indexed.get(path)
+                    if known and known[1:] == (stat.st_size, stat.st_mtime_ns):
+                        stats.unchanged += 1
+                        continue
+                    self.add(path, load_segments(path))
+                    stats.indexed += 1
+                except (OSError, ValueError) as e:
+                    stats.failed += 1
+                    if on_error is not None:
+                        on_error(path, e)
+
+            prefix = root.rstrip(os.sep) + os.sep
+            gone = [transcript_id for path, (transcript_id, _, _) in indexed.items()
+                    if path.startswith(prefix) and path not in current]
+            with self._lock:
+                self._db.execute("BEGIN IMMEDIATE")
+                for transcript_id in gone:
+                    self._remove(transcript_id)
+                self._db.execute("COMMIT")
+            stats.removed += len(gone)
+        return stats
+
+    def search(self, query: str, limit: int = 20,
+               marks: Tuple[str, str] = ('[', ']')) -> List[SearchHit]:
+        """
+        Find the segments that best match a query.
+
+        Args:
+            query: Words to look for (all must occur in a segment)
+            limit: Maximum number of hits
+            marks: Strings placed around matched terms in snippets
+
+        Returns:
+            Hits, best first
+        """
+        match = _match_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT t.path, s.start, s.end, "
+                "snippet(segments_fts, 0, ?, ?, '…', ?), bm25(segments_fts) AS score "
+                "FROM segments_fts "
+                "JOIN segments s ON s.id = segments_fts.rowid "
+                "JOIN transcripts t ON t.id = s.transcript_id "
+                "WHERE segments_fts MATCH ? ORDER BY score LIMIT ?",
+                (marks[0], marks[1], config.SEARCH_SNIPPET_TOKENS, match, limit)
+            ).fetchall()
+        return [SearchHit(path=path, start=start, end=end, snippet=snippet, score=score)
+                for path, start, end, snippet, score in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Number of indexed transcripts and segments."""
+        with self._lock:
+            transcripts = self._db.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+            segments = self._db.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        return {'transcripts': transcripts, 'segments': segments}
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,270 @@
+"""
+Streaming JSONL segment output for Local Video Transcriber
+
+Pretty-printed JSON of a day-long recording runs to hundreds of megabytes and
+has to be parsed whole before anything can be read from it. The ``jsonl``
+formats write one compact JSON object per segment instead::
+
+    {"start": 12.48, "end": 15.2, "text": "Welcome back."}
+
+Segments are written as they come, in blocks of about
+config.JSONL_BLOCK_SECONDS of audio. With ``jsonl.gz`` or ``jsonl.zst`` each
+block is its own gzip member or zstd frame (the file is still an ordinary
+gzip/zstd stream for ``zcat``/``zstdcat``). A small index next to the file
+(``talk.jsonl.gz.idx``) lists each block's byte offset and time span, so
+read_segments() can seek straight to a time range and only decompress the
+blocks it needs.
+
+zstd needs the zstandard package (``pip install local-transcriber[zstd]``).
+"""
+
+import gzip
+import io
+import json
+import os
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from . import config, formats
+
+# Bump when the index layout changes so old indexes are ignored
+INDEX_FORMAT_VERSION = 1
+INDEX_SUFFIX = ".idx"
+
+# Output format -> compression of its blocks
+COMPRESSIONS = {'jsonl': None, 'jsonl.gz': 'gzip', 'jsonl.zst': 'zstd'}
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd compression needs zstandard: "
+                           "pip install local-transcriber[zstd]") from None
+    return zstandard
+
+
+def check_format(output_format: str) -> None:
+    """
+    Fail early if the compressor an output format needs isn't installed.
+
+    Raises:
+        RuntimeError: for ``jsonl.zst`` without zstandard
+    """
+    if COMPRESSIONS.get(output_format) == 'zstd':
+        _zstandard()
+
+
+def _compress(data: bytes, compression: Optional[str]) -> bytes:
+    if compression == 'gzip':
+        # mtime=0 keeps identical transcripts byte-identical
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if compression == 'zstd':
+        return _zstandard().ZstdCompressor().compress(data)
+    return data
+
+
+def index_path(path: str) -> str:
+    """Path of the seek index written next to a JSONL transcript."""
+    return f"{path}{INDEX_SUFFIX}"
+
+
+def encode_segment(segment: Dict[str, Any]) -> str:
+    """One JSONL line (with newline) for a segment with start/end in seconds."""
+    return json.dumps({'start': round(segment['start'], 3), 'end': round(segment['end'], 3),
+                       'text': segment['text']},
+                      ensure_ascii=False, separators=(',', ':')) + "\n"
+
+
+class SegmentWriter:
+    """Write segments to a JSONL file in indexed, optionally compressed blocks."""
+
+    def __init__(self, path: str, compression: str = None,
+                 metadata: Dict[str, Any] = None, block_seconds: float = None):
+        """
+        Args:
+            path: Transcript file to create
+            compression: None, "gzip" or "zstd"
+            metadata: Result fields besides the segments (model, params, ...),
+                kept in the index
+            block_seconds: Audio covered by one seekable block (default:
+                config.JSONL_BLOCK_SECONDS)
+        """
+        if compression not in (None, 'gzip', 'zstd'):
+            raise ValueError(f"Unsupported compression: {compression}")
+        if compression == 'zstd':
+            _zstandard()  # Fail before creating the file
+        self.path = path
+        self.compression = compression
+        self.metadata = metadata or {}
+        self.block_seconds = block_seconds or config.JSONL_BLOCK_SECONDS
+        self.segments = 0
+        self._file = open(path, 'wb')
+        self._blocks: List[List[float]] = []
+        self._lines: List[bytes] = []
+        self._size = 0
+        self._block_start = 0.0
+        self._block_end = 0.0
+        self._block_first = 0
+
+    def write(self, segment: Dict[str, Any]) -> None:
+        """Append a segment with ``start``/``end`` in seconds and ``text``."""
+        if self._lines and (segment['start'] >= self._block_start + self.block_seconds
+                            or self._size >= config.JSONL_BLOCK_BYTES):
+            self._flush()
+        if not self._lines:
+            self._block_start = segment['start']
+            self._block_end = segment['end']
+            self._block_first = self.segments
+        line = encode_segment(segment).encode('utf-8')
+        self._lines.append(line)
+        self._size += len(line)
+        self._block_end = max(self._block_end, segment['end'])
+        self.segments += 1
+
+    def _flush(self) -> None:
+        offset = self._file.tell()
+        self._file.write(_compress(b"".join(self._lines), self.compression))
+        self._blocks.append([round(self._block_start, 3), round(self._block_end, 3),
+                             offset, self._block_first])
+        self._lines = []
+        self._size = 0
+
+    def close(self) -> None:
+        """Write the last block and the index."""
+        if self._file.closed:
+            return
+        if self._lines:
+            self._flush()
+        self._file.close()
+        index = {
+            'version': INDEX_FORMAT_VERSION,
+            'compression': self.compression,
+            'segments': self.segments,
+            'size': os.path.getsize(self.path),
+            'metadata': self.metadata,
+            # [first start, last end, byte offset, first segment number]
+            'blocks': self._blocks,
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(index, f, separators=(',', ':'))
+            os.replace(tmp_path, index_path(self.path))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def __enter__(self) -> 'SegmentWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_jsonl(result: Dict[str, Any], path: str, output_format: str = 'jsonl') -> str:
+    """
+    Write a Whisper.cpp JSON result as a JSONL transcript with its index.
+
+    Args:
+        result: Whisper.cpp JSON result
+        path: Output file
+        output_format: ``jsonl``, ``jsonl.gz`` or ``jsonl.zst``
+
+    Returns:
+        path
+    """
+    metadata = {key: value for key, value in result.items() if key != 'transcription'}
+    with SegmentWriter(path, COMPRESSIONS[output_format], metadata) as writer:
+        for segment in formats.iter_segments(result):
+            writer.write(segment)
+    return path
+
+
+def load_index(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the seek index of a JSONL transcript.
+
+    Args:
+        path: JSONL transcript
+
+    Returns:
+        Index dictionary, or None if it is missing, stale or unreadable
+    """
+    try:
+        with open(index_path(path), encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != INDEX_FORMAT_VERSION or index.get('size') != os.path.getsize(path):
+        return None
+    return index
+
+
+def _open_lines(raw) -> Iterable[str]:
+    """Text lines of a (possibly compressed) stream positioned at a block."""
+    position = raw.tell()
+    magic = raw.read(4)
+    raw.seek(position)
+    if magic.startswith(_GZIP_MAGIC):
+        stream = gzip.GzipFile(fileobj=raw, mode='rb')
+    elif magic == _ZSTD_MAGIC:
+        stream = _zstandard().ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+    else:
+        stream = raw
+    return io.TextIOWrapper(stream, encoding='utf-8')
+
+
+def read_segments(path: str, start: float = None,
+                  end: float = None) -> Iterator[Dict[str, Any]]:
+    """
+    Read the segments of a JSONL transcript, optionally only a time range.
+
+    With an index only the blocks overlapping the range are read;
+    without one the file is scanned from the beginning.
+
+    Args:
+        path: JSONL transcript (plain, gzip or zstd)
+        start: Skip segments ending at or before this time (seconds)
+        end: Stop at the first segment starting at or after this time
+
+    Returns:
+        Iterator of segments with ``start``/``end`` in seconds and ``text``
+    """
+    offset = 0
+    index = load_index(path) if start is not None else None
+    if index is not None:
+        blocks = [block for block in index['blocks'] if block[1] > start]
+        if not blocks:
+            return
+        offset = blocks[0][2]
+    with open(path, 'rb') as raw:
+        raw.seek(offset)
+        for line in _open_lines(raw):
+            if not line.strip():
+                continue
+            segment = json.loads(line)
+            if end is not None and segment['start'] >= end:
+                return
+            if start is not None and segment['end'] <= start:
+                continue
+            yield segment
+
+
+def load_jsonl_result(path: str) -> Dict[str, Any]:
+    """
+    Load a JSONL transcript back into a Whisper.cpp shaped result.
+
+    Args:
+        path: JSONL transcript
+
+    Returns:
+        Result dictionary (metadata comes from the index when present)
+    """
+    index = load_index(path)
+    return formats.build_result(read_segments(path), base=index['metadata'] if index else None)
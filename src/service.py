@@ -0,0 +1,681 @@
+"""
+Local HTTP job service for Local Video Transcriber
+
+``serve`` lets other systems submit transcription jobs over HTTP instead of
+exec'ing into the container and polling the output directory. A job names a
+file under the input directory or uploads the media as the request body.
+Jobs wait in a bounded queue (a full queue is refused with 429 and the
+current depth) and run on a fixed pool of workers sharing one
+AsyncVideoTranscriber, so models stay loaded between jobs and cancelling a
+job kills its FFmpeg or Whisper.cpp process.
+
+Endpoints (JSON unless noted):
+
+    GET    /health            queue depth, running jobs and workers
+    GET    /jobs              every job still remembered
+    POST   /jobs              {"path": ..., "model": ..., "language": ...,
+                              "formats": ...}, or the media itself as the
+                              body with ?filename=talk.mp4 (and optionally
+                              model, language and formats) in the query
+    GET    /jobs/<id>         status and progress of one job
+    GET    /jobs/<id>/result  the transcript as a file (?format= picks one
+                              of the job's formats)
+    DELETE /jobs/<id>         cancel a queued or running job
+
+A job's model must already be installed: a name from config.WHISPER_MODELS
+whose file is present (requests never trigger a download) or a file in one
+of the model directories. The input directory doesn't count as one, and
+other paths on the host are refused.
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from . import config
+from . import formats
+from . import segments
+from .aio import AsyncVideoTranscriber, CompletedEvent, SegmentEvent
+from .discovery import INPUT_MODEL_DIRECTORY, model_directories
+from .progress import ProgressEvent
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+# Largest JSON request body (job descriptions are tiny)
+_MAX_JSON_BYTES = 64 * 1024
+_COPY_SIZE = 1024 * 1024
+
+_CONTENT_TYPES = {
+    'txt': "text/plain; charset=utf-8",
+    'srt': "application/x-subrip; charset=utf-8",
+    'vtt': "text/vtt; charset=utf-8",
+    'json': "application/json",
+    'jsonl': "application/x-ndjson",
+    'jsonl.gz': "application/gzip",
+    'jsonl.zst': "application/zstd",
+}
+
+
+class QueueFullError(RuntimeError):
+    """Every queue slot is taken; the client should retry later."""
+
+
+@dataclass
+class Job:
+    """One transcription request and what became of it."""
+
+    id: str
+    input_path: str
+    model: str
+    language: Optional[str]
+    formats: List[str]
+    upload: bool = False
+    status: str = QUEUED
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    stage: Optional[str] = None
+    percent: Optional[float] = None
+    segments: int = 0
+    output_path: Optional[str] = None
+    written: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'status': self.status,
+            'input': os.path.basename(self.input_path) if self.upload else self.input_path,
+            'model': self.model,
+            'language': self.language,
+            'formats': self.formats,
+            'created': round(self.created, 3),
+            'started': None if self.started is None else round(self.started, 3),
+            'finished': None if self.finished is None else round(self.finished, 3),
+            'stage': self.stage,
+            'percent': None if self.percent is None else round(self.percent, 1),
+            'segments': self.segments,
+            'outputs': self.written,
+            'error': self.error,
+        }
+
+
+class JobService:
+    """Queue of transcription jobs run by a pool of asyncio workers."""
+
+    def __init__(self, transcriber, input_dir: str, output_dir: str,
+                 model_name_or_path: str = "base", language: str = None,
+                 output_format="txt", workers: int = None, queue_size: int = None,
+                 upload_dir: str = None, model_dirs: List[str] = None):
+        """
+        Initialize the service.
+
+        Args:
+            transcriber: VideoTranscriber shared by all workers
+            input_dir: Directory path jobs may name files in
+            output_dir: Directory for transcripts (one subdirectory per job)
+            model_name_or_path: Model for jobs that don't name one
+            language: Language for jobs that don't name one
+            output_format: Output format(s) for jobs that don't name any
+            workers: Number of jobs run at once
+            queue_size: Jobs that may wait for a worker
+                (default: config.SERVICE_QUEUE_SIZE)
+            upload_dir: Where uploaded media is kept until its job ends
+                (default: in the transcriber's temp directory)
+            model_dirs: Directories jobs may pick model files from
+                (default: discovery.model_directories() without the input
+                directory)
+        """
+        self.transcriber = transcriber
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.model_name_or_path = model_name_or_path
+        self.language = language
+        self.output_formats = formats.parse_formats(output_format)
+        self.workers = max(1, workers or config.get_default_batch_workers())
+        self.queue_size = config.SERVICE_QUEUE_SIZE if queue_size is None else queue_size
+        self.upload_dir = upload_dir or os.path.join(transcriber.temp_dir,
+                                                     "local-transcriber-uploads")
+        if model_dirs is None:
+            model_dirs = [directory for directory in model_directories()
+                          if not _is_within(directory, INPUT_MODEL_DIRECTORY)]
+        # Media in the input directory is never a model
+        self.model_dirs = [directory for directory in model_dirs
+                           if not _is_within(directory, input_dir)]
+        self.runner = AsyncVideoTranscriber(transcriber, max_concurrent=self.workers)
+        os.makedirs(output_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name="service-loop", daemon=True)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Future] = []
+        self._server = None
+
+    def start(self) -> None:
+        """Start the event loop thread and the workers."""
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start_workers(), self._loop).result()
+
+    async def _start_workers(self) -> None:
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [asyncio.ensure_future(self._work())
+                              for _ in range(self.workers)]
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a worker."""
+        with self._lock:
+            return self._count(QUEUED)
+
+    @property
+    def running(self) -> int:
+        """Jobs being transcribed right now."""
+        with self._lock:
+            return self._count(RUNNING)
+
+    def _count(self, status: str) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == status)
+
+    def _check_capacity(self) -> None:
+        """Raise QueueFullError when no more jobs may queue (caller holds the lock)."""
+        depth = self._count(QUEUED)
+        if depth >= self.queue_size:
+            raise QueueFullError(f"Job queue is full ({depth} waiting)")
+
+    def check_capacity(self) -> None:
+        """
+        Fail fast before accepting an upload.
+
+        Raises:
+            QueueFullError: if the queue is full
+        """
+        with self._lock:
+            self._check_capacity()
+
+    def resolve_input(self, path: str) -> str:
+        """
+        Turn a path from a request into a media file inside the input directory.
+
+        Relative paths are relative to the input directory.
+
+        Raises:
+            PermissionError: if the path leads outside the input directory
+            FileNotFoundError: if there is no such file
+            ValueError: if the file is not a supported media format
+        """
+        root = os.path.realpath(self.input_dir)
+        full = os.path.realpath(os.path.join(root, path))
+        if os.path.commonpath([root, full]) != root:
+            raise PermissionError(f"{path} is outside the input directory")
+        if not os.path.isfile(full):
+            raise FileNotFoundError(f"Input file not found: {path}")
+        if not config.validate_media_format(full):
+            raise ValueError(f"Unsupported media format: {path}")
+        return full
+
+    def resolve_model(self, model: str = None) -> str:
+        """
+        Check a model from a request.
+
+        Requests may name the service's own model, an installed model from
+        config.WHISPER_MODELS, or a model file inside one of the model
+        directories (relative paths are relative to each of them). A model
+        that isn't installed is refused rather than downloaded, and so are
+        other paths on the host.
+
+        Returns:
+            The service's model, or the model file's full path
+
+        Raises:
+            ValueError: for any other model
+        """
+        if not model or model == self.model_name_or_path:
+            return self.model_name_or_path
+        if model in config.WHISPER_MODELS:
+            path = self.transcriber.registry.find_model(model)
+            if path is None or not self._in_model_dirs(path):
+                raise ValueError(f"Model {model} is not installed")
+            return os.path.realpath(path)
+        for directory in self.model_dirs:
+            full = os.path.realpath(os.path.join(directory, model))
+            if self._in_model_dirs(full) and os.path.isfile(full):
+                return full
+        raise ValueError(f"Unknown model: {model} (choose an installed model from "
+                         f"{', '.join(config.WHISPER_MODELS)} or a file in the model directories)")
+
+    def _in_model_dirs(self, path: str) -> bool:
+        return any(_is_within(path, directory) for directory in self.model_dirs)
+
+    def _job_options(self, model: str = None, language: str = None, output_format=None):
+        model = self.resolve_model(model)
+        output_formats = formats.parse_formats(output_format or self.output_formats)
+        for output_format in output_formats:
+            segments.check_format(output_format)
+        return model, language or self.language, output_formats
+
+    def submit(self, input_path: str, model: str = None, language: str = None,
+               output_format=None, upload: bool = False, job_id: str = None) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            input_path: Media file (see resolve_input)
+            model: Model name or path (default: the service's)
+            language: Language code (default: the service's)
+            output_format: Output format(s) (default: the service's)
+            upload: input_path is an upload to remove once the job ends
+            job_id: Id to use (default: a new one)
+
+        Returns:
+            The queued Job
+
+        Raises:
+            QueueFullError: if the queue is full
+            ValueError: for an unknown model or output format (see resolve_model)
+        """
+        model, language, output_formats = self._job_options(model, language, output_format)
+        job = Job(id=job_id or uuid.uuid4().hex[:12], input_path=input_path, model=model,
+                  language=language, formats=output_formats, upload=upload)
+        with self._lock:
+            self._check_capacity()
+            self._jobs[job.id] = job
+            self._forget_finished()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+        return job
+
+    def submit_upload(self, body: BinaryIO, length: int, filename: str,
+                      model: str = None, language: str = None, output_format=None) -> Job:
+        """
+        Save uploaded media and queue a job for it.
+
+        Args:
+            body: Stream with the media
+            length: Bytes to read from body
+            filename: Original file name (its extension picks the demuxer)
+            model: Model name or path (default: the service's)
+            language: Language code (default: the service's)
+            output_format: Output format(s) (default: the service's)
+
+        Returns:
+            The queued Job
+
+        Raises:
+            QueueFullError: if the queue is full
+            ValueError: for a bad file name, size, model or output format
+        """
+        name = os.path.basename(filename or "")
+        if not name or not config.validate_media_format(name):
+            raise ValueError(f"Unsupported media format: {filename}")
+        if length <= 0 or length > config.SERVICE_MAX_UPLOAD_BYTES:
+            raise ValueError(f"Upload must be between 1 and "
+                             f"{config.SERVICE_MAX_UPLOAD_BYTES} bytes")
+        self._job_options(model, language, output_format)
+        self.check_capacity()
+
+        job_id = uuid.uuid4().hex[:12]
+        directory = os.path.join(self.upload_dir, job_id)
+        os.makedirs(directory)
+        path = os.path.join(directory, name)
+        try:
+            with open(path, 'wb') as f:
+                remaining = length
+                while remaining:
+                    chunk = body.read(min(_COPY_SIZE, remaining))
+                    if not chunk:
+                        raise ValueError(f"Upload ended after {length - remaining} "
+                                         f"of {length} bytes")
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            return self.submit(path, model, language, output_format, upload=True,
+                               job_id=job_id)
+        except BaseException:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+
+    def _forget_finished(self) -> None:
+        """Drop the oldest finished jobs past config.SERVICE_JOB_HISTORY (lock held)."""
+        finished = [job.id for job in self._jobs.values() if job.status in FINISHED]
+        for job_id in finished[:max(0, len(finished) - config.SERVICE_JOB_HISTORY)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Job:
+        """
+        Look up a job.
+
+        Raises:
+            KeyError: if the job is unknown (or long finished)
+        """
+        with self._lock:
+            return self._jobs[job_id]
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """Snapshot of every remembered job, oldest first."""
+        with self._lock:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def describe(self, job_id: str) -> Dict[str, Any]:
+        """Snapshot of one job (see get)."""
+        with self._lock:
+            return self._jobs[job_id].to_dict()
+
+    def result_path(self, job_id: str, output_format: str = None) -> str:
+        """
+        Path of a finished job's transcript.
+
+        Args:
+            job_id: Job id
+            output_format: One of the job's formats (default: the first)
+
+        Raises:
+            KeyError: if the job is unknown
+            RuntimeError: if the job has not finished successfully
+            ValueError: if the job did not produce that format
+        """
+        job = self.get(job_id)
+        if job.status != DONE:
+            raise RuntimeError(f"Job {job_id} is {job.status}")
+        written = dict(zip(job.formats, job.written))
+        path = written.get(output_format or job.formats[0])
+        if path is None:
+            raise ValueError(f"Job {job_id} has no {output_format} output "
+                             f"(formats: {', '.join(job.formats)})")
+        return path
+
+    def cancel(self, job_id: str, timeout: float = 10.0) -> Job:
+        """
+        Cancel a job. A queued job is dropped; a running one has its
+        processes killed. Finished jobs are left as they are.
+
+        Args:
+            job_id: Job id
+            timeout: Seconds to wait for a running job to stop
+
+        Raises:
+            KeyError: if the job is unknown
+            TimeoutError: if a running job is still stopping after timeout
+        """
+        with self._lock:
+            job = self._jobs[job_id]
+            task = self._tasks.get(job_id)
+            dropped = job.status == QUEUED
+            if dropped:
+                job.status = CANCELLED
+                job.finished = time.time()
+        if dropped:
+            self._remove_upload(job)
+        elif task is not None:
+            future = asyncio.run_coroutine_threadsafe(self._cancel_task(task), self._loop)
+            try:
+                future.result(timeout)
+            except concurrent.futures.TimeoutError:
+                raise TimeoutError(f"Job {job_id} is still stopping after {timeout:g}s")
+        return job
+
+    @staticmethod
+    async def _cancel_task(task: asyncio.Future) -> None:
+        task.cancel()
+        await asyncio.wait([task])
+
+    def output_path_for(self, job: Job) -> str:
+        """Transcript path of a job: a directory per job keeps names apart."""
+        return os.path.join(self.output_dir, job.id,
+                            f"{Path(job.input_path).stem}_transcript.{job.formats[0]}")
+
+    def _remove_upload(self, job: Job) -> None:
+        if job.upload:
+            shutil.rmtree(os.path.dirname(job.input_path), ignore_errors=True)
+
+    def _on_event(self, job: Job, event) -> None:
+        with self._lock:
+            if isinstance(event, ProgressEvent):
+                job.stage = event.stage
+                job.percent = event.percent
+            elif isinstance(event, SegmentEvent):
+                job.segments += 1
+            elif isinstance(event, CompletedEvent):
+                job.written = list(event.written)
+
+    async def _run(self, job: Job) -> None:
+        """Transcribe one job and record how it ended."""
+        status, error = FAILED, "interrupted"
+        try:
+            job.output_path = await self.runner.transcribe_video(
+                job.input_path, job.model, output_path=self.output_path_for(job),
+                language=job.language, output_format=job.formats,
+                on_event=lambda event: self._on_event(job, event))
+            status, error = DONE, None
+        except asyncio.CancelledError:
+            status, error = CANCELLED, None
+            raise
+        except Exception as e:
+            status, error = FAILED, str(e)
+        finally:
+            with self._lock:
+                job.status = status
+                job.error = error
+                job.finished = time.time()
+                self._tasks.pop(job.id, None)
+            self._remove_upload(job)
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            with self._lock:
+                if job.status != QUEUED:
+                    continue
+                job.status = RUNNING
+                job.started = time.time()
+                task = asyncio.ensure_future(self._run(job))
+                self._tasks[job.id] = task
+            try:
+                await asyncio.wait([task])
+            except asyncio.CancelledError:
+                # The service is stopping
+                await self._cancel_task(task)
+                raise
+
+    def serve(self, port: int = None, host: str = "127.0.0.1") -> int:
+        """
+        Serve the HTTP API from a background thread.
+
+        Args:
+            port: Port to listen on (default: config.SERVICE_PORT; 0 picks
+                a free port)
+            host: Interface to bind
+
+        Returns:
+            The bound port
+        """
+        from http.server import ThreadingHTTPServer
+
+        self._server = ThreadingHTTPServer(
+            (host, config.SERVICE_PORT if port is None else port), _make_handler(self))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="service-http",
+                         daemon=True).start()
+        return self._server.server_address[1]
+
+    def close(self) -> None:
+        """Stop the HTTP server, cancel running jobs and stop the workers."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread.is_alive():
+            asyncio.run_coroutine_threadsafe(self._stop_workers(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        self._loop.close()
+
+    async def _stop_workers(self) -> None:
+        for task in self._worker_tasks:
+            task.cancel()
+        if self._worker_tasks:
+            await asyncio.wait(self._worker_tasks)
+
+
+def _is_within(path: str, directory: str) -> bool:
+    """Whether path is directory or inside it, after resolving symlinks."""
+    path, directory = os.path.realpath(path), os.path.realpath(directory)
+    return os.path.commonpath([path, directory]) == directory
+
+
+def _make_handler(service: JobService):
+    """Build the request handler class bound to a service."""
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import parse_qs, urlsplit
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status: int, body, headers=()) -> None:
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_error(self, status: int, message: str, **extra) -> None:
+            self._send_json(status, dict(error=message, **extra))
+
+        def _route(self):
+            url = urlsplit(self.path)
+            parts = [part for part in url.path.split('/') if part]
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            return parts, query
+
+        def do_GET(self):
+            parts, query = self._route()
+            try:
+                if parts == ['health']:
+                    self._send_json(200, {
+                        'status': 'ok',
+                        'queue_depth': service.queue_depth,
+                        'queue_size': service.queue_size,
+                        'running': service.running,
+                        'workers': service.workers,
+                        'backend': service.transcriber.backend.name,
+                    })
+                elif parts == ['jobs']:
+                    self._send_json(200, {'jobs': service.jobs()})
+                elif len(parts) == 2 and parts[0] == 'jobs':
+                    self._send_json(200, service.describe(parts[1]))
+                elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'result':
+                    self._send_file(service.result_path(parts[1], query.get('format')))
+                else:
+                    self._send_error(404, "Not found")
+            except KeyError:
+                self._send_error(404, f"Unknown job: {parts[1]}")
+            except RuntimeError as e:
+                self._send_error(409, str(e))
+            except ValueError as e:
+                self._send_error(400, str(e))
+            except FileNotFoundError:
+                self._send_error(410, f"Transcript of job {parts[1]} was removed")
+            except OSError as e:
+                self._send_error(500, f"Can't read transcript: {e}")
+
+        def _send_file(self, path: str) -> None:
+            fmt = path[len(formats.strip_format_extension(path)):].lstrip('.')
+            content_type = _CONTENT_TYPES.get(fmt, "application/octet-stream")
+            # Open before the status line so a missing file still gets a JSON error
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(size))
+                self.send_header("Content-Disposition",
+                                 f'attachment; filename="{os.path.basename(path)}"')
+                self.end_headers()
+                try:
+                    shutil.copyfileobj(f, self.wfile, _COPY_SIZE)
+                except OSError:
+                    # Too late for an error response; the client sees a short body
+                    self.close_connection = True
+
+        def do_POST(self):
+            parts, query = self._route()
+            if parts != ['jobs']:
+                self._send_error(404, "Not found")
+                return
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                content_type = self.headers.get('Content-Type', '').split(';')[0].strip()
+                if content_type == 'application/json':
+                    if length > _MAX_JSON_BYTES:
+                        raise ValueError("Request body too large")
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                    if not isinstance(request, dict) or not request.get('path'):
+                        raise ValueError('Expected {"path": ...} or an upload with ?filename=')
+                    for name in ('path', 'model', 'language'):
+                        if not isinstance(request.get(name) or "", str):
+                            raise ValueError(f'"{name}" must be a string')
+                    requested = request.get('formats') or ""
+                    if not isinstance(requested, str) and not (
+                            isinstance(requested, list)
+                            and all(isinstance(item, str) for item in requested)):
+                        raise ValueError('"formats" must be a string or a list of strings')
+                    job = service.submit(service.resolve_input(request['path']),
+                                         request.get('model'), request.get('language'),
+                                         request.get('formats'))
+                else:
+                    job = service.submit_upload(self.rfile, length, query.get('filename'),
+                                                query.get('model'), query.get('language'),
+                                                query.get('formats'))
+            except QueueFullError as e:
+                # The body may not have been read; don't reuse the connection
+                self.close_connection = True
+                self._send_json(429, {'error': str(e), 'queue_depth': service.queue_depth,
+                                      'queue_size': service.queue_size},
+                                headers=[("Retry-After", str(config.SERVICE_RETRY_AFTER_SECONDS)),
+                                         ("Connection", "close")])
+                return
+            except FileNotFoundError as e:
+                self._send_error(404, str(e))
+                return
+            except PermissionError as e:
+                self._send_error(403, str(e))
+                return
+            except (ValueError, RuntimeError) as e:
+                self.close_connection = True
+                self._send_error(400, str(e))
+                return
+            self._send_json(202, dict(job.to_dict(), queue_depth=service.queue_depth),
+                            headers=[("Location", f"/jobs/{job.id}")])
+
+        def do_DELETE(self):
+            parts, _ = self._route()
+            if len(parts) != 2 or parts[0] != 'jobs':
+                self._send_error(404, "Not found")
+                return
+            try:
+                service.cancel(parts[1])
+                self._send_json(200, service.describe(parts[1]))
+            except KeyError:
+                self._send_error(404, f"Unknown job: {parts[1]}")
+            except TimeoutError as e:
+                self._send_error(504, str(e), job=service.describe(parts[1]))
+
+    return Handler
@@ -11,30 +11,68 @@ import json
 import subprocess
 import tempfile
 import shutil
+import sqlite3
+import time
+import wave
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 import click
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
-from rich.panel import Panel
-from rich.text import Text
-from rich.table import Table
-import tqdm
 from . import config
+from . import formats
+from . import segments
+from . import ui
+from .backends import CliBackend
+from .chunking import get_wav_duration, transcribe_chunked
+from .discovery import get_registry
+from .metrics import FileMetrics, file_size, wav_duration
+from .model_selection import get_throughput_store, model_name_for_path
+from .extraction import (PASSTHROUGH, COPY, build_extract_command, link_or_copy,
+                         plan_extraction, probe_media)
+from .progress import ProgressTracker, StreamingProcess, run_streaming
+from .scratch import ScratchManager, estimate_audio_bytes
 
-console = Console()
+# rich is only imported once something is printed (see ui.py)
+console = ui.LazyConsole()
+
+FFMPEG_MISSING = "FFmpeg not found. Please install FFmpeg and ensure it's in your PATH."
 
 class VideoTranscriber:
     """Main class for video transcription using Whisper.cpp and FFmpeg."""
     
-    def __init__(self, whisper_path: str = None, temp_dir: str = None):
+    def __init__(self, whisper_path: str = None, temp_dir: str = None,
+                 quiet: bool = False, cache=None, scheduler=None, backend=None,
+                 metrics=None, registry=None, ffmpeg_threads: int = None,
+                 dedup=None, throughput=None, vad: bool = False, scratch=None,
+                 search=None):
         """
         Initialize the transcriber.
         
         Args:
             whisper_path: Path to Whisper.cpp main executable
             temp_dir: Directory for temporary files
+            quiet: Suppress console output (used by batch workers)
+            cache: TranscriptionCache consulted before running Whisper.cpp
+            scheduler: CpuScheduler that assigns threads/cores to each
+                Whisper.cpp process (Whisper.cpp defaults apply when None)
+            backend: TranscriptionBackend that runs Whisper (default: one
+                Whisper.cpp CLI process per file)
+            metrics: MetricsRecorder that receives per-stage timings
+            registry: DiscoveryRegistry used to find executables and models
+                (default: the shared, persisted one)
+            ffmpeg_threads: FFmpeg decoder/filter threads per extraction
+                (default: config.FFMPEG_THREADS; 0 lets FFmpeg decide)
+            dedup: FingerprintIndex used to recognise re-encoded duplicates
+                of files transcribed before
+            throughput: ThroughputStore that records how fast each model
+                runs here, for --model auto (default: the shared one)
+            vad: Send only the speech found by voice activity detection to
+                Whisper.cpp
+            scratch: ScratchManager handing out per-job work directories
+                (default: in temp_dir, preferring config.SCRATCH_RAM_DIR)
+            search: TranscriptIndex every saved transcript is added to
         """
+        self.registry = registry or get_registry()
         self.whisper_path = whisper_path or self._find_whisper_executable()
         
         # Use container temp directory if available
@@ -47,58 +85,27 @@ class VideoTranscriber:
         else:
             self.temp_dir = temp_dir
             
-        self.console = Console()
+        self.console = ui.make_console(quiet=quiet)
+        self.cache = cache
+        self.scheduler = scheduler
+        self.backend = backend or CliBackend(self)
+        self.metrics = metrics
+        self.ffmpeg_threads = (config.FFMPEG_THREADS if ffmpeg_threads is None
+                               else ffmpeg_threads)
+        self.dedup = dedup
+        self.throughput = throughput or get_throughput_store()
+        self.vad = vad
+        self.scratch = scratch or ScratchManager(self.temp_dir)
+        self.search = search
+        self._dependencies_checked = False
+        # Cleared when Whisper.cpp rejects audio on stdin (see transcribe_stream)
+        self._stream_supported = True
         
     def _find_whisper_executable(self) -> str:
         """Find the Whisper.cpp main executable."""
-        # Check environment variable first (for containerized environments)
-        whisper_dir = os.environ.get('WHISPER_CPP_DIR')
-        if whisper_dir:
-            # Prioritize whisper-cli over main
-            whisper_cli_path = os.path.join(whisper_dir, "whisper-cli")
-            if os.path.isfile(whisper_cli_path) and os.access(whisper_cli_path, os.X_OK):
-                return whisper_cli_path
-            # Fallback to main
-            main_path = os.path.join(whisper_dir, "main")
-            if os.path.isfile(main_path) and os.access(main_path, os.X_OK):
-                return main_path
-        
-        possible_paths = [
-            # Container paths (preferred) - whisper-cli first
-            "/opt/whisper.cpp/whisper-cli",  # Container path (preferred)
-            "/opt/whisper.cpp/build/bin/whisper-cli",  # Alternative container path
-            # Local development paths
-            "./whisper.cpp/whisper-cli",
-            "./whisper.cpp/build/bin/whisper-cli",
-            "../whisper.cpp/whisper-cli",
-            "../whisper.cpp/build/bin/whisper-cli",
-            "~/whisper.cpp/whisper-cli",
-            "~/whisper.cpp/build/bin/whisper-cli",
-            # Fallback to main executable (deprecated but still works)
-            "/opt/whisper.cpp/main",  # Container fallback
-            "/opt/whisper.cpp/build/bin/main",  # Container fallback
-            "./whisper.cpp/main",
-            "./whisper.cpp/build/bin/main",
-            "../whisper.cpp/main",
-            "../whisper.cpp/build/bin/main",
-            "~/whisper.cpp/main",
-            "~/whisper.cpp/build/bin/main",
-            "/usr/local/bin/whisper-main",
-            "/opt/whisper.cpp/whisper-main"
-        ]
-        
-        for path in possible_paths:
-            expanded_path = os.path.expanduser(path)
-            if os.path.isfile(expanded_path) and os.access(expanded_path, os.X_OK):
-                return expanded_path
-                
-        # Try to find in PATH
-        try:
-            result = subprocess.run(["which", "whisper-main"], 
-                                  capture_output=True, text=True, check=True)
-            return result.stdout.strip()
-        except subprocess.CalledProcessError:
-            pass
+        path = self.registry.whisper_executable()
+        if path is not None:
+            return path
             
         raise FileNotFoundError(
             "Whisper.cpp main executable not found. Please specify --whisper-path or "
@@ -113,31 +120,21 @@ class VideoTranscriber:
             
         # Check if it's a model name from config
         if model_name_or_path in config.WHISPER_MODELS:
-            # Try to find the model file in common locations
-            model_filename = f"ggml-{model_name_or_path}.bin"
-            possible_paths = [
-                f"./whisper.cpp/models/{model_filename}",
-                f"~/whisper.cpp/models/{model_filename}",
-                f"/opt/whisper.cpp/models/{model_filename}",
-                f"/usr/local/whisper.cpp/models/{model_filename}",
-                f"/app/input/{model_filename}"  # Allow models in input directory
-            ]
-            
-            for path in possible_paths:
-                expanded_path = os.path.expanduser(path)
-                if os.path.isfile(expanded_path):
-                    return expanded_path
+            # Look in the usual model directories (see discovery.model_directories)
+            model_path = self.registry.find_model(model_name_or_path)
+            if model_path is not None:
+                return model_path
                     
             # If not found, try to download it automatically
             self.console.print(f"[yellow]Model '{model_name_or_path}' not found. Attempting to download...[/yellow]")
             try:
                 self._download_model(model_name_or_path)
                 # Check again after download
-                for path in possible_paths:
-                    expanded_path = os.path.expanduser(path)
-                    if os.path.isfile(expanded_path):
-                        self.console.print(f"[green]✓ Model '{model_name_or_path}' downloaded successfully![/green]")
-                        return expanded_path
+                self.registry.forget_models()
+                model_path = self.registry.find_model(model_name_or_path)
+                if model_path is not None:
+                    self.console.print(f"[green]✓ Model '{model_name_or_path}' downloaded successfully![/green]")
+                    return model_path
                 raise FileNotFoundError(f"Failed to download model '{model_name_or_path}'")
             except Exception as e:
                 raise FileNotFoundError(
@@ -192,52 +189,145 @@ class VideoTranscriber:
     
     def _check_dependencies(self) -> None:
         """Check if required dependencies are available."""
-        # Check FFmpeg
-        try:
-            subprocess.run(["ffmpeg", "-version"], 
-                         capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            raise RuntimeError(
-                "FFmpeg not found. Please install FFmpeg and ensure it's in your PATH."
-            )
+        # Dependencies don't change between files, so only probe once
+        if self._dependencies_checked:
+            return
+        
+        # Check FFmpeg (the version probe is cached across runs)
+        if self.registry.tool("ffmpeg") is None:
+            raise RuntimeError(FFMPEG_MISSING)
         
-        # Check Whisper.cpp
+        self._check_whisper_executable()
+        self._dependencies_checked = True
+    
+    def _check_whisper_executable(self) -> None:
+        """Check that the Whisper.cpp executable exists and may be run."""
         if not os.path.isfile(self.whisper_path):
             raise FileNotFoundError(f"Whisper.cpp executable not found at: {self.whisper_path}")
         
         if not os.access(self.whisper_path, os.X_OK):
             raise PermissionError(f"Whisper.cpp executable not executable: {self.whisper_path}")
     
-    def extract_audio(self, video_path: str, output_path: str = None) -> str:
+    def _build_extract_command(self, video_path: str, output_path: str,
+                               plan=None) -> List[str]:
+        """Build the FFmpeg command that converts media to Whisper-ready audio.
+        
+        Passing "-" as output_path writes a WAV stream to stdout. Without a
+        plan (see extraction.plan_extraction) the first audio stream is
+        transcoded.
+        """
+        return build_extract_command(video_path, output_path, plan, self.ffmpeg_threads)
+    
+    def _build_whisper_command(self, audio_path: str, model_path: str,
+                               language: str = None, output_format: str = "txt",
+                               output_prefix: str = None, allocation=None) -> List[str]:
+        """Build the Whisper.cpp command line.
+        
+        Passing "-" as audio_path makes Whisper.cpp read WAV data from stdin.
+        """
+        cmd = [self.whisper_path, "-m", model_path, "-f", audio_path]
+        
+        if language:
+            cmd.extend(["-l", language])
+        
+        # Add output format
+        if output_format == "json":
+            cmd.append("-oj")
+        elif output_format == "srt":
+            cmd.append("-osrt")
+        elif output_format == "vtt":
+            cmd.append("-ovtt")
+        else:  # txt format
+            cmd.append("-otxt")
+        
+        if output_prefix:
+            cmd.extend(["-of", output_prefix])
+        
+        if allocation is not None:
+            cmd.extend(["-t", str(allocation.threads), "-p", str(allocation.processors)])
+        
+        return cmd
+    
+    def _lease_cpus(self):
+        """Reserve CPUs for one Whisper.cpp process (no-op without a scheduler)."""
+        if self.scheduler is None:
+            return nullcontext(None)
+        return self.scheduler.lease()
+    
+    def _read_whisper_output(self, output_prefix: str, output_format: str,
+                             stdout: str) -> Dict[str, Any]:
+        """Load the result Whisper.cpp wrote to disk, falling back to stdout."""
+        output_file = f"{output_prefix}.{output_format}"
+        if output_format == "json":
+            if os.path.exists(output_file):
+                with open(output_file, 'r') as f:
+                    return json.load(f)
+            # Parse stdout if JSON file not found
+            try:
+                return json.loads(stdout)
+            except json.JSONDecodeError:
+                return formats.parse_console_output(stdout)
+        
+        # For text-based formats, return the content
+        if os.path.exists(output_file):
+            with open(output_file, 'r') as f:
+                return {"transcription": f.read()}
+        return {"transcription": stdout}
+    
+    def _format_result(self, result: Dict[str, Any], output_format: str) -> Dict[str, Any]:
+        """Return the JSON result as-is, or rendered text for other formats."""
+        if output_format == "json":
+            return result
+        return {"transcription": formats.render(result, output_format)}
+    
+    def extract_audio(self, video_path: str, output_path: str = None,
+                      on_progress=None, plan=None) -> str:
         """
-        Extract audio from video file using FFmpeg.
+        Extract audio from a video or audio file.
+        
+        The input is probed with ffprobe first: a file that already is
+        16 kHz mono PCM WAV is linked into place without running FFmpeg,
+        PCM audio in other containers is remuxed, and everything else is
+        transcoded. Only the selected audio stream is ever decoded.
         
         Args:
-            video_path: Path to input video file
+            video_path: Path to input video or audio file
             output_path: Path for output audio file (optional)
+            on_progress: Called with a ProgressEvent for each FFmpeg stats
+                update
+            plan: ExtractionPlan if the caller already probed the input
             
         Returns:
             Path to extracted audio file
+            
+        Raises:
+            NoAudioStreamError: if the input has no audio stream
         """
         if output_path is None:
             video_name = Path(video_path).stem
             output_path = os.path.join(self.temp_dir, f"{video_name}_audio.wav")
         
-        self.console.print(f"[blue]Extracting audio from video...[/blue]")
+        if plan is None:
+            plan = plan_extraction(probe_media(video_path))
+        tracker = ProgressTracker("extract", on_progress, plan.duration, video_path)
+        
+        if plan.action == PASSTHROUGH:
+            link_or_copy(video_path, output_path)
+            tracker.finish()
+            self.console.print(f"[green]✓ Audio already Whisper-ready, no re-encode: {output_path}[/green]")
+            return output_path
+        
+        if plan.action == COPY:
+            self.console.print(f"[blue]Copying audio stream without re-encoding...[/blue]")
+        else:
+            self.console.print(f"[blue]Extracting audio from video...[/blue]")
         
         # FFmpeg command to extract audio in Whisper-compatible format
-        cmd = [
-            "ffmpeg",
-            "-i", video_path,
-            "-ar", "16000",  # 16kHz sample rate
-            "-ac", "1",      # Mono audio
-            "-c:a", "pcm_s16le",  # 16-bit PCM
-            "-y",  # Overwrite output file
-            output_path
-        ]
+        cmd = self._build_extract_command(video_path, output_path, plan)
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            run_streaming(cmd, on_stderr=tracker.ffmpeg_line, keep_stdout=False).close()
+            tracker.finish()
             self.console.print(f"[green]✓ Audio extracted successfully: {output_path}[/green]")
             return output_path
         except subprocess.CalledProcessError as e:
@@ -246,58 +336,56 @@ class VideoTranscriber:
             raise
     
     def transcribe_audio(self, audio_path: str, model_path: str, 
-                        language: str = None, output_format: str = "txt") -> Dict[str, Any]:
+                        language: str = None, output_format: str = "txt",
+                        on_progress=None) -> Dict[str, Any]:
         """
         Transcribe audio using Whisper.cpp.
         
+        Whisper.cpp always produces JSON segments; other formats are
+        rendered from them.
+        
         Args:
             audio_path: Path to audio file
             model_path: Path to Whisper model
             language: Language code (optional)
-            output_format: Output format (txt, srt, vtt, json)
+            output_format: Output format (one of config.OUTPUT_FORMATS)
+            on_progress: Called with a ProgressEvent for each segment
+                Whisper.cpp prints
             
         Returns:
-            Dictionary containing transcription results
+            The Whisper.cpp JSON result for "json", otherwise a dictionary
+            with the rendered text under "transcription"
         """
-        self.console.print(f"[blue]Transcribing audio with Whisper.cpp...[/blue]")
-        
-        # Build Whisper.cpp command
-        cmd = [self.whisper_path, "-m", model_path, "-f", audio_path]
+        tracker = None
+        if on_progress is not None:
+            tracker = ProgressTracker("transcribe", on_progress,
+                                      wav_duration(audio_path), audio_path)
         
-        if language:
-            cmd.extend(["-l", language])
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(audio_path, model_path, language, "json",
+                                            self.cache_options())
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.console.print(f"[green]✓ Using cached transcription[/green]")
+                if tracker is not None:
+                    tracker.finish()
+                return self._format_result(cached, output_format)
         
-        # Add output format
-        if output_format == "json":
-            cmd.append("-oj")
-        elif output_format == "srt":
-            cmd.append("-osrt")
-        elif output_format == "vtt":
-            cmd.append("-ovtt")
-        else:  # txt format
-            cmd.append("-otxt")
+        self.console.print(f"[blue]Transcribing audio with Whisper.cpp...[/blue]")
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            # Parse output based on format
-            if output_format == "json":
-                # Find the JSON output file
-                json_path = audio_path.replace(".wav", ".json")
-                if os.path.exists(json_path):
-                    with open(json_path, 'r') as f:
-                        return json.load(f)
-                else:
-                    # Parse stdout if JSON file not found
-                    return json.loads(result.stdout)
-            else:
-                # For text-based formats, return the content
-                output_file = audio_path.replace(".wav", f".{output_format}")
-                if os.path.exists(output_file):
-                    with open(output_file, 'r') as f:
-                        return {"transcription": f.read()}
-                else:
-                    return {"transcription": result.stdout}
+            started = time.monotonic()
+            with self._lease_cpus() as allocation:
+                transcription = self.backend.transcribe(audio_path, model_path,
+                                                        language, allocation,
+                                                        progress=tracker)
+            self._record_throughput(model_path, audio_path, time.monotonic() - started)
+            if tracker is not None:
+                tracker.finish()
+            if cache_key is not None:
+                self.cache.put(cache_key, transcription)
+            return self._format_result(transcription, output_format)
                     
         except subprocess.CalledProcessError as e:
             self.console.print(f"[red]✗ Transcription failed:[/red]")
@@ -306,27 +394,286 @@ class VideoTranscriber:
         except json.JSONDecodeError as e:
             self.console.print(f"[red]✗ Failed to parse JSON output: {e}[/red]")
             raise
+        except RuntimeError as e:
+            self.console.print(f"[red]✗ Transcription failed: {e}[/red]")
+            raise
+    
+    def cache_options(self) -> Dict[str, Any]:
+        """Settings besides audio, model and language that change a result (cache key)."""
+        return {
+            'backend': self.backend.name,
+            # Whisper.cpp -p splits the audio, which changes segmentation
+            'processors': self.scheduler.processors if self.scheduler is not None else 1,
+        }
+
+    def transcribe_speech(self, audio_path: str, transcribe,
+                          file_metrics: FileMetrics = None) -> Dict[str, Any]:
+        """
+        Transcribe only the speech in an audio file when VAD is enabled.
+        
+        Non-speech is cut out before Whisper.cpp runs and the segment
+        timestamps are mapped back, so the result lines up with audio_path.
+        Without VAD this just calls ``transcribe(audio_path)``.
+        
+        Args:
+            audio_path: Extracted 16 kHz audio
+            transcribe: Callable taking an audio path and returning the
+                Whisper.cpp JSON result
+            file_metrics: FileMetrics that records the skipped seconds
+            
+        Returns:
+            Whisper.cpp JSON result on audio_path's timeline
+        """
+        if not self.vad:
+            return transcribe(audio_path)
+        
+        from .vad import detect_speech, remap_result, write_speech_audio
+        speech = detect_speech(audio_path)
+        if file_metrics is not None:
+            file_metrics.skipped_seconds = speech.skipped_seconds
+        share = speech.skipped_seconds / speech.duration * 100 if speech.duration else 0.0
+        self.console.print(f"[blue]Voice activity: {speech.speech_seconds:.1f}s of speech in "
+                           f"{len(speech.spans)} span(s), skipping {speech.skipped_seconds:.1f}s "
+                           f"({share:.0f}%)[/blue]")
+        
+        if not speech.spans:
+            return formats.build_result([])
+        if speech.skipped_seconds < config.VAD_MIN_SKIPPED_SECONDS:
+            return transcribe(audio_path)
+        
+        speech_path = f"{os.path.splitext(audio_path)[0]}_speech.wav"
+        try:
+            write_speech_audio(audio_path, speech, speech_path)
+            return remap_result(transcribe(speech_path), speech)
+        finally:
+            prefix = os.path.splitext(speech_path)[0]
+            for leftover in [speech_path] + [prefix + ext for ext in [".json", ".srt", ".vtt", ".txt"]]:
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+    
+    def _record_throughput(self, model_path: str, audio_path: str,
+                           wall_seconds: float) -> None:
+        """Remember how fast a standard model ran, for --model auto."""
+        model_name = model_name_for_path(model_path)
+        if model_name is None:
+            return
+        audio_seconds = wav_duration(audio_path)
+        if audio_seconds:
+            self.throughput.record(model_name, audio_seconds, wall_seconds)
+    
+    def transcribe_deduplicated(self, source_path: str, audio_path: str, model_path: str,
+                                language: str, transcribe, on_progress=None) -> Dict[str, Any]:
+        """
+        Reuse the transcript of an earlier duplicate, or transcribe and remember.
+        
+        Without a dedup index this just calls ``transcribe``.
+        
+        Args:
+            source_path: Input file the audio was extracted from
+            audio_path: Extracted 16 kHz audio
+            model_path: Path to Whisper model
+            language: Language code (optional)
+            transcribe: Callable returning the Whisper.cpp JSON result
+            on_progress: Told that transcription is done when a duplicate
+                is found
+            
+        Returns:
+            Whisper.cpp JSON result
+        """
+        if self.dedup is None:
+            return transcribe()
+        
+        from .fingerprint import compute_fingerprint
+        try:
+            fingerprint = compute_fingerprint(audio_path)
+        except (ValueError, EOFError, wave.Error) as e:
+            self.console.print(f"[yellow]Cannot fingerprint {audio_path}, "
+                               f"skipping duplicate detection: {e}[/yellow]")
+            return transcribe()
+        
+        match = self.dedup.find(fingerprint, model_path, language)
+        if match is not None:
+            self.dedup.record_match(source_path, match)
+            self.console.print(f"[green]✓ Duplicate of {match.original_path} "
+                               f"(similarity {match.similarity:.2f}), "
+                               f"reusing its transcription[/green]")
+            if on_progress is not None:
+                ProgressTracker("transcribe", on_progress, fingerprint.duration,
+                                audio_path).finish()
+            return match.result
+        
+        result = transcribe()
+        self.dedup.add(fingerprint, source_path, model_path, language, result)
+        return result
+    
+    def close(self) -> None:
+        """Shut down the backend (e.g. stop resident Whisper servers), metrics export and indexes."""
+        self.backend.close()
+        if self.metrics is not None:
+            self.metrics.close()
+        if self.dedup is not None:
+            self.dedup.close()
+        if self.search is not None:
+            self.search.close()
+
+    def stream_blockers(self, keep_audio: bool = False,
+                        chunk_length: float = None) -> List[str]:
+        """
+        List what keeps transcribe_video from streaming audio into Whisper.cpp.
+
+        Fingerprints, voice activity detection, chunking and --keep-audio
+        all need the extracted WAV, and only the CLI backend reads audio
+        from a pipe. (The cache keys streamed results on the input file.)
+
+        Returns:
+            Names of the settings that force a temporary WAV (empty when
+            streaming is possible)
+        """
+        blockers = []
+        if self.dedup is not None:
+            blockers.append("dedup")
+        if self.vad:
+            blockers.append("vad")
+        if chunk_length:
+            blockers.append("chunk-length")
+        if keep_audio:
+            blockers.append("keep-audio")
+        if self.backend.name != "cli":
+            blockers.append(f"{self.backend.name} backend")
+        if not self._stream_supported:
+            blockers.append("Whisper.cpp without pipe input")
+        return blockers
+
+    def transcribe_stream(self, video_path: str, model_path: str,
+                          language: str = None, output_format: str = "txt",
+                          on_progress=None) -> Optional[Dict[str, Any]]:
+        """
+        Pipe FFmpeg's audio output straight into Whisper.cpp.
+        
+        FFmpeg decodes into a pipe while Whisper.cpp loads the model, and no
+        intermediate WAV is written to the temp directory. With no WAV to
+        hash, the cache key covers the input file instead.
+        
+        Args:
+            video_path: Path to input video file
+            model_path: Path to Whisper model
+            language: Language code (optional)
+            output_format: Output format (one of config.OUTPUT_FORMATS)
+            on_progress: Called with a ProgressEvent for each segment
+                Whisper.cpp prints
+            
+        Returns:
+            Dictionary containing transcription results, or None if this
+            Whisper.cpp build cannot read audio from stdin
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(video_path, model_path, language, "json",
+                                            dict(self.cache_options(), source="input"))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.console.print(f"[green]✓ Using cached transcription[/green]")
+                return self._format_result(cached, output_format)
+        
+        self.console.print(f"[blue]Streaming audio into Whisper.cpp...[/blue]")
+        
+        # Whisper.cpp's output files go to a private directory, removed after
+        with self.scratch.acquire() as job:
+            output_prefix = job.file(f"{Path(video_path).stem}_stream")
+            plan = plan_extraction(probe_media(video_path))
+            extract_cmd = self._build_extract_command(video_path, "-", plan)
+            
+            tracker = None
+            if on_progress is not None:
+                tracker = ProgressTracker("transcribe", on_progress, plan.duration, video_path)
+            
+            with self._lease_cpus() as allocation:
+                whisper_cmd = self._build_whisper_command("-", model_path, language,
+                                                          "json", output_prefix, allocation)
+                ffmpeg = StreamingProcess(extract_cmd, keep_stdout=False, pipe_stdout=True)
+                try:
+                    whisper = StreamingProcess(
+                        whisper_cmd, stdin=ffmpeg.process.stdout,
+                        on_stdout=tracker.whisper_line if tracker else None,
+                        on_start=allocation.pin_process if allocation else None
+                    )
+                except OSError:
+                    ffmpeg.process.kill()
+                    ffmpeg.wait(check=False)
+                    raise
+                # Only Whisper.cpp should hold the read end so FFmpeg sees SIGPIPE
+                ffmpeg.process.stdout.close()
+            
+                try:
+                    whisper_output = whisper.wait(check=False)
+                finally:
+                    ffmpeg_output = ffmpeg.wait(check=False)
+            
+            with whisper_output:
+                if ffmpeg_output.returncode != 0 and whisper_output.returncode == 0:
+                    self.console.print(f"[red]✗ Audio extraction failed:[/red]")
+                    self.console.print(f"[red]Error: {ffmpeg_output.stderr}[/red]")
+                    raise subprocess.CalledProcessError(ffmpeg_output.returncode, extract_cmd,
+                                                        stderr=ffmpeg_output.stderr)
+            
+                if whisper_output.returncode != 0:
+                    # Older builds reject "-f -"; let the caller use a temp file instead
+                    self.console.print(
+                        f"[yellow]Whisper.cpp could not read from a pipe, falling back to "
+                        f"temporary audio file[/yellow]"
+                    )
+                    self._stream_supported = False
+                    return None
+            
+                stdout = "" if os.path.exists(f"{output_prefix}.json") else whisper_output.stdout
+                result = self._read_whisper_output(output_prefix, "json", stdout)
+                if cache_key is not None:
+                    self.cache.put(cache_key, result)
+                if tracker is not None:
+                    tracker.finish()
+                return self._format_result(result, output_format)
     
     def transcribe_video(self, video_path: str, model_name_or_path: str, 
                         output_path: str = None, language: str = None,
-                        output_format: str = "txt", keep_audio: bool = False,
-                        verbose: bool = False) -> str:
+                        output_format="txt", keep_audio: bool = False,
+                        verbose: bool = False, show_progress: bool = True,
+                        stream: bool = False, chunk_length: float = None,
+                        chunk_overlap: float = None, chunk_workers: int = None,
+                        on_progress=None) -> str:
         """
         Complete video transcription pipeline.
         
         Args:
             video_path: Path to input video file
             model_path: Path to Whisper model
-            output_path: Path for output file
+            output_path: Path for output file (for several formats, the
+                path of the first; the others swap the extension)
             language: Language code
-            output_format: Output format
+            output_format: Output format, or several as a list or a comma
+                separated string (e.g. "srt,vtt,txt")
             keep_audio: Whether to keep extracted audio file
             verbose: Enable verbose output
+            show_progress: Display live progress spinners (disable when
+                several transcriptions share one terminal)
+            stream: Pipe audio from FFmpeg into Whisper.cpp instead of
+                writing a temporary WAV file (ignored while anything in
+                stream_blockers() needs the audio, e.g. voice activity
+                detection)
+            chunk_length: Split audio longer than this many seconds into
+                chunks transcribed in parallel (disabled when None)
+            chunk_overlap: Seconds of overlap between neighbouring chunks
+            chunk_workers: Number of chunks transcribed concurrently
+            on_progress: Called with a ProgressEvent (stage, position,
+                percent, ETA) as FFmpeg and Whisper.cpp report progress
             
         Returns:
-            Path to output file
+            Path to the (first) output file
         """
+        file_metrics = FileMetrics(video_path)
+        scratch_job = None
         try:
+            output_formats = formats.parse_formats(output_format)
+            
             # Check dependencies
             self._check_dependencies()
             
@@ -340,69 +687,183 @@ class VideoTranscriber:
             # Generate output path if not provided
             if output_path is None:
                 video_name = Path(video_path).stem
-                output_path = f"{video_name}_transcript.{output_format}"
+                output_path = f"{video_name}_transcript.{output_formats[0]}"
             
             # Create output directory if it doesn't exist
             output_dir = os.path.dirname(output_path)
             if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
+                os.makedirs(output_dir, exist_ok=True)
+            
+            progress_display = ui.progress(self.console, enabled=show_progress)
+            
+            # Progress parsing costs an ffprobe call, so only when someone listens
+            track = (not isinstance(progress_display, ui.SilentProgress)
+                     or on_progress is not None)
             
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                BarColumn(),
-                TaskProgressColumn(),
-                console=self.console
-            ) as progress:
+            with progress_display as progress:
                 
-                # Step 1: Extract audio
-                task1 = progress.add_task("Extracting audio...", total=None)
-                audio_path = self.extract_audio(video_path)
-                progress.update(task1, completed=True)
+                def follow(task):
+                    """Progress callback moving a task's bar and forwarding events."""
+                    if not track:
+                        return None
+                    
+                    def callback(event):
+                        if event.percent is not None:
+                            progress.update(task, total=100, completed=event.percent)
+                        if on_progress is not None:
+                            on_progress(event)
+                    return callback
+                
+                result = None
+                audio_path = None
                 
-                # Step 2: Transcribe audio
-                task2 = progress.add_task("Transcribing audio...", total=None)
-                result = self.transcribe_audio(audio_path, model_path, language, output_format)
-                progress.update(task2, completed=True)
+                # Steps 1+2 in one go: FFmpeg piped into Whisper.cpp
+                if stream and not self.stream_blockers(keep_audio, chunk_length):
+                    task = progress.add_task("Streaming audio into Whisper...", total=None)
+                    with file_metrics.stage("transcribe") as stage:
+                        stage.bytes_read = file_size(video_path)
+                        result = self.transcribe_stream(video_path, model_path, language, "json",
+                                                        on_progress=follow(task))
+                    if result is not None:
+                        result_segments = formats.get_segments(result)
+                        file_metrics.audio_seconds = (result_segments[-1]['end']
+                                                      if result_segments else None)
+                    progress.update(task, total=1, completed=1,
+                                    description=f"Streamed audio into Whisper ({stage.wall_seconds:.1f}s)")
+                
+                if result is None:
+                    # Step 1: Extract audio into a private directory (waits
+                    # while other jobs hold the scratch quota)
+                    task1 = progress.add_task("Extracting audio...", total=None)
+                    scratch_job, plan = self.acquire_scratch(video_path,
+                                                             chunked=bool(chunk_length))
+                    with file_metrics.stage("extract") as stage:
+                        stage.bytes_read = file_size(video_path)
+                        audio_path = self.extract_audio(
+                            video_path,
+                            output_path=scratch_job.file(f"{Path(video_path).stem}_audio.wav"),
+                            on_progress=follow(task1), plan=plan)
+                        stage.bytes_written = file_size(audio_path)
+                    file_metrics.audio_seconds = wav_duration(audio_path)
+                    progress.update(task1, total=1, completed=1,
+                                    description=f"Extracted audio ({stage.wall_seconds:.1f}s)")
+                    
+                    # Step 2: Transcribe audio
+                    task2 = progress.add_task("Transcribing audio...", total=None)
+                    with file_metrics.stage("transcribe") as stage:
+                        stage.bytes_read = file_size(audio_path)
+                        
+                        def run(path):
+                            if chunk_length and get_wav_duration(path) > chunk_length:
+                                return transcribe_chunked(self, path, model_path, language,
+                                                          chunk_length=chunk_length,
+                                                          overlap=chunk_overlap,
+                                                          workers=chunk_workers,
+                                                          on_progress=follow(task2))
+                            return self.transcribe_audio(path, model_path, language,
+                                                         "json", on_progress=follow(task2))
+                        
+                        result = self.transcribe_deduplicated(
+                            video_path, audio_path, model_path, language,
+                            lambda: self.transcribe_speech(audio_path, run, file_metrics),
+                            on_progress=follow(task2))
+                    progress.update(task2, total=1, completed=1,
+                                    description=f"Transcribed audio ({stage.wall_seconds:.1f}s)")
                 
                 # Step 3: Save output
                 task3 = progress.add_task("Saving transcription...", total=None)
                 
-                if output_format == "json":
-                    with open(output_path, 'w') as f:
-                        json.dump(result, f, indent=2)
-                else:
-                    with open(output_path, 'w', encoding='utf-8') as f:
-                        f.write(result.get("transcription", str(result)))
-                
-                progress.update(task3, completed=True)
+                with file_metrics.stage("write") as stage:
+                    written = self.save_outputs(result, output_path, output_formats)
+                    stage.bytes_written = sum(file_size(path) for path in written)
                 
-                # Clean up audio file unless requested to keep it
-                if not keep_audio and os.path.exists(audio_path):
-                    os.remove(audio_path)
-                    if verbose:
-                        self.console.print(f"[dim]Removed temporary audio file: {audio_path}[/dim]")
+                progress.update(task3, total=1, completed=1,
+                                description=f"Saved transcription ({stage.wall_seconds:.1f}s)")
                 
-                # Clean up intermediate files
-                for ext in [".json", ".srt", ".vtt", ".txt"]:
-                    temp_file = audio_path.replace(".wav", ext)
-                    if os.path.exists(temp_file) and temp_file != output_path:
-                        os.remove(temp_file)
-                        if verbose:
-                            self.console.print(f"[dim]Removed temporary file: {temp_file}[/dim]")
+                if audio_path and keep_audio:
+                    kept_path = os.path.join(self.temp_dir, os.path.basename(audio_path))
+                    shutil.move(audio_path, kept_path)
+                    self.console.print(f"[dim]Kept audio file: {kept_path}[/dim]")
             
+            file_metrics.stop()
+            if self.metrics is not None:
+                self.metrics.finish(file_metrics, success=True)
             self.console.print(f"[green]✓ Transcription completed successfully![/green]")
-            self.console.print(f"[green]Output saved to: {output_path}[/green]")
+            if verbose:
+                self.console.print(f"[dim]Timings: {file_metrics.summary()}[/dim]")
+            for path in written:
+                self.console.print(f"[green]Output saved to: {path}[/green]")
             
             return output_path
             
         except Exception as e:
+            if self.metrics is not None:
+                self.metrics.finish(file_metrics, success=False, error=str(e))
             self.console.print(f"[red]✗ Transcription failed: {str(e)}[/red]")
             raise
+        finally:
+            if scratch_job is not None:
+                scratch_job.close()
+                if verbose:
+                    self.console.print(f"[dim]Removed scratch directory: {scratch_job.path}[/dim]")
+
+    def acquire_scratch(self, input_path: str, chunked: bool = False):
+        """
+        Probe an input and reserve a scratch directory sized for it.
+        
+        Blocks while other jobs hold the scratch quota.
+        
+        Args:
+            input_path: Video or audio file about to be extracted
+            chunked: The audio will be split into chunks
+            
+        Returns:
+            (ScratchJob, ExtractionPlan) - pass the plan on to extract_audio
+        """
+        plan = plan_extraction(probe_media(input_path))
+        return self.scratch.acquire(self.scratch_bytes(input_path, plan, chunked)), plan
+    
+    def scratch_bytes(self, input_path: str, plan, chunked: bool = False) -> int:
+        """Scratch space a job extracting input_path with plan may use."""
+        expected = estimate_audio_bytes(plan.duration, fallback=file_size(input_path))
+        # VAD and chunking write up to a second copy of the audio next to it
+        if self.vad or chunked:
+            expected *= 2
+        return expected
+    
+    def save_outputs(self, result: Dict[str, Any], output_path: str,
+                     output_format="txt") -> List[str]:
+        """
+        Render a Whisper.cpp JSON result into every requested format.
+        
+        With a search index the saved transcript is indexed as well; an index
+        that can't be written is reported but doesn't fail the file.
+        
+        Args:
+            result: Whisper.cpp JSON result
+            output_path: Path for the first format (others swap the extension)
+            output_format: Output format(s)
+            
+        Returns:
+            List of written paths
+        """
+        output_dir = os.path.dirname(output_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+        
+        output_formats = formats.parse_formats(output_format)
+        written = formats.write_outputs(result, formats.output_paths(output_path, output_formats))
+        if self.search is not None:
+            try:
+                self.search.add_result(written, result)
+            except (sqlite3.Error, OSError) as e:
+                self.console.print(f"[yellow]Could not add {written[0]} to the search index: "
+                                   f"{e}[/yellow]")
+        return written
 
 def display_info():
     """Display application information."""
-    console.print(Panel.fit(
+    console.print(ui.panel(
         "[bold blue]Local Video Transcriber[/bold blue]\n"
         "Transcribe local video files using Whisper.cpp and FFmpeg",
         title="Welcome"
@@ -410,33 +871,18 @@ def display_info():
 
 def list_models():
     """Display available Whisper models."""
-    table = Table(title="Available Whisper Models")
+    table = ui.table(title="Available Whisper Models")
     table.add_column("Model", style="cyan", no_wrap=True)
     table.add_column("Status", style="bold", no_wrap=True)
     table.add_column("Size", style="magenta")
     table.add_column("Speed", style="yellow")
     table.add_column("Accuracy", style="green")
+    table.add_column("Measured RTF", style="blue", justify="right")
     table.add_column("Description", style="white")
     
     # Check which models are actually available
-    available_models = set()
-    whisper_dir = os.environ.get('WHISPER_CPP_DIR', '/opt/whisper.cpp')
-    
-    # Check common paths for models
-    possible_paths = [
-        os.path.join(whisper_dir, 'models'),
-        './whisper.cpp/models',
-        '~/whisper.cpp/models',
-        '/usr/local/whisper.cpp/models'
-    ]
-    
-    for path in possible_paths:
-        expanded_path = os.path.expanduser(path)
-        if os.path.exists(expanded_path):
-            for model_name in config.WHISPER_MODELS.keys():
-                model_file = os.path.join(expanded_path, f"ggml-{model_name}.bin")
-                if os.path.isfile(model_file):
-                    available_models.add(model_name)
+    available_models = set(get_registry().models())
+    measured = get_throughput_store().measured()
     
     for model_name, model_info in config.WHISPER_MODELS.items():
         status = "✅ Available" if model_name in available_models else "❌ Not Downloaded"
@@ -448,6 +894,7 @@ def list_models():
             model_info['size'],
             model_info['speed'],
             model_info['accuracy'],
+            f"{measured[model_name]:.2f}" if model_name in measured else "-",
             model_info['description']
         )
     
@@ -455,46 +902,311 @@ def list_models():
     console.print("\n[bold]Usage:[/bold]")
     console.print("• Use model name: python3 -m src.transcriber transcribe -i video.mp4 -m base")
     console.print("• Use custom path: python3 -m src.transcriber transcribe -i video.mp4 -m /path/to/model.bin")
+    console.print("• Pick by deadline: python3 -m src.transcriber transcribe -i video.mp4 -m auto --deadline 10m")
     console.print("\n[bold]Note:[/bold] Models will be automatically downloaded if not available.")
 
+def _build_cache(use_cache: bool, cache_dir: str = None):
+    """Create the transcription cache used by the CLI, if enabled."""
+    if not use_cache:
+        return None
+    from .cache import TranscriptionCache
+    return TranscriptionCache(cache_dir=cache_dir)
+
+def _build_dedup(use_dedup: bool, threshold: float = None):
+    """Open the fingerprint index used for duplicate detection, if enabled."""
+    if not use_dedup:
+        return None
+    from .fingerprint import FingerprintIndex
+    return FingerprintIndex(threshold=threshold)
+
+def _build_search(use_index: bool, path: str = None):
+    """Open the transcript search index, if enabled (a broken index only warns)."""
+    if not use_index:
+        return None
+    from .search import TranscriptIndex
+    try:
+        return TranscriptIndex(path)
+    except (RuntimeError, sqlite3.Error, OSError) as e:
+        console.print(f"[yellow]Search index disabled: {str(e)}[/yellow]")
+        return None
+
+def _build_scheduler(slots: int, threads: int = None, processors: int = 1,
+                     pin: bool = False):
+    """Create a CPU scheduler sized for the given number of concurrent jobs."""
+    from .scheduler import CpuScheduler
+    return CpuScheduler(slots=slots, pin=pin, threads=threads, processors=processors)
+
+def _configure_backend(transcriber: VideoTranscriber, backend: str,
+                       server_path: str = None, idle_timeout: float = None) -> None:
+    """Swap in the requested Whisper backend ("auto" uses the server if installed)."""
+    if backend == "auto":
+        from .backends import find_server_executable
+        try:
+            server_path = server_path or find_server_executable(transcriber.whisper_path)
+            backend = "server"
+        except FileNotFoundError:
+            backend = "cli"
+    if backend == "server":
+        from .backends import ServerBackend
+        # One server per scheduler slot, each with that slot's threads
+        scheduler = transcriber.scheduler
+        transcriber.backend = ServerBackend(server_path=server_path,
+                                            whisper_path=transcriber.whisper_path,
+                                            idle_timeout=idle_timeout,
+                                            servers_per_model=scheduler.slots if scheduler else 1)
+
+def _configure_scratch(transcriber: VideoTranscriber, quota: int = None,
+                       use_ram: bool = True) -> None:
+    """Set up per-job scratch directories and sweep those left by dead processes."""
+    transcriber.scratch = ScratchManager(transcriber.temp_dir, quota=quota,
+                                         ram_dir=None if use_ram else "")
+    removed, freed = transcriber.scratch.sweep()
+    if removed:
+        from .cache import format_size
+        console.print(f"[dim]Removed {removed} orphaned scratch director"
+                      f"{'y' if removed == 1 else 'ies'} ({format_size(freed)})[/dim]")
+
+def _warn_stream_ignored(transcriber: VideoTranscriber, keep_audio: bool = False,
+                         chunk_length: float = None, extra=()) -> None:
+    """Say so when --stream can't take effect because other options need the WAV."""
+    blockers = list(extra) + transcriber.stream_blockers(keep_audio, chunk_length)
+    if blockers:
+        console.print(f"[yellow]--stream has no effect with: {', '.join(blockers)} "
+                      f"(audio goes through a temporary WAV file)[/yellow]")
+
+def _warm_models(transcriber: VideoTranscriber, model_paths, budget: int = None) -> None:
+    """Verify the models a run needs and load them before work starts."""
+    from .cache import format_size
+    from .model_manager import ModelManager
+    for warmup in ModelManager(budget=budget).warm(model_paths, transcriber):
+        details = []
+        if warmup.hashed:
+            details.append("checksum verified")
+        if warmup.prefetched:
+            rate = warmup.read_rate
+            details.append("in page cache" + (f", read at {format_size(int(rate))}/s" if rate else ""))
+        else:
+            details.append("over the prefetch budget, not cached")
+        if warmup.server_seconds is not None:
+            details.append(f"whisper-server loaded in {warmup.server_seconds:.1f}s")
+        console.print(f"[green]✓ Model {os.path.basename(warmup.model_path)} "
+                      f"({format_size(warmup.size)}) ready in {warmup.load_seconds:.1f}s[/green] "
+                      f"[dim]({'; '.join(details)})[/dim]")
+
+def _build_metrics(metrics_file: str = None, prometheus_file: str = None,
+                   metrics_port: int = None):
+    """Create the metrics recorder used by the CLI, if any sink is requested."""
+    if not (metrics_file or prometheus_file or metrics_port is not None):
+        return None
+    from .metrics import MetricsRecorder
+    recorder = MetricsRecorder(jsonl_path=metrics_file, prometheus_path=prometheus_file)
+    if metrics_port is not None:
+        port = recorder.serve(metrics_port)
+        console.print(f"[blue]Serving Prometheus metrics on :{port}/metrics[/blue]")
+    return recorder
+
+def _parse_format_option(ctx, param, value):
+    """Click callback turning "srt,vtt" into a validated list of formats."""
+    try:
+        output_formats = formats.parse_formats(value)
+        for output_format in output_formats:
+            segments.check_format(output_format)
+    except (ValueError, RuntimeError) as e:
+        raise click.BadParameter(str(e))
+    return output_formats
+
+def _parse_deadline_option(ctx, param, value):
+    """Click callback turning "20m" or "1h30m" into seconds."""
+    if value is None:
+        return None
+    from .model_selection import parse_duration
+    try:
+        return parse_duration(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+def _parse_size_option(ctx, param, value):
+    """Click callback turning "500M" or "2G" into bytes."""
+    if value is None:
+        return None
+    from .cache import parse_size
+    try:
+        return parse_size(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+def _check_auto_model_options(model_path: str, deadline: float, max_rtf: float) -> None:
+    """Reject --deadline/--max-rtf without --model auto."""
+    if model_path != 'auto' and (deadline is not None or max_rtf is not None):
+        raise click.UsageError("--deadline and --max-rtf need --model auto")
+
+def _plan_auto_models(transcriber: VideoTranscriber, files: List[str], deadline: float,
+                      max_rtf: float, language: str = None, workers: int = 1,
+                      verbose: bool = False):
+    """Choose models for --model auto from ffprobe durations and print the plan."""
+    from collections import Counter
+    from concurrent.futures import ThreadPoolExecutor
+    from .model_selection import ModelTarget, format_duration, plan_models
+    
+    with ThreadPoolExecutor(max_workers=min(8, len(files))) as executor:
+        infos = list(executor.map(probe_media, files))
+    durations = {path: info.duration if info else None for path, info in zip(files, infos)}
+    if deadline is not None and not any(durations.values()):
+        console.print("[yellow]Input durations unknown (is ffprobe installed?); choosing by "
+                      "realtime factor instead of --deadline[/yellow]")
+    target = ModelTarget(deadline=deadline, max_rtf=max_rtf)
+    plan = plan_models(durations, target, transcriber.registry.models(),
+                       transcriber.throughput, language, workers)
+    
+    counts = Counter(plan.models.values())
+    chosen = ", ".join(f"{name} x{counts[name]} (RTF {plan.realtime_factors[name]:.2f})"
+                       for name in sorted(counts, key=counts.get, reverse=True))
+    console.print(f"[blue]Auto model ({target.describe()}): {chosen}, "
+                  f"estimated {format_duration(plan.estimated_seconds)}[/blue]")
+    if not plan.meets_target:
+        console.print("[yellow]Even the fastest installed model is expected to miss "
+                      "the target[/yellow]")
+    if verbose:
+        table = ui.table(title="Model Plan")
+        table.add_column("File", style="cyan")
+        table.add_column("Duration", style="magenta", justify="right")
+        table.add_column("Model", style="green")
+        for path in files:
+            duration = durations[path]
+            table.add_row(os.path.basename(path),
+                          format_duration(duration) if duration else "unknown",
+                          plan.models[path])
+        console.print(table)
+    return plan
+
 @click.group()
-def cli():
+@click.option('--rescan', is_flag=True,
+              help='Forget cached Whisper.cpp, FFmpeg and model locations and search again')
+@click.option('--plain', is_flag=True, envvar='TRANSCRIBER_PLAIN',
+              help='Plain text output without colours, tables or live progress')
+@click.option('--quiet', '-q', is_flag=True,
+              help='Only print errors (to stderr); check the exit status')
+def cli(rescan, plain, quiet):
     """Local Video Transcriber - Transcribe video files using Whisper.cpp and FFmpeg."""
-    pass
+    ui.configure(plain=plain, quiet=quiet)
+    if rescan:
+        get_registry().rescan()
 
 @cli.command()
 @click.option('--input', '-i', 'input_file', required=True,
-              help='Input video file (MP4 format)')
+              help='Input video or audio file')
 @click.option('--model', '-m', 'model_path', required=True,
-              help='Whisper model name (tiny, base, small, medium, large) or path to model file (.bin)')
+              help='Whisper model name (tiny, base, small, medium, large), path to model file (.bin), '
+                   'or "auto" to pick the most accurate installed model that meets --deadline/--max-rtf')
 @click.option('--output', '-o', 'output_file',
               help='Output file for transcription (default: auto-generated)')
+@click.option('--deadline', 'deadline', callback=_parse_deadline_option,
+              help='With --model auto: time the job may take, e.g. 90s, 20m, 1h30m')
+@click.option('--max-rtf', 'max_rtf', type=click.FloatRange(min=0, min_open=True),
+              help='With --model auto: highest processing time per second of audio '
+                   '(default without --deadline: 1.0, i.e. realtime)')
 @click.option('--whisper-path', '-w', 'whisper_path',
               help='Path to Whisper.cpp main executable')
 @click.option('--language', '-l', 'language',
               help='Language code (e.g., "en", "es", "fr")')
 @click.option('--format', '-f', 'output_format', default='txt',
-              type=click.Choice(['txt', 'srt', 'vtt', 'json']),
-              help='Output format')
+              callback=_parse_format_option,
+              help='Output format(s): txt, srt, vtt, json, jsonl, jsonl.gz, jsonl.zst '
+                   '(comma separated, e.g. "srt,txt")')
 @click.option('--temp-dir', '-t', 'temp_dir',
               help='Directory for temporary files')
+@click.option('--scratch-quota', 'scratch_quota', callback=_parse_size_option,
+              help='Most temporary space all jobs may use at once, e.g. "2G"; '
+                   'further jobs wait (default: 4G, 0 = unlimited)')
+@click.option('--ram-scratch/--no-ram-scratch', 'ram_scratch', default=True,
+              help='Put temporary audio in RAM (/dev/shm) when it fits')
 @click.option('--keep-audio', '-k', is_flag=True,
               help='Keep extracted audio file after transcription')
+@click.option('--stream/--no-stream', 'stream', default=False,
+              help='Pipe audio from FFmpeg into Whisper.cpp without a temporary WAV file')
+@click.option('--cache/--no-cache', 'use_cache', default=True,
+              help='Reuse cached results for audio that was already transcribed')
+@click.option('--cache-dir', 'cache_dir',
+              help='Directory for cached transcription results')
+@click.option('--dedup/--no-dedup', 'use_dedup', default=False,
+              help='Reuse transcripts of re-encoded or re-muxed copies of earlier files '
+                   '(audio fingerprints, needs NumPy)')
+@click.option('--dedup-threshold', 'dedup_threshold', type=click.FloatRange(min=0.5, max=1),
+              default=config.DEDUP_SIMILARITY_THRESHOLD, show_default=True,
+              help='Fingerprint similarity at which two files count as duplicates')
+@click.option('--vad/--no-vad', 'use_vad', default=False,
+              help='Skip silence, music and noise before Whisper.cpp runs '
+                   '(voice activity detection, needs NumPy)')
+@click.option('--index/--no-index', 'use_index', default=True,
+              help='Add saved transcripts to the full-text search index (see search)')
+@click.option('--chunk-length', 'chunk_length', type=click.FloatRange(min=1),
+              help='Split recordings longer than this many seconds into chunks '
+                   'transcribed in parallel')
+@click.option('--chunk-overlap', 'chunk_overlap', type=click.FloatRange(min=0),
+              default=config.CHUNK_OVERLAP_DEFAULT, show_default=True,
+              help='Seconds of overlap between neighbouring chunks')
+@click.option('--chunk-workers', 'chunk_workers', type=click.IntRange(min=1),
+              default=config.get_default_batch_workers, show_default='CPU cores / 4',
+              help='Number of chunks transcribed concurrently')
+@click.option('--threads', 'threads', type=click.IntRange(min=1),
+              help='Whisper.cpp threads per job (default: usable CPUs split across jobs)')
+@click.option('--processors', 'processors', type=click.IntRange(min=1), default=1,
+              show_default=True, help='Whisper.cpp processors (-p) per job')
+@click.option('--pin-cpus', 'pin_cpus', is_flag=True,
+              help='Pin each Whisper.cpp job to its own set of cores')
+@click.option('--ffmpeg-threads', 'ffmpeg_threads', type=click.IntRange(min=0),
+              default=config.FFMPEG_THREADS, show_default='0 = FFmpeg decides',
+              help='FFmpeg decoder/filter threads per extraction')
+@click.option('--backend', 'backend', type=click.Choice(['cli', 'server']), default='cli',
+              show_default=True,
+              help='Run Whisper.cpp once per file (cli) or keep models loaded in whisper-server (server)')
+@click.option('--server-path', 'server_path',
+              help='Path to the whisper.cpp server executable (server backend)')
+@click.option('--server-idle-timeout', 'server_idle_timeout', type=click.FloatRange(min=0),
+              default=config.SERVER_IDLE_TIMEOUT, show_default=True,
+              help='Stop an idle whisper-server after this many seconds (0 = never)')
+@click.option('--metrics-file', 'metrics_file',
+              help='Append per-file stage timings to this JSON-lines file')
+@click.option('--prometheus-file', 'prometheus_file',
+              help='Write Prometheus text-format metrics to this file')
 @click.option('--verbose', '-v', is_flag=True,
               help='Enable verbose output')
-def transcribe(input_file, model_path, output_file, whisper_path, language, 
-         output_format, temp_dir, keep_audio, verbose):
+def transcribe(input_file, model_path, output_file, deadline, max_rtf, whisper_path, language,
+         output_format, temp_dir, scratch_quota, ram_scratch, keep_audio, stream,
+         use_cache, cache_dir,
+         use_dedup, dedup_threshold, use_vad, use_index, chunk_length, chunk_overlap, chunk_workers,
+         threads, processors, pin_cpus, ffmpeg_threads, backend, server_path,
+         server_idle_timeout, metrics_file, prometheus_file, verbose):
     """Local Video Transcriber - Transcribe video files using Whisper.cpp and FFmpeg."""
+    _check_auto_model_options(model_path, deadline, max_rtf)
     
+    transcriber = None
     try:
         display_info()
         
         # Create transcriber instance
-        transcriber = VideoTranscriber(whisper_path=whisper_path, temp_dir=temp_dir)
+        scheduler = _build_scheduler(chunk_workers if chunk_length else 1,
+                                     threads, processors, pin_cpus)
+        transcriber = VideoTranscriber(whisper_path=whisper_path, temp_dir=temp_dir,
+                                       cache=_build_cache(use_cache, cache_dir),
+                                       dedup=_build_dedup(use_dedup, dedup_threshold),
+                                       vad=use_vad,
+                                       search=_build_search(use_index),
+                                       scheduler=scheduler,
+                                       metrics=_build_metrics(metrics_file, prometheus_file),
+                                       ffmpeg_threads=ffmpeg_threads)
+        _configure_backend(transcriber, backend, server_path, server_idle_timeout)
+        _configure_scratch(transcriber, scratch_quota, ram_scratch)
+        if stream:
+            _warn_stream_ignored(transcriber, keep_audio, chunk_length)
+        
+        if model_path == 'auto':
+            plan = _plan_auto_models(transcriber, [input_file], deadline, max_rtf, language)
+            model_path = plan.model_paths()[input_file]
         
         # Display configuration
         if verbose:
-            config_table = Table(title="Configuration")
+            config_table = ui.table(title="Configuration")
             config_table.add_column("Setting", style="cyan")
             config_table.add_column("Value", style="green")
             
@@ -503,9 +1215,20 @@ def transcribe(input_file, model_path, output_file, whisper_path, language,
             config_table.add_row("Output File", output_file or "auto-generated")
             config_table.add_row("Whisper Path", transcriber.whisper_path)
             config_table.add_row("Language", language or "auto-detect")
-            config_table.add_row("Output Format", output_format)
+            config_table.add_row("Output Format", ", ".join(output_format))
             config_table.add_row("Temp Directory", transcriber.temp_dir)
+            config_table.add_row("RAM Scratch", transcriber.scratch.ram_dir or "disabled")
             config_table.add_row("Keep Audio", str(keep_audio))
+            config_table.add_row("Backend", backend)
+            config_table.add_row("Stream Audio", str(stream))
+            config_table.add_row("Whisper Threads", f"{scheduler.threads} x {scheduler.processors}")
+            config_table.add_row("FFmpeg Threads", str(transcriber.ffmpeg_threads or "auto"))
+            config_table.add_row("Chunk Length", f"{chunk_length:g}s" if chunk_length else "disabled")
+            config_table.add_row("Cache", transcriber.cache.cache_dir if transcriber.cache else "disabled")
+            config_table.add_row("Dedup", f"{transcriber.dedup.path} (threshold {transcriber.dedup.threshold:g})"
+                                 if transcriber.dedup else "disabled")
+            config_table.add_row("Voice Activity Detection", "enabled" if use_vad else "disabled")
+            config_table.add_row("Search Index", transcriber.search.path if transcriber.search else "disabled")
             
             console.print(config_table)
             console.print()
@@ -518,11 +1241,15 @@ def transcribe(input_file, model_path, output_file, whisper_path, language,
             language=language,
             output_format=output_format,
             keep_audio=keep_audio,
-            verbose=verbose
+            verbose=verbose,
+            stream=stream,
+            chunk_length=chunk_length,
+            chunk_overlap=chunk_overlap,
+            chunk_workers=chunk_workers
         )
         
         # Display success message
-        console.print(Panel.fit(
+        console.print(ui.panel(
             f"[bold green]Transcription completed successfully![/bold green]\n"
             f"Output saved to: [blue]{output_path}[/blue]",
             title="Success"
@@ -537,11 +1264,750 @@ def transcribe(input_file, model_path, output_file, whisper_path, language,
             import traceback
             console.print(f"[red]{traceback.format_exc()}[/red]")
         sys.exit(1)
+    finally:
+        if transcriber is not None:
+            transcriber.close()
+
+@cli.command()
+@click.option('--input-dir', '-i', 'input_dir', default='./input', show_default=True,
+              help='Directory containing video files')
+@click.option('--output-dir', '-o', 'output_dir', default='./output', show_default=True,
+              help='Directory for transcriptions')
+@click.option('--model', '-m', 'model_path', default='base', show_default=True,
+              help='Whisper model name (tiny, base, small, medium, large), path to model file (.bin), '
+                   'or "auto" to pick the most accurate installed model that meets --deadline/--max-rtf')
+@click.option('--deadline', 'deadline', callback=_parse_deadline_option,
+              help='With --model auto: time the job may take, e.g. 90s, 20m, 1h30m')
+@click.option('--max-rtf', 'max_rtf', type=click.FloatRange(min=0, min_open=True),
+              help='With --model auto: highest processing time per second of audio '
+                   '(default without --deadline: 1.0, i.e. realtime)')
+@click.option('--whisper-path', '-w', 'whisper_path',
+              help='Path to Whisper.cpp main executable')
+@click.option('--language', '-l', 'language',
+              help='Language code (e.g., "en", "es", "fr")')
+@click.option('--format', '-f', 'output_format', default='txt',
+              callback=_parse_format_option,
+              help='Output format(s): txt, srt, vtt, json, jsonl, jsonl.gz, jsonl.zst '
+                   '(comma separated, e.g. "srt,txt")')
+@click.option('--temp-dir', '-t', 'temp_dir',
+              help='Directory for temporary files')
+@click.option('--scratch-quota', 'scratch_quota', callback=_parse_size_option,
+              help='Most temporary space all jobs may use at once, e.g. "2G"; '
+                   'further jobs wait (default: 4G, 0 = unlimited)')
+@click.option('--ram-scratch/--no-ram-scratch', 'ram_scratch', default=True,
+              help='Put temporary audio in RAM (/dev/shm) when it fits')
+@click.option('--workers', '-j', 'workers', type=click.IntRange(min=1),
+              default=config.get_default_batch_workers, show_default='CPU cores / 4',
+              help='Number of files to transcribe concurrently')
+@click.option('--recursive', '-r', is_flag=True,
+              help='Also process videos in subdirectories')
+@click.option('--pipeline', is_flag=True,
+              help='Run extraction, transcription and writing as overlapping stages')
+@click.option('--extract-workers', 'extract_workers', type=click.IntRange(min=1), default=1,
+              show_default=True, help='Concurrent FFmpeg extractions (with --pipeline)')
+@click.option('--write-workers', 'write_workers', type=click.IntRange(min=1), default=1,
+              show_default=True, help='Concurrent output writers (with --pipeline)')
+@click.option('--queue-depth', 'queue_depth', type=click.IntRange(min=0),
+              default=config.PIPELINE_QUEUE_DEPTH, show_default=True,
+              help='Extracted files allowed to wait for transcription (with --pipeline)')
+@click.option('--resume', is_flag=True,
+              help='Skip files the journal lists as done and retry failed or interrupted ones')
+@click.option('--journal/--no-journal', 'use_journal', default=True,
+              help=f'Record progress in {config.JOURNAL_FILENAME} in the output directory')
+@click.option('--stream/--no-stream', 'stream', default=False,
+              help='Pipe audio from FFmpeg into Whisper.cpp without temporary WAV files')
+@click.option('--cache/--no-cache', 'use_cache', default=True,
+              help='Reuse cached results for audio that was already transcribed')
+@click.option('--cache-dir', 'cache_dir',
+              help='Directory for cached transcription results')
+@click.option('--dedup/--no-dedup', 'use_dedup', default=False,
+              help='Reuse transcripts of re-encoded or re-muxed copies of earlier files '
+                   '(audio fingerprints, needs NumPy)')
+@click.option('--dedup-threshold', 'dedup_threshold', type=click.FloatRange(min=0.5, max=1),
+              default=config.DEDUP_SIMILARITY_THRESHOLD, show_default=True,
+              help='Fingerprint similarity at which two files count as duplicates')
+@click.option('--vad/--no-vad', 'use_vad', default=False,
+              help='Skip silence, music and noise before Whisper.cpp runs '
+                   '(voice activity detection, needs NumPy)')
+@click.option('--index/--no-index', 'use_index', default=True,
+              help='Add saved transcripts to the full-text search index (see search)')
+@click.option('--threads', 'threads', type=click.IntRange(min=1),
+              help='Whisper.cpp threads per job (default: usable CPUs split across jobs)')
+@click.option('--processors', 'processors', type=click.IntRange(min=1), default=1,
+              show_default=True, help='Whisper.cpp processors (-p) per job')
+@click.option('--pin-cpus', 'pin_cpus', is_flag=True,
+              help='Pin each Whisper.cpp job to its own set of cores')
+@click.option('--ffmpeg-threads', 'ffmpeg_threads', type=click.IntRange(min=0),
+              default=config.FFMPEG_THREADS, show_default='0 = FFmpeg decides',
+              help='FFmpeg decoder/filter threads per extraction')
+@click.option('--backend', 'backend', type=click.Choice(['cli', 'server']), default='cli',
+              show_default=True,
+              help='Run Whisper.cpp once per file (cli) or keep models loaded in whisper-server (server)')
+@click.option('--server-path', 'server_path',
+              help='Path to the whisper.cpp server executable (server backend)')
+@click.option('--server-idle-timeout', 'server_idle_timeout', type=click.FloatRange(min=0),
+              default=config.SERVER_IDLE_TIMEOUT, show_default=True,
+              help='Stop an idle whisper-server after this many seconds (0 = never)')
+@click.option('--metrics-file', 'metrics_file',
+              help='Append per-file stage timings to this JSON-lines file')
+@click.option('--prometheus-file', 'prometheus_file',
+              help='Write Prometheus text-format metrics to this file')
+@click.option('--metrics-port', 'metrics_port', type=click.IntRange(min=0, max=65535),
+              help='Serve Prometheus metrics over HTTP on this port')
+@click.option('--warm/--no-warm', 'warm', default=True,
+              help='Verify models and load them into memory before taking work')
+@click.option('--prefetch-budget', 'prefetch_budget', callback=_parse_size_option,
+              help='Most memory model prefetching may fill, e.g. "4G" '
+                   '(default: half of available memory)')
+@click.option('--verbose', '-v', is_flag=True,
+              help='Enable verbose output')
+def batch(input_dir, output_dir, model_path, deadline, max_rtf, whisper_path, language,
+          output_format, temp_dir, scratch_quota, ram_scratch, workers, recursive,
+          pipeline, extract_workers,
+          write_workers, queue_depth, resume, use_journal, stream, use_cache, cache_dir,
+          use_dedup, dedup_threshold, use_vad, use_index,
+          threads, processors, pin_cpus, ffmpeg_threads, backend, server_path,
+          server_idle_timeout,
+          metrics_file, prometheus_file, metrics_port, warm, prefetch_budget, verbose):
+    """Transcribe every video in a directory using a pool of workers."""
+    from .batch import find_media_files, run_batch
+    from .pipeline import run_pipeline
+
+    if resume and not use_journal:
+        raise click.UsageError("--resume needs the journal (drop --no-journal)")
+    _check_auto_model_options(model_path, deadline, max_rtf)
+
+    transcriber = None
+    journal = None
+    try:
+        display_info()
+
+        files = find_media_files(input_dir, recursive=recursive)
+        if not files:
+            console.print(f"[yellow]No video or audio files found in {input_dir}[/yellow]")
+            console.print(f"Supported formats: "
+                          f"{', '.join(config.SUPPORTED_VIDEO_FORMATS + config.SUPPORTED_AUDIO_FORMATS)}")
+            return
+
+        transcriber = VideoTranscriber(whisper_path=whisper_path, temp_dir=temp_dir,
+                                       quiet=not verbose,
+                                       cache=_build_cache(use_cache, cache_dir),
+                                       dedup=_build_dedup(use_dedup, dedup_threshold),
+                                       vad=use_vad,
+                                       search=_build_search(use_index),
+                                       scheduler=_build_scheduler(workers, threads,
+                                                                  processors, pin_cpus),
+                                       metrics=_build_metrics(metrics_file, prometheus_file,
+                                                              metrics_port),
+                                       ffmpeg_threads=ffmpeg_threads)
+        _configure_backend(transcriber, backend, server_path, server_idle_timeout)
+        _configure_scratch(transcriber, scratch_quota, ram_scratch)
+        if stream:
+            _warn_stream_ignored(transcriber, extra=["pipeline"] if pipeline else ())
+
+        if use_journal:
+            from .journal import BatchJournal, default_journal_path
+            journal = BatchJournal(default_journal_path(output_dir))
+            journal.begin({'model': model_path, 'language': language,
+                           'formats': output_format}, resume=resume, inputs=files)
+
+        console.print(f"[blue]Found {len(files)} video file(s), processing with "
+                      f"{workers} worker(s)[/blue]")
+
+        model_for = None
+        if model_path == 'auto':
+            # Files a resumed batch already finished don't share the deadline
+            pending = [f for f in files if journal is None or not journal.is_done(f)]
+            plan = _plan_auto_models(transcriber, pending or files, deadline, max_rtf,
+                                     language, workers, verbose)
+            planned = plan.model_paths()
+            fallback = next(iter(plan.paths.values()))
+            model_for = {f: planned.get(f, fallback) for f in files}
+
+        def report(item):
+            name = os.path.basename(item.input_path)
+            if item.skipped:
+                if verbose:
+                    console.print(f"[dim]- {name} (already done)[/dim]")
+            elif item.success:
+                console.print(f"[green]✓ {name}[/green] [dim]({item.elapsed:.1f}s)[/dim]")
+            else:
+                console.print(f"[red]✗ {name}: {item.error}[/red]")
+
+        if warm:
+            _warm_models(transcriber, model_for.values() if model_for
+                         else [transcriber._resolve_model_path(model_path)], prefetch_budget)
+
+        started = time.time()
+        if pipeline:
+            results = run_pipeline(
+                transcriber,
+                files,
+                model_name_or_path=model_path,
+                output_dir=output_dir,
+                language=language,
+                output_format=output_format,
+                extract_workers=extract_workers,
+                transcribe_workers=workers,
+                write_workers=write_workers,
+                queue_depth=queue_depth,
+                journal=journal,
+                model_for=model_for,
+                on_result=report,
+                input_dir=input_dir
+            )
+        else:
+            results = run_batch(
+                transcriber,
+                files,
+                model_name_or_path=model_path,
+                output_dir=output_dir,
+                language=language,
+                output_format=output_format,
+                workers=workers,
+                stream=stream,
+                journal=journal,
+                model_for=model_for,
+                on_result=report,
+                input_dir=input_dir
+            )
+
+        summary = ui.table(title="Batch Summary")
+        summary.add_column("File", style="cyan")
+        summary.add_column("Status", style="bold", no_wrap=True)
+        summary.add_column("Time", style="magenta", justify="right")
+        summary.add_column("Output / Error", style="white")
+        for item in results:
+            if item.skipped:
+                status = "[dim]Skipped[/dim]"
+            else:
+                status = "[green]Success[/green]" if item.success else "[red]Failed[/red]"
+            detail = item.output_path if item.success else item.error
+            summary.add_row(os.path.basename(item.input_path), status,
+                            f"{item.elapsed:.1f}s", detail or "")
+        console.print(summary)
+
+        duplicates = transcriber.dedup.report(since=started) if transcriber.dedup else []
+        if duplicates:
+            _print_duplicates(duplicates, title="De-duplicated Files")
+
+        failed = sum(1 for item in results if not item.success)
+        skipped = sum(1 for item in results if item.skipped)
+        console.print(f"[green]Successful: {len(results) - failed - skipped}[/green]")
+        if skipped:
+            console.print(f"[dim]Skipped (already done): {skipped}[/dim]")
+        if duplicates:
+            console.print(f"[green]Reused transcripts of duplicates: {len(duplicates)}[/green]")
+        if failed:
+            console.print(f"[red]Failed: {failed}[/red]")
+            sys.exit(1)
+
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Batch cancelled by user[/yellow]")
+        sys.exit(1)
+    except Exception as e:
+        console.print(f"\n[red]Error: {str(e)}[/red]")
+        if verbose:
+            import traceback
+            console.print(f"[red]{traceback.format_exc()}[/red]")
+        sys.exit(1)
+    finally:
+        if transcriber is not None:
+            transcriber.close()
+        if journal is not None:
+            journal.close()
+
+@cli.command()
+@click.option('--input-dir', '-i', 'input_dir', default='./input', show_default=True,
+              help='Directory to watch for new videos')
+@click.option('--output-dir', '-o', 'output_dir', default='./output', show_default=True,
+              help='Directory for transcriptions')
+@click.option('--model', '-m', 'model_path', default='base', show_default=True,
+              help='Whisper model name (tiny, base, small, medium, large) or path to model file (.bin)')
+@click.option('--whisper-path', '-w', 'whisper_path',
+              help='Path to Whisper.cpp main executable')
+@click.option('--language', '-l', 'language',
+              help='Language code (e.g., "en", "es", "fr")')
+@click.option('--format', '-f', 'output_format', default='txt',
+              callback=_parse_format_option,
+              help='Output format(s): txt, srt, vtt, json, jsonl, jsonl.gz, jsonl.zst '
+                   '(comma separated, e.g. "srt,txt")')
+@click.option('--temp-dir', '-t', 'temp_dir',
+              help='Directory for temporary files')
+@click.option('--scratch-quota', 'scratch_quota', callback=_parse_size_option,
+              help='Most temporary space all jobs may use at once, e.g. "2G"; '
+                   'further jobs wait (default: 4G, 0 = unlimited)')
+@click.option('--ram-scratch/--no-ram-scratch', 'ram_scratch', default=True,
+              help='Put temporary audio in RAM (/dev/shm) when it fits')
+@click.option('--workers', '-j', 'workers', type=click.IntRange(min=1),
+              default=config.get_default_batch_workers, show_default='CPU cores / 4',
+              help='Number of files to transcribe concurrently')
+@click.option('--recursive', '-r', is_flag=True,
+              help='Also watch subdirectories')
+@click.option('--settle', 'settle', type=click.FloatRange(min=0),
+              default=config.WATCH_SETTLE_SECONDS, show_default=True,
+              help='Seconds a file must stop changing before it is transcribed')
+@click.option('--polling', is_flag=True,
+              help='Poll the directory instead of using inotify (e.g. for network or VM mounts)')
+@click.option('--poll-interval', 'poll_interval', type=click.FloatRange(min=0.1),
+              default=config.WATCH_POLL_INTERVAL, show_default=True,
+              help='Seconds between directory scans when polling')
+@click.option('--cache/--no-cache', 'use_cache', default=True,
+              help='Reuse cached results for audio that was already transcribed')
+@click.option('--cache-dir', 'cache_dir',
+              help='Directory for cached transcription results')
+@click.option('--dedup/--no-dedup', 'use_dedup', default=False,
+              help='Reuse transcripts of re-encoded or re-muxed copies of earlier files '
+                   '(audio fingerprints, needs NumPy)')
+@click.option('--dedup-threshold', 'dedup_threshold', type=click.FloatRange(min=0.5, max=1),
+              default=config.DEDUP_SIMILARITY_THRESHOLD, show_default=True,
+              help='Fingerprint similarity at which two files count as duplicates')
+@click.option('--vad/--no-vad', 'use_vad', default=False,
+              help='Skip silence, music and noise before Whisper.cpp runs '
+                   '(voice activity detection, needs NumPy)')
+@click.option('--index/--no-index', 'use_index', default=True,
+              help='Add saved transcripts to the full-text search index (see search)')
+@click.option('--threads', 'threads', type=click.IntRange(min=1),
+              help='Whisper.cpp threads per job (default: usable CPUs split across jobs)')
+@click.option('--pin-cpus', 'pin_cpus', is_flag=True,
+              help='Pin each Whisper.cpp job to its own set of cores')
+@click.option('--ffmpeg-threads', 'ffmpeg_threads', type=click.IntRange(min=0),
+              default=config.FFMPEG_THREADS, show_default='0 = FFmpeg decides',
+              help='FFmpeg decoder/filter threads per extraction')
+@click.option('--backend', 'backend', type=click.Choice(['auto', 'cli', 'server']),
+              default='auto', show_default=True,
+              help='Keep models loaded in whisper-server when available (auto), '
+                   'or force the cli/server backend')
+@click.option('--server-path', 'server_path',
+              help='Path to the whisper.cpp server executable (server backend)')
+@click.option('--metrics-file', 'metrics_file',
+              help='Append per-file stage timings to this JSON-lines file')
+@click.option('--prometheus-file', 'prometheus_file',
+              help='Write Prometheus text-format metrics to this file')
+@click.option('--metrics-port', 'metrics_port', type=click.IntRange(min=0, max=65535),
+              help='Serve Prometheus metrics over HTTP on this port')
+@click.option('--warm/--no-warm', 'warm', default=True,
+              help='Verify models and load them into memory before taking work')
+@click.option('--prefetch-budget', 'prefetch_budget', callback=_parse_size_option,
+              help='Most memory model prefetching may fill, e.g. "4G" '
+                   '(default: half of available memory)')
+@click.option('--verbose', '-v', is_flag=True,
+              help='Enable verbose output')
+def watch(input_dir, output_dir, model_path, whisper_path, language, output_format,
+          temp_dir, scratch_quota, ram_scratch, workers, recursive, settle, polling,
+          poll_interval, use_cache,
+          cache_dir, use_dedup, dedup_threshold, use_vad, use_index, threads, pin_cpus, ffmpeg_threads, backend, server_path, metrics_file,
+          prometheus_file, metrics_port, warm, prefetch_budget, verbose):
+    """Transcribe videos as they arrive in a directory (runs until stopped)."""
+    if model_path == 'auto':
+        raise click.UsageError("--model auto plans against a known queue; "
+                               "use transcribe or batch, or name a model")
+    import signal
+    import threading
+    from .journal import BatchJournal, default_journal_path
+    from .watch import WatchService
+
+    transcriber = None
+    journal = None
+    try:
+        display_info()
+
+        transcriber = VideoTranscriber(whisper_path=whisper_path, temp_dir=temp_dir,
+                                       quiet=not verbose,
+                                       cache=_build_cache(use_cache, cache_dir),
+                                       dedup=_build_dedup(use_dedup, dedup_threshold),
+                                       vad=use_vad,
+                                       search=_build_search(use_index),
+                                       scheduler=_build_scheduler(workers, threads,
+                                                                  pin=pin_cpus),
+                                       metrics=_build_metrics(metrics_file, prometheus_file,
+                                                              metrics_port),
+                                       ffmpeg_threads=ffmpeg_threads)
+        # Idle servers stay up: the point of watching is a warm model
+        _configure_backend(transcriber, backend, server_path, idle_timeout=0)
+        _configure_scratch(transcriber, scratch_quota, ram_scratch)
+
+        journal = BatchJournal(default_journal_path(output_dir))
+        journal.begin({'model': model_path, 'language': language,
+                       'formats': output_format}, resume=True)
+
+        def report(item):
+            name = os.path.basename(item.input_path)
+            if item.success:
+                console.print(f"[green]✓ {name}[/green] [dim]({item.elapsed:.1f}s) "
+                              f"→ {item.output_path}[/dim]")
+            else:
+                console.print(f"[red]✗ {name}: {item.error}[/red]")
+
+        service = WatchService(
+            transcriber,
+            input_dir=input_dir,
+            output_dir=output_dir,
+            model_name_or_path=model_path,
+            language=language,
+            output_format=output_format,
+            workers=workers,
+            recursive=recursive,
+            settle=settle,
+            polling=polling,
+            poll_interval=poll_interval,
+            journal=journal,
+            on_result=report
+        )
+
+        if warm:
+            _warm_models(transcriber, [transcriber._resolve_model_path(model_path)],
+                         prefetch_budget)
+
+        stop = threading.Event()
+        # docker stop sends SIGTERM; finish in-flight files and exit cleanly
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+        console.print(f"[blue]Watching {input_dir} ({service.watcher.name}, "
+                      f"{transcriber.backend.name} backend, {service.workers} worker(s)). "
+                      f"Press Ctrl+C to stop.[/blue]")
+        try:
+            service.run(stop)
+        except KeyboardInterrupt:
+            stop.set()
+        console.print("[yellow]Stopped watching[/yellow]")
+
+    except Exception as e:
+        console.print(f"\n[red]Error: {str(e)}[/red]")
+        if verbose:
+            import traceback
+            console.print(f"[red]{traceback.format_exc()}[/red]")
+        sys.exit(1)
+    finally:
+        if transcriber is not None:
+            transcriber.close()
+        if journal is not None:
+            journal.close()
+
+@cli.command()
+@click.option('--host', 'host', default='127.0.0.1', show_default=True,
+              help='Interface to listen on (0.0.0.0 to accept jobs from other hosts)')
+@click.option('--port', '-p', 'port', type=click.IntRange(min=0, max=65535),
+              default=config.SERVICE_PORT, show_default=True,
+              help='Port to listen on')
+@click.option('--input-dir', '-i', 'input_dir', default='./input', show_default=True,
+              help='Directory jobs may name files in')
+@click.option('--output-dir', '-o', 'output_dir', default='./output', show_default=True,
+              help='Directory for transcriptions (one subdirectory per job)')
+@click.option('--model', '-m', 'model_path', default='base', show_default=True,
+              help='Whisper model for jobs that don\'t name one')
+@click.option('--whisper-path', '-w', 'whisper_path',
+              help='Path to Whisper.cpp main executable')
+@click.option('--language', '-l', 'language',
+              help='Language code for jobs that don\'t name one')
+@click.option('--format', '-f', 'output_format', default='txt',
+              callback=_parse_format_option,
+              help='Output format(s) for jobs that don\'t name any '
+                   '(comma separated, e.g. "srt,txt")')
+@click.option('--temp-dir', '-t', 'temp_dir',
+              help='Directory for temporary files and uploads')
+@click.option('--scratch-quota', 'scratch_quota', callback=_parse_size_option,
+              help='Most temporary space all jobs may use at once, e.g. "2G"; '
+                   'further jobs wait (default: 4G, 0 = unlimited)')
+@click.option('--ram-scratch/--no-ram-scratch', 'ram_scratch', default=True,
+              help='Put temporary audio in RAM (/dev/shm) when it fits')
+@click.option('--workers', '-j', 'workers', type=click.IntRange(min=1),
+              default=config.get_default_batch_workers, show_default='CPU cores / 4',
+              help='Number of jobs transcribed concurrently')
+@click.option('--queue-size', 'queue_size', type=click.IntRange(min=0),
+              default=config.SERVICE_QUEUE_SIZE, show_default=True,
+              help='Jobs that may wait for a worker; further submissions get HTTP 429')
+@click.option('--cache/--no-cache', 'use_cache', default=True,
+              help='Reuse cached results for audio that was already transcribed')
+@click.option('--cache-dir', 'cache_dir',
+              help='Directory for cached transcription results')
+@click.option('--index/--no-index', 'use_index', default=True,
+              help='Add saved transcripts to the full-text search index (see search)')
+@click.option('--threads', 'threads', type=click.IntRange(min=1),
+              help='Whisper.cpp threads per job (default: usable CPUs split across jobs)')
+@click.option('--pin-cpus', 'pin_cpus', is_flag=True,
+              help='Pin each Whisper.cpp job to its own set of cores')
+@click.option('--ffmpeg-threads', 'ffmpeg_threads', type=click.IntRange(min=0),
+              default=config.FFMPEG_THREADS, show_default='0 = FFmpeg decides',
+              help='FFmpeg decoder/filter threads per extraction')
+@click.option('--backend', 'backend', type=click.Choice(['auto', 'cli', 'server']),
+              default='auto', show_default=True,
+              help='Keep models loaded in whisper-server when available (auto), '
+                   'or force the cli/server backend')
+@click.option('--server-path', 'server_path',
+              help='Path to the whisper.cpp server executable (server backend)')
+@click.option('--metrics-file', 'metrics_file',
+              help='Append per-file stage timings to this JSON-lines file')
+@click.option('--prometheus-file', 'prometheus_file',
+              help='Write Prometheus text-format metrics to this file')
+@click.option('--metrics-port', 'metrics_port', type=click.IntRange(min=0, max=65535),
+              help='Serve Prometheus metrics over HTTP on this port')
+@click.option('--warm/--no-warm', 'warm', default=True,
+              help='Verify the default model and load it into memory before taking jobs')
+@click.option('--prefetch-budget', 'prefetch_budget', callback=_parse_size_option,
+              help='Most memory model prefetching may fill, e.g. "4G" '
+                   '(default: half of available memory)')
+@click.option('--verbose', '-v', is_flag=True,
+              help='Enable verbose output')
+def serve(host, port, input_dir, output_dir, model_path, whisper_path, language,
+          output_format, temp_dir, scratch_quota, ram_scratch, workers, queue_size,
+          use_cache, cache_dir, use_index, threads, pin_cpus, ffmpeg_threads, backend,
+          server_path, metrics_file, prometheus_file, metrics_port, warm, prefetch_budget,
+          verbose):
+    """Accept transcription jobs over a local HTTP API (runs until stopped)."""
+    if model_path == 'auto':
+        raise click.UsageError("--model auto plans against a known queue; name a model")
+    import signal
+    import threading
+    from .service import JobService
+
+    transcriber = None
+    service = None
+    try:
+        display_info()
+
+        transcriber = VideoTranscriber(whisper_path=whisper_path, temp_dir=temp_dir,
+                                       quiet=not verbose,
+                                       cache=_build_cache(use_cache, cache_dir),
+                                       search=_build_search(use_index),
+                                       scheduler=_build_scheduler(workers, threads,
+                                                                  pin=pin_cpus),
+                                       metrics=_build_metrics(metrics_file, prometheus_file,
+                                                              metrics_port),
+                                       ffmpeg_threads=ffmpeg_threads)
+        # Idle servers stay up so the next job finds its model loaded
+        _configure_backend(transcriber, backend, server_path, idle_timeout=0)
+        _configure_scratch(transcriber, scratch_quota, ram_scratch)
+        transcriber._check_dependencies()
+
+        if warm:
+            _warm_models(transcriber, [transcriber._resolve_model_path(model_path)],
+                         prefetch_budget)
+
+        service = JobService(transcriber, input_dir=input_dir, output_dir=output_dir,
+                             model_name_or_path=model_path, language=language,
+                             output_format=output_format, workers=workers,
+                             queue_size=queue_size)
+        service.start()
+        bound = service.serve(port, host)
+
+        stop = threading.Event()
+        # docker stop sends SIGTERM; cancel running jobs and exit cleanly
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+        console.print(f"[blue]Serving jobs on http://{host}:{bound} ({transcriber.backend.name} "
+                      f"backend, {service.workers} worker(s), queue of {service.queue_size}). "
+                      f"Press Ctrl+C to stop.[/blue]")
+        try:
+            while not stop.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            stop.set()
+        console.print("[yellow]Stopped serving[/yellow]")
+
+    except Exception as e:
+        console.print(f"\n[red]Error: {str(e)}[/red]")
+        if verbose:
+            import traceback
+            console.print(f"[red]{traceback.format_exc()}[/red]")
+        sys.exit(1)
+    finally:
+        if service is not None:
+            service.close()
+        if transcriber is not None:
+            transcriber.close()
+
+@cli.command()
+@click.option('--input', '-i', 'input_files', required=True, multiple=True,
+              help='JSON or JSONL transcript to convert (repeat for several files)')
+@click.option('--format', '-f', 'output_format', default='srt',
+              callback=_parse_format_option,
+              help='Output format(s): txt, srt, vtt, json, jsonl, jsonl.gz, jsonl.zst '
+                   '(comma separated)')
+@click.option('--output-dir', '-o', 'output_dir',
+              help='Directory for converted files (default: next to each input)')
+def convert(input_files, output_format, output_dir):
+    """Re-render JSON/JSONL transcripts into other formats without re-transcribing."""
+    failed = 0
+    for input_file in input_files:
+        try:
+            result = formats.load_result(input_file)
+            base = formats.strip_format_extension(input_file)
+            if base == input_file:
+                base = os.path.splitext(input_file)[0]
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+                base = os.path.join(output_dir, os.path.basename(base))
+            paths = {fmt: f"{base}.{fmt}" for fmt in output_format
+                     if os.path.abspath(f"{base}.{fmt}") != os.path.abspath(input_file)}
+            for path in formats.write_outputs(result, paths):
+                console.print(f"[green]✓ {input_file} → {path}[/green]")
+        except (OSError, ValueError) as e:
+            failed += 1
+            console.print(f"[red]✗ {input_file}: {str(e)}[/red]")
+    if failed:
+        sys.exit(1)
 
 @cli.command()
 def models():
     """List available Whisper models."""
     list_models()
 
+@cli.group()
+def cache():
+    """Inspect and manage cached transcription results."""
+    pass
+
+@cache.command('stats')
+@click.option('--cache-dir', 'cache_dir',
+              help='Directory for cached transcription results')
+def cache_stats(cache_dir):
+    """Show cache size and usage."""
+    from .cache import TranscriptionCache, describe_age, format_size
+    
+    stats = TranscriptionCache(cache_dir=cache_dir).stats()
+    
+    table = ui.table(title="Transcription Cache")
+    table.add_column("Setting", style="cyan")
+    table.add_column("Value", style="green")
+    table.add_row("Directory", stats['cache_dir'])
+    table.add_row("Entries", str(stats['entries']))
+    table.add_row("Size", format_size(stats['total_size']))
+    table.add_row("Size Limit", format_size(stats['max_size']))
+    table.add_row("Least Recently Used", describe_age(stats['oldest']))
+    table.add_row("Most Recently Used", describe_age(stats['newest']))
+    console.print(table)
+
+@cache.command('prune')
+@click.option('--cache-dir', 'cache_dir',
+              help='Directory for cached transcription results')
+@click.option('--max-size', 'max_size',
+              help='Shrink the cache to this size, e.g. 500M (default: configured limit)')
+@click.option('--all', 'clear_all', is_flag=True,
+              help='Remove every cached result')
+def cache_prune(cache_dir, max_size, clear_all):
+    """Evict least recently used results to fit the size limit."""
+    from .cache import TranscriptionCache, format_size, parse_size
+    
+    try:
+        limit = 0 if clear_all else (parse_size(max_size) if max_size else None)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--max-size'")
+    
+    removed, freed = TranscriptionCache(cache_dir=cache_dir).prune(max_size=limit)
+    console.print(f"[green]✓ Removed {removed} cached result(s), freed {format_size(freed)}[/green]")
+
+def _print_duplicates(rows, title: str) -> None:
+    """Print files whose transcript was reused from a duplicate."""
+    table = ui.table(title=title)
+    table.add_column("File", style="cyan")
+    table.add_column("Duplicate Of", style="white")
+    table.add_column("Similarity", style="magenta", justify="right")
+    for row in rows:
+        table.add_row(row['source_path'], row['original_path'], f"{row['similarity']:.3f}")
+    console.print(table)
+
+@cli.group()
+def dedup():
+    """Inspect and manage the duplicate-detection fingerprint index."""
+    pass
+
+@dedup.command('report')
+@click.option('--limit', 'limit', type=click.IntRange(min=1), default=50, show_default=True,
+              help='Show at most this many de-duplicated files')
+def dedup_report(limit):
+    """List files whose transcript was reused from a duplicate, newest first."""
+    try:
+        index = _build_dedup(True)
+    except RuntimeError as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        sys.exit(1)
+    
+    stats = index.stats()
+    rows = index.report(limit=limit)
+    index.close()
+    console.print(f"[blue]{index.path}: {stats['fingerprints']} fingerprint(s), "
+                  f"{stats['matches']} duplicate(s) found[/blue]")
+    if rows:
+        _print_duplicates(rows, title="De-duplicated Files")
+
+@dedup.command('clear')
+def dedup_clear():
+    """Forget every fingerprint and logged duplicate."""
+    try:
+        index = _build_dedup(True)
+    except RuntimeError as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        sys.exit(1)
+    
+    index.clear()
+    index.close()
+    console.print(f"[green]✓ Cleared {index.path}[/green]")
+
+def _format_hit_time(seconds) -> str:
+    """Timestamp of a search hit, "-" for plain text transcripts."""
+    if seconds is None:
+        return "-"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}"
+
+@cli.command()
+@click.argument('query', nargs=-1, required=True)
+@click.option('--limit', '-n', 'limit', type=click.IntRange(min=1), default=20,
+              show_default=True, help='Show at most this many hits')
+@click.option('--index-file', 'index_file',
+              help='Search index database (default: in the cache directory)')
+def search(query, limit, index_file):
+    """Find transcript segments that mention all the given words."""
+    index = _build_search(True, index_file)
+    if index is None:
+        sys.exit(1)
+    
+    started = time.perf_counter()
+    hits = index.search(" ".join(query), limit=limit, marks=("\x02", "\x03"))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    index.close()
+    
+    if hits:
+        table = ui.table(title="Search Results")
+        table.add_column("File", style="cyan")
+        table.add_column("Time", style="magenta", justify="right")
+        table.add_column("Text", style="white")
+        for hit in hits:
+            snippet = ui.escape(hit.snippet).replace("\x02", "[bold yellow]").replace(
+                "\x03", "[/bold yellow]")
+            table.add_row(hit.path, _format_hit_time(hit.start), snippet)
+        console.print(table)
+    console.print(f"[blue]{len(hits)} hit(s) in {elapsed_ms:.1f} ms[/blue]")
+
+@cli.command()
+@click.argument('directories', nargs=-1, type=click.Path(exists=True, file_okay=False))
+@click.option('--index-file', 'index_file',
+              help='Search index database (default: in the cache directory)')
+def reindex(directories, index_file):
+    """Index transcripts added or changed since the last run (default: ./output)."""
+    index = _build_search(True, index_file)
+    if index is None:
+        sys.exit(1)
+    
+    def report_error(path, error):
+        console.print(f"[yellow]Skipped {path}: {str(error)}[/yellow]")
+    
+    started = time.monotonic()
+    stats = index.reindex(directories or ['./output'], on_error=report_error)
+    totals = index.stats()
+    index.close()
+    console.print(f"[green]✓ Indexed {stats.indexed}, unchanged {stats.unchanged}, "
+                  f"removed {stats.removed} in {time.monotonic() - started:.1f}s "
+                  f"({totals['transcripts']} transcript(s), {totals['segments']} segment(s) "
+                  f"in {index.path})[/green]")
+    if stats.failed:
+        sys.exit(1)
+
+def main():
+    """Console script entry point."""
+    cli()
+
 if __name__ == "__main__":
-    cli() 
\ No newline at end of file
+    main() 
\ No newline at end of file
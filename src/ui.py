@@ -0,0 +1,198 @@
+"""
+Console output for Local Video Transcriber
+
+rich is imported only when something is drawn with it, which keeps the
+start-up of short commands (and of every ``python -m src.transcriber`` a job
+runner spawns) cheap. Plain mode (``--plain`` or TRANSCRIBER_PLAIN=1) never
+imports rich at all: markup is stripped and tables and panels are printed as
+plain text. Quiet mode (``--quiet``) prints nothing but errors, on stderr.
+"""
+
+import os
+import re
+import sys
+from typing import Any, List
+
+# rich style tags such as [bold blue] or [/red]; timestamps like
+# [00:00:01.000 --> ...] start with a digit and are left alone
+_MARKUP = re.compile(r'\[/?[a-z][a-z0-9 ._#-]*\]')
+
+_state = {
+    'plain': os.environ.get('TRANSCRIBER_PLAIN', '').lower() in ('1', 'true', 'yes'),
+    'quiet': False,
+}
+
+
+def configure(plain: bool = None, quiet: bool = None) -> None:
+    """
+    Choose the output mode for consoles created from now on.
+
+    Args:
+        plain: Print plain text without rich
+        quiet: Print only errors (implies plain)
+    """
+    if plain is not None:
+        _state['plain'] = plain
+    if quiet is not None:
+        _state['quiet'] = quiet
+
+
+def is_plain() -> bool:
+    """True if rich output is disabled."""
+    return _state['plain'] or _state['quiet']
+
+
+def strip_markup(text: str) -> str:
+    """Remove rich style tags from a string."""
+    return _MARKUP.sub('', text)
+
+
+class PlainConsole:
+    """Subset of rich's Console that writes plain text."""
+
+    def __init__(self, quiet: bool = False, keep_errors: bool = False):
+        """
+        Args:
+            quiet: Print nothing
+            keep_errors: With quiet, still print red (error) messages to stderr
+        """
+        self.quiet = quiet
+        self.keep_errors = keep_errors
+
+    def print(self, *objects: Any, **kwargs) -> None:
+        text = " ".join(str(obj) for obj in objects)
+        stream = sys.stdout
+        if self.quiet:
+            if not (self.keep_errors and text.lstrip().startswith("[red]")):
+                return
+            stream = sys.stderr
+        stream.write(strip_markup(text) + "\n")
+        stream.flush()
+
+
+class PlainTable:
+    """Table that prints as tab-separated rows under a title."""
+
+    def __init__(self, title: str = None):
+        self.title = title
+        self.columns: List[str] = []
+        self.rows: List[List[str]] = []
+
+    def add_column(self, header: str, **kwargs) -> None:
+        self.columns.append(header)
+
+    def add_row(self, *cells: str) -> None:
+        self.rows.append([strip_markup(str(cell)) for cell in cells])
+
+    def __str__(self) -> str:
+        lines = [self.title] if self.title else []
+        lines.append("\t".join(self.columns))
+        lines.extend("\t".join(row) for row in self.rows)
+        return "\n".join(lines)
+
+
+class SilentProgress:
+    """No-op stand-in for rich Progress when live display is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add_task(self, description: str, **kwargs) -> int:
+        return 0
+
+    def update(self, task_id: int, **kwargs) -> None:
+        pass
+
+
+def make_console(quiet: bool = False):
+    """
+    Create a console for the current output mode.
+
+    Args:
+        quiet: Suppress all output (used by batch workers)
+
+    Returns:
+        A rich Console, or a PlainConsole in plain or quiet mode
+    """
+    if quiet or _state['quiet']:
+        return PlainConsole(quiet=True)
+    if _state['plain']:
+        return PlainConsole()
+    from rich.console import Console
+    return Console()
+
+
+class LazyConsole:
+    """Module-level console that picks its implementation on first use.
+
+    Lets ``console = LazyConsole()`` sit at import time without importing
+    rich, and follows configure() calls made by the CLI before printing.
+    """
+
+    def __init__(self):
+        self._consoles = {}
+
+    def _resolve(self):
+        mode = (_state['plain'], _state['quiet'])
+        if mode not in self._consoles:
+            if _state['quiet']:
+                self._consoles[mode] = PlainConsole(quiet=True, keep_errors=True)
+            else:
+                self._consoles[mode] = make_console()
+        return self._consoles[mode]
+
+    def __getattr__(self, name: str):
+        return getattr(self._resolve(), name)
+
+
+def table(title: str = None):
+    """A rich Table, or a PlainTable in plain mode."""
+    if is_plain():
+        return PlainTable(title=title)
+    from rich.table import Table
+    return Table(title=title)
+
+
+def panel(text: str, title: str = None):
+    """A fitted rich Panel, or the bare text in plain mode."""
+    if is_plain():
+        return f"{title}: {text}" if title else text
+    from rich.panel import Panel
+    return Panel.fit(text, title=title)
+
+
+def escape(text: str) -> str:
+    """Protect brackets in text from being read as rich markup (as is in plain mode)."""
+    if is_plain():
+        return text
+    from rich.markup import escape as escape_markup
+    return escape_markup(text)
+
+
+def progress(console, enabled: bool = True):
+    """
+    Live progress display for transcribe_video.
+
+    Args:
+        console: Console the display draws on
+        enabled: False for a no-op display
+
+    Returns:
+        A rich Progress with bars and ETA, or a SilentProgress when disabled
+        or when the console is plain
+    """
+    if not enabled or isinstance(console, PlainConsole):
+        return SilentProgress()
+    from rich.progress import (Progress, SpinnerColumn, TextColumn, BarColumn,
+                               TaskProgressColumn, TimeRemainingColumn)
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TaskProgressColumn(),
+        TimeRemainingColumn(),
+        console=console
+    )
@@ -0,0 +1,289 @@
+"""
+Voice activity detection for Local Video Transcriber
+
+Lectures and meetings carry long silences, intros and music beds that
+Whisper.cpp would otherwise decode second by second (and sometimes fill with
+hallucinated text). The extracted PCM is cut into 30 ms frames and each frame
+is classified from vectorized NumPy features:
+
+- energy above the recording's own noise floor (and an absolute minimum)
+- share of spectral energy in the speech band (300-3400 Hz)
+- spectral flatness, which is high for hiss and broadband noise
+- energy modulation over half a second, which syllables produce and
+  sustained music or hum does not
+
+Speech frames are grouped into spans (short pauses are bridged, stray blips
+dropped, edges padded), the spans are concatenated into a shorter WAV for
+Whisper.cpp, and the resulting segment timestamps are mapped back onto the
+original timeline so SRT/VTT cues stay in sync with the video.
+
+NumPy is only needed when VAD is enabled
+(``pip install local-transcriber[vad]``).
+"""
+
+import bisect
+import wave
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+from . import config
+from . import formats
+from .fingerprint import read_pcm_blocks
+
+# Frame length in samples at 16 kHz, FFT size for the spectral features
+SAMPLE_RATE = 16000
+FRAME_SIZE = 480
+FFT_SIZE = 512
+SPEECH_BAND_HZ = (300.0, 3400.0)
+# Frames read and transformed at once (about two minutes); bounds memory
+# for long recordings
+BLOCK_FRAMES = 4096
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("Voice activity detection needs NumPy: "
+                           "pip install local-transcriber[vad]") from None
+    return numpy
+
+
+@dataclass
+class SpeechMap:
+    """Where the speech is, and how the speech-only audio maps back.
+
+    Attributes:
+        spans: (start, end) of each kept region on the original timeline,
+            in seconds, sorted and non-overlapping
+        duration: Duration of the original audio in seconds
+    """
+
+    spans: List[Tuple[float, float]] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def speech_seconds(self) -> float:
+        return sum(end - start for start, end in self.spans)
+
+    @property
+    def skipped_seconds(self) -> float:
+        return max(0.0, self.duration - self.speech_seconds)
+
+    def _offsets(self) -> List[float]:
+        """Start of each span on the speech-only timeline."""
+        offsets, position = [], 0.0
+        for start, end in self.spans:
+            offsets.append(position)
+            position += end - start
+        return offsets
+
+    def to_original(self, seconds: float, is_end: bool = False) -> float:
+        """
+        Map a time in the speech-only audio to the original timeline.
+
+        A time exactly on the seam between two spans belongs to the later
+        span for segment starts and to the earlier one for segment ends.
+
+        Args:
+            seconds: Time in the speech-only audio
+            is_end: The time ends a segment
+
+        Returns:
+            Time in the original audio
+        """
+        if not self.spans:
+            return seconds
+        offsets = self._offsets()
+        if is_end:
+            index = bisect.bisect_left(offsets, seconds) - 1
+        else:
+            index = bisect.bisect_right(offsets, seconds) - 1
+        index = min(max(index, 0), len(self.spans) - 1)
+        start, end = self.spans[index]
+        return min(start + max(0.0, seconds - offsets[index]), end)
+
+
+def _runs(mask) -> List[Tuple[int, int]]:
+    """(first, last + 1) index pairs of the True runs in a boolean array."""
+    np = _numpy()
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return list(zip(np.flatnonzero(edges == 1).tolist(),
+                    np.flatnonzero(edges == -1).tolist()))
+
+
+def _frame_features(np, frames) -> Tuple[Any, Any, Any]:
+    """Level in dB, speech-band share and spectral flatness of each frame."""
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    power = np.abs(np.fft.rfft(frames * np.hanning(FRAME_SIZE), n=FFT_SIZE, axis=1)) ** 2
+    freqs = np.fft.rfftfreq(FFT_SIZE, 1.0 / SAMPLE_RATE)
+    band = (freqs >= SPEECH_BAND_HZ[0]) & (freqs <= SPEECH_BAND_HZ[1])
+    band_power = power[:, band] + 1e-12
+    band_ratio = band_power.sum(axis=1) / (power.sum(axis=1) + 1e-12)
+    flatness = np.exp(np.mean(np.log(band_power), axis=1)) / np.mean(band_power, axis=1)
+    return energy_db, band_ratio, flatness
+
+
+def _classify_features(np, energy_db, band_ratio, flatness) -> Any:
+    """Per-frame speech decisions from the features of the whole recording."""
+    if not len(energy_db):
+        return np.zeros(0, dtype=bool)
+
+    # Loud relative to this recording's quiet parts, but never below the floor
+    noise_floor = np.percentile(energy_db, 10)
+    peak = np.percentile(energy_db, 95)
+    threshold = max(config.VAD_MIN_ENERGY_DB,
+                    min(noise_floor + config.VAD_ENERGY_MARGIN_DB,
+                        peak - config.VAD_ENERGY_MARGIN_DB))
+
+    # Standard deviation of the level over a sliding window (via running sums)
+    window = max(1, int(round(config.VAD_MODULATION_SECONDS * SAMPLE_RATE / FRAME_SIZE)))
+    padded = np.pad(energy_db, (window // 2, window - 1 - window // 2), mode='edge')
+    sums = np.concatenate([[0.0], np.cumsum(padded)])
+    squares = np.concatenate([[0.0], np.cumsum(padded ** 2)])
+    mean = (sums[window:] - sums[:-window]) / window
+    variance = (squares[window:] - squares[:-window]) / window - mean ** 2
+    modulation = np.sqrt(np.maximum(variance, 0.0))
+
+    return ((energy_db > threshold)
+            & (band_ratio >= config.VAD_MIN_SPEECH_BAND_RATIO)
+            & (flatness <= config.VAD_MAX_FLATNESS)
+            & (modulation >= config.VAD_MIN_MODULATION_DB))
+
+
+def _classify_blocks(np, blocks) -> Tuple[Any, int]:
+    """
+    Classify audio arriving in blocks of samples.
+
+    Only a block's spectra are in memory at once; the per-frame features
+    kept for the whole recording are three floats per 30 ms.
+
+    Returns:
+        (boolean array with one entry per whole frame, total samples)
+    """
+    features = []
+    total = 0
+    # Samples left over after the last whole frame of a block
+    pending = np.zeros(0, dtype=np.float32)
+    for samples in blocks:
+        total += len(samples)
+        pending = np.concatenate([pending, samples])
+        count = len(pending) // FRAME_SIZE
+        if not count:
+            continue
+        frames = pending[:count * FRAME_SIZE].reshape(count, FRAME_SIZE)
+        features.append(_frame_features(np, frames))
+        pending = pending[count * FRAME_SIZE:]
+    if not features:
+        return np.zeros(0, dtype=bool), total
+    energy_db, band_ratio, flatness = (np.concatenate(parts) for parts in zip(*features))
+    return _classify_features(np, energy_db, band_ratio, flatness), total
+
+
+def classify_frames(samples) -> Any:
+    """
+    Decide per 30 ms frame whether it holds speech.
+
+    Args:
+        samples: Mono float samples in [-1, 1] at 16 kHz (NumPy array)
+
+    Returns:
+        Boolean NumPy array, one entry per whole frame
+    """
+    np = _numpy()
+    size = BLOCK_FRAMES * FRAME_SIZE
+    blocks = (samples[start:start + size] for start in range(0, len(samples), size))
+    return _classify_blocks(np, blocks)[0]
+
+
+def speech_spans(speech, duration: float) -> List[Tuple[float, float]]:
+    """
+    Turn per-frame decisions into padded, merged speech spans.
+
+    Args:
+        speech: Boolean NumPy array from classify_frames
+        duration: Audio duration in seconds
+
+    Returns:
+        Sorted, non-overlapping (start, end) pairs in seconds
+    """
+    frame_seconds = FRAME_SIZE / SAMPLE_RATE
+    # Pauses shorter than VAD_MIN_SILENCE_SECONDS stay in, so sentences
+    # are not chopped into syllables
+    merged: List[List[float]] = []
+    for first, last in _runs(speech):
+        start, end = first * frame_seconds, last * frame_seconds
+        if merged and start - merged[-1][1] < config.VAD_MIN_SILENCE_SECONDS:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    spans: List[Tuple[float, float]] = []
+    for start, end in merged:
+        if end - start < config.VAD_MIN_SPEECH_SECONDS:
+            continue  # A click or a cough, not speech
+        start = max(0.0, start - config.VAD_PADDING_SECONDS)
+        end = min(duration, end + config.VAD_PADDING_SECONDS)
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def detect_speech(audio_path: str) -> SpeechMap:
+    """
+    Find the speech in an extracted WAV file.
+
+    Args:
+        audio_path: 16 kHz 16-bit PCM WAV (channels are averaged)
+
+    Returns:
+        SpeechMap
+    """
+    np = _numpy()
+    speech, total = _classify_blocks(
+        np, read_pcm_blocks(audio_path, BLOCK_FRAMES * FRAME_SIZE, scale=1 / 32768.0))
+    duration = total / SAMPLE_RATE
+    return SpeechMap(spans=speech_spans(speech, duration), duration=duration)
+
+
+def write_speech_audio(audio_path: str, speech: SpeechMap, output_path: str) -> str:
+    """
+    Write only the speech spans of a WAV file, back to back.
+
+    Args:
+        audio_path: Source WAV file
+        speech: SpeechMap from detect_speech
+        output_path: Destination WAV file
+
+    Returns:
+        output_path
+    """
+    with wave.open(audio_path, 'rb') as source, wave.open(output_path, 'wb') as target:
+        target.setparams(source.getparams())
+        rate = source.getframerate()
+        for start, end in speech.spans:
+            first = int(round(start * rate))
+            source.setpos(first)
+            target.writeframes(source.readframes(int(round(end * rate)) - first))
+    return output_path
+
+
+def remap_result(result: Dict[str, Any], speech: SpeechMap) -> Dict[str, Any]:
+    """
+    Move a transcript of the speech-only audio onto the original timeline.
+
+    Args:
+        result: Whisper.cpp JSON result for write_speech_audio's output
+        speech: The SpeechMap the audio was written from
+
+    Returns:
+        Whisper.cpp shaped JSON result with original timestamps
+    """
+    segments = []
+    for segment in formats.get_segments(result):
+        start = speech.to_original(segment['start'])
+        end = speech.to_original(segment['end'], is_end=True)
+        segments.append({'start': start, 'end': max(start, end), 'text': segment['text']})
+    return formats.build_result(segments, base=result)
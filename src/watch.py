@@ -0,0 +1,414 @@
+"""
+Watch-folder ingestion for Local Video Transcriber
+
+Watches the input directory (inotify on Linux, periodic scans elsewhere or
+on filesystems that don't deliver events, such as some Docker bind mounts),
+waits for new files to stop growing and hands them to a long-lived worker
+pool. Files already transcribed with the same settings are skipped using the
+batch journal, so restarts don't redo finished work.
+"""
+
+import ctypes
+import ctypes.util
+import itertools
+import os
+import select
+import struct
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from . import config
+from . import formats
+from .batch import BatchItemResult
+
+# inotify event masks (linux/inotify.h)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _is_candidate(path: str) -> bool:
+    """Return True for media files, ignoring hidden/partial uploads."""
+    return not os.path.basename(path).startswith('.') and config.validate_media_format(path)
+
+
+def _scan(input_dir: str, recursive: bool) -> Dict[str, Tuple[int, int]]:
+    """Return {path: (size, mtime_ns)} for every media file in the directory."""
+    snapshot = {}
+    pattern = "**/*" if recursive else "*"
+    for path in Path(input_dir).glob(pattern):
+        path = str(path)
+        if not _is_candidate(path):
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if os.path.isfile(path):
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+class PollingWatcher:
+    """Detect changes by comparing directory snapshots."""
+
+    name = "polling"
+
+    def __init__(self, input_dir: str, recursive: bool = False,
+                 interval: float = None):
+        self.input_dir = input_dir
+        self.recursive = recursive
+        self.interval = interval or config.WATCH_POLL_INTERVAL
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+
+    def wait(self, timeout: float) -> Set[str]:
+        """
+        Wait up to timeout seconds and return paths that appeared or changed.
+        """
+        time.sleep(min(timeout, self.interval))
+        snapshot = _scan(self.input_dir, self.recursive)
+        changed = {path for path, state in snapshot.items()
+                   if self._snapshot.get(path) != state}
+        self._snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Receive file events from the Linux kernel through libc's inotify API."""
+
+    name = "inotify"
+
+    def __init__(self, input_dir: str, recursive: bool = False):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.input_dir = input_dir
+        self.recursive = recursive
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self._dirs: Dict[int, str] = {}
+        self._add_tree(input_dir)
+
+    def _add_watch(self, directory: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch failed for {directory}: "
+                               f"{os.strerror(err)}")
+        self._dirs[wd] = directory
+
+    def _add_tree(self, directory: str) -> None:
+        self._add_watch(directory)
+        if self.recursive:
+            for root, dirs, _ in os.walk(directory):
+                for name in dirs:
+                    self._add_watch(os.path.join(root, name))
+
+    def wait(self, timeout: float) -> Optional[Set[str]]:
+        """
+        Wait up to timeout seconds for events.
+
+        Returns:
+            Paths with activity, or None if the kernel queue overflowed and
+            the caller should rescan the directory
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[str] = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                return None
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & _IN_ISDIR:
+                if self.recursive and mask & (_IN_CREATE | _IN_MOVED_TO):
+                    try:
+                        self._add_tree(path)
+                    except OSError:
+                        continue
+                    # Files may have landed before the watch existed
+                    changed.update(_scan(path, True))
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(input_dir: str, recursive: bool = False, polling: bool = False,
+                   interval: float = None):
+    """
+    Create the best available watcher for a directory.
+
+    Args:
+        input_dir: Directory to watch
+        recursive: Also watch subdirectories
+        polling: Skip inotify and poll the directory
+        interval: Polling interval in seconds
+
+    Returns:
+        InotifyWatcher when available, otherwise PollingWatcher
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(input_dir, recursive=recursive)
+        except (OSError, AttributeError):
+            # AttributeError: libc without inotify (e.g. macOS)
+            pass
+    return PollingWatcher(input_dir, recursive=recursive, interval=interval)
+
+
+class FileStabilizer:
+    """Hold files back until their size and mtime stop changing."""
+
+    def __init__(self, settle: float = None):
+        """
+        Args:
+            settle: Seconds a file must stay unchanged before it is ready
+        """
+        self.settle = config.WATCH_SETTLE_SECONDS if settle is None else settle
+        self._pending: Dict[str, Tuple[Tuple[int, int], float]] = {}
+
+    def observe(self, path: str) -> None:
+        """Note activity on a path, restarting its quiet period."""
+        self._pending[path] = ((-1, -1), time.monotonic())
+
+    def ready(self) -> Set[str]:
+        """Return (and forget) files that have been quiet for the settle period."""
+        now = time.monotonic()
+        done = set()
+        for path, (state, since) in list(self._pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Deleted or renamed away before it settled
+                del self._pending[path]
+                continue
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current != state:
+                self._pending[path] = (current, now)
+            elif now - since >= self.settle:
+                del self._pending[path]
+                done.add(path)
+        return done
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+class WatchService:
+    """Transcribe media as it arrives in a directory."""
+
+    def __init__(self, transcriber, input_dir: str, output_dir: str,
+                 model_name_or_path: str, language: str = None,
+                 output_format="txt", workers: int = None, recursive: bool = False,
+                 settle: float = None, polling: bool = False,
+                 poll_interval: float = None, journal=None,
+                 on_result: Optional[Callable[[BatchItemResult], None]] = None):
+        """
+        Initialize the service.
+
+        Args:
+            transcriber: VideoTranscriber shared by all workers
+            input_dir: Directory to watch
+            output_dir: Directory for transcripts
+            model_name_or_path: Whisper model name or path
+            language: Language code (optional)
+            output_format: Output format(s)
+            workers: Number of concurrent jobs
+            recursive: Also watch subdirectories
+            settle: Seconds a file must stop changing before it is processed
+            polling: Poll instead of using inotify
+            poll_interval: Polling interval in seconds
+            journal: BatchJournal used to skip finished files
+            on_result: Callback invoked as each file finishes
+        """
+        if not os.path.isdir(input_dir):
+            raise FileNotFoundError(f"Input directory not found: {input_dir}")
+
+        self.transcriber = transcriber
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.language = language
+        self.output_formats = formats.parse_formats(output_format)
+        self.workers = max(1, workers or config.get_default_batch_workers())
+        self.recursive = recursive
+        self.journal = journal
+        self.on_result = on_result
+        self.stabilizer = FileStabilizer(settle)
+        self.watcher = create_watcher(input_dir, recursive=recursive, polling=polling,
+                                      interval=poll_interval)
+        self.tick = min(self.stabilizer.settle / 2 or 0.1, config.WATCH_POLL_INTERVAL)
+
+        transcriber._check_dependencies()
+        self.model_path = transcriber._resolve_model_path(model_name_or_path)
+        os.makedirs(output_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._requeue: Set[str] = set()
+        self._resettle: Set[str] = set()
+        # Output path -> input that claimed it
+        self._names: Dict[str, str] = {}
+
+    def output_path_for(self, input_path: str) -> str:
+        """
+        Choose the transcript path for an input.
+
+        Like batch mode, a file whose stem is already taken by another input
+        keeps its extension in the name (then gets a counter). A name counts
+        as taken when another input claimed it in this run or in the
+        journal, or when a transcript of unknown origin already has it, so
+        a restart never hands a finished file's transcript to a newcomer.
+        An input the journal remembers keeps the path it had.
+        """
+        ext = self.output_formats[0]
+        if self.journal is not None:
+            row = self.journal.get(input_path)
+            recorded = row and row['output_path']
+            if (recorded and os.path.dirname(recorded) == self.output_dir
+                    and recorded.endswith(f"_transcript.{ext}")
+                    and self._claim(recorded, input_path)):
+                return recorded
+
+        path = Path(input_path)
+        suffix = path.suffix.lstrip('.').lower()
+        names = itertools.chain([path.stem, f"{path.stem}_{suffix}"],
+                                (f"{path.stem}_{suffix}_{n}" for n in itertools.count(2)))
+        for name in names:
+            candidate = os.path.join(self.output_dir, f"{name}_transcript.{ext}")
+            if self._claim(candidate, input_path):
+                return candidate
+
+    def _claim(self, output_path: str, input_path: str) -> bool:
+        """Reserve output_path for input_path unless another input owns it."""
+        owner = self._names.get(output_path)
+        if owner is None and self.journal is not None:
+            owner = self.journal.owner_of(output_path)
+        if owner is None and os.path.exists(output_path):
+            return False
+        if owner not in (None, input_path):
+            return False
+        self._names[output_path] = input_path
+        return True
+
+    def _process(self, input_path: str, output_path: str) -> BatchItemResult:
+        item = BatchItemResult(input_path=input_path)
+        if self.journal is not None:
+            self.journal.start(input_path, output_path)
+        start = time.monotonic()
+        try:
+            item.output_path = self.transcriber.transcribe_video(
+                video_path=input_path,
+                model_name_or_path=self.model_path,
+                output_path=output_path,
+                language=self.language,
+                output_format=self.output_formats,
+                show_progress=False
+            )
+            item.success = True
+        except Exception as e:
+            item.error = str(e)
+        item.elapsed = time.monotonic() - start
+        if self.journal is not None:
+            self.journal.finish(item)
+        return item
+
+    def _done(self, input_path: str, future: Future) -> None:
+        with self._lock:
+            self._in_flight.pop(input_path, None)
+            # The file changed while it was being transcribed
+            if input_path in self._requeue:
+                self._requeue.discard(input_path)
+                self._resettle.add(input_path)
+        if future.cancelled():
+            return
+        if self.on_result:
+            self.on_result(future.result())
+
+    def submit(self, executor: ThreadPoolExecutor, input_path: str) -> bool:
+        """
+        Queue a settled file unless it is already done or in flight.
+
+        Returns:
+            True if the file was queued
+        """
+        with self._lock:
+            if input_path in self._in_flight:
+                self._requeue.add(input_path)
+                return False
+            if self.journal is not None and self.journal.is_done(input_path):
+                return False
+            output_path = self.output_path_for(input_path)
+            future = executor.submit(self._process, input_path, output_path)
+            self._in_flight[input_path] = future
+        future.add_done_callback(lambda f, path=input_path: self._done(path, f))
+        return True
+
+    def run(self, stop: threading.Event) -> None:
+        """
+        Watch and transcribe until stop is set.
+
+        Files present at startup are considered too; finished ones are
+        skipped through the journal.
+
+        Args:
+            stop: Event that ends the loop
+        """
+        executor = ThreadPoolExecutor(max_workers=self.workers,
+                                      thread_name_prefix="watch-worker")
+        try:
+            for path in _scan(self.input_dir, self.recursive):
+                self.stabilizer.observe(path)
+
+            while not stop.is_set():
+                changed = self.watcher.wait(self.tick)
+                if changed is None:
+                    changed = set(_scan(self.input_dir, self.recursive))
+                with self._lock:
+                    changed |= self._resettle
+                    self._resettle = set()
+                for path in changed:
+                    if _is_candidate(path):
+                        self.stabilizer.observe(path)
+                for path in sorted(self.stabilizer.ready()):
+                    self.submit(executor, path)
+        finally:
+            self.watcher.close()
+            # Drop queued work; in-flight files finish (or stay "running"
+            # in the journal and are picked up on the next start)
+            with self._lock:
+                futures = list(self._in_flight.values())
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
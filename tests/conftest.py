@@ -0,0 +1,58 @@
+"""
+Shared fixtures for the test suite
+"""
+
+import wave
+
+import pytest
+
+RATE = 16000
+
+
+@pytest.fixture
+def write_wav():
+    """Return a function writing 16 kHz mono 16-bit WAV files.
+
+    ``write_wav(path, samples)`` writes float samples in [-1, 1] (NumPy
+    array); ``write_wav(path, seconds=3)`` writes digital silence. Both return
+    the path as a string.
+    """
+    def write(path, samples=None, seconds=None):
+        if samples is None:
+            data = b"\0\0" * int(RATE * seconds)
+        else:
+            import numpy as np
+            data = (np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes()
+        with wave.open(str(path), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(RATE)
+            wav.writeframes(data)
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def speechlike():
+    """Return a function making speech-like audio (skips without NumPy).
+
+    ``speechlike(seconds, seed=0)`` gives voiced bursts of varying pitch with
+    short pauses, like syllables, as float samples peaking at 0.5.
+    """
+    np = pytest.importorskip("numpy")
+
+    def make(seconds, seed=0):
+        rng = np.random.default_rng(seed)
+        samples = np.zeros(int(RATE * seconds))
+        position = 0
+        while position < len(samples):
+            length = int(rng.uniform(0.1, 0.3) * RATE)
+            t = np.arange(length) / RATE
+            pitch = rng.uniform(100, 200)
+            burst = sum(np.exp(-((h * pitch - 800) / 600) ** 2) * np.sin(2 * np.pi * h * pitch * t)
+                        for h in range(1, 25))
+            end = min(position + length, len(samples))
+            samples[position:end] += (burst * np.hanning(length))[:end - position]
+            position += length + int(rng.uniform(0.05, 0.2) * RATE)
+        return samples / np.abs(samples).max() * 0.5
+    return make
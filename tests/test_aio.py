@@ -0,0 +1,242 @@
+"""
+Tests for the asyncio API
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from benchmarks.media import make_corpus
+from benchmarks.stubs import StubProfile, install_stubs
+from src.aio import AsyncVideoTranscriber, CompletedEvent, SegmentEvent, run_async
+from src.backends import TranscriptionBackend
+from src.discovery import DiscoveryRegistry
+from src.progress import ProgressEvent
+
+
+@pytest.fixture
+def stubs(tmp_path, monkeypatch):
+    """Stub ffmpeg/ffprobe/whisper-cli on PATH and a transcriber using them"""
+    monkeypatch.setenv("PATH", os.environ["PATH"])
+    paths = install_stubs(str(tmp_path / "bin"))
+    model = tmp_path / "ggml-test.bin"
+    model.write_bytes(b"model")
+
+    def make(profile=StubProfile(), max_concurrent=1):
+        for name, value in profile.env().items():
+            monkeypatch.setenv(name, value)
+        return AsyncVideoTranscriber(
+            max_concurrent=max_concurrent, whisper_path=paths["whisper"],
+            temp_dir=str(tmp_path), quiet=True,
+            registry=DiscoveryRegistry(str(tmp_path / "discovery.json")))
+    return make, str(model)
+
+
+class TestRunAsync:
+    """Test cases for running commands on the event loop"""
+
+    def test_lines_and_stderr_tail(self):
+        script = "import sys; print('a'); sys.stderr.write('x\\ry\\n'); sys.exit(3)"
+        lines = []
+
+        with pytest.raises(subprocess.CalledProcessError) as error:
+            asyncio.run(run_async([sys.executable, "-c", script], on_stderr=lines.append))
+
+        assert lines == ["x\n", "y\n"]
+        assert error.value.returncode == 3
+        assert error.value.stderr == "x\ny\n"
+
+    def test_cancel_kills_process(self, tmp_path):
+        pid_file = tmp_path / "pid"
+        script = ("import os, time; open({!r}, 'w').write(str(os.getpid())); "
+                  "time.sleep(60)").format(str(pid_file))
+
+        async def main():
+            task = asyncio.ensure_future(run_async([sys.executable, "-c", script]))
+            while not pid_file.exists() or not pid_file.read_text():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        started = time.monotonic()
+        asyncio.run(main())
+
+        assert time.monotonic() - started < 10
+        with pytest.raises(ProcessLookupError):
+            os.kill(int(pid_file.read_text()), 0)
+
+
+class TestAsyncVideoTranscriber:
+    """Test cases for the async pipeline against stub executables"""
+
+    def test_events_end_with_outputs(self, tmp_path, stubs):
+        make, model = stubs
+        transcriber = make(StubProfile(segment_seconds=1.0))
+        video, = make_corpus(str(tmp_path / "in"), 1, seconds=3.0)
+
+        async def collect():
+            return [event async for event in transcriber.events(
+                video, model, output_path=str(tmp_path / "out" / "clip.srt"),
+                output_format="srt,txt")]
+        events = asyncio.run(collect())
+
+        segments = [event for event in events if isinstance(event, SegmentEvent)]
+        assert [segment.end for segment in segments] == [1.0, 2.0, 3.0]
+        assert {event.stage for event in events if isinstance(event, ProgressEvent)} == {
+            "extract", "transcribe"}
+        assert isinstance(events[-1], CompletedEvent)
+        assert events[-1].written == [str(tmp_path / "out" / "clip.srt"),
+                                      str(tmp_path / "out" / "clip.txt")]
+        assert "word0" in (tmp_path / "out" / "clip.txt").read_text()
+
+    def test_semaphore_limits_concurrency(self, tmp_path, stubs):
+        """Three jobs with one slot run one after another"""
+        make, model = stubs
+        transcriber = make(StubProfile(whisper_latency=0.3))
+        videos = make_corpus(str(tmp_path / "in"), 3, seconds=1.0)
+
+        async def run_all():
+            return await asyncio.gather(*[
+                transcriber.transcribe_video(video, model,
+                                             output_path=str(tmp_path / f"{index}.txt"))
+                for index, video in enumerate(videos)])
+
+        started = time.monotonic()
+        outputs = asyncio.run(run_all())
+
+        assert time.monotonic() - started >= 0.9
+        assert all(os.path.exists(path) for path in outputs)
+
+    def test_leaving_events_cancels_job(self, tmp_path, stubs):
+        """Breaking out after extraction stops Whisper.cpp and frees scratch"""
+        make, model = stubs
+        transcriber = make(StubProfile(whisper_latency=60))
+        video, = make_corpus(str(tmp_path / "in"), 1, seconds=1.0)
+
+        async def stop_after_extract():
+            async for event in transcriber.events(video, model,
+                                                  output_path=str(tmp_path / "out.txt")):
+                if isinstance(event, ProgressEvent) and event.stage == "extract" and event.done:
+                    await asyncio.sleep(0.5)
+                    break
+
+        started = time.monotonic()
+        asyncio.run(stop_after_extract())
+
+        assert time.monotonic() - started < 10
+        assert transcriber.transcriber.scratch.reserved_bytes == 0
+        assert not (tmp_path / "out.txt").exists()
+
+    def test_cancel_aborts_backend(self, tmp_path, stubs):
+        """Cancelling a job on a non-CLI backend aborts it and waits for the thread"""
+        make, model = stubs
+        transcriber = make()
+        video, = make_corpus(str(tmp_path / "in"), 1, seconds=1.0)
+        started, aborted = threading.Event(), threading.Event()
+
+        class SlowBackend(TranscriptionBackend):
+            name = "slow"
+
+            def transcribe(self, audio_path, model_path, language=None, allocation=None,
+                           progress=None):
+                started.set()
+                if not aborted.wait(30):
+                    return {"transcription": []}
+                raise RuntimeError("aborted")
+
+            def abort(self, audio_path):
+                aborted.set()
+                return True
+
+        transcriber.transcriber.backend = SlowBackend()
+
+        async def cancel_mid_transcribe():
+            task = asyncio.ensure_future(transcriber.transcribe_video(
+                video, model, output_path=str(tmp_path / "out.txt")))
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        begun = time.monotonic()
+        asyncio.run(cancel_mid_transcribe())
+
+        assert time.monotonic() - begun < 10
+        assert aborted.is_set()
+        assert transcriber.transcriber.scratch.reserved_bytes == 0
+        assert not (tmp_path / "out.txt").exists()
+
+    def test_waits_for_scratch_without_polling(self, tmp_path, stubs):
+        """A job over the scratch quota starts as soon as space is released"""
+        make, model = stubs
+        transcriber = make(max_concurrent=2)
+        video, = make_corpus(str(tmp_path / "in"), 1, seconds=1.0)
+        scratch = transcriber.transcriber.scratch
+        scratch.quota = 1
+        held = scratch.acquire(1)
+
+        async def main():
+            job = asyncio.ensure_future(transcriber.transcribe_video(
+                video, model, output_path=str(tmp_path / "out.txt")))
+            await asyncio.sleep(0.2)
+            assert not job.done() and scratch.reserved_bytes == 1
+            await asyncio.get_running_loop().run_in_executor(None, held.close)
+            return await job
+
+        assert os.path.exists(asyncio.run(main()))
+        assert scratch.reserved_bytes == 0
+
+    def test_vad_and_dedup_apply(self, tmp_path, stubs):
+        """VAD and dedup on the wrapped transcriber run, with Whisper.cpp on the loop"""
+        make, model = stubs
+        transcriber = make()
+        sync = transcriber.transcriber
+        video, = make_corpus(str(tmp_path / "in"), 1, seconds=1.0)
+        paths = []
+
+        def speech(audio_path, transcribe, file_metrics=None):
+            paths.append(audio_path)
+            return transcribe(audio_path)
+
+        sync.vad = True
+        sync.dedup = object()
+        sync.transcribe_speech = speech
+        sync.transcribe_deduplicated = (
+            lambda source, audio, model_path, language, transcribe, on_progress=None:
+            transcribe())
+
+        output = asyncio.run(transcriber.transcribe_video(
+            video, model, output_path=str(tmp_path / "out.txt")))
+
+        assert len(paths) == 1 and "word0" in open(output).read()
+
+    def test_cancel_during_vad_kills_whisper(self, tmp_path, stubs):
+        """Cancelling while the worker thread waits on Whisper.cpp kills it"""
+        make, model = stubs
+        transcriber = make(StubProfile(whisper_latency=60))
+        sync = transcriber.transcriber
+        sync.vad = True
+        sync.transcribe_speech = lambda audio_path, transcribe, file_metrics=None: \
+            transcribe(audio_path)
+        video, = make_corpus(str(tmp_path / "in"), 1, seconds=1.0)
+
+        async def stop_during_transcribe():
+            async for event in transcriber.events(video, model,
+                                                  output_path=str(tmp_path / "out.txt")):
+                if isinstance(event, ProgressEvent) and event.stage == "extract" and event.done:
+                    await asyncio.sleep(0.5)
+                    break
+
+        started = time.monotonic()
+        asyncio.run(stop_during_transcribe())
+
+        assert time.monotonic() - started < 10
+        assert sync.scratch.reserved_bytes == 0
+        assert not (tmp_path / "out.txt").exists()
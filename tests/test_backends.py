@@ -0,0 +1,211 @@
+"""
+Tests for transcription backends
+"""
+
+import os
+import stat
+import sys
+import threading
+import time
+
+import pytest
+
+from src.backends import ServerBackend, result_from_server
+from src.transcriber import VideoTranscriber
+
+
+# whisper-server stand-in: answers /health and /inference with the pid and
+# the number of bytes uploaded, so tests can tell servers apart.
+# FAKE_SERVER_DELAY makes inference slow, FAKE_SERVER_STARTUP loading.
+FAKE_SERVER = """\
+import json, os, sys, time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+args = sys.argv[1:]
+port = int(args[args.index("--port") + 1])
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send({"status": "ok"})
+
+    def do_POST(self):
+        size = len(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(float(os.environ.get("FAKE_SERVER_DELAY", "0")))
+        self._send({"language": "en", "segments": [
+            {"start": 0.0, "end": 1.5, "text": " pid=%d bytes=%d" % (os.getpid(), size)}
+        ]})
+
+time.sleep(float(os.environ.get("FAKE_SERVER_STARTUP", "0")))
+HTTPServer(("127.0.0.1", port), Handler).serve_forever()
+"""
+
+
+@pytest.fixture
+def server_path(tmp_path):
+    """Write the fake whisper-server executable"""
+    path = tmp_path / "whisper-server"
+    path.write_text("#!{}\n{}".format(sys.executable, FAKE_SERVER))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+@pytest.fixture
+def audio(tmp_path):
+    """Create a small audio file"""
+    path = tmp_path / "clip_audio.wav"
+    path.write_bytes(b"RIFF" + b"\0" * 96)
+    return str(path)
+
+
+def _pid(result):
+    return int(result["transcription"][0]["text"].split()[0].split("=")[1])
+
+
+class TestServerBackend:
+    """Test cases for the resident whisper-server backend"""
+
+    def test_result_conversion(self):
+        """verbose_json segments become Whisper.cpp JSON"""
+        result = result_from_server({"segments": [{"start": 1.25, "end": 2, "text": " hi"}]})
+        assert result["transcription"][0]["offsets"] == {"from": 1250, "to": 2000}
+        assert result["transcription"][0]["text"] == "hi"
+
+    def test_server_is_reused(self, server_path, audio):
+        """Consecutive files go to the same warm server"""
+        backend = ServerBackend(server_path=server_path, idle_timeout=0)
+        try:
+            first = backend.transcribe(audio, "model.bin")
+            second = backend.transcribe(audio, "model.bin")
+            assert _pid(first) == _pid(second)
+            # The whole file arrived, wrapped in the multipart envelope
+            assert int(first["transcription"][0]["text"].split("bytes=")[1]) > 100
+            assert backend.loaded_models() == ["model.bin"]
+        finally:
+            backend.close()
+        assert backend.loaded_models() == []
+
+    def test_restarts_dead_server(self, server_path, audio):
+        """A crashed server is restarted on the next request"""
+        backend = ServerBackend(server_path=server_path, idle_timeout=0)
+        try:
+            first = _pid(backend.transcribe(audio, "model.bin"))
+            os.kill(first, 9)
+            time.sleep(0.1)
+            second = _pid(backend.transcribe(audio, "model.bin"))
+            assert first != second
+        finally:
+            backend.close()
+
+    def test_idle_shutdown(self, server_path, audio):
+        """Idle servers are stopped"""
+        backend = ServerBackend(server_path=server_path, idle_timeout=0.2)
+        try:
+            backend.transcribe(audio, "model.bin")
+            deadline = time.monotonic() + 5
+            while backend.loaded_models() and time.monotonic() < deadline:
+                time.sleep(0.1)
+            assert backend.loaded_models() == []
+        finally:
+            backend.close()
+
+    def test_transcriber_uses_backend(self, server_path, audio, tmp_path):
+        """VideoTranscriber routes transcribe_audio through its backend"""
+        backend = ServerBackend(server_path=server_path, idle_timeout=0)
+        transcriber = VideoTranscriber(whisper_path="/bin/true", temp_dir=str(tmp_path),
+                                       quiet=True, backend=backend)
+        try:
+            result = transcriber.transcribe_audio(audio, "model.bin", output_format="srt")
+            assert result["transcription"].startswith("1\n00:00:00,000 --> 00:00:01,500\n")
+        finally:
+            transcriber.close()
+
+    def test_server_pool_per_model(self, server_path, audio):
+        """Concurrent jobs get a server each instead of queueing on one"""
+        backend = ServerBackend(server_path=server_path, idle_timeout=0,
+                                servers_per_model=2)
+        try:
+            first = backend._checkout("model.bin")
+            second = backend._checkout("model.bin")
+            assert first is not second
+            backend._checkin(first)
+            assert backend._checkout("model.bin") is first
+        finally:
+            backend.close()
+
+    def test_eviction_stops_busy_server_on_checkin(self, server_path, audio):
+        """A model evicted mid-request is stopped by its user, not restarted or leaked"""
+        backend = ServerBackend(server_path=server_path, idle_timeout=0)
+        try:
+            busy = backend._checkout("a.bin")
+            backend._ensure_running(busy)
+            backend.transcribe(audio, "b.bin")
+            assert busy.retired and busy.alive()
+            backend._checkin(busy)
+            assert not busy.alive()
+            assert backend.loaded_models() == ["b.bin"]
+        finally:
+            backend.close()
+
+    def test_abort_stops_inflight_request(self, server_path, audio, monkeypatch):
+        """abort() kills the server working on a file instead of waiting it out"""
+        monkeypatch.setenv("FAKE_SERVER_DELAY", "60")
+        backend = ServerBackend(server_path=server_path, idle_timeout=0)
+        errors = []
+
+        def run():
+            try:
+                backend.transcribe(audio, "model.bin")
+            except RuntimeError as error:
+                errors.append(error)
+
+        worker = threading.Thread(target=run)
+        worker.start()
+        try:
+            deadline = time.monotonic() + 10
+            while not backend.abort(audio) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            worker.join(10)
+            assert not worker.is_alive()
+            assert "aborted" in str(errors[0])
+            assert not backend.abort(audio)
+        finally:
+            backend.close()
+
+    def test_abort_while_starting(self, server_path, audio, monkeypatch):
+        """An abort during startup stops the server and the job doesn't restart it"""
+        monkeypatch.setenv("FAKE_SERVER_STARTUP", "60")
+        backend = ServerBackend(server_path=server_path, idle_timeout=0, startup_timeout=120)
+        errors = []
+
+        def run():
+            try:
+                backend.transcribe(audio, "model.bin")
+            except RuntimeError as error:
+                errors.append(error)
+
+        worker = threading.Thread(target=run)
+        worker.start()
+        try:
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline:
+                servers = [server for pool in backend._servers.values() for server in pool]
+                if servers and servers[0].process is not None:
+                    break
+                time.sleep(0.05)
+            assert backend.abort(audio)
+            worker.join(15)
+            assert not worker.is_alive()
+            assert "aborted" in str(errors[0])
+            assert not servers[0].alive()
+        finally:
+            backend.close()
@@ -0,0 +1,125 @@
+"""
+Tests for batch processing
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from src.batch import build_output_paths, find_media_files, run_batch
+
+
+class TestFindMediaFiles:
+    """Test cases for input discovery"""
+
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.input_dir = tempfile.mkdtemp()
+        for name in ["b.mp4", "a.MKV", "notes.txt", "sub/c.mov"]:
+            path = os.path.join(self.input_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "w").close()
+
+    def teardown_method(self):
+        """Clean up test fixtures"""
+        shutil.rmtree(self.input_dir, ignore_errors=True)
+
+    def test_filters_supported_formats(self):
+        """Only supported video extensions are returned, sorted"""
+        files = [os.path.basename(f) for f in find_media_files(self.input_dir)]
+        assert files == ["a.MKV", "b.mp4"]
+
+    def test_recursive(self):
+        """Recursive mode includes subdirectories"""
+        files = find_media_files(self.input_dir, recursive=True)
+        assert any(f.endswith("c.mov") for f in files)
+
+    def test_audio_inputs(self):
+        """Audio files are first-class inputs"""
+        open(os.path.join(self.input_dir, "podcast.mp3"), "w").close()
+        files = [os.path.basename(f) for f in find_media_files(self.input_dir)]
+        assert "podcast.mp3" in files
+
+    def test_missing_directory(self):
+        """Missing input directory raises FileNotFoundError"""
+        with pytest.raises(FileNotFoundError):
+            find_media_files(os.path.join(self.input_dir, "missing"))
+
+
+class TestBatch:
+    """Test cases for the batch worker pool"""
+
+    def test_output_paths_disambiguate_stems(self):
+        """Files sharing a stem get distinct output names"""
+        paths = build_output_paths(["in/intro.mp4", "in/intro.mov", "in/talk.mp4"],
+                                   "out", "srt")
+        assert paths["in/intro.mp4"] == os.path.join("out", "intro_mp4_transcript.srt")
+        assert paths["in/intro.mov"] == os.path.join("out", "intro_mov_transcript.srt")
+        assert paths["in/talk.mp4"] == os.path.join("out", "talk_transcript.srt")
+
+    def test_output_paths_mirror_subdirectories(self):
+        """Same-named files in different subdirectories get separate transcripts"""
+        files = [os.path.join("in", "a", "intro.mp4"), os.path.join("in", "b", "intro.mp4"),
+                 os.path.join("in", "talk.mp4")]
+        paths = build_output_paths(files, "out", "txt", input_dir="in")
+        assert paths[files[0]] == os.path.join("out", "a", "intro_transcript.txt")
+        assert paths[files[1]] == os.path.join("out", "b", "intro_transcript.txt")
+        assert paths[files[2]] == os.path.join("out", "talk_transcript.txt")
+
+    def test_recursive_batch_keeps_both_transcripts(self, tmp_path):
+        """A recursive batch writes one transcript per same-named input"""
+        for sub in ("a", "b"):
+            (tmp_path / "in" / sub).mkdir(parents=True)
+            (tmp_path / "in" / sub / "intro.mp4").write_bytes(sub.encode())
+        files = find_media_files(str(tmp_path / "in"), recursive=True)
+
+        def fake_transcribe(video_path, output_path, **kwargs):
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, "w") as f:
+                f.write(open(video_path).read())
+            return output_path
+
+        transcriber = Mock()
+        transcriber._resolve_model_path.return_value = "/models/ggml-base.bin"
+        transcriber.transcribe_video.side_effect = fake_transcribe
+        results = run_batch(transcriber, files, "base", str(tmp_path / "out"),
+                            input_dir=str(tmp_path / "in"))
+
+        assert len({item.output_path for item in results}) == 2
+        assert sorted(open(item.output_path).read() for item in results) == ["a", "b"]
+
+    def test_run_batch_collects_failures_and_runs_concurrently(self, tmp_path):
+        """Failures are reported per file and jobs overlap"""
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_transcribe(video_path, output_path, **kwargs):
+            with lock:
+                active.append(video_path)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(video_path)
+            if "bad" in video_path:
+                raise RuntimeError("boom")
+            return output_path
+
+        transcriber = Mock()
+        transcriber._resolve_model_path.return_value = "/models/ggml-base.bin"
+        transcriber.transcribe_video.side_effect = fake_transcribe
+
+        files = ["a.mp4", "bad.mp4", "c.mp4", "d.mp4"]
+        results = run_batch(transcriber, files, "base", str(tmp_path), workers=4)
+
+        assert [r.input_path for r in results] == files
+        assert [r.success for r in results] == [True, False, True, True]
+        assert results[1].error == "boom"
+        assert max(peak) > 1
+        transcriber._check_dependencies.assert_called_once()
+        transcriber._resolve_model_path.assert_called_once_with("base")
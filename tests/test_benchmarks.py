@@ -0,0 +1,35 @@
+"""
+Smoke tests for the benchmark suite
+"""
+
+import os
+from unittest.mock import patch
+
+from benchmarks.media import make_corpus
+from benchmarks.scenarios import run_scenario
+from src.chunking import get_wav_duration
+
+
+class TestBenchmarks:
+    """Keep the offline benchmarks runnable"""
+
+    def test_corpus_is_deterministic(self, tmp_path):
+        """Synthetic files have the requested length and identical bytes"""
+        first, second = make_corpus(str(tmp_path), 2, seconds=1.5)
+        assert get_wav_duration(first) == 1.5
+        assert open(first, "rb").read() == open(second, "rb").read()
+
+    def test_throughput_scenario_with_stubs(self):
+        """A tiny batch runs against the stub executables"""
+        with patch.dict(os.environ):
+            result = run_scenario("throughput", {"workers": 2, "files": 3, "seconds": 1.0,
+                                                 "whisper_latency": 0.01})
+        assert result["files"] == 3
+        assert result["files_per_s"] > 0
+        assert result["peak_temp_files"] >= 1
+
+    def test_startup_scenario(self):
+        """CLI start-up is timed in fresh interpreters"""
+        result = run_scenario("startup", {"runs": 1})
+        assert result["runs"] == 1
+        assert result["import_ms"] > result["python_ms"] > 0
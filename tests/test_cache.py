@@ -0,0 +1,109 @@
+"""
+Tests for the transcription result cache
+"""
+
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.cache import TranscriptionCache, parse_size
+from src.transcriber import VideoTranscriber
+
+
+@pytest.fixture
+def media(tmp_path):
+    """Create an audio file and a model file"""
+    audio = tmp_path / "clip_audio.wav"
+    audio.write_bytes(b"RIFF" + b"\1" * 1000)
+    model = tmp_path / "ggml-base.bin"
+    model.write_bytes(b"weights")
+    return str(audio), str(model)
+
+
+class TestTranscriptionCache:
+    """Test cases for TranscriptionCache"""
+
+    def test_parse_size(self):
+        """Sizes accept optional binary units"""
+        assert parse_size("512") == 512
+        assert parse_size("2K") == 2048
+        assert parse_size("1.5MB") == int(1.5 * 1024 ** 2)
+        with pytest.raises(ValueError):
+            parse_size("lots")
+
+    def test_key_depends_on_inputs(self, tmp_path, media):
+        """Keys change with audio content, language and format"""
+        audio, model = media
+        cache = TranscriptionCache(cache_dir=str(tmp_path / "cache"))
+        key = cache.make_key(audio, model, "en", "txt")
+
+        assert key == cache.make_key(audio, model, "en", "txt")
+        assert key != cache.make_key(audio, model, "fr", "txt")
+        assert key != cache.make_key(audio, model, "en", "srt")
+
+        assert key != cache.make_key(audio, model, "en", "txt", {"backend": "server"})
+
+        with open(audio, "ab") as f:
+            f.write(b"more")
+        assert key != cache.make_key(audio, model, "en", "txt")
+
+    def test_round_trip(self, tmp_path):
+        """Stored results are returned on the next lookup"""
+        cache = TranscriptionCache(cache_dir=str(tmp_path / "cache"))
+        assert cache.get("ab" * 32) is None
+        cache.put("ab" * 32, {"transcription": "hello"})
+        assert cache.get("ab" * 32) == {"transcription": "hello"}
+        assert cache.stats()["entries"] == 1
+
+    def test_lru_eviction(self, tmp_path):
+        """Least recently used entries are evicted past the size cap"""
+        cache = TranscriptionCache(cache_dir=str(tmp_path / "cache"), max_size=10 ** 6)
+        keys = ["a" * 64, "b" * 64, "c" * 64]
+        for offset, key in enumerate(keys):
+            cache.put(key, {"transcription": "x" * 100})
+            path = cache._entry_path(key)
+            os.utime(path, (time.time() - 100 + offset, time.time() - 100 + offset))
+
+        cache.get(keys[0])  # Most recently used now
+        entry_size = os.path.getsize(cache._entry_path(keys[0]))
+        removed, _ = cache.prune(max_size=entry_size * 2)
+
+        assert removed == 1
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[2]) is not None
+
+    def test_put_walks_only_when_over_cap(self, tmp_path):
+        """The cache directory is scanned once, then again only past the cap"""
+        cache = TranscriptionCache(cache_dir=str(tmp_path / "cache"), max_size=1000)
+        with patch.object(cache, "_entries", wraps=cache._entries) as entries:
+            for index in range(4):
+                cache.put(f"{index:02d}" * 32, {"transcription": "x" * 100})
+            assert entries.call_count == 1
+
+            for index in range(4, 12):
+                cache.put(f"{index:02d}" * 32, {"transcription": "x" * 100})
+            assert entries.call_count > 1
+        assert cache.stats()["total_size"] <= 1000
+
+
+class TestTranscriberCache:
+    """Test cases for the cache in front of transcribe_audio"""
+
+    @patch('src.backends.run_streaming')
+    def test_hit_skips_whisper(self, mock_run, tmp_path, media):
+        """A second identical request never launches Whisper.cpp"""
+        audio, model = media
+        mock_run.return_value.__enter__.return_value.stdout = \
+            "[00:00:00.000 --> 00:00:01.000]  hello"
+        transcriber = VideoTranscriber(whisper_path="/bin/true", temp_dir=str(tmp_path),
+                                       quiet=True,
+                                       cache=TranscriptionCache(str(tmp_path / "cache")))
+
+        first = transcriber.transcribe_audio(audio, model, "en", "txt")
+        second = transcriber.transcribe_audio(audio, model, "en", "txt")
+
+        assert first == second == {"transcription": "hello\n"}
+        assert mock_run.call_count == 1
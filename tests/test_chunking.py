@@ -0,0 +1,92 @@
+"""
+Tests for chunked transcription of long recordings
+"""
+
+import wave
+from unittest.mock import Mock, patch
+
+from src.chunking import (
+    Chunk,
+    detect_silences,
+    get_wav_duration,
+    merge_chunk_segments,
+    plan_chunks,
+    split_wav,
+)
+from src.progress import ProgressTracker
+
+
+SILENCEDETECT_STDERR = """\
+[silencedetect @ 0x1] silence_start: 58.2
+[silencedetect @ 0x1] silence_end: 59.8 | silence_duration: 1.6
+[silencedetect @ 0x1] silence_start: 130
+[silencedetect @ 0x1] silence_end: 131 | silence_duration: 1
+"""
+
+
+class TestChunkPlanning:
+    """Test cases for choosing chunk boundaries"""
+
+    @patch('src.chunking.run_streaming')
+    def test_detect_silences(self, mock_run):
+        """silencedetect output is parsed into intervals as it streams"""
+        def run(cmd, on_stderr, **kwargs):
+            for line in SILENCEDETECT_STDERR.splitlines(keepends=True):
+                on_stderr(line)
+            return Mock()
+        mock_run.side_effect = run
+        events = []
+        tracker = ProgressTracker("silence", events.append, 200.0)
+
+        assert detect_silences("audio.wav", ffmpeg="/opt/ffmpeg", tracker=tracker) == [
+            (58.2, 59.8), (130.0, 131.0)]
+        assert mock_run.call_args[0][0][0] == "/opt/ffmpeg"
+        assert events[-1].done
+
+    def test_cuts_at_silence(self):
+        """Cuts land on silence midpoints near the target length"""
+        chunks = plan_chunks(200.0, [(58.2, 59.8), (130.0, 131.0)], 60.0, overlap=2.0)
+        assert [round(c.core_start, 1) for c in chunks] == [0.0, 59.0, 59.0 + 60.0, 179.0]
+        assert chunks[1].start == chunks[1].core_start - 2.0
+        assert chunks[-1].end == 200.0
+
+    def test_hard_cut_without_silence(self):
+        """Without silence the audio is cut at the target length"""
+        chunks = plan_chunks(25.0, [], 10.0)
+        assert [(c.start, c.end) for c in chunks] == [(0.0, 10.0), (10.0, 20.0), (20.0, 25.0)]
+
+    def test_short_audio_is_one_chunk(self):
+        """Audio shorter than the chunk length isn't split"""
+        assert len(plan_chunks(5.0, [], 10.0)) == 1
+
+
+class TestChunkMerging:
+    """Test cases for stitching chunk segments back together"""
+
+    def test_offsets_and_overlap(self):
+        """Segments are shifted and overlap duplicates removed"""
+        chunks = [Chunk(0, 0.0, 10.0, 0.0), Chunk(1, 8.0, 20.0, 10.0)]
+        merged = merge_chunk_segments(chunks, [
+            [{"start": 0.0, "end": 4.0, "text": "one two"},
+             {"start": 4.0, "end": 10.0, "text": "three four five"}],
+            [{"start": 0.0, "end": 1.5, "text": "five"},
+             {"start": 1.5, "end": 5.0, "text": "four five six seven"},
+             {"start": 5.0, "end": 9.0, "text": "eight"}],
+        ])
+        assert [s["text"] for s in merged] == ["one two", "three four five", "six seven", "eight"]
+        assert merged[2]["start"] == 10.0
+        assert merged[3]["start"] == 13.0
+
+    def test_split_wav(self, tmp_path):
+        """Chunk files contain the right slice of samples"""
+        source = tmp_path / "long_audio.wav"
+        with wave.open(str(source), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(16000)
+            wav.writeframes(b"\0\0" * 16000 * 3)
+
+        chunks = plan_chunks(get_wav_duration(str(source)), [], 2.0, overlap=0.5)
+        paths = split_wav(str(source), chunks, str(tmp_path))
+
+        assert [round(get_wav_duration(p), 2) for p in paths] == [2.0, 1.5]
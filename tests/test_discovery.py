@@ -0,0 +1,123 @@
+"""
+Tests for cached tool and model discovery
+"""
+
+import os
+import stat
+from unittest.mock import patch
+
+import pytest
+
+from src import discovery
+from src.discovery import DiscoveryRegistry
+
+
+def _executable(path, body="echo 'ffmpeg version 6.1-test'"):
+    path.write_text("#!/bin/sh\n{}\n".format(body))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return str(tmp_path / "cache" / "discovery.json")
+
+
+class TestWhisperDiscovery:
+    """Test cases for finding the Whisper.cpp executable"""
+
+    def test_found_once_and_persisted(self, tmp_path, cache_file, monkeypatch):
+        """A second process reuses the answer without searching again"""
+        whisper_dir = tmp_path / "whisper.cpp"
+        whisper_dir.mkdir()
+        cli = _executable(whisper_dir / "whisper-cli")
+        monkeypatch.setenv("WHISPER_CPP_DIR", str(whisper_dir))
+
+        assert DiscoveryRegistry(cache_file).whisper_executable() == cli
+
+        with patch.object(discovery, "whisper_candidates") as candidates:
+            assert DiscoveryRegistry(cache_file).whisper_executable() == cli
+        candidates.assert_not_called()
+
+    def test_changed_binary_is_searched_again(self, tmp_path, cache_file, monkeypatch):
+        """The cached path is dropped once the file it names goes away"""
+        whisper_dir = tmp_path / "whisper.cpp"
+        whisper_dir.mkdir()
+        cli = _executable(whisper_dir / "whisper-cli")
+        main = _executable(whisper_dir / "main")
+        monkeypatch.setenv("WHISPER_CPP_DIR", str(whisper_dir))
+        DiscoveryRegistry(cache_file).whisper_executable()
+
+        os.remove(cli)
+
+        assert DiscoveryRegistry(cache_file).whisper_executable() == main
+
+
+class TestToolDiscovery:
+    """Test cases for executable version probes"""
+
+    def test_version_probe_is_cached(self, tmp_path, cache_file, monkeypatch):
+        """ffmpeg -version runs once until the binary changes"""
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        ffmpeg = _executable(bin_dir / "ffmpeg")
+        monkeypatch.setenv("PATH", str(bin_dir))
+
+        info = DiscoveryRegistry(cache_file).tool("ffmpeg")
+        assert (info.path, info.version) == (ffmpeg, "ffmpeg version 6.1-test")
+
+        with patch.object(discovery.subprocess, "run") as run:
+            assert DiscoveryRegistry(cache_file).tool("ffmpeg").version == info.version
+        run.assert_not_called()
+
+        _executable(bin_dir / "ffmpeg", "echo 'ffmpeg version 7.0-upgraded'")
+        assert DiscoveryRegistry(cache_file).tool("ffmpeg").version == "ffmpeg version 7.0-upgraded"
+
+    def test_missing_tool(self, tmp_path, cache_file, monkeypatch):
+        """A tool that is not on PATH is reported as None"""
+        monkeypatch.setenv("PATH", str(tmp_path))
+        assert DiscoveryRegistry(cache_file).tool("ffmpeg") is None
+
+
+class TestModelDiscovery:
+    """Test cases for installed model lookup"""
+
+    @pytest.fixture
+    def models_dir(self, tmp_path, monkeypatch):
+        whisper_dir = tmp_path / "whisper.cpp"
+        (whisper_dir / "models").mkdir(parents=True)
+        monkeypatch.setenv("WHISPER_CPP_DIR", str(whisper_dir))
+        monkeypatch.setattr(discovery, "model_directories",
+                            lambda: [str(whisper_dir / "models")])
+        return whisper_dir / "models"
+
+    def test_new_download_is_noticed(self, models_dir, cache_file):
+        """Adding a model changes the directory, so the list is rebuilt"""
+        (models_dir / "ggml-base.bin").write_bytes(b"model")
+        assert DiscoveryRegistry(cache_file).models() == {"base": str(models_dir / "ggml-base.bin")}
+
+        (models_dir / "ggml-tiny.bin").write_bytes(b"model")
+        # Directory mtimes can be coarse; make sure the change is visible
+        os.utime(models_dir, ns=(0, os.stat(models_dir).st_mtime_ns + 10 ** 9))
+
+        assert set(DiscoveryRegistry(cache_file).models()) == {"base", "tiny"}
+
+    def test_rescan_forgets_everything(self, models_dir, cache_file):
+        """rescan removes the cache file and the in-process answers"""
+        registry = DiscoveryRegistry(cache_file)
+        assert registry.find_model("base") is None
+        assert os.path.exists(cache_file)
+
+        (models_dir / "ggml-base.bin").write_bytes(b"model")
+        registry.rescan()
+
+        assert not os.path.exists(cache_file)
+        assert registry.find_model("base") == str(models_dir / "ggml-base.bin")
+
+    def test_corrupt_cache_file_is_ignored(self, models_dir, cache_file):
+        """An unreadable cache file just means searching again"""
+        os.makedirs(os.path.dirname(cache_file))
+        with open(cache_file, "w") as f:
+            f.write("{not json")
+
+        assert DiscoveryRegistry(cache_file).models() == {}
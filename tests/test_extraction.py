@@ -0,0 +1,143 @@
+"""
+Tests for the ffprobe-driven audio extraction planner
+"""
+
+import json
+import os
+import wave
+from unittest.mock import patch
+
+import pytest
+
+from src.extraction import (COPY, PASSTHROUGH, TRANSCODE, AudioStream, MediaInfo,
+                            NoAudioStreamError, build_extract_command, plan_extraction,
+                            probe_media)
+from src.transcriber import VideoTranscriber
+
+
+def _info(format_name="mov,mp4,m4a,3gp,3g2,mj2", streams=(), other_streams=1):
+    return MediaInfo(path="in.mp4", format_name=format_name, duration=12.5,
+                     audio_streams=list(streams), other_streams=other_streams)
+
+
+PCM = dict(codec="pcm_s16le", sample_rate=16000, channels=1)
+
+
+class TestPlanExtraction:
+    """Test cases for plan_extraction"""
+
+    def test_compliant_wav_passes_through(self):
+        """A 16 kHz mono PCM WAV needs no FFmpeg at all"""
+        plan = plan_extraction(_info("wav", [AudioStream(0, **PCM)], other_streams=0))
+        assert plan.action == PASSTHROUGH
+        assert plan.duration == 12.5
+
+    def test_pcm_in_other_container_is_copied(self):
+        """PCM audio inside a video container is remuxed, not resampled"""
+        assert plan_extraction(_info(streams=[AudioStream(1, **PCM)])).action == COPY
+
+    def test_default_stream_is_selected(self):
+        """The default audio track wins over the first one"""
+        streams = [AudioStream(1, "aac", 48000, 2),
+                   AudioStream(2, "ac3", 48000, 6, default=True)]
+        plan = plan_extraction(_info(streams=streams))
+        assert plan.action == TRANSCODE
+        assert plan.stream.index == 2
+
+    def test_no_audio_fails_fast(self):
+        """Inputs without audio are rejected before extraction"""
+        with pytest.raises(NoAudioStreamError):
+            plan_extraction(_info(streams=[]))
+
+    def test_unprobed_input_is_transcoded(self):
+        """Without ffprobe the first audio stream is transcoded"""
+        plan = plan_extraction(None)
+        assert (plan.action, plan.stream) == (TRANSCODE, None)
+
+
+class TestBuildExtractCommand:
+    """Test cases for the FFmpeg command line"""
+
+    def test_maps_one_stream_and_skips_video(self):
+        """Only the chosen stream is mapped; video is never decoded"""
+        plan = plan_extraction(_info(streams=[AudioStream(3, "aac", 44100, 2)]))
+        cmd = build_extract_command("in.mp4", "out.wav", plan, threads=2)
+
+        assert cmd[cmd.index("-map") + 1] == "0:3"
+        assert "-vn" in cmd
+        assert cmd[cmd.index("-threads") + 1] == "2"
+        assert cmd.index("-threads") < cmd.index("-i")
+        assert cmd[cmd.index("-ar") + 1] == "16000"
+
+    def test_copy_does_not_resample(self):
+        """Compliant PCM is stream-copied"""
+        plan = plan_extraction(_info(streams=[AudioStream(1, **PCM)]))
+        cmd = build_extract_command("in.mkv", "-", plan)
+
+        assert cmd[cmd.index("-c:a") + 1] == "copy"
+        assert "-ar" not in cmd and "-threads" not in cmd
+
+
+class TestProbeMedia:
+    """Test cases for reading ffprobe output"""
+
+    @patch('src.extraction.subprocess.run')
+    def test_parses_streams(self, mock_run):
+        """Audio streams are collected; other streams are only counted"""
+        mock_run.return_value.stdout = json.dumps({
+            "format": {"format_name": "matroska,webm", "duration": "61.500000"},
+            "streams": [
+                {"index": 0, "codec_type": "video", "codec_name": "h264"},
+                {"index": 1, "codec_type": "audio", "codec_name": "opus",
+                 "sample_rate": "48000", "channels": 2, "disposition": {"default": 1}},
+                {"index": 2, "codec_type": "subtitle", "codec_name": "subrip"},
+            ],
+        })
+
+        info = probe_media("talk.mkv")
+
+        assert info.duration == 61.5
+        assert info.other_streams == 2
+        assert info.audio_streams == [AudioStream(1, "opus", 48000, 2, default=True)]
+
+    @patch('src.extraction.subprocess.run', side_effect=FileNotFoundError)
+    def test_missing_ffprobe(self, mock_run):
+        """No ffprobe means no plan, not an error"""
+        assert probe_media("talk.mkv") is None
+
+
+class TestExtractAudio:
+    """Test cases for extract_audio with a plan"""
+
+    def test_passthrough_links_without_ffmpeg(self, tmp_path):
+        """A compliant WAV is linked into the temp dir, not copied or transcoded"""
+        source = tmp_path / "voice.wav"
+        with wave.open(str(source), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(16000)
+            wav.writeframes(b"\0\0" * 1600)
+        temp_dir = tmp_path / "temp"
+        temp_dir.mkdir()
+        transcriber = VideoTranscriber(whisper_path="/bin/true", temp_dir=str(temp_dir),
+                                       quiet=True)
+        info = _info("wav", [AudioStream(0, **PCM)], other_streams=0)
+
+        with patch('src.transcriber.probe_media', return_value=info), \
+                patch('src.transcriber.run_streaming') as ffmpeg:
+            audio = transcriber.extract_audio(str(source))
+        ffmpeg.assert_not_called()
+
+        assert os.path.samefile(audio, source)
+        assert os.path.dirname(audio) == str(temp_dir)
+
+    def test_no_audio_stream_skips_ffmpeg(self, tmp_path):
+        """A silent video fails before FFmpeg or Whisper.cpp runs"""
+        transcriber = VideoTranscriber(whisper_path="/bin/true", temp_dir=str(tmp_path),
+                                       quiet=True)
+
+        with patch('src.transcriber.probe_media', return_value=_info(streams=[])), \
+                patch('src.transcriber.run_streaming') as ffmpeg:
+            with pytest.raises(NoAudioStreamError):
+                transcriber.extract_audio("slides.mp4")
+        ffmpeg.assert_not_called()
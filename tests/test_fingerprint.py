@@ -0,0 +1,138 @@
+"""
+Tests for audio fingerprints and duplicate detection
+"""
+
+import wave
+from unittest.mock import Mock
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.fingerprint import FingerprintIndex, compute_fingerprint, similarity
+from src.transcriber import VideoTranscriber
+
+
+def _reencoded(samples):
+    """Quieter, band-limited, slightly delayed copy, as a lossy re-encode gives."""
+    spectrum = np.fft.rfft(samples)
+    spectrum[np.fft.rfftfreq(len(samples), 1 / 16000) > 3500] = 0
+    filtered = np.fft.irfft(spectrum, len(samples)) * 0.6
+    return np.concatenate([np.zeros(700), filtered])
+
+
+@pytest.fixture
+def original(speechlike):
+    return speechlike(20, seed=1)
+
+
+class TestFingerprint:
+    """Test cases for computing and comparing fingerprints"""
+
+    def test_reencoded_copy_is_similar(self, tmp_path, original, write_wav, speechlike):
+        """A re-encoded copy scores far above unrelated audio"""
+        first = compute_fingerprint(write_wav(tmp_path / "a.wav", original))
+        copy = compute_fingerprint(write_wav(tmp_path / "b.wav", _reencoded(original)))
+        other = compute_fingerprint(write_wav(tmp_path / "c.wav", speechlike(20, seed=2)))
+
+        assert len(first.words) == pytest.approx(20 * 16000 / 512, abs=10)
+        assert first.duration == 20.0
+        assert similarity(first, copy) > 0.85
+        assert similarity(first, other) < 0.6
+
+    def test_block_size_does_not_change_words(self, tmp_path, original, monkeypatch, write_wav):
+        """Frames straddling read blocks give the same words as one big block"""
+        path = write_wav(tmp_path / "a.wav", original)
+        whole = compute_fingerprint(path)
+        monkeypatch.setattr("src.fingerprint.BLOCK_FRAMES", 7)
+
+        assert np.array_equal(compute_fingerprint(path).words, whole.words)
+
+    def test_excerpt_is_not_a_duplicate(self, tmp_path, original, write_wav):
+        """Half a recording does not match the whole"""
+        whole = compute_fingerprint(write_wav(tmp_path / "a.wav", original))
+        half = compute_fingerprint(write_wav(tmp_path / "b.wav", original[:len(original) // 2]))
+
+        assert similarity(whole, half) == 0.0
+
+    def test_rejects_other_sample_rates(self, tmp_path):
+        """Fingerprints are only comparable for 16 kHz audio"""
+        path = tmp_path / "cd.wav"
+        with wave.open(str(path), "wb") as wav:
+            wav.setnchannels(2)
+            wav.setsampwidth(2)
+            wav.setframerate(44100)
+            wav.writeframes(b"\0\0" * 44100)
+
+        with pytest.raises(ValueError):
+            compute_fingerprint(str(path))
+
+
+class TestFingerprintIndex:
+    """Test cases for FingerprintIndex"""
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        index = FingerprintIndex(str(tmp_path / "fingerprints.sqlite3"))
+        yield index
+        index.close()
+
+    @pytest.fixture
+    def model(self, tmp_path):
+        path = tmp_path / "ggml-base.bin"
+        path.write_bytes(b"model")
+        return str(path)
+
+    def test_finds_duplicate_for_same_model_and_language(self, tmp_path, index, model,
+                                                         original, write_wav):
+        """Matches need the same model and language as the indexed result"""
+        result = {"transcription": [{"text": " hello"}]}
+        index.add(compute_fingerprint(write_wav(tmp_path / "a.wav", original)),
+                  "talk.mp4", model, "en", result)
+        copy = compute_fingerprint(write_wav(tmp_path / "b.wav", _reencoded(original)))
+
+        match = index.find(copy, model, "en")
+        assert match.original_path.endswith("talk.mp4")
+        assert match.result == result
+        assert index.find(copy, model, "de") is None
+
+        other_model = tmp_path / "ggml-tiny.bin"
+        other_model.write_bytes(b"other")
+        assert index.find(copy, str(other_model), "en") is None
+
+    def test_threshold(self, tmp_path, model, original, write_wav):
+        """Nothing short of an identical fingerprint passes a threshold of 1"""
+        index = FingerprintIndex(str(tmp_path / "strict.sqlite3"), threshold=1.0)
+        index.add(compute_fingerprint(write_wav(tmp_path / "a.wav", original)),
+                  "talk.mp4", model, None, {"transcription": []})
+
+        copy = compute_fingerprint(write_wav(tmp_path / "b.wav", _reencoded(original)))
+        assert index.find(copy, model) is None
+        index.close()
+
+
+class TestTranscriberDedup:
+    """Test cases for duplicate detection through the transcriber"""
+
+    def test_duplicate_reuses_transcript(self, tmp_path, original, write_wav):
+        """The second copy is not transcribed and shows up in the report"""
+        model = tmp_path / "ggml-base.bin"
+        model.write_bytes(b"model")
+        index = FingerprintIndex(str(tmp_path / "fingerprints.sqlite3"))
+        transcriber = VideoTranscriber(whisper_path="whisper-cli", temp_dir=str(tmp_path),
+                                       quiet=True, dedup=index)
+        result = {"transcription": [{"text": " hello"}]}
+        run = Mock(return_value=result)
+
+        first = transcriber.transcribe_deduplicated(
+            "talk.mp4", write_wav(tmp_path / "a.wav", original), str(model), None, run)
+        second = transcriber.transcribe_deduplicated(
+            "talk.mkv", write_wav(tmp_path / "b.wav", _reencoded(original)), str(model),
+            None, run)
+
+        assert first == second == result
+        run.assert_called_once()
+        [row] = index.report()
+        assert row["source_path"].endswith("talk.mkv")
+        assert row["original_path"].endswith("talk.mp4")
+        transcriber.close()
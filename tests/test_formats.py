@@ -0,0 +1,79 @@
+"""
+Tests for output format rendering
+"""
+
+import json
+
+import pytest
+
+from src import formats
+
+
+RESULT = {
+    "model": {"type": "base"},
+    "transcription": [
+        {"offsets": {"from": 0, "to": 2500}, "text": " Hello there."},
+        {"offsets": {"from": 2500, "to": 3723500}, "text": " General Kenobi."},
+    ],
+}
+
+
+class TestFormats:
+    """Test cases for the format renderers"""
+
+    def test_parse_formats(self):
+        """Comma separated formats are validated and de-duplicated"""
+        assert formats.parse_formats("srt, vtt,srt") == ["srt", "vtt"]
+        assert formats.parse_formats(["json"]) == ["json"]
+        with pytest.raises(ValueError):
+            formats.parse_formats("srt,docx")
+        with pytest.raises(ValueError):
+            formats.parse_formats("")
+
+    def test_output_paths(self):
+        """The first format keeps the given path, others swap the extension"""
+        assert formats.output_paths("out/talk.srt", ["srt", "txt"]) == {
+            "srt": "out/talk.srt", "txt": "out/talk.txt"
+        }
+        assert formats.output_paths("talk.text", ["txt", "json"]) == {
+            "txt": "talk.text", "json": "talk.text.json"
+        }
+
+    def test_render_txt(self):
+        """Plain text has one stripped segment per line"""
+        assert formats.render(RESULT, "txt") == "Hello there.\nGeneral Kenobi.\n"
+
+    def test_render_srt(self):
+        """SRT uses numbered cues and comma milliseconds"""
+        assert formats.render(RESULT, "srt") == (
+            "1\n00:00:00,000 --> 00:00:02,500\nHello there.\n\n"
+            "2\n00:00:02,500 --> 01:02:03,500\nGeneral Kenobi.\n"
+        )
+
+    def test_render_vtt(self):
+        """VTT has a header and dot milliseconds"""
+        rendered = formats.render(RESULT, "vtt")
+        assert rendered.startswith("WEBVTT\n\n00:00:00.000 --> 00:00:02.500\n")
+
+    def test_json_round_trip(self):
+        """Segments rebuilt into a result keep metadata and timings"""
+        rebuilt = formats.build_result(formats.get_segments(RESULT), base=RESULT)
+        assert rebuilt["model"] == {"type": "base"}
+        assert json.loads(formats.render(rebuilt, "json"))["transcription"][1]["offsets"] == {
+            "from": 2500, "to": 3723500
+        }
+
+    def test_parse_console_output(self):
+        """Console lines are turned into segments"""
+        result = formats.parse_console_output(
+            "whisper_init: loading model\n"
+            "[00:00:01.000 --> 00:00:02.250]   Hi.\n"
+        )
+        assert formats.get_segments(result) == [{"start": 1.0, "end": 2.25, "text": "Hi."}]
+
+    def test_load_result_rejects_other_json(self, tmp_path):
+        """Only Whisper.cpp shaped JSON can be converted"""
+        path = tmp_path / "other.json"
+        path.write_text('{"foo": 1}')
+        with pytest.raises(ValueError):
+            formats.load_result(str(path))
@@ -0,0 +1,122 @@
+"""
+Tests for the batch job journal
+"""
+
+import os
+from unittest.mock import Mock
+
+import pytest
+
+from src.batch import run_batch
+from src.journal import BatchJournal, DONE, FAILED, RUNNING
+
+PARAMS = {'model': 'base', 'language': None, 'formats': ['txt']}
+
+
+def _make_inputs(tmp_path, names):
+    paths = []
+    for name in names:
+        path = tmp_path / "in" / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b"video " + name.encode())
+        paths.append(str(path))
+    return paths
+
+
+def _transcriber(fail=()):
+    """Mock transcriber that writes its output file"""
+    transcriber = Mock()
+    transcriber._resolve_model_path.return_value = "model.bin"
+
+    def transcribe_video(video_path, output_path, **kwargs):
+        if os.path.basename(video_path) in fail:
+            raise RuntimeError("whisper crashed")
+        with open(output_path, "w") as f:
+            f.write("text")
+        return output_path
+
+    transcriber.transcribe_video.side_effect = transcribe_video
+    return transcriber
+
+
+class TestBatchJournal:
+    """Test cases for BatchJournal"""
+
+    def test_resume_skips_done_and_retries_failed(self, tmp_path):
+        """Only unfinished files run again on resume"""
+        files = _make_inputs(tmp_path, ["a.mp4", "b.mp4", "c.mp4"])
+        out = str(tmp_path / "out")
+        journal = BatchJournal(str(tmp_path / "journal.sqlite3"))
+        journal.begin(PARAMS)
+        run_batch(_transcriber(fail={"b.mp4"}), files, "base", out, journal=journal)
+        assert journal.get(files[1])["state"] == FAILED
+
+        journal.begin(PARAMS, resume=True)
+        transcriber = _transcriber()
+        results = run_batch(transcriber, files, "base", out, journal=journal)
+        journal.close()
+
+        assert [r.skipped for r in results] == [True, False, True]
+        assert all(r.success for r in results)
+        assert transcriber.transcribe_video.call_count == 1
+
+    def test_interrupted_item_runs_again_once(self, tmp_path):
+        """A file left running by a crash is retried and counted"""
+        files = _make_inputs(tmp_path, ["a.mp4"])
+        path = str(tmp_path / "journal.sqlite3")
+        journal = BatchJournal(path)
+        journal.begin(PARAMS)
+        journal.start(files[0])
+        journal.close()
+
+        journal = BatchJournal(path)
+        journal.begin(PARAMS, resume=True)
+        assert journal.get(files[0])["state"] != RUNNING
+        run_batch(_transcriber(), files, "base", str(tmp_path / "out"), journal=journal)
+        row = journal.get(files[0])
+        journal.close()
+
+        assert row["state"] == DONE
+        assert row["attempts"] == 2
+
+    def test_changed_input_or_params_rerun(self, tmp_path):
+        """A modified input or different options invalidate a done entry"""
+        files = _make_inputs(tmp_path, ["a.mp4", "b.mp4"])
+        journal = BatchJournal(str(tmp_path / "journal.sqlite3"))
+        journal.begin(PARAMS)
+        run_batch(_transcriber(), files, "base", str(tmp_path / "out"), journal=journal)
+
+        with open(files[0], "ab") as f:
+            f.write(b"more")
+        journal.begin(PARAMS, resume=True)
+        assert journal.is_done(files[0]) is None
+        assert journal.is_done(files[1])
+
+        journal.begin(dict(PARAMS, model='small'), resume=True)
+        assert journal.is_done(files[1]) is None
+        journal.close()
+
+    def test_fresh_batch_keeps_other_rows(self, tmp_path):
+        """A batch without --resume forgets only its own files' rows"""
+        files = _make_inputs(tmp_path, ["a.mp4", "b.mp4"])
+        journal = BatchJournal(str(tmp_path / "journal.sqlite3"))
+        journal.begin({}, resume=True)
+        journal.start(files[0], str(tmp_path / "out" / "a_transcript.txt"))
+
+        journal.begin(PARAMS, inputs=[files[1]])
+        run_batch(_transcriber(), [files[1]], "base", str(tmp_path / "out"), journal=journal)
+        journal.begin(PARAMS, inputs=[files[1]])
+
+        assert journal.owner_of(str(tmp_path / "out" / "a_transcript.txt")) == files[0]
+        assert journal.get(files[1]) is None
+        journal.close()
+
+    def test_journal_is_exclusive(self, tmp_path):
+        """A second batch can't use a journal that is in use"""
+        path = str(tmp_path / "journal.sqlite3")
+        journal = BatchJournal(path)
+        try:
+            with pytest.raises(RuntimeError):
+                BatchJournal(path)
+        finally:
+            journal.close()
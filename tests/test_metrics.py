@@ -0,0 +1,77 @@
+"""
+Tests for per-stage metrics
+"""
+
+import json
+import urllib.request
+from unittest.mock import patch
+
+from src.metrics import FileMetrics, MetricsRecorder
+from src.transcriber import VideoTranscriber
+
+
+class TestMetricsRecorder:
+    """Test cases for MetricsRecorder"""
+
+    def test_jsonl_and_prometheus(self, tmp_path):
+        """Finished files are appended as JSON and summed into counters"""
+        recorder = MetricsRecorder(jsonl_path=str(tmp_path / "m.jsonl"),
+                                   prometheus_path=str(tmp_path / "m.prom"))
+        metrics = FileMetrics("talk.mp4")
+        with metrics.stage("extract") as stage:
+            stage.bytes_read = 100
+        metrics.audio_seconds = 10.0
+        recorder.finish(metrics, success=True)
+        recorder.finish(FileMetrics("bad.mp4"), success=False, error="boom")
+
+        records = [json.loads(line) for line in open(tmp_path / "m.jsonl")]
+        assert records[0]["stages"]["extract"]["bytes_read"] == 100
+        assert records[0]["realtime_factor"] < 1
+        assert records[1] == dict(records[1], success=False, error="boom")
+
+        text = (tmp_path / "m.prom").read_text()
+        assert 'transcriber_files_total{status="success"} 1' in text
+        assert 'transcriber_files_total{status="failure"} 1' in text
+        assert 'transcriber_stage_runs_total{stage="extract"} 1' in text
+        assert "transcriber_audio_seconds_total 10.0" in text
+
+    def test_http_endpoint(self):
+        """/metrics serves the Prometheus text format"""
+        recorder = MetricsRecorder()
+        port = recorder.serve(0, host="127.0.0.1")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+                body = response.read().decode()
+        finally:
+            recorder.close()
+        assert "# TYPE transcriber_files_total counter" in body
+
+
+class TestTranscriberMetrics:
+    """Test cases for stage instrumentation in transcribe_video"""
+
+    def test_stages_recorded(self, tmp_path, write_wav):
+        """Each stage of a file is timed and the audio duration is measured"""
+        video = tmp_path / "talk.mp4"
+        video.write_bytes(b"video" * 10)
+        (tmp_path / "ggml-test.bin").write_bytes(b"model")
+        recorder = MetricsRecorder(jsonl_path=str(tmp_path / "m.jsonl"))
+        transcriber = VideoTranscriber(whisper_path="/bin/true", temp_dir=str(tmp_path),
+                                       quiet=True, metrics=recorder)
+        result = {"transcription": [{"offsets": {"from": 0, "to": 1000}, "text": "hi"}]}
+
+        with patch.object(transcriber, "_check_dependencies"), \
+                patch.object(transcriber, "extract_audio",
+                             side_effect=lambda video_path, **kwargs: write_wav(
+                                 tmp_path / "a.wav", seconds=2)), \
+                patch.object(transcriber, "transcribe_audio", return_value=result):
+            transcriber.transcribe_video(str(video), str(tmp_path / "ggml-test.bin"),
+                                         output_path=str(tmp_path / "out.srt"),
+                                         show_progress=False)
+
+        record = json.loads(open(tmp_path / "m.jsonl").readline())
+        assert set(record["stages"]) == {"extract", "transcribe", "write"}
+        assert record["audio_seconds"] == 2.0
+        assert record["stages"]["extract"]["bytes_read"] == 50
+        assert record["stages"]["write"]["bytes_written"] > 0
+        assert record["success"]
@@ -0,0 +1,106 @@
+"""
+Tests for model verification and warm-up
+"""
+
+import hashlib
+import os
+from contextlib import nullcontext
+from unittest.mock import Mock
+
+import pytest
+
+from src.model_manager import RECORD_SUFFIX, ModelManager, ModelVerificationError
+
+CONTENT = b"lmgg" + b"\x01" * 4096
+
+
+@pytest.fixture
+def model(tmp_path):
+    path = tmp_path / "models" / "ggml-base.bin"
+    path.parent.mkdir()
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return ModelManager(budget=1024 ** 2, record_dir=str(tmp_path / "records"))
+
+
+class TestVerification:
+    """Test cases for verifying model files"""
+
+    def test_hashes_once(self, model, manager):
+        """The first run hashes and records, later runs trust the record"""
+        first = manager.prepare(model)
+        second = manager.prepare(model)
+
+        assert first.hashed and first.sha256 == hashlib.sha256(CONTENT).hexdigest()
+        assert os.path.exists(model + RECORD_SUFFIX)
+        assert not second.hashed and second.sha256 == first.sha256
+        assert second.prefetched
+
+    def test_changed_file_is_hashed_again(self, model, manager):
+        """A re-downloaded model doesn't match its old record"""
+        manager.prepare(model)
+        with open(model, "ab") as f:
+            f.write(b"more")
+
+        assert manager.prepare(model).hashed
+
+    def test_rejects_files_that_are_not_models(self, tmp_path, manager):
+        """An HTML error page saved as a model fails before any job runs"""
+        path = tmp_path / "ggml-small.bin"
+        path.write_bytes(b"<html>404</html>")
+
+        with pytest.raises(ModelVerificationError):
+            manager.prepare(str(path))
+
+    def test_checksum_file(self, model, manager):
+        """A sha256sum file next to the model must match"""
+        with open(model + ".sha256", "w") as f:
+            f.write(f"{'0' * 64}  ggml-base.bin\n")
+        with pytest.raises(ModelVerificationError):
+            manager.prepare(model)
+
+        with open(model + ".sha256", "w") as f:
+            f.write(f"{hashlib.sha256(CONTENT).hexdigest()}  ggml-base.bin\n")
+        assert manager.prepare(model).hashed
+
+    def test_record_falls_back_to_cache_dir(self, tmp_path, model, manager):
+        """Models in read-only directories keep their record elsewhere"""
+        os.mkdir(model + RECORD_SUFFIX)  # Not writable as a file
+
+        manager.prepare(model)
+
+        assert len(os.listdir(tmp_path / "records")) == 1
+        assert not manager.prepare(model).hashed
+
+
+class TestWarmup:
+    """Test cases for prefetching and preloading"""
+
+    def test_budget_limits_prefetch(self, tmp_path, model):
+        """Models beyond the memory budget are verified but not cached"""
+        manager = ModelManager(budget=len(CONTENT) + 10, record_dir=str(tmp_path / "records"))
+        other = tmp_path / "models" / "ggml-tiny.bin"
+        other.write_bytes(CONTENT[:100])
+
+        warmups = manager.warm([model, str(other), model])
+
+        assert [os.path.basename(w.model_path) for w in warmups] == ["ggml-tiny.bin",
+                                                                     "ggml-base.bin"]
+        assert warmups[0].prefetched
+        assert not warmups[1].prefetched and warmups[1].hashed
+
+    def test_backend_preloads_model(self, model, manager):
+        """Backends that keep models loaded get them before the first file"""
+        transcriber = Mock()
+        transcriber._lease_cpus.return_value = nullcontext(None)
+        transcriber.backend.preload.return_value = True
+
+        [warmup] = manager.warm([model], transcriber)
+
+        transcriber.backend.preload.assert_called_once_with(model, None)
+        assert warmup.server_seconds is not None
+        assert warmup.load_seconds >= warmup.read_seconds
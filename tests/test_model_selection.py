@@ -0,0 +1,147 @@
+"""
+Tests for deadline-aware model selection
+"""
+
+import wave
+from unittest.mock import Mock
+
+import pytest
+
+from src.batch import resolve_models
+from src.model_selection import (ModelTarget, ThroughputStore, candidate_models,
+                                 model_name_for_path, parse_duration, plan_models)
+from src.transcriber import VideoTranscriber
+
+INSTALLED = {name: f"/models/ggml-{name}.bin" for name in ("tiny", "base", "small", "medium")}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Store without measurements: the priors apply as they are"""
+    monkeypatch.setattr("src.config.MODEL_REALTIME_FACTOR_PRIORS",
+                        {'tiny': 0.1, 'base': 0.2, 'small': 0.5, 'medium': 1.0,
+                         'large': 2.0, 'large-v2': 2.0})
+    return ThroughputStore(str(tmp_path / "throughput.json"))
+
+
+class TestParsing:
+    """Test cases for option parsing helpers"""
+
+    def test_parse_duration(self):
+        """Plain seconds and h/m/s units are accepted"""
+        assert parse_duration("90") == 90
+        assert parse_duration("20m") == 1200
+        assert parse_duration("1h30m") == 5400
+        assert parse_duration("2.5s") == 2.5
+        for bad in ("soon", "10x", "0", "5m later"):
+            with pytest.raises(ValueError):
+                parse_duration(bad)
+
+    def test_model_name_for_path(self):
+        """Only standard ggml files have a name throughput is recorded under"""
+        assert model_name_for_path("/opt/models/ggml-base.en.bin") == "base.en"
+        assert model_name_for_path("custom-finetune.bin") is None
+
+
+class TestThroughputStore:
+    """Test cases for ThroughputStore"""
+
+    def test_measurements_persist(self, tmp_path, store):
+        """A second process sees the realtime factor recorded by the first"""
+        store.record("base", audio_seconds=100.0, wall_seconds=30.0)
+
+        assert ThroughputStore(store.path).realtime_factor("base") == pytest.approx(0.3)
+
+    def test_unmeasured_models_scale_with_host(self, store):
+        """A host measured at 3x the prior is assumed 3x slower for every model"""
+        store.record("base", audio_seconds=100.0, wall_seconds=60.0)
+
+        assert store.realtime_factor("medium") == pytest.approx(3.0)
+        assert store.realtime_factor("small.en") == pytest.approx(1.5)
+
+    def test_recent_runs_weigh_more(self, store):
+        """Older measurements decay, so a slower host is noticed"""
+        store.record("tiny", 100.0, 10.0)
+        for _ in range(20):
+            store.record("tiny", 100.0, 50.0)
+
+        assert store.realtime_factor("tiny") == pytest.approx(0.5, rel=0.05)
+
+    def test_transcriber_records_runs(self, tmp_path, store):
+        """Each Whisper.cpp run of a standard model becomes a measurement"""
+        audio = tmp_path / "talk_audio.wav"
+        with wave.open(str(audio), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(16000)
+            wav.writeframes(b"\0\0" * 32000)
+        model = tmp_path / "ggml-small.bin"
+        model.write_bytes(b"model")
+        backend = Mock()
+        backend.transcribe.return_value = {"transcription": []}
+        transcriber = VideoTranscriber(whisper_path="whisper-cli", temp_dir=str(tmp_path),
+                                       quiet=True, backend=backend, throughput=store)
+
+        transcriber.transcribe_audio(str(audio), str(model), output_format="json")
+
+        assert set(store.measured()) == {"small"}
+
+
+class TestPlanModels:
+    """Test cases for plan_models"""
+
+    def test_most_accurate_model_within_deadline(self, store):
+        """10 minutes of audio in 6 minutes: small (5 min) fits, medium does not"""
+        plan = plan_models({"talk.mp4": 600.0}, ModelTarget(deadline=360.0), INSTALLED, store)
+
+        assert plan.models == {"talk.mp4": "small"}
+        assert plan.model_paths() == {"talk.mp4": "/models/ggml-small.bin"}
+        assert plan.estimated_seconds == pytest.approx(300.0)
+        assert plan.meets_target
+
+    def test_max_rtf(self, store):
+        """The realtime factor limit alone picks the best model under it"""
+        plan = plan_models({"talk.mp4": None}, ModelTarget(max_rtf=0.6), INSTALLED, store)
+        assert plan.models == {"talk.mp4": "small"}
+
+    def test_impossible_target_falls_back_to_fastest(self, store):
+        """If nothing fits, the fastest model runs and the plan says so"""
+        plan = plan_models({"talk.mp4": 3600.0}, ModelTarget(deadline=60.0), INSTALLED, store)
+
+        assert plan.models == {"talk.mp4": "tiny"}
+        assert not plan.meets_target
+
+    def test_batch_shares_the_deadline(self, store):
+        """Files move up together, then leftover time upgrades the cheapest"""
+        durations = {"a": 100.0, "b": 100.0, "c": 400.0}
+        # base for all costs 120s, small for all 300s; budget 200s (x2 workers)
+        plan = plan_models(durations, ModelTarget(deadline=200 / 0.85 / 2), INSTALLED, store,
+                           workers=2)
+
+        assert plan.models == {"a": "small", "b": "small", "c": "base"}
+        assert plan.estimated_seconds == pytest.approx((50 + 50 + 80) / 2)
+
+    def test_english_models_replace_multilingual(self):
+        """English-only models are only considered for English"""
+        installed = {"base": "b", "base.en": "be", "small": "s"}
+        assert candidate_models(installed, "en") == ["base.en", "small"]
+        assert candidate_models(installed, "de") == ["base", "small"]
+
+    def test_no_models_installed(self, store):
+        """--model auto needs something to choose from"""
+        with pytest.raises(RuntimeError):
+            plan_models({"talk.mp4": 60.0}, ModelTarget(), {}, store)
+
+
+class TestResolveModels:
+    """Test cases for per-file models in batches"""
+
+    def test_each_model_resolved_once(self):
+        """Files planned onto the same model share one lookup"""
+        transcriber = Mock()
+        transcriber._resolve_model_path.side_effect = lambda name: f"/models/{name}"
+
+        paths = resolve_models(transcriber, ["a", "b", "c"], "base", {"a": "small", "b": "small"})
+
+        assert paths == {"a": "/models/small", "b": "/models/small", "c": "/models/base"}
+        assert transcriber._resolve_model_path.call_count == 2
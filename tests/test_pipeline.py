@@ -0,0 +1,111 @@
+"""
+Tests for the pipelined batch
+"""
+
+import os
+import threading
+import time
+from unittest.mock import Mock
+
+from src.pipeline import run_pipeline
+
+
+class FakeScratch:
+    """Scratch directory that only counts how many are held"""
+
+    def __init__(self, transcriber):
+        self.transcriber = transcriber
+
+    def file(self, name):
+        return os.path.join(self.transcriber.temp_dir, name)
+
+    def close(self):
+        with self.transcriber.lock:
+            self.transcriber.audio_on_disk -= 1
+
+
+class FakeTranscriber:
+    """Records stage activity instead of running FFmpeg/Whisper"""
+
+    def __init__(self, temp_dir):
+        self.temp_dir = temp_dir
+        self.lock = threading.Lock()
+        self.audio_on_disk = 0
+        self.peak_audio = 0
+        self.events = []
+        self.metrics = None
+        self._check_dependencies = Mock()
+        self._resolve_model_path = Mock(return_value="model.bin")
+
+    def _log(self, event):
+        with self.lock:
+            self.events.append(event)
+
+    def acquire_scratch(self, input_path, chunked=False):
+        with self.lock:
+            self.audio_on_disk += 1
+            self.peak_audio = max(self.peak_audio, self.audio_on_disk)
+        return FakeScratch(self), None
+
+    def extract_audio(self, video_path, output_path, plan=None):
+        if "broken" in video_path:
+            raise RuntimeError("no audio stream")
+        self._log(("extract", video_path))
+        return output_path
+
+    def transcribe_audio(self, audio_path, model_path, language, output_format):
+        self._log(("transcribe-start", audio_path))
+        time.sleep(0.05)
+        self._log(("transcribe-end", audio_path))
+        return {"transcription": []}
+
+    def transcribe_deduplicated(self, source_path, audio_path, model_path, language,
+                                transcribe):
+        return transcribe()
+
+    def transcribe_speech(self, audio_path, transcribe, file_metrics=None):
+        return transcribe(audio_path)
+
+    def save_outputs(self, result, output_path, output_formats):
+        self._log(("write", output_path))
+        return [output_path]
+
+
+class TestPipeline:
+    """Test cases for run_pipeline"""
+
+    def test_stages_overlap_and_results_ordered(self, tmp_path):
+        """Extraction runs ahead of inference and results keep input order"""
+        transcriber = FakeTranscriber(str(tmp_path))
+        files = ["a.mp4", "b.mp4", "c.mp4", "d.mp4"]
+
+        results = run_pipeline(transcriber, files, "base", str(tmp_path / "out"),
+                               transcribe_workers=1, queue_depth=2)
+
+        assert [r.input_path for r in results] == files
+        assert all(r.success for r in results)
+        kinds = [event[0] for event in transcriber.events]
+        # The second file is extracted before the first finishes transcribing
+        assert kinds.index("extract", 1) < kinds.index("transcribe-end")
+
+    def test_temp_audio_is_bounded(self, tmp_path):
+        """Extracted files never exceed queue depth plus transcribers"""
+        transcriber = FakeTranscriber(str(tmp_path))
+        files = ["f%d.mp4" % i for i in range(10)]
+
+        run_pipeline(transcriber, files, "base", str(tmp_path / "out"),
+                     extract_workers=4, transcribe_workers=2, queue_depth=1)
+
+        assert transcriber.peak_audio <= 3
+        assert transcriber.audio_on_disk == 0
+
+    def test_failures_are_isolated(self, tmp_path):
+        """A failing file doesn't stop the rest"""
+        transcriber = FakeTranscriber(str(tmp_path))
+
+        results = run_pipeline(transcriber, ["ok.mp4", "broken.mp4"], "base",
+                               str(tmp_path / "out"), transcribe_workers=1)
+
+        assert results[0].success
+        assert not results[1].success
+        assert results[1].error == "extract: no audio stream"
@@ -0,0 +1,132 @@
+"""
+Tests for progress reporting and incremental subprocess output
+"""
+
+import stat
+import subprocess
+import sys
+
+import pytest
+
+from src import config
+from src.backends import CliBackend
+from src.progress import ProgressEvent, ProgressTracker, run_streaming
+from src.transcriber import VideoTranscriber
+
+# Whisper.cpp stand-in: prints one console segment per second of audio and
+# writes the JSON result.
+FAKE_WHISPER = """\
+import json, sys, wave
+args = sys.argv[1:]
+with wave.open(args[args.index("-f") + 1]) as wav:
+    seconds = wav.getnframes() // wav.getframerate()
+segments = []
+for i in range(seconds):
+    print("[00:00:%02d.000 --> 00:00:%02d.000]  part %d" % (i, i + 1, i), flush=True)
+    segments.append({"offsets": {"from": i * 1000, "to": (i + 1) * 1000},
+                     "text": " part %d" % i})
+json.dump({"transcription": segments}, open(args[args.index("-of") + 1] + ".json", "w"))
+"""
+
+
+def _python(code):
+    return [sys.executable, "-c", code]
+
+
+class TestProgressTracker:
+    """Test cases for ProgressTracker"""
+
+    def test_percent_and_eta(self):
+        """Percent follows the position; ETA extrapolates the elapsed time"""
+        event = ProgressEvent("transcribe", None, position=30.0, duration=120.0, elapsed=10.0)
+        assert event.percent == 25.0
+        assert event.eta == pytest.approx(30.0)
+        assert ProgressEvent("extract", None, 5.0, None, 1.0).percent is None
+
+    def test_ffmpeg_time_stats(self):
+        """FFmpeg's time= field advances the position"""
+        events = []
+        tracker = ProgressTracker("extract", events.append, duration=100.0)
+        tracker.ffmpeg_line("Input #0, mov,mp4, from 'talk.mp4':")
+        tracker.ffmpeg_line("size=  1024kB time=00:00:50.00 bitrate= 256.0kbits/s speed=40x")
+        tracker.finish()
+
+        assert [e.percent for e in events] == [50.0, 100.0]
+        assert events[-1].done
+
+    def test_whisper_segments(self):
+        """Whisper.cpp console segments carry their end time and text"""
+        events = []
+        tracker = ProgressTracker("transcribe", events.append, duration=10.0)
+        tracker.whisper_line("[00:00:02.000 --> 00:00:04.500]   hello there\n")
+        tracker.whisper_line("whisper_print_timings: total time = 1.0 ms\n")
+
+        assert len(events) == 1
+        assert events[0].position == 4.5
+        assert events[0].text == "hello there"
+
+
+class TestRunStreaming:
+    """Test cases for run_streaming"""
+
+    def test_lines_arrive_incrementally(self, tmp_path):
+        """Callbacks see each line while the process is still running"""
+        flag = tmp_path / "seen"
+        code = ("import os, sys, time\n"
+                "print('first', flush=True)\n"
+                "deadline = time.time() + 5\n"
+                "while not os.path.exists(sys.argv[1]) and time.time() < deadline:\n"
+                "    time.sleep(0.01)\n"
+                "print('answered' if os.path.exists(sys.argv[1]) else 'timed out')")
+        seen = []
+
+        def on_line(line):
+            seen.append(line)
+            flag.touch()
+
+        with run_streaming(_python(code) + [str(flag)], on_stdout=on_line) as result:
+            assert result.stdout == "first\nanswered\n"
+        assert seen == ["first\n", "answered\n"]
+
+    def test_stderr_tail_is_bounded(self, monkeypatch):
+        """Only the last lines of stderr are kept, and they reach the error"""
+        monkeypatch.setattr(config, "SUBPROCESS_STDERR_TAIL_LINES", 5)
+        code = "import sys\nfor i in range(10000): sys.stderr.write('line %d\\n' % i)\nsys.exit(3)"
+
+        with pytest.raises(subprocess.CalledProcessError) as error:
+            run_streaming(_python(code))
+
+        assert error.value.returncode == 3
+        assert error.value.stderr.splitlines() == ["line %d" % i for i in range(9995, 10000)]
+
+    def test_large_stdout_spools_to_disk(self, monkeypatch):
+        """Stdout past the spool size is still returned in full"""
+        monkeypatch.setattr(config, "SUBPROCESS_STDOUT_SPOOL_SIZE", 1024)
+        code = "for i in range(5000): print('x' * 50)"
+
+        with run_streaming(_python(code)) as result:
+            assert result._spool._rolled
+            assert len(result.stdout) == 5000 * 51
+
+
+class TestProgressIntegration:
+    """Test cases for on_progress through the transcriber"""
+
+    def test_cli_backend_reports_segments(self, tmp_path, write_wav):
+        """Each segment Whisper.cpp prints becomes a progress event"""
+        whisper = tmp_path / "whisper-cli"
+        whisper.write_text("#!{}\n{}".format(sys.executable, FAKE_WHISPER))
+        whisper.chmod(whisper.stat().st_mode | stat.S_IEXEC)
+        audio = write_wav(tmp_path / "talk_audio.wav", seconds=3)
+        transcriber = VideoTranscriber(whisper_path=str(whisper), temp_dir=str(tmp_path),
+                                       quiet=True)
+        assert isinstance(transcriber.backend, CliBackend)
+        events = []
+
+        result = transcriber.transcribe_audio(audio, "model.bin", output_format="txt",
+                                              on_progress=events.append)
+
+        assert result == {"transcription": "part 0\npart 1\npart 2\n"}
+        assert [e.position for e in events] == [1.0, 2.0, 3.0, 3.0]
+        assert [e.text for e in events[:3]] == ["part 0", "part 1", "part 2"]
+        assert events[-1].done and events[-1].percent == 100.0
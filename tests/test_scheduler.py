@@ -0,0 +1,114 @@
+"""
+Tests for CPU scheduling of Whisper.cpp jobs
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.scheduler import CpuAllocation, CpuScheduler, cgroup_cpu_limit
+from src.transcriber import VideoTranscriber
+
+
+class TestCgroupLimit:
+    """Test cases for reading container CPU quotas"""
+
+    def test_cgroup_v2(self, tmp_path):
+        """cpu.max quota/period is converted to CPUs"""
+        (tmp_path / "cpu.max").write_text("400000 100000\n")
+        assert cgroup_cpu_limit(str(tmp_path)) == 4.0
+
+    def test_cgroup_v2_unlimited(self, tmp_path):
+        """'max' means no quota"""
+        (tmp_path / "cpu.max").write_text("max 100000\n")
+        assert cgroup_cpu_limit(str(tmp_path)) is None
+
+    def test_cgroup_v1(self, tmp_path):
+        """cfs quota/period is converted to CPUs"""
+        (tmp_path / "cpu").mkdir()
+        (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("150000")
+        (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000")
+        assert cgroup_cpu_limit(str(tmp_path)) == 1.5
+
+
+class TestCpuScheduler:
+    """Test cases for CpuScheduler"""
+
+    def test_single_job_gets_every_cpu(self):
+        """One slot uses all usable CPUs"""
+        scheduler = CpuScheduler(slots=1, cpus=list(range(32)), cpu_count=32)
+        with scheduler.lease() as allocation:
+            assert allocation.threads == 32
+            assert allocation.cpus == list(range(32))
+
+    def test_cores_split_between_slots(self):
+        """Concurrent slots get disjoint core sets"""
+        scheduler = CpuScheduler(slots=4, pin=True, cpus=list(range(16)), cpu_count=16)
+        with scheduler.lease() as first, scheduler.lease() as second:
+            assert first.threads == second.threads == 4
+            assert not set(first.cpus) & set(second.cpus)
+
+    def test_pin_process(self):
+        """A started child is pinned to the allocation's cores"""
+        if not hasattr(os, "sched_setaffinity"):
+            pytest.skip("no CPU affinity on this platform")
+        cpu = sorted(os.sched_getaffinity(0))[0]
+        allocation = CpuAllocation(threads=1, cpus=[cpu], pin=True)
+        child = subprocess.Popen([sys.executable, "-c", "import sys; sys.stdin.read()"],
+                                 stdin=subprocess.PIPE)
+        try:
+            allocation.pin_process(child.pid)
+            assert os.sched_getaffinity(child.pid) == {cpu}
+        finally:
+            child.communicate(b"")
+        allocation.pin_process(child.pid)
+
+    def test_quota_limits_threads(self):
+        """A cgroup quota below the affinity mask caps threads"""
+        scheduler = CpuScheduler(slots=2, cpus=list(range(32)), cpu_count=8)
+        assert scheduler.threads == 4
+
+    def test_processors_divide_threads(self):
+        """Threads are divided between Whisper.cpp processors"""
+        scheduler = CpuScheduler(slots=1, processors=2, cpus=list(range(8)), cpu_count=8)
+        assert scheduler.threads == 4
+
+    def test_lease_blocks_when_full(self):
+        """Jobs beyond the slot count wait for a free slot"""
+        scheduler = CpuScheduler(slots=1, cpus=[0], cpu_count=1)
+        order = []
+
+        def job(name):
+            with scheduler.lease():
+                order.append(name + ":start")
+                time.sleep(0.05)
+                order.append(name + ":end")
+
+        threads = [threading.Thread(target=job, args=(n,)) for n in "ab"]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert order[1].endswith(":end")
+
+    @patch('src.backends.run_streaming')
+    def test_whisper_gets_thread_flags(self, mock_run, tmp_path):
+        """Whisper.cpp is launched with explicit -t and -p"""
+        mock_run.return_value.__enter__.return_value.stdout = ""
+        audio = tmp_path / "a_audio.wav"
+        audio.write_bytes(b"RIFF")
+        transcriber = VideoTranscriber(
+            whisper_path="/bin/true", temp_dir=str(tmp_path), quiet=True,
+            scheduler=CpuScheduler(slots=2, cpus=list(range(8)), cpu_count=8)
+        )
+
+        transcriber.transcribe_audio(str(audio), "model.bin", output_format="json")
+
+        cmd = mock_run.call_args[0][0]
+        assert cmd[cmd.index("-t") + 1] == "4"
+        assert cmd[cmd.index("-p") + 1] == "1"
@@ -0,0 +1,157 @@
+"""
+Tests for per-job scratch space
+"""
+
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from src.scratch import LOCK_NAME, ScratchManager, estimate_audio_bytes
+from src.transcriber import VideoTranscriber
+
+
+@pytest.fixture
+def disk(tmp_path):
+    path = tmp_path / "disk"
+    path.mkdir()
+    return str(path)
+
+
+@pytest.fixture
+def ram(tmp_path):
+    path = tmp_path / "ram"
+    path.mkdir()
+    return str(path)
+
+
+class TestScratchJobs:
+    """Test cases for handing out job directories"""
+
+    def test_jobs_get_private_directories(self, disk):
+        """Same-stem inputs never share a path, and close removes everything"""
+        manager = ScratchManager(disk, ram_dir="")
+        first, second = manager.acquire(), manager.acquire()
+
+        assert first.file("intro_audio.wav") != second.file("intro_audio.wav")
+        with open(first.file("intro_audio.wav"), "wb") as f:
+            f.write(b"audio")
+        first.close()
+        second.close()
+
+        assert os.listdir(disk) == []
+        assert manager.reserved_bytes == 0
+
+    def test_prefers_ram_when_it_fits(self, disk, ram, monkeypatch):
+        """Small jobs go to the RAM directory, ones too large for it to disk"""
+        manager = ScratchManager(disk, ram_dir=ram, quota=0)
+        free = shutil.disk_usage(ram).free
+
+        with manager.acquire(1024) as small, manager.acquire(free) as large:
+            assert small.in_ram and small.path.startswith(ram)
+            assert not large.in_ram and large.path.startswith(disk)
+
+    def test_estimate_audio_bytes(self):
+        """16 kHz mono 16-bit audio is 32000 bytes a second plus the header"""
+        assert estimate_audio_bytes(10.0) == 320044
+        assert estimate_audio_bytes(None, fallback=123) == 123
+
+
+class TestQuota:
+    """Test cases for the scratch quota"""
+
+    def test_new_jobs_wait_for_space(self, disk):
+        """A job that would exceed the quota starts once space is released"""
+        manager = ScratchManager(disk, ram_dir="", quota=100)
+        first = manager.acquire(80)
+        started = threading.Event()
+
+        def second():
+            with manager.acquire(50):
+                started.set()
+
+        thread = threading.Thread(target=second)
+        thread.start()
+        time.sleep(0.1)
+        assert not started.is_set()
+
+        first.close()
+        thread.join(timeout=5)
+        assert started.is_set()
+
+    def test_release_listeners(self, disk):
+        """on_release callbacks fire on each release while subscribed"""
+        manager = ScratchManager(disk, ram_dir="", quota=100)
+        calls = []
+        with manager.on_release(lambda: calls.append(1)):
+            manager.acquire(10).close()
+        manager.acquire(10).close()
+        assert calls == [1]
+
+    def test_timeout(self, disk):
+        """Waiting can be bounded"""
+        manager = ScratchManager(disk, ram_dir="", quota=100)
+        with manager.acquire(80):
+            with pytest.raises(TimeoutError):
+                manager.acquire(50, timeout=0.05)
+
+    def test_oversized_job_runs_alone(self, disk):
+        """A job larger than the whole quota is not blocked forever"""
+        manager = ScratchManager(disk, ram_dir="", quota=100)
+        with manager.acquire(500) as job:
+            assert job.reserved_bytes == 500
+
+
+class TestSweep:
+    """Test cases for removing orphaned scratch"""
+
+    def test_removes_only_orphans(self, disk):
+        """Directories whose lock nobody holds are removed, live ones stay"""
+        manager = ScratchManager(disk, ram_dir="")
+        live = manager.acquire()
+        orphan = os.path.join(disk, "local-transcriber-job-999999-dead")
+        os.mkdir(orphan)
+        open(os.path.join(orphan, LOCK_NAME), "w").close()
+        with open(os.path.join(orphan, "talk_audio.wav"), "wb") as f:
+            f.write(b"x" * 100)
+        unrelated = os.path.join(disk, "something-else")
+        os.mkdir(unrelated)
+
+        assert manager.sweep() == (1, 100)
+        assert os.path.isdir(live.path)
+        assert os.path.isdir(unrelated)
+        assert not os.path.exists(orphan)
+        live.close()
+
+    def test_lockless_directories_get_a_grace_period(self, disk):
+        """A directory still being created is left alone until it is old"""
+        manager = ScratchManager(disk, ram_dir="")
+        creating = os.path.join(disk, "local-transcriber-job-1-new")
+        os.mkdir(creating)
+
+        assert manager.sweep() == (0, 0)
+        old = time.time() - 3600
+        os.utime(creating, (old, old))
+        assert manager.sweep()[0] == 1
+
+
+class TestTranscriberScratch:
+    """Test cases for scratch through the transcriber"""
+
+    def test_acquire_scratch_sizes_the_job(self, tmp_path, disk):
+        """The reservation follows the input, doubled when VAD writes a copy"""
+        source = tmp_path / "intro.mp4"
+        source.write_bytes(b"v" * 1000)
+        transcriber = VideoTranscriber(whisper_path="/bin/true", temp_dir=disk, quiet=True,
+                                       vad=True, scratch=ScratchManager(disk, ram_dir=""))
+
+        job, plan = transcriber.acquire_scratch(str(source))
+        other, _ = transcriber.acquire_scratch(str(tmp_path / "intro.mov"))
+
+        assert plan.duration is None
+        assert job.reserved_bytes == 2000
+        assert job.path != other.path
+        job.close()
+        other.close()
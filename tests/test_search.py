@@ -0,0 +1,112 @@
+"""
+Tests for the transcript search index
+"""
+
+import os
+
+import pytest
+
+from src import formats
+from src.search import TranscriptIndex, load_segments, preferred_transcript
+from src.transcriber import VideoTranscriber
+
+RESULT = formats.build_result([
+    {"start": 0.0, "end": 2.5, "text": "Welcome to the quarterly review."},
+    {"start": 2.5, "end": 6.0, "text": "Revenue grew in every région."},
+    {"start": 3600.0, "end": 3604.0, "text": "Any questions about the review?"},
+])
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = TranscriptIndex(str(tmp_path / "search.sqlite3"))
+    yield index
+    index.close()
+
+
+def save(path, fmt="srt", result=RESULT):
+    formats.write_outputs(result, {fmt: str(path)})
+    return str(path)
+
+
+class TestTranscriptIndex:
+    """Test cases for indexing and searching"""
+
+    def test_ranked_hits_with_timestamps(self, tmp_path, index):
+        path = save(tmp_path / "meeting.srt")
+        index.add(path, load_segments(path))
+
+        hits = index.search("review")
+
+        assert sorted(hit.start for hit in hits) == [0.0, 3600.0]
+        assert all(hit.path == path for hit in hits)
+        assert "[review]" in hits[0].snippet
+
+    def test_diacritics_and_punctuation(self, tmp_path, index):
+        """Accents are folded and stray quotes don't break the query"""
+        path = save(tmp_path / "meeting.json", "json")
+        index.add(path, load_segments(path))
+
+        assert len(index.search("region")) == 1
+        assert index.search('revenue "grew') != []
+
+    def test_one_entry_per_recording(self, tmp_path, index):
+        """A recording saved as SRT and TXT is indexed once, from the SRT"""
+        paths = [save(tmp_path / "talk.txt", "txt"), save(tmp_path / "talk.srt")]
+        assert preferred_transcript(paths) == paths[1]
+
+        index.add(paths[0], load_segments(paths[0]))
+        index.add_result(paths, RESULT)
+
+        assert index.stats() == {"transcripts": 1, "segments": 3}
+        assert index.search("welcome")[0].start == 0.0
+
+
+class TestReindex:
+    """Test cases for incremental reindexing"""
+
+    def test_only_changed_files(self, tmp_path, index):
+        archive = tmp_path / "output"
+        archive.mkdir()
+        first = save(archive / "a_transcript.srt")
+        save(archive / "b_transcript.vtt", "vtt")
+        (archive / "notes.md").write_text("not a transcript")
+
+        assert index.reindex([str(archive)]).indexed == 2
+        stats = index.reindex([str(archive)])
+        assert (stats.indexed, stats.unchanged) == (0, 2)
+
+        save(archive / "a_transcript.srt",
+             result=formats.build_result([{"start": 1, "end": 2, "text": "Budget."}]))
+        os.remove(archive / "b_transcript.vtt")
+        stats = index.reindex([str(archive)])
+
+        assert (stats.indexed, stats.removed) == (1, 1)
+        assert index.search("budget")[0].path == first
+        assert index.search("review") == []
+
+    def test_unreadable_transcripts_are_reported(self, tmp_path, index):
+        archive = tmp_path / "output"
+        archive.mkdir()
+        (archive / "broken.json").write_text("{}")
+        errors = []
+
+        stats = index.reindex([str(archive)], on_error=lambda path, e: errors.append(path))
+
+        assert stats.failed == 1
+        assert errors == [str(archive / "broken.json")]
+
+
+class TestTranscriberIndexing:
+    """Test cases for indexing in the save stage"""
+
+    def test_save_outputs_indexes(self, tmp_path, index):
+        transcriber = VideoTranscriber(whisper_path="/bin/true", temp_dir=str(tmp_path),
+                                       quiet=True, search=index)
+
+        written = transcriber.save_outputs(RESULT, str(tmp_path / "out" / "talk.txt"),
+                                           ["txt", "vtt"])
+
+        hits = index.search("questions")
+        assert [hit.path for hit in hits] == [written[1]]
+        assert hits[0].start == 3600.0
@@ -0,0 +1,105 @@
+"""
+Tests for streaming JSONL segment output
+"""
+
+import gzip
+import json
+
+import pytest
+
+from src import formats
+from src.segments import (SegmentWriter, index_path, load_index, read_segments,
+                          write_jsonl)
+
+
+def make_result(count, step=10.0):
+    return formats.build_result(
+        [{"start": i * step, "end": i * step + step, "text": f"Segment {i} é"}
+         for i in range(count)],
+        base={"model": {"type": "base"}},
+    )
+
+
+class TestSegmentWriter:
+    """Test cases for writing JSONL transcripts"""
+
+    def test_plain_jsonl(self, tmp_path):
+        """One compact object per line, metadata in the index"""
+        path = str(tmp_path / "talk.jsonl")
+        write_jsonl(make_result(3), path)
+
+        lines = open(path, encoding="utf-8").read().splitlines()
+        assert json.loads(lines[1]) == {"start": 10.0, "end": 20.0, "text": "Segment 1 é"}
+        assert len(lines) == 3
+        index = load_index(path)
+        assert index["segments"] == 3
+        assert index["metadata"] == {"model": {"type": "base"}}
+
+    def test_gzip_blocks_are_one_stream(self, tmp_path):
+        """Every block is its own gzip member, yet gzip reads the file whole"""
+        path = str(tmp_path / "talk.jsonl.gz")
+        write_jsonl(make_result(30), path, "jsonl.gz")
+
+        assert len(load_index(path)["blocks"]) == 5  # 60 s blocks of 10 s segments
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            assert len(f.read().splitlines()) == 30
+
+    def test_blocks_split_on_size(self, tmp_path, monkeypatch):
+        """Dense speech still gets bounded blocks"""
+        monkeypatch.setattr("src.config.JSONL_BLOCK_BYTES", 100)
+        path = str(tmp_path / "talk.jsonl")
+        with SegmentWriter(path, block_seconds=3600) as writer:
+            for i in range(10):
+                writer.write({"start": i, "end": i + 1, "text": "x" * 60})
+
+        assert len(load_index(path)["blocks"]) == 5
+
+    def test_unknown_compression(self, tmp_path):
+        with pytest.raises(ValueError):
+            SegmentWriter(str(tmp_path / "talk.jsonl"), compression="lz4")
+
+
+class TestReadSegments:
+    """Test cases for reading JSONL transcripts back"""
+
+    @pytest.mark.parametrize("fmt", ["jsonl", "jsonl.gz"])
+    def test_time_range_seeks(self, tmp_path, fmt):
+        """A range is read from the first block that overlaps it"""
+        path = str(tmp_path / f"talk.{fmt}")
+        write_jsonl(make_result(100), path, fmt)
+
+        segments = list(read_segments(path, start=605, end=630))
+
+        assert [s["start"] for s in segments] == [600.0, 610.0, 620.0]
+
+    def test_without_index(self, tmp_path):
+        """A missing or stale index falls back to scanning"""
+        path = str(tmp_path / "talk.jsonl.gz")
+        write_jsonl(make_result(20), path, "jsonl.gz")
+        with open(index_path(path), "w") as f:
+            f.write("{}")
+
+        assert load_index(path) is None
+        assert len(list(read_segments(path, start=95))) == 11
+
+    def test_zstd(self, tmp_path):
+        pytest.importorskip("zstandard")
+        path = str(tmp_path / "talk.jsonl.zst")
+        write_jsonl(make_result(20), path, "jsonl.zst")
+
+        assert [s["start"] for s in read_segments(path, start=150, end=170)] == [150.0, 160.0]
+
+
+class TestFormatsIntegration:
+    """Test cases for JSONL through the format helpers"""
+
+    def test_round_trip(self, tmp_path):
+        """convert can turn a JSONL transcript back into anything else"""
+        result = make_result(5)
+        paths = formats.output_paths(str(tmp_path / "talk.jsonl.gz"), ["jsonl.gz", "srt"])
+        assert paths["srt"] == str(tmp_path / "talk.srt")
+
+        formats.write_outputs(result, paths)
+
+        assert formats.load_result(paths["jsonl.gz"]) == result
+        assert formats.render(result, "jsonl").count("\n") == 5
@@ -0,0 +1,220 @@
+"""
+Tests for the local HTTP job service
+"""
+
+import asyncio
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from unittest.mock import Mock
+
+import pytest
+
+from benchmarks.media import make_corpus
+from benchmarks.stubs import StubProfile, install_stubs
+from src.discovery import DiscoveryRegistry
+from src.service import JobService
+from src.transcriber import VideoTranscriber
+
+
+@pytest.fixture
+def serve(tmp_path, monkeypatch):
+    """Start a service against stub executables; returns (service, base URL)"""
+    monkeypatch.setenv("PATH", os.environ["PATH"])
+    paths = install_stubs(str(tmp_path / "bin"))
+    model = tmp_path / "ggml-test.bin"
+    model.write_bytes(b"model")
+    (tmp_path / "models").mkdir()
+    (tmp_path / "models" / "ggml-custom.bin").write_bytes(b"model")
+    make_corpus(str(tmp_path / "input"), 2, seconds=2.0)
+    services = []
+
+    def start(profile=StubProfile(), workers=1, queue_size=4):
+        for name, value in profile.env().items():
+            monkeypatch.setenv(name, value)
+        transcriber = VideoTranscriber(
+            whisper_path=paths["whisper"], temp_dir=str(tmp_path / "temp"), quiet=True,
+            registry=DiscoveryRegistry(str(tmp_path / "discovery.json")))
+        service = JobService(transcriber, input_dir=str(tmp_path / "input"),
+                             output_dir=str(tmp_path / "output"),
+                             model_name_or_path=str(model), output_format="srt,txt",
+                             workers=workers, queue_size=queue_size,
+                             model_dirs=[str(tmp_path / "models")])
+        service.start()
+        services.append(service)
+        return service, f"http://127.0.0.1:{service.serve(0)}"
+
+    yield start
+    for service in services:
+        service.close()
+
+
+def request(url, method="GET", body=None, content_type="application/json"):
+    """Return (status, parsed JSON or raw bytes, headers)"""
+    data = json.dumps(body).encode() if isinstance(body, dict) else body
+    req = urllib.request.Request(url, data=data, method=method)
+    if data is not None:
+        req.add_header("Content-Type", content_type)
+    try:
+        with urllib.request.urlopen(req, timeout=10) as response:
+            status, raw, headers = response.status, response.read(), response.headers
+    except urllib.error.HTTPError as e:
+        status, raw, headers = e.code, e.read(), e.headers
+    if headers.get("Content-Type") == "application/json":
+        return status, json.loads(raw), headers
+    return status, raw, headers
+
+
+def wait_for_status(url, statuses, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        _, job, _ = request(url)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job did not reach {statuses}: {job}")
+
+
+class TestJobService:
+    """Test cases for submitting, querying and cancelling jobs over HTTP"""
+
+    def test_path_job_and_result(self, serve):
+        service, base = serve()
+
+        status, job, headers = request(f"{base}/jobs", "POST", {"path": "clip_000.mp4"})
+        assert status == 202
+        assert headers["Location"] == f"/jobs/{job['id']}"
+
+        job = wait_for_status(f"{base}/jobs/{job['id']}", {"done", "failed"})
+        assert job["status"] == "done", job["error"]
+        assert job["segments"] == 1
+        status, srt, headers = request(f"{base}/jobs/{job['id']}/result")
+        assert status == 200 and b"-->" in srt
+        status, txt, _ = request(f"{base}/jobs/{job['id']}/result?format=txt")
+        assert b"word0" in txt and b"-->" not in txt
+
+        _, health, _ = request(f"{base}/health")
+        assert (health["queue_depth"], health["running"], health["workers"]) == (0, 0, 1)
+
+    def test_upload_job(self, tmp_path, serve):
+        service, base = serve()
+        media = (tmp_path / "input" / "clip_001.mp4").read_bytes()
+
+        status, job, _ = request(f"{base}/jobs?filename=talk.mp4&formats=vtt", "POST",
+                                 media, content_type="video/mp4")
+        assert status == 202 and job["formats"] == ["vtt"]
+
+        job = wait_for_status(f"{base}/jobs/{job['id']}", {"done", "failed"})
+        assert job["status"] == "done", job["error"]
+        assert job["outputs"][0].endswith(os.path.join(job["id"], "talk_transcript.vtt"))
+        assert os.listdir(service.upload_dir) == []
+
+    def test_full_queue_and_cancel(self, serve):
+        """One running and one waiting job fill a queue of one; cancel kills the runner"""
+        service, base = serve(StubProfile(whisper_latency=60), queue_size=1)
+
+        _, running, _ = request(f"{base}/jobs", "POST", {"path": "clip_000.mp4"})
+        wait_for_status(f"{base}/jobs/{running['id']}", {"running"})
+        status, waiting, _ = request(f"{base}/jobs", "POST", {"path": "clip_001.mp4"})
+        assert (status, waiting["queue_depth"]) == (202, 1)
+
+        status, body, headers = request(f"{base}/jobs", "POST", {"path": "clip_001.mp4"})
+        assert status == 429
+        assert body["queue_depth"] == 1 and "Retry-After" in headers
+
+        started = time.monotonic()
+        status, job, _ = request(f"{base}/jobs/{waiting['id']}", "DELETE")
+        assert (status, job["status"]) == (200, "cancelled")
+        status, job, _ = request(f"{base}/jobs/{running['id']}", "DELETE")
+        assert (status, job["status"]) == (200, "cancelled")
+        assert time.monotonic() - started < 10
+        assert service.transcriber.scratch.reserved_bytes == 0
+
+        status, body, _ = request(f"{base}/jobs/{running['id']}/result")
+        assert status == 409
+
+    def test_rejected_requests(self, serve):
+        service, base = serve()
+
+        assert request(f"{base}/jobs", "POST", {"path": "../secret.mp4"})[0] == 403
+        assert request(f"{base}/jobs", "POST", {"path": "missing.mp4"})[0] == 404
+        assert request(f"{base}/jobs", "POST", {"path": "clip_000.mp4",
+                                                "model": "huge"})[0] == 400
+        assert request(f"{base}/jobs", "POST", {"path": "clip_000.mp4",
+                                                "model": "/etc/passwd"})[0] == 400
+        assert request(f"{base}/jobs", "POST", {"path": "clip_000.mp4",
+                                                "model": "../ggml-test.bin"})[0] == 400
+        assert request(f"{base}/jobs", "POST", {"path": ["clip_000.mp4"]})[0] == 400
+        assert request(f"{base}/jobs", "POST", {"path": "clip_000.mp4",
+                                                "formats": [1]})[0] == 400
+        assert request(f"{base}/jobs?filename=notes.md", "POST", b"x",
+                       content_type="text/plain")[0] == 400
+        assert request(f"{base}/jobs/nope")[0] == 404
+        assert service.jobs() == []
+
+    def test_models_from_model_directories(self, tmp_path, serve):
+        """Model files are accepted by name or path inside the model directories"""
+        service, _ = serve()
+        custom = str(tmp_path / "models" / "ggml-custom.bin")
+
+        assert service.resolve_model("ggml-custom.bin") == custom
+        assert service.resolve_model(custom) == custom
+        assert service.resolve_model(None) == service.model_name_or_path
+
+    def test_catalogue_models_must_be_installed(self, tmp_path, serve, monkeypatch):
+        """A model name is never downloaded on a client's behalf"""
+        service, base = serve()
+        registry = service.transcriber.registry
+        monkeypatch.setattr(registry, "find_model", lambda name: None)
+        monkeypatch.setattr(service.transcriber, "_download_model", Mock())
+
+        status, body, _ = request(f"{base}/jobs", "POST", {"path": "clip_000.mp4",
+                                                           "model": "base"})
+        assert (status, body["error"]) == (400, "Model base is not installed")
+        service.transcriber._download_model.assert_not_called()
+
+        installed = tmp_path / "models" / "ggml-base.bin"
+        installed.write_bytes(b"model")
+        monkeypatch.setattr(registry, "find_model", lambda name: str(installed))
+        assert service.resolve_model("base") == str(installed)
+
+    def test_input_directory_is_not_a_model_directory(self, tmp_path, monkeypatch):
+        """Media under the input directory can't be picked as a model"""
+        monkeypatch.setattr("src.service.model_directories",
+                            lambda: [str(tmp_path / "input"), str(tmp_path / "models")])
+        make_corpus(str(tmp_path / "input"), 1, seconds=1.0)
+        transcriber = Mock(temp_dir=str(tmp_path / "temp"), scheduler=None)
+        service = JobService(transcriber, input_dir=str(tmp_path / "input"),
+                             output_dir=str(tmp_path / "output"))
+
+        assert service.model_dirs == [str(tmp_path / "models")]
+        with pytest.raises(ValueError):
+            service.resolve_model("clip_000.mp4")
+        with pytest.raises(ValueError):
+            service.resolve_model(str(tmp_path / "input" / "clip_000.mp4"))
+        service.close()
+
+    def test_removed_transcript_and_slow_cancel(self, serve, monkeypatch):
+        """A deleted transcript is 410 and a cancel that outlasts its timeout is 504"""
+        service, base = serve()
+        _, job, _ = request(f"{base}/jobs", "POST", {"path": "clip_000.mp4"})
+        job = wait_for_status(f"{base}/jobs/{job['id']}", {"done"})
+        os.remove(job["outputs"][0])
+        assert request(f"{base}/jobs/{job['id']}/result")[0] == 410
+
+        service, base = serve(StubProfile(whisper_latency=60))
+        _, job, _ = request(f"{base}/jobs", "POST", {"path": "clip_000.mp4"})
+        wait_for_status(f"{base}/jobs/{job['id']}", {"running"})
+
+        async def slow_cancel(task):
+            await asyncio.sleep(1)
+            await JobService._cancel_task(task)
+        monkeypatch.setattr(service, "_cancel_task", slow_cancel)
+        cancel = service.cancel
+        monkeypatch.setattr(service, "cancel", lambda job_id: cancel(job_id, timeout=0.1))
+        status, body, _ = request(f"{base}/jobs/{job['id']}", "DELETE")
+        assert status == 504
+        assert body["job"]["id"] == job["id"]
+        wait_for_status(f"{base}/jobs/{job['id']}", {"cancelled"})
@@ -0,0 +1,131 @@
+"""
+Tests for streaming FFmpeg output into Whisper.cpp
+"""
+
+import os
+import stat
+import sys
+
+import pytest
+
+from src.scratch import ScratchManager
+from src.transcriber import VideoTranscriber
+
+
+FAKE_FFMPEG = """\
+import sys
+if sys.argv[1] == "-version":
+    sys.exit(0)
+out = sys.argv[-1]
+data = b"RIFF" + b"\\0" * 3196
+if out == "-":
+    sys.stdout.buffer.write(data)
+else:
+    open(out, "wb").write(data)
+"""
+
+# Whisper.cpp stand-in: echoes how many bytes of audio it received.
+FAKE_WHISPER = """\
+import json
+import sys
+args = sys.argv[1:]
+src = args[args.index("-f") + 1]
+if src == "-" and {reject_stdin}:
+    sys.stderr.write("error: failed to open '-'\\n")
+    sys.exit(1)
+data = sys.stdin.buffer.read() if src == "-" else open(src, "rb").read()
+prefix = args[args.index("-of") + 1]
+text = "source=%s bytes=%d" % (src, len(data))
+json.dump({{"transcription": [{{"offsets": {{"from": 0, "to": 1000}}, "text": text}}]}},
+          open(prefix + ".json", "w"))
+"""
+
+
+def _write_script(path, body):
+    path.write_text("#!{}\n{}".format(sys.executable, body))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+@pytest.fixture
+def stub_bin(tmp_path, monkeypatch):
+    """Put a fake ffmpeg on PATH and return a factory for fake whisper builds"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    _write_script(bin_dir / "ffmpeg", FAKE_FFMPEG)
+    monkeypatch.setenv("PATH", "{}{}{}".format(bin_dir, os.pathsep, os.environ["PATH"]))
+
+    (tmp_path / "ggml-test.bin").write_bytes(b"model")
+
+    def make_whisper(reject_stdin=False):
+        return _write_script(bin_dir / "whisper-cli",
+                             FAKE_WHISPER.format(reject_stdin=reject_stdin))
+    return make_whisper
+
+
+class TestStreaming:
+    """Test cases for the FFmpeg -> Whisper.cpp pipe"""
+
+    def test_stream_writes_no_temp_audio(self, tmp_path, stub_bin):
+        """Audio goes through the pipe and no WAV lands in temp_dir"""
+        temp_dir = tmp_path / "temp"
+        temp_dir.mkdir()
+        video = tmp_path / "talk.mp4"
+        video.write_bytes(b"video")
+        transcriber = VideoTranscriber(whisper_path=stub_bin(), temp_dir=str(temp_dir),
+                                       quiet=True)
+
+        output = transcriber.transcribe_video(str(video), str(tmp_path / "ggml-test.bin"),
+                                              output_path=str(tmp_path / "out.txt"),
+                                              show_progress=False, stream=True)
+
+        assert open(output).read() == "source=- bytes=3200\n"
+        assert os.listdir(temp_dir) == []
+
+    def test_falls_back_to_temp_file(self, tmp_path, stub_bin):
+        """Builds that can't read stdin fall back to the temp WAV path"""
+        video = tmp_path / "talk.mp4"
+        video.write_bytes(b"video")
+        transcriber = VideoTranscriber(whisper_path=stub_bin(reject_stdin=True),
+                                       temp_dir=str(tmp_path), quiet=True,
+                                       scratch=ScratchManager(str(tmp_path), ram_dir=""))
+
+        output = transcriber.transcribe_video(str(video), str(tmp_path / "ggml-test.bin"),
+                                              output_path=str(tmp_path / "out.txt"),
+                                              show_progress=False, stream=True)
+
+        assert open(output).read().startswith("source={}".format(tmp_path))
+        assert transcriber._stream_supported is False
+        assert not os.path.exists(tmp_path / "talk_audio.wav")
+
+    def test_stream_blockers(self, tmp_path, stub_bin):
+        """Options that need the extracted WAV are named instead of silently winning"""
+        from src.cache import TranscriptionCache
+        transcriber = VideoTranscriber(whisper_path=stub_bin(), temp_dir=str(tmp_path),
+                                       quiet=True)
+        assert transcriber.stream_blockers() == []
+
+        transcriber.cache = TranscriptionCache(cache_dir=str(tmp_path / "cache"))
+        transcriber.vad = True
+        assert transcriber.stream_blockers(chunk_length=60) == ["vad", "chunk-length"]
+
+    def test_stream_uses_cache(self, tmp_path, stub_bin):
+        """Streamed results are cached by input file, so --stream works with the cache"""
+        from src.cache import TranscriptionCache
+        video = tmp_path / "talk.mp4"
+        video.write_bytes(b"video")
+        transcriber = VideoTranscriber(whisper_path=stub_bin(), temp_dir=str(tmp_path),
+                                       quiet=True,
+                                       cache=TranscriptionCache(str(tmp_path / "cache")))
+        model = str(tmp_path / "ggml-test.bin")
+        transcriber.transcribe_video(str(video), model, output_path=str(tmp_path / "a.txt"),
+                                     show_progress=False, stream=True)
+
+        # A build that can't stream would fall back to a WAV; the hit never runs it
+        stub_bin(reject_stdin=True)
+        output = transcriber.transcribe_video(str(video), model,
+                                              output_path=str(tmp_path / "b.txt"),
+                                              show_progress=False, stream=True)
+
+        assert open(output).read() == "source=- bytes=3200\n"
+        assert transcriber._stream_supported is True
@@ -0,0 +1,80 @@
+"""
+Tests for lazy, plain and quiet console output
+"""
+
+import subprocess
+import sys
+
+from click.testing import CliRunner
+
+from src import ui
+from src.transcriber import cli
+
+
+def _modules_after(code):
+    """Names of rich modules loaded by running ``code`` in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", code + "\nimport sys\n"
+         "sys.stderr.write(' '.join(m for m in sys.modules"
+         " if m.split('.')[0] in ('rich', 'tqdm')))"],
+        capture_output=True, text=True, check=True
+    )
+    return result.stderr.split()
+
+
+class TestLazyImports:
+    """Test cases for start-up imports"""
+
+    def test_import_does_not_load_rich(self):
+        """Importing the CLI module leaves rich and tqdm unloaded"""
+        assert _modules_after("import src.transcriber") == []
+
+    def test_plain_models_never_loads_rich(self):
+        """--plain output is produced without rich"""
+        code = ("from src.transcriber import cli\n"
+                "try:\n"
+                "    cli(['--plain', 'models'])\n"
+                "except SystemExit:\n"
+                "    pass")
+        assert _modules_after(code) == []
+
+    def test_plain_search_never_loads_rich(self, tmp_path):
+        """--plain search results are printed without rich"""
+        code = ("from src.transcriber import cli\n"
+                "try:\n"
+                "    cli(['--plain', 'search', 'hello', '--index-file', {!r}])\n"
+                "except SystemExit:\n"
+                "    pass").format(str(tmp_path / "search.sqlite3"))
+        assert _modules_after(code) == []
+
+
+class TestPlainOutput:
+    """Test cases for plain and quiet modes"""
+
+    def teardown_method(self):
+        ui.configure(plain=False, quiet=False)
+
+    def test_plain_console_strips_markup(self, capsys):
+        """Style tags go, bracketed timestamps stay"""
+        ui.PlainConsole().print("[green]✓ done[/green] [00:00:01.000 --> 00:00:02.000]")
+        assert capsys.readouterr().out == "✓ done [00:00:01.000 --> 00:00:02.000]\n"
+
+    def test_quiet_keeps_errors_on_stderr(self, capsys):
+        """Quiet mode drops progress chatter but still reports errors"""
+        console = ui.PlainConsole(quiet=True, keep_errors=True)
+        console.print("[blue]Extracting audio...[/blue]")
+        console.print("\n[red]Error: boom[/red]")
+
+        captured = capsys.readouterr()
+        assert captured.out == ""
+        assert captured.err == "\nError: boom\n"
+
+    def test_plain_models_table(self):
+        """The models table prints as tab-separated rows"""
+        result = CliRunner().invoke(cli, ["--plain", "models"])
+
+        assert result.exit_code == 0
+        lines = result.output.splitlines()
+        assert lines[0] == "Available Whisper Models"
+        assert lines[1].split("\t")[:2] == ["Model", "Status"]
+        assert "\x1b[" not in result.output
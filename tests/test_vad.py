@@ -0,0 +1,135 @@
+"""
+Tests for voice activity detection
+"""
+
+import os
+import wave
+from unittest.mock import Mock
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.metrics import FileMetrics
+from src.transcriber import VideoTranscriber
+from src.vad import SpeechMap, detect_speech, remap_result, write_speech_audio
+
+RATE = 16000
+
+
+@pytest.fixture
+def lecture(tmp_path, write_wav, speechlike):
+    """Silence, speech (5-13s), hiss, music, speech (24-30s), silence: 34s."""
+    rng = np.random.default_rng(1)
+    t = np.arange(6 * RATE) / RATE
+    chord = sum(np.sin(2 * np.pi * f * t) for f in (220, 277, 330)) * 0.1
+    samples = np.concatenate([
+        rng.normal(0, 0.001, 5 * RATE),
+        speechlike(8, seed=2),
+        rng.normal(0, 0.05, 5 * RATE),
+        chord,
+        speechlike(6, seed=3),
+        rng.normal(0, 0.001, 4 * RATE),
+    ])
+    return write_wav(tmp_path / "lecture_audio.wav", samples)
+
+
+class TestDetectSpeech:
+    """Test cases for detect_speech"""
+
+    def test_finds_speech_and_skips_the_rest(self, lecture):
+        """Silence, hiss and music are skipped; both talks are kept"""
+        speech = detect_speech(lecture)
+
+        assert speech.duration == pytest.approx(34.0)
+        assert len(speech.spans) == 2
+        (first_start, first_end), (second_start, second_end) = speech.spans
+        assert first_start == pytest.approx(5.0, abs=0.5)
+        assert first_end == pytest.approx(13.0, abs=0.5)
+        assert second_start == pytest.approx(24.0, abs=0.6)
+        assert second_end == pytest.approx(30.0, abs=0.5)
+        assert speech.skipped_seconds > 15
+
+    def test_block_size_does_not_change_spans(self, lecture, monkeypatch):
+        """Reading in small blocks finds the same spans as one big block"""
+        whole = detect_speech(lecture)
+        monkeypatch.setattr("src.vad.BLOCK_FRAMES", 7)
+
+        assert detect_speech(lecture).spans == pytest.approx(whole.spans)
+
+    def test_silence_has_no_speech(self, tmp_path, write_wav):
+        """Digital silence yields no spans at all"""
+        speech = detect_speech(write_wav(tmp_path / "quiet.wav", np.zeros(3 * RATE)))
+
+        assert speech.spans == []
+        assert speech.skipped_seconds == pytest.approx(3.0)
+
+    def test_write_speech_audio(self, tmp_path, lecture):
+        """The speech-only file holds exactly the spans"""
+        speech = SpeechMap(spans=[(1.0, 2.5), (10.0, 11.0)], duration=34.0)
+        output = write_speech_audio(lecture, speech, str(tmp_path / "speech.wav"))
+
+        with wave.open(output, "rb") as wav:
+            assert wav.getnframes() == int(2.5 * RATE)
+
+
+class TestRemap:
+    """Test cases for mapping timestamps back to the original audio"""
+
+    def test_to_original(self):
+        """Times move by the silence cut before their span"""
+        speech = SpeechMap(spans=[(5.0, 8.0), (20.0, 22.0)], duration=30.0)
+
+        assert speech.to_original(1.0) == 6.0
+        assert speech.to_original(4.0) == 21.0
+        # On the seam a start belongs to the next span, an end to the previous
+        assert speech.to_original(3.0) == 20.0
+        assert speech.to_original(3.0, is_end=True) == 8.0
+
+    def test_remap_result(self):
+        """Segment offsets are rewritten so SRT/VTT cues line up"""
+        speech = SpeechMap(spans=[(5.0, 8.0), (20.0, 22.0)], duration=30.0)
+        result = {"transcription": [
+            {"offsets": {"from": 500, "to": 2500}, "text": " Hello"},
+            {"offsets": {"from": 3000, "to": 4500}, "text": " again"},
+        ]}
+
+        remapped = remap_result(result, speech)["transcription"]
+
+        assert [(s["offsets"]["from"], s["offsets"]["to"]) for s in remapped] == [
+            (5500, 7500), (20000, 21500)]
+        assert [s["text"].strip() for s in remapped] == ["Hello", "again"]
+
+
+class TestTranscriberVad:
+    """Test cases for VAD through the transcriber"""
+
+    def test_only_speech_is_transcribed(self, tmp_path, lecture):
+        """Whisper sees the short file, the result uses original times"""
+        transcriber = VideoTranscriber(whisper_path="whisper-cli", temp_dir=str(tmp_path),
+                                       quiet=True, vad=True)
+        seen = []
+
+        def transcribe(path):
+            with wave.open(path, "rb") as wav:
+                seen.append(wav.getnframes() / RATE)
+            return {"transcription": [{"offsets": {"from": 0, "to": 1000}, "text": " Hi"}]}
+
+        file_metrics = FileMetrics("lecture.mp4")
+        result = transcriber.transcribe_speech(lecture, transcribe, file_metrics)
+
+        assert seen[0] < 20
+        assert result["transcription"][0]["offsets"]["from"] == pytest.approx(5000, abs=500)
+        assert file_metrics.skipped_seconds > 15
+        assert file_metrics.to_dict()["skipped_seconds"] > 15
+        assert not [name for name in os.listdir(tmp_path) if "_speech" in name]
+
+    def test_disabled_passes_audio_through(self, tmp_path, lecture):
+        """Without VAD the original audio is transcribed"""
+        transcriber = VideoTranscriber(whisper_path="whisper-cli", temp_dir=str(tmp_path),
+                                       quiet=True)
+        transcribe = Mock(return_value={"transcription": []})
+
+        transcriber.transcribe_speech(lecture, transcribe)
+
+        transcribe.assert_called_once_with(lecture)
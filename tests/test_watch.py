@@ -0,0 +1,138 @@
+"""
+Tests for watch-folder ingestion
+"""
+
+import os
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from src.journal import BatchJournal
+from src.watch import FileStabilizer, InotifyWatcher, PollingWatcher, WatchService
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestWatchers:
+    """Test cases for change detection"""
+
+    def test_polling_reports_new_and_changed_files(self, tmp_path):
+        """Only media files that appeared or changed are reported"""
+        watcher = PollingWatcher(str(tmp_path), interval=0.01)
+        (tmp_path / "a.mp4").write_bytes(b"1")
+        (tmp_path / "notes.txt").write_bytes(b"1")
+        assert watcher.wait(0.01) == {str(tmp_path / "a.mp4")}
+        assert watcher.wait(0.01) == set()
+        (tmp_path / "a.mp4").write_bytes(b"12")
+        assert watcher.wait(0.01) == {str(tmp_path / "a.mp4")}
+
+    def test_inotify_reports_writes(self, tmp_path):
+        """Kernel events name the written file"""
+        try:
+            watcher = InotifyWatcher(str(tmp_path))
+        except (OSError, AttributeError):
+            pytest.skip("inotify not available")
+        try:
+            (tmp_path / "a.mp4").write_bytes(b"1")
+            assert str(tmp_path / "a.mp4") in watcher.wait(1.0)
+        finally:
+            watcher.close()
+
+    def test_stabilizer_waits_for_quiet_file(self, tmp_path):
+        """A growing file is held back until it stops changing"""
+        path = tmp_path / "a.mp4"
+        path.write_bytes(b"1")
+        stabilizer = FileStabilizer(settle=0.2)
+        stabilizer.observe(str(path))
+        assert stabilizer.ready() == set()
+        time.sleep(0.1)
+        path.write_bytes(b"12")
+        assert stabilizer.ready() == set()
+        time.sleep(0.25)
+        assert stabilizer.ready() == {str(path)}
+        assert len(stabilizer) == 0
+
+
+class TestWatchService:
+    """Test cases for WatchService"""
+
+    def _transcriber(self):
+        transcriber = Mock()
+        transcriber._resolve_model_path.return_value = "model.bin"
+
+        def transcribe_video(video_path, output_path, **kwargs):
+            with open(output_path, "w") as f:
+                f.write("text")
+            return output_path
+
+        transcriber.transcribe_video.side_effect = transcribe_video
+        return transcriber
+
+    def test_transcribes_new_files_once(self, tmp_path):
+        """Existing and newly dropped files are transcribed exactly once"""
+        input_dir = tmp_path / "in"
+        input_dir.mkdir()
+        (input_dir / "old.mp4").write_bytes(b"old")
+        journal = BatchJournal(str(tmp_path / "journal.sqlite3"))
+        journal.begin({}, resume=True)
+        transcriber = self._transcriber()
+        results = []
+        service = WatchService(transcriber, str(input_dir), str(tmp_path / "out"),
+                               "base", settle=0.1, polling=True, poll_interval=0.05,
+                               journal=journal, on_result=results.append)
+
+        stop = threading.Event()
+        thread = threading.Thread(target=service.run, args=(stop,))
+        thread.start()
+        try:
+            assert _wait_for(lambda: len(results) == 1)
+            (input_dir / "new.mp4").write_bytes(b"new")
+            assert _wait_for(lambda: len(results) == 2)
+            time.sleep(0.3)
+        finally:
+            stop.set()
+            thread.join()
+            journal.close()
+
+        names = sorted(os.path.basename(r.input_path) for r in results)
+        assert names == ["new.mp4", "old.mp4"]
+        assert transcriber.transcribe_video.call_count == 2
+        assert os.path.exists(tmp_path / "out" / "new_transcript.txt")
+
+    def test_same_stem_gets_distinct_output(self, tmp_path):
+        """A later file with a taken stem keeps its extension"""
+        (tmp_path / "in").mkdir()
+        service = WatchService(self._transcriber(), str(tmp_path / "in"),
+                               str(tmp_path / "out"), "base", polling=True)
+        first = service.output_path_for("in/intro.mp4")
+        second = service.output_path_for("in/intro.mov")
+        assert first.endswith("intro_transcript.txt")
+        assert second.endswith("intro_mov_transcript.txt")
+        assert service.output_path_for("in/intro.mp4") == first
+
+    def test_names_survive_restart(self, tmp_path):
+        """A newcomer never takes the transcript name of a file finished in an earlier run"""
+        (tmp_path / "in").mkdir()
+        out = str(tmp_path / "out")
+        (tmp_path / "out").mkdir()
+        (tmp_path / "out" / "intro_mov_transcript.txt").write_text("unknown origin")
+        journal = BatchJournal(str(tmp_path / "journal.sqlite3"))
+        journal.begin({}, resume=True)
+        try:
+            journal.start("in/intro.mp4", os.path.join(out, "intro_transcript.txt"))
+
+            service = WatchService(self._transcriber(), str(tmp_path / "in"), out, "base",
+                                   polling=True, journal=journal)
+            assert service.output_path_for("in/intro.mov").endswith("intro_mov_2_transcript.txt")
+            assert service.output_path_for("in/intro.mp4").endswith("intro_transcript.txt")
+        finally:
+            journal.close()